@@ -3,13 +3,16 @@ AI 챗봇 서비스 - 원본 프로젝트 기반 간소화 버전
 """
 import os
 import logging
+import pickle
+import threading
 import time
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.utils import timezone
 from django.core.cache import cache
 import openai
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 import json
 from datetime import datetime, timedelta, date
 import hashlib
@@ -25,6 +28,16 @@ except ImportError:
     VECTORSTORE_AVAILABLE = False
 import numpy as np
 
+from .services.keyword_matcher import CATEGORY_KEYWORDS, QueryAnalysis, analyze_query, simple_answer
+from .services.knowledge_retriever import (
+    DEFAULT_KNOWLEDGE_DOCUMENTS, SEMANTIC_MIN_SCORE, get_knowledge_retriever
+)
+from .services.meal_optimizer import local_day_plan, local_meal_plan_enabled
+from .services.model_router import acomplete, astream_complete, complete, get_model_router, stream_complete
+from .services.recommendation_cache import get_recommendation_cache
+from .services.semantic_cache import BMI_BAND_LABELS, get_semantic_cache, profile_fingerprint
+from .services.text_embedding import LangchainEmbedder, get_default_embedder
+
 class HealthAIChatbot:
     """헬스케어 AI 챗봇 - Railway 배포용 경량화 버전"""
     
@@ -32,6 +45,15 @@ class HealthAIChatbot:
     _embeddings = None
     _vectorstore = None
     
+    # 워밍업 상태 (idle → loading → ready/failed, 라이브러리 없으면 unavailable)
+    _warmup_lock = threading.Lock()
+    _warmup_thread = None
+    _warmup_state = 'idle'
+    _warmup_error = None
+    _warmup_seconds = None
+    _warmup_failed_at = None
+    _vectorstore_mmap = False
+    
     def __init__(self):
         try:
             api_key = settings.OPENAI_API_KEY
@@ -58,6 +80,12 @@ class HealthAIChatbot:
                     timeout=15.0,  # 타임아웃 15초로 단축
                     max_retries=1  # 재시도 횟수 설정
                 )
+                # ASGI 비동기 뷰용 클라이언트 (느린 호출이 스레드 대신 코루틴만 점유)
+                self.async_client = AsyncOpenAI(
+                    api_key=api_key,
+                    timeout=15.0,
+                    max_retries=1
+                )
                 
                 # 연결 테스트는 첫 실제 요청 시 수행하도록 변경
                 logger.info("OpenAI client initialized (connection test skipped for faster startup)")
@@ -67,17 +95,16 @@ class HealthAIChatbot:
                 logger.error(f"OpenAI initialization failed: {str(e)}")
                 # 폴백 모드 설정
                 self.client = None
+                self.async_client = None
                 self.fallback_mode = True
             
             # 캐시 설정
-            self.cache_timeout = 3600  # 1시간
+            self.cache_timeout = getattr(settings, 'CHATBOT_SEMANTIC_CACHE_TTL', 3600)  # 1시간
+            self.cache_enabled = getattr(settings, 'CHATBOT_SEMANTIC_CACHE_ENABLED', True)
+            self.semantic_cache = get_semantic_cache()
             
-            # 카테고리 키워드 정의
-            self.category_keywords = {
-                'exercise': ['운동', '스쿼트', '푸시업', '플랭크', '런닝', '요가', '필라테스', '근육', '체력', '트레이닝'],
-                'nutrition': ['영양', '단백질', '탄수화물', '지방', '비타민', '칼로리', '식단', '음식', '다이어트', '식품'],
-                'health': ['건강', '질병', '증상', '치료', '예방', '면역', '스트레스', '수면', '정신건강', '의학']
-            }
+            # 카테고리 키워드 정의 (매칭은 임포트 시 컴파일된 QUERY_MATCHER 사용)
+            self.category_keywords = CATEGORY_KEYWORDS
             
             # 벡터스토어 초기화는 첫 사용 시 수행 (lazy loading)
             logger.info("Vectorstore initialization deferred for faster startup")
@@ -88,18 +115,91 @@ class HealthAIChatbot:
             logger.error(f"HealthAIChatbot initialization failed: {str(e)}")
             raise
     
+    @classmethod
+    def warm_up(cls) -> bool:
+        """
+        임베딩 모델과 벡터스토어를 한 번만 로드 (워커 부팅 시 또는 warm_chatbot 명령)
+        
+        동시에 여러 스레드가 호출해도 락으로 직렬화되어 모델은 한 번만 로드됩니다.
+        """
+        if not VECTORSTORE_AVAILABLE:
+            cls._warmup_state = 'unavailable'
+            return False
+        
+        with cls._warmup_lock:
+            if cls._warmup_state == 'ready':
+                return True
+            
+            cls._warmup_state = 'loading'
+            start_time = time.time()
+            cls._initialize_vectorstore()
+            cls._warmup_seconds = round(time.time() - start_time, 3)
+            
+            if cls._vectorstore is not None:
+                cls._warmup_state = 'ready'
+                cls._warmup_error = None
+                cls._warmup_failed_at = None
+            else:
+                cls._warmup_state = 'failed'
+                cls._warmup_failed_at = time.time()
+            logger.info(f"Chatbot warm-up finished: {cls._warmup_state} ({cls._warmup_seconds}s)")
+            return cls._warmup_state == 'ready'
+    
+    @classmethod
+    def start_background_warm_up(cls):
+        """
+        백그라운드 스레드에서 워밍업 시작 (이미 진행 중/완료면 무시)
+
+        실패한 뒤에는 CHATBOT_WARMUP_RETRY_SECONDS 동안 다시 시도하지 않습니다
+        (요청마다 모델 로드를 재시도하지 않도록).
+        """
+        if not VECTORSTORE_AVAILABLE or cls._warmup_state in ('ready', 'unavailable'):
+            return
+        if cls._warmup_state == 'failed' and cls._warmup_failed_at is not None:
+            if time.time() - cls._warmup_failed_at < getattr(settings, 'CHATBOT_WARMUP_RETRY_SECONDS', 300):
+                return
+        if cls._warmup_thread and cls._warmup_thread.is_alive():
+            return
+        cls._warmup_thread = threading.Thread(target=cls.warm_up, name='chatbot-warm-up', daemon=True)
+        cls._warmup_thread.start()
+    
+    @classmethod
+    def readiness(cls) -> Dict:
+        """헬스체크용 준비 상태"""
+        if not VECTORSTORE_AVAILABLE:
+            cls._warmup_state = 'unavailable'
+        return {
+            'ready': cls._warmup_state in ('ready', 'unavailable'),
+            'state': cls._warmup_state,
+            'vectorstore_available': VECTORSTORE_AVAILABLE,
+            'vectors': cls._vectorstore.index.ntotal if cls._vectorstore is not None else 0,
+            'mmap': cls._vectorstore_mmap,
+            'load_seconds': cls._warmup_seconds,
+            'error': cls._warmup_error,
+            'retry_after': cls._warmup_retry_after(),
+        }
+    
+    @classmethod
+    def _warmup_retry_after(cls) -> Optional[float]:
+        """실패 후 다음 백그라운드 재시도까지 남은 시간 (초)"""
+        if cls._warmup_state != 'failed' or cls._warmup_failed_at is None:
+            return None
+        remaining = cls._warmup_failed_at + getattr(settings, 'CHATBOT_WARMUP_RETRY_SECONDS', 300) - time.time()
+        return round(max(remaining, 0.0), 1)
+    
     @classmethod
     def _initialize_vectorstore(cls):
-        """벡터스토어 초기화 - 한 번만 실행"""
+        """벡터스토어 초기화 - warm_up에서 락을 잡고 한 번만 실행"""
         try:
             logger.info("Initializing vectorstore...")
             
             # HuggingFace 임베딩 모델 (무료)
-            cls._embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
-                model_kwargs={"device": "cpu"},  # Railway는 CPU 사용
-                encode_kwargs={'normalize_embeddings': True}
-            )
+            if cls._embeddings is None:
+                cls._embeddings = HuggingFaceEmbeddings(
+                    model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+                    model_kwargs={"device": "cpu"},  # Railway는 CPU 사용
+                    encode_kwargs={'normalize_embeddings': True}
+                )
             
             # 벡터스토어 경로 확인
             vectorstore_path = os.path.join(settings.BASE_DIR, "vectorstore")
@@ -108,50 +208,71 @@ class HealthAIChatbot:
             if not os.path.exists(vectorstore_path):
                 logger.info("Creating new vectorstore with default data...")
                 cls._create_default_vectorstore(vectorstore_path)
+                # 저장된 파일을 다시 매핑해 빌드 시 만든 힙 사본을 해제
+                if cls._vectorstore is not None:
+                    cls._vectorstore = cls._load_vectorstore_mmap(vectorstore_path)
             else:
-                # 기존 벡터스토어 로드
-                cls._vectorstore = FAISS.load_local(
-                    vectorstore_path, 
-                    cls._embeddings,
-                    allow_dangerous_deserialization=True
-                )
-                logger.info(f"Loaded vectorstore with {cls._vectorstore.index.ntotal} vectors")
+                # 기존 벡터스토어 로드 (메모리 매핑 우선)
+                cls._vectorstore = cls._load_vectorstore_mmap(vectorstore_path)
+                logger.info(f"Loaded vectorstore with {cls._vectorstore.index.ntotal} vectors (mmap={cls._vectorstore_mmap})")
                 
         except Exception as e:
             logger.error(f"Vectorstore initialization failed: {str(e)}")
+            cls._warmup_error = str(e)
             cls._vectorstore = None
     
+    @classmethod
+    def _load_vectorstore_mmap(cls, path: str):
+        """
+        FAISS 인덱스를 메모리 매핑으로 로드
+        
+        인덱스 파일 페이지가 OS 페이지 캐시를 통해 워커 간에 공유되므로
+        워커 수만큼 RSS가 늘어나지 않습니다. 지원하지 않는 인덱스면 일반 로드로 폴백합니다.
+        IO_FLAG_MMAP은 IVF 역색인 목록에만 적용되고 Flat 인덱스는 읽기에 성공해도 힙에 복사되므로,
+        _vectorstore_mmap에는 실제로 매핑된 경우만 기록합니다.
+        """
+        try:
+            import faiss
+            
+            index = faiss.read_index(os.path.join(path, "index.faiss"), faiss.IO_FLAG_MMAP)
+            with open(os.path.join(path, "index.pkl"), "rb") as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+            
+            cls._vectorstore_mmap = cls._is_memory_mapped(faiss, index)
+            if not cls._vectorstore_mmap:
+                logger.info(f"FAISS index {type(index).__name__} is not memory-mappable; loaded into process memory")
+            return FAISS(cls._embeddings, index, docstore, index_to_docstore_id)
+        except Exception as e:
+            logger.warning(f"Memory-mapped FAISS load failed, falling back to load_local: {str(e)}")
+            cls._vectorstore_mmap = False
+            return FAISS.load_local(
+                path, 
+                cls._embeddings,
+                allow_dangerous_deserialization=True
+            )
+    
+    @staticmethod
+    def _is_memory_mapped(faiss, index) -> bool:
+        """역색인 목록이 파일 매핑(OnDiskInvertedLists)인 IVF 인덱스인지"""
+        try:
+            ivf = faiss.extract_index_ivf(index)
+            return isinstance(faiss.downcast_InvertedLists(ivf.invlists), faiss.OnDiskInvertedLists)
+        except Exception:
+            # IVF가 아닌 인덱스 (IndexFlat 등)
+            return False
+    
     @classmethod
     def _create_default_vectorstore(cls, path: str):
         """기본 헬스/운동 지식으로 벡터스토어 생성"""
         try:
-            # 기본 운동 지식
-            default_docs = [
-                # 운동 관련
-                "스쿼트는 하체 운동의 기본으로, 대퇴사두근, 햄스트링, 둔근을 강화합니다. 올바른 자세: 발을 어깨너비로 벌리고, 무릎이 발끝을 넘지 않도록 주의하며 엉덩이를 뒤로 빼면서 앉습니다.",
-                "푸시업은 가슴, 어깨, 삼두근을 강화하는 상체 운동입니다. 초보자는 무릎을 대고 시작하며, 점진적으로 표준 푸시업으로 발전시킵니다.",
-                "플랭크는 코어 강화에 효과적입니다. 팔꿈치를 90도로 굽히고 전완을 바닥에 대고, 몸을 일직선으로 유지합니다. 30초부터 시작해 점진적으로 시간을 늘립니다.",
-                
-                # 영양 관련
-                "단백질은 근육 성장과 회복에 필수적입니다. 체중 1kg당 0.8-2g의 단백질 섭취를 권장합니다. 운동 후 30분 이내 섭취가 효과적입니다.",
-                "탄수화물은 운동 에너지원입니다. 운동 전 1-2시간 전에 복합 탄수화물을 섭취하면 지속적인 에너지를 얻을 수 있습니다.",
-                "수분 섭취는 운동 성능에 중요합니다. 운동 전 500ml, 운동 중 15-20분마다 150-250ml, 운동 후 체중 감소량의 150%를 섭취합니다.",
-                
-                # 건강 관련
-                "규칙적인 운동은 심혈관 건강을 개선하고, 당뇨병 위험을 감소시키며, 정신 건강에도 도움이 됩니다. 주 150분 이상의 중강도 운동을 권장합니다.",
-                "충분한 수면은 근육 회복과 성장에 필수적입니다. 성인은 7-9시간의 수면이 필요하며, 운동 후 회복을 위해 특히 중요합니다.",
-                "스트레칭은 유연성을 향상시키고 부상을 예방합니다. 운동 전 동적 스트레칭, 운동 후 정적 스트레칭을 권장합니다.",
-            ]
-            
-            # 메타데이터 추가
+            # 기본 지식 문서 (NumPy 검색기와 공용)
             documents = []
-            for i, doc in enumerate(default_docs):
-                category = 'exercise' if i < 3 else 'nutrition' if i < 6 else 'health'
+            for i, doc in enumerate(DEFAULT_KNOWLEDGE_DOCUMENTS):
                 documents.append({
-                    'page_content': doc,
+                    'page_content': doc['content'],
                     'metadata': {
                         'source': 'default',
-                        'category': category,
+                        'category': doc['category'],
                         'id': i
                     }
                 })
@@ -173,64 +294,166 @@ class HealthAIChatbot:
             
         except Exception as e:
             logger.error(f"Failed to create default vectorstore: {str(e)}")
+            cls._warmup_error = str(e)
             cls._vectorstore = None
     
+    @classmethod
+    def add_knowledge(cls, documents: List[Dict]) -> int:
+        """
+        지식 문서 추가 (전체 재빌드 없음)
+        
+        documents: [{'content': ..., 'category': 'exercise'|'nutrition'|'health'|'general'}, ...]
+        """
+        if VECTORSTORE_AVAILABLE:
+            cls.warm_up()
+            if cls._vectorstore is None:
+                return 0
+            with cls._warmup_lock:
+                vectorstore_path = os.path.join(settings.BASE_DIR, "vectorstore")
+                if cls._vectorstore_mmap:
+                    # 메모리 매핑 인덱스는 읽기 전용이므로 쓰기 가능한 사본으로 다시 로드
+                    cls._vectorstore = FAISS.load_local(
+                        vectorstore_path, cls._embeddings, allow_dangerous_deserialization=True
+                    )
+                    cls._vectorstore_mmap = False
+                cls._vectorstore.add_texts(
+                    texts=[doc['content'] for doc in documents],
+                    metadatas=[{'source': doc.get('source', 'custom'), 'category': doc.get('category') or 'general'}
+                               for doc in documents]
+                )
+                cls._vectorstore.save_local(vectorstore_path)
+            return len(documents)
+        
+        return get_knowledge_retriever().add_documents(documents)
+    
     def get_response(self, user_id: str, username: str, question: str, session_data: Dict = None) -> Dict:
         """사용자 질문에 대한 응답 생성"""
         start_time = time.time()
         
         try:
-            # 1. 간단한 인사 처리
-            simple_response = self._check_simple_questions(question)
-            if simple_response:
-                return {
-                    'success': True,
-                    'response': simple_response,
-                    'response_time': time.time() - start_time,
-                    'cached': True
-                }
-            
-            # 2. 카테고리 분류
-            category = self._classify_query(question)
-            
-            # 3. 벡터스토어에서 관련 지식 검색
-            relevant_knowledge = []
-            if VECTORSTORE_AVAILABLE and self._vectorstore and category:
-                relevant_knowledge = self._search_knowledge(question, category)
-            
-            # 4. 시스템 프롬프트 생성
-            system_prompt = self._create_system_prompt(username, session_data or {}, relevant_knowledge)
+            prepared = self._prepare_response(username, question, session_data)
+            if prepared['result']:
+                prepared['result']['response_time'] = time.time() - start_time
+                return prepared['result']
+            
+            # LLM 호출 (모델은 라우터가 지연 예산 기준으로 선택, 지연/토큰 기록)
+            # 공급자 서킷이 열려 있으면 즉시 실패해 아래 폴백 응답 반환, 느리면 다른 공급자로 헤징
+            result = complete(
+                prepared['endpoint'], prepared['messages'], temperature=0.7, max_tokens=500,
+                model=prepared['model'], openai_client=self.client
+            )
+            answer = result.text
+            prepared['model'] = result.model  # 헤징 시 실제로 응답한 모델
+            self._store_cached_answer(prepared, username, question, answer)
             
-            # 5. 대화 컨텍스트 구성
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": question}
-            ]
+            return {
+                'success': True,
+                'response': answer,
+                'response_time': time.time() - start_time,
+                'model_used': prepared['model'],
+                'category': prepared['category'],
+                'knowledge_used': prepared['knowledge_used']
+            }
             
-            # 6. 모델 선택
-            model = self._select_model_by_complexity(question, category)
+        except Exception as e:
+            logger.error(f"Response generation failed: {str(e)}")
+            return {
+                'success': False,
+                'response': "죄송합니다. 일시적인 오류가 발생했습니다. 잠시 후 다시 시도해주세요.",
+                'error': str(e),
+                'response_time': time.time() - start_time,
+                'fallback': True
+            }
+    
+    def stream_response(self, user_id: str, username: str, question: str, session_data: Dict = None) -> Iterator[Dict]:
+        """
+        사용자 질문에 대한 스트리밍 응답 생성
+        
+        토큰이 도착할 때마다 {'type': 'token', 'content': ...} 이벤트를 내보내고,
+        마지막에 get_response와 같은 형식의 결과를 담은 {'type': 'done', ...} 이벤트를 보냅니다.
+        """
+        start_time = time.time()
+        
+        try:
+            prepared = self._prepare_response(username, question, session_data)
+            if prepared['result']:
+                # 빠른 응답/캐시 적중은 한 번에 전송
+                result = prepared['result']
+                result['response_time'] = time.time() - start_time
+                yield {'type': 'token', 'content': result['response']}
+                yield dict(result, type='done')
+                return
+            
+            chunks = []
+            first_token_time = None
+            # 라우터가 모델 선택/서킷 상태를 반영하고, 첫 토큰 전 실패는 다른 공급자로 전환 (헤징 없음)
+            for chunk in stream_complete(
+                prepared['endpoint'], prepared['messages'], temperature=0.7, max_tokens=500,
+                model=prepared['model'], openai_client=self.client
+            ):
+                if first_token_time is None:
+                    first_token_time = time.time() - start_time
+                prepared['model'] = chunk.model  # 전환 시 실제로 응답한 모델
+                chunks.append(chunk.text)
+                yield {'type': 'token', 'content': chunk.text}
+            
+            answer = ''.join(chunks)
+            self._store_cached_answer(prepared, username, question, answer)
+            
+            yield {
+                'type': 'done',
+                'success': True,
+                'response': answer,
+                'response_time': time.time() - start_time,
+                'first_token_time': first_token_time,
+                'model_used': prepared['model'],
+                'category': prepared['category'],
+                'knowledge_used': prepared['knowledge_used']
+            }
             
-            # 7. OpenAI API 호출
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=500
+        except Exception as e:
+            logger.error(f"Streaming response generation failed: {str(e)}")
+            yield {
+                'type': 'error',
+                'success': False,
+                'response': "죄송합니다. 일시적인 오류가 발생했습니다. 잠시 후 다시 시도해주세요.",
+                'error': str(e),
+                'response_time': time.time() - start_time,
+                'fallback': True
+            }
+    
+    async def aget_response(self, user_id: str, username: str, question: str, session_data: Dict = None) -> Dict:
+        """사용자 질문에 대한 응답 생성 (비동기 - ASGI 뷰용)"""
+        start_time = time.time()
+        
+        try:
+            # 분류/캐시/지식 검색은 CPU·동기 I/O 작업이므로 스레드에서 실행
+            prepared = await sync_to_async(self._prepare_response, thread_sensitive=False)(
+                username, question, session_data
             )
+            if prepared['result']:
+                prepared['result']['response_time'] = time.time() - start_time
+                return prepared['result']
             
-            answer = response.choices[0].message.content
+            result = await acomplete(
+                prepared['endpoint'], prepared['messages'], temperature=0.7, max_tokens=500,
+                model=prepared['model'], openai_client=self.async_client
+            )
+            answer = result.text
+            prepared['model'] = result.model  # 헤징 시 실제로 응답한 모델
+            self._store_cached_answer(prepared, username, question, answer)
             
             return {
                 'success': True,
                 'response': answer,
                 'response_time': time.time() - start_time,
-                'model_used': model,
-                'category': category,
-                'knowledge_used': len(relevant_knowledge)
+                'model_used': prepared['model'],
+                'category': prepared['category'],
+                'knowledge_used': prepared['knowledge_used']
             }
             
         except Exception as e:
-            logger.error(f"Response generation failed: {str(e)}")
+            logger.error(f"Async response generation failed: {str(e)}")
             return {
                 'success': False,
                 'response': "죄송합니다. 일시적인 오류가 발생했습니다. 잠시 후 다시 시도해주세요.",
@@ -239,34 +462,191 @@ class HealthAIChatbot:
                 'fallback': True
             }
     
+    async def astream_response(self, user_id: str, username: str, question: str, session_data: Dict = None) -> AsyncIterator[Dict]:
+        """사용자 질문에 대한 스트리밍 응답 생성 (비동기 - stream_response와 같은 이벤트 형식)"""
+        start_time = time.time()
+        
+        try:
+            prepared = await sync_to_async(self._prepare_response, thread_sensitive=False)(
+                username, question, session_data
+            )
+            if prepared['result']:
+                result = prepared['result']
+                result['response_time'] = time.time() - start_time
+                yield {'type': 'token', 'content': result['response']}
+                yield dict(result, type='done')
+                return
+            
+            chunks = []
+            first_token_time = None
+            async for chunk in astream_complete(
+                prepared['endpoint'], prepared['messages'], temperature=0.7, max_tokens=500,
+                model=prepared['model'], openai_client=self.async_client
+            ):
+                if first_token_time is None:
+                    first_token_time = time.time() - start_time
+                prepared['model'] = chunk.model
+                chunks.append(chunk.text)
+                yield {'type': 'token', 'content': chunk.text}
+            
+            answer = ''.join(chunks)
+            self._store_cached_answer(prepared, username, question, answer)
+            
+            yield {
+                'type': 'done',
+                'success': True,
+                'response': answer,
+                'response_time': time.time() - start_time,
+                'first_token_time': first_token_time,
+                'model_used': prepared['model'],
+                'category': prepared['category'],
+                'knowledge_used': prepared['knowledge_used']
+            }
+            
+        except Exception as e:
+            logger.error(f"Async streaming response generation failed: {str(e)}")
+            yield {
+                'type': 'error',
+                'success': False,
+                'response': "죄송합니다. 일시적인 오류가 발생했습니다. 잠시 후 다시 시도해주세요.",
+                'error': str(e),
+                'response_time': time.time() - start_time,
+                'fallback': True
+            }
+    
+    def _prepare_response(self, username: str, question: str, session_data: Dict = None) -> Dict:
+        """
+        응답 생성 준비 (get_response/stream_response 공용)
+        
+        빠른 응답이나 캐시 적중이면 'result'에 완성된 응답을 담아 반환하고,
+        아니면 LLM 호출에 필요한 메시지/모델 정보를 반환합니다.
+        """
+        prepared = {
+            'result': None,
+            'category': None,
+            'model': None,
+            'messages': None,
+            'endpoint': None,
+            'knowledge_used': 0,
+            'cache_bucket': None,
+            'query_vector': None
+        }
+        
+        # 키워드 분석은 한 번만 수행 (카테고리 점수 + 인사/감사 의도)
+        analysis = analyze_query(question)
+        
+        # 1. 간단한 인사 처리
+        simple_response = self._check_simple_questions(question, analysis)
+        if simple_response:
+            prepared['result'] = {
+                'success': True,
+                'response': simple_response,
+                'cached': True
+            }
+            return prepared
+        
+        # 2. 카테고리 분류
+        category = self._classify_query(question, analysis)
+        prepared['category'] = category
+        
+        # 3. 시맨틱 캐시 조회 (같은 의미의 질문 + 같은 프로필 구간)
+        if self.cache_enabled:
+            embedder, query_vector = self._embed_query(question)
+            cache_bucket = (embedder.name,) + profile_fingerprint(session_data, category)
+            prepared['cache_bucket'] = cache_bucket
+            prepared['query_vector'] = query_vector
+            cached = self.semantic_cache.lookup(cache_bucket, query_vector, lexical=embedder.lexical)
+            if cached:
+                payload = cached['payload']
+                prepared['result'] = {
+                    'success': True,
+                    'response': payload['response'],
+                    'model_used': payload.get('model_used'),
+                    'category': category,
+                    'cached': True,
+                    'cache_similarity': round(cached['similarity'], 3)
+                }
+                return prepared
+        
+        # 4. 벡터스토어(없으면 NumPy 검색기)에서 관련 지식 검색
+        relevant_knowledge = []
+        if category:
+            relevant_knowledge = self._search_knowledge(question, category)
+        prepared['knowledge_used'] = len(relevant_knowledge)
+        
+        # 5. 시스템 프롬프트 생성 (캐시할 답변은 버킷 값만 사용 - 다른 사용자에게 개인 정보가 노출되지 않도록)
+        system_prompt = self._create_system_prompt(
+            username, session_data or {}, relevant_knowledge, profile_bucket=prepared['cache_bucket']
+        )
+        
+        # 6. 대화 컨텍스트 구성
+        prepared['messages'] = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": question}
+        ]
+        
+        # 7. 모델 선택
+        prepared['endpoint'] = self._route_endpoint(question, category)
+        prepared['model'] = self._select_model_by_complexity(question, category)
+        
+        return prepared
+    
+    def _store_cached_answer(self, prepared: Dict, username: str, question: str, answer: str):
+        """캐시 저장 (버킷 값만 넣은 프롬프트로 생성한 답변이므로 그대로 공유 가능)"""
+        if prepared['cache_bucket'] is None or not answer:
+            return
+        self.semantic_cache.store(prepared['cache_bucket'], prepared['query_vector'], question, {
+            'response': answer,
+            'model_used': prepared['model']
+        })
+    
+    def _embed_query(self, question: str):
+        """
+        질문 임베딩 - 로컬 MiniLM (로드된 경우) > 해싱 임베딩
+
+        캐시 조회는 미스일 때도 매 요청 실행되므로 네트워크 임베딩 API는 쓰지 않습니다.
+        """
+        if HealthAIChatbot._embeddings is not None:
+            embedder = LangchainEmbedder(HealthAIChatbot._embeddings, name="paraphrase-multilingual-MiniLM-L12-v2")
+            try:
+                return embedder, embedder.embed_query(question)
+            except Exception as e:
+                logger.warning(f"Query embedding failed with {embedder.name}: {str(e)}")
+        
+        embedder = get_default_embedder()
+        return embedder, embedder.embed_query(question)
+    
     def _search_knowledge(self, query: str, category: str) -> List[Dict]:
         """벡터스토어에서 관련 지식 검색"""
         try:
             if not VECTORSTORE_AVAILABLE:
-                return []
-            
-            # 벡터스토어가 초기화되지 않았으면 초기화
-            if not self._vectorstore and not HealthAIChatbot._embeddings:
-                self._initialize_vectorstore()
+                # 경량 이미지: .npy 임베딩 행렬 기반 검색 (카테고리 필터 후 top-k)
+                return get_knowledge_retriever().search(query, k=2, category=category)
             
-            if not self._vectorstore:
+            # 워밍업 전이면 요청을 기다리게 하지 않고 백그라운드 로드만 시작
+            if HealthAIChatbot._warmup_state != 'ready':
+                HealthAIChatbot.start_background_warm_up()
                 return []
             
-            # 카테고리 기반 검색
-            docs = self._vectorstore.similarity_search_with_score(query, k=3)
+            # 카테고리 필터를 FAISS 검색 단계에 적용 (전역 top-3 후 버리는 대신 카테고리 내 top-k)
+            query_vector = HealthAIChatbot._embeddings.embed_query(query)
+            fetch_k = min(self._vectorstore.index.ntotal, getattr(settings, 'KNOWLEDGE_FETCH_K', 200))
+            candidates = []
+            for doc_category in dict.fromkeys([category, 'general']):
+                candidates.extend(self._vectorstore.similarity_search_with_score_by_vector(
+                    query_vector, k=2, filter={'category': doc_category}, fetch_k=fetch_k
+                ))
             
             relevant_docs = []
-            for doc, score in docs:
-                # 점수가 낮을수록 유사도가 높음
-                if score < 0.8:  # 임계값
-                    doc_category = doc.metadata.get('category', 'general')
-                    # 같은 카테고리이거나 일반 지식인 경우
-                    if doc_category == category or doc_category == 'general':
-                        relevant_docs.append({
-                            'content': doc.page_content,
-                            'score': score,
-                            'category': doc_category
-                        })
+            for doc, distance in sorted(candidates, key=lambda item: item[1]):
+                # 정규화 벡터의 L2 제곱 거리 → 코사인 유사도
+                score = 1 - float(distance) / 2
+                if score >= SEMANTIC_MIN_SCORE:
+                    relevant_docs.append({
+                        'content': doc.page_content,
+                        'score': score,
+                        'category': doc.metadata.get('category', 'general')
+                    })
             
             return relevant_docs[:2]  # 최대 2개만 사용
             
@@ -274,63 +654,60 @@ class HealthAIChatbot:
             logger.error(f"Knowledge search failed: {str(e)}")
             return []
     
-    def _classify_query(self, query: str) -> Optional[str]:
-        """쿼리를 카테고리로 분류"""
-        query_lower = query.lower()
-        
-        category_scores = {}
-        for category, keywords in self.category_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in query_lower)
-            if score > 0:
-                category_scores[category] = score
-        
-        if category_scores:
-            return max(category_scores.items(), key=lambda x: x[1])[0]
-        
-        return None
+    def _classify_query(self, query: str, analysis: QueryAnalysis = None) -> Optional[str]:
+        """쿼리를 카테고리로 분류 (가장 많은 키워드가 나온 카테고리)"""
+        analysis = analysis or analyze_query(query)
+        return analysis.top_category
     
-    def _check_simple_questions(self, question: str) -> Optional[str]:
-        """간단한 질문에 대한 빠른 응답"""
-        simple_patterns = {
-            '안녕': "안녕하세요! 무엇을 도와드릴까요?",
-            '고마워': "천만에요! 더 궁금한 점이 있으시면 언제든 물어보세요.",
-            '감사': "도움이 되어 기쁩니다! 건강한 하루 보내세요.",
-        }
-        
-        question_lower = question.lower()
-        for pattern, response in simple_patterns.items():
-            if pattern in question_lower:
-                return response
-        
-        return None
+    def _check_simple_questions(self, question: str, analysis: QueryAnalysis = None) -> Optional[str]:
+        """간단한 질문에 대한 빠른 응답 (짧은 인사/감사 메시지만)"""
+        analysis = analysis or analyze_query(question)
+        return simple_answer(analysis)
     
-    def _create_system_prompt(self, username: str, session_data: Dict, knowledge: List[Dict] = None) -> str:
-        """시스템 프롬프트 생성"""
-        prompt = f"""당신은 전문적이고 친근한 헬스케어 AI 어시스턴트입니다.
+    def _create_system_prompt(self, username: str, session_data: Dict, knowledge: List[Dict] = None,
+                              profile_bucket: Optional[tuple] = None) -> str:
+        """
+        시스템 프롬프트 생성
+        
+        profile_bucket(시맨틱 캐시 버킷)을 주면 이름과 정확한 수치 대신 나이대/성별/BMI 구간만 넣습니다.
+        이렇게 만든 답변은 같은 버킷의 모든 사용자에게 캐시로 제공됩니다.
+        """
+        prompt = """당신은 전문적이고 친근한 헬스케어 AI 어시스턴트입니다.
 사용자의 건강 정보와 선호도를 고려하여 맞춤형 운동과 식단 조언을 제공합니다.
 답변은 간결하고 실용적으로 하되, 핵심 정보는 놓치지 마세요.
 
 사용자 정보:
-- 이름: {username}
 """
         
-        # 세션 데이터가 있으면 추가
-        if session_data:
-            if 'birth_date' in session_data:
+        if profile_bucket is not None:
+            _, age_band, gender, bmi_band, _ = profile_bucket
+            prompt += "- 호칭: 회원님 (이름이나 정확한 수치를 추측하지 마세요)\n"
+            if age_band != 'unknown':
+                prompt += f"- 나이대: {age_band[:-1]}대\n"
+            if gender != 'unknown':
+                prompt += f"- 성별: {gender}\n"
+            if bmi_band != 'unknown':
+                prompt += f"- BMI 구간: {BMI_BAND_LABELS[bmi_band]}\n"
+        else:
+            prompt += f"- 이름: {username}\n"
+        
+        # 세션 데이터가 있으면 추가 (캐시하지 않는 답변만)
+        if profile_bucket is None and session_data:
+            if session_data.get('birth_date'):
                 # birth_date로부터 나이 계산
                 birth_date = session_data['birth_date']
                 if isinstance(birth_date, str):
                     birth_date = datetime.strptime(birth_date, '%Y-%m-%d').date()
                 age = (date.today() - birth_date).days // 365
                 prompt += f"- 나이: {age}세\n"
-            if 'gender' in session_data:
+            if session_data.get('gender'):
                 prompt += f"- 성별: {session_data['gender']}\n"
-            if 'height' in session_data:
+            if session_data.get('height'):
                 prompt += f"- 키: {session_data['height']}cm\n"
-            if 'weight' in session_data:
+            if session_data.get('weight'):
                 prompt += f"- 체중: {session_data['weight']}kg\n"
                 # BMI 계산
-                if 'height' in session_data and session_data['height'] > 0:
+                if session_data.get('height') and session_data['height'] > 0:
                     height_m = session_data['height'] / 100
                     bmi = session_data['weight'] / (height_m ** 2)
                     prompt += f"- BMI: {bmi:.1f}\n"
@@ -345,13 +722,17 @@ class HealthAIChatbot:
         
         return prompt
     
-    def _select_model_by_complexity(self, question: str, category: str = None) -> str:
-        """질문 복잡도에 따라 모델 선택"""
-        # 의학적 카테고리이거나 긴 질문이면 더 좋은 모델 사용
+    def _route_endpoint(self, question: str, category: str = None) -> str:
+        """질문 복잡도에 따른 라우터 엔드포인트 (지연 예산/후보 목록 구분)"""
+        # 의학적 카테고리이거나 긴 질문이면 더 좋은 모델(gpt-4o-mini) 우선
         if category == 'health' or len(question.split()) > 20:
-            return "gpt-4o-mini"  # 더 저렴한 GPT-4 모델
-        
-        return "gpt-3.5-turbo"
+            return 'chatbot_complex'
+        return 'chatbot'
+    
+    def _select_model_by_complexity(self, question: str, category: str = None, providers=None) -> str:
+        """질문 복잡도에 따라 엔드포인트를 정하고, 지연 예산에 맞는 모델은 라우터가 선택"""
+        endpoint = self._route_endpoint(question, category)
+        return get_model_router().choose(endpoint, providers=providers).name
     
     def get_health_consultation(self, user_data: Dict, question: str) -> Dict:
         """건강 상담 API"""
@@ -372,8 +753,53 @@ class HealthAIChatbot:
             session_data=user_data
         )
     
+    def stream_health_consultation(self, user_data: Dict, question: str) -> Iterator[Dict]:
+        """건강 상담 API (스트리밍)"""
+        is_authenticated = user_data.get('is_authenticated', False)
+        username = user_data.get('username', 'Guest')
+        display_name = username if is_authenticated and username != 'Guest' else 'Guest'
+        
+        return self.stream_response(
+            user_id=str(user_data.get('user_id', 'guest')),
+            username=display_name,
+            question=question,
+            session_data=user_data
+        )
+    
+    async def aget_health_consultation(self, user_data: Dict, question: str) -> Dict:
+        """건강 상담 API (비동기)"""
+        is_authenticated = user_data.get('is_authenticated', False)
+        username = user_data.get('username', 'Guest')
+        display_name = username if is_authenticated and username != 'Guest' else 'Guest'
+        
+        return await self.aget_response(
+            user_id=str(user_data.get('user_id', 'guest')),
+            username=display_name,
+            question=question,
+            session_data=user_data
+        )
+    
+    def astream_health_consultation(self, user_data: Dict, question: str) -> AsyncIterator[Dict]:
+        """건강 상담 API (비동기 스트리밍)"""
+        is_authenticated = user_data.get('is_authenticated', False)
+        username = user_data.get('username', 'Guest')
+        display_name = username if is_authenticated and username != 'Guest' else 'Guest'
+        
+        return self.astream_response(
+            user_id=str(user_data.get('user_id', 'guest')),
+            username=display_name,
+            question=question,
+            session_data=user_data
+        )
+    
     def generate_workout_recommendation(self, user_data: Dict) -> Dict:
-        """운동 추천 생성"""
+        """운동 추천 생성 (같은 프로필 구간이면 캐시된 추천 변형을 순환 제공)"""
+        return get_recommendation_cache().get_or_generate(
+            'workout', user_data, lambda: self._generate_workout_recommendation(user_data)
+        )
+    
+    def _generate_workout_recommendation(self, user_data: Dict) -> Dict:
+        """운동 추천 생성 (LLM 호출)"""
         try:
             # API 키 확인
             if not self.client:
@@ -411,17 +837,18 @@ class HealthAIChatbot:
             }}
             """
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            # 지연 예산 안의 모델로 호출 (OpenAI가 느리면 Gemini로 우회)
+            content = complete(
+                'recommendation',
+                [
                     {"role": "system", "content": "당신은 전문 피트니스 트레이너입니다. JSON 형식으로만 답변하세요."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.7
-            )
+                temperature=0.7,
+                openai_client=self.client
+            ).text
             
             # JSON 파싱
-            content = response.choices[0].message.content
             # JSON 블록 추출 (```json ... ``` 형식 처리)
             if '```json' in content:
                 content = content.split('```json')[1].split('```')[0].strip()
@@ -443,7 +870,25 @@ class HealthAIChatbot:
             }
     
     def generate_nutrition_recommendation(self, user_data: Dict) -> Dict:
-        """영양 추천 생성"""
+        """
+        영양 추천 생성 - 로컬 식단 최적화로 하루 식단 계산 (LLM 호출 없음)
+
+        LOCAL_MEAL_PLAN_ENABLED=False이거나 성분표로 식단을 만들 수 없으면
+        기존 LLM 식단 (같은 프로필 구간이면 캐시된 추천 변형을 순환 제공)
+        """
+        if local_meal_plan_enabled():
+            try:
+                plan = local_day_plan(user_data)
+                if plan:
+                    return {'success': True, 'recommendation': plan}
+            except Exception as e:
+                logger.warning(f"Local meal plan failed, falling back to LLM: {str(e)}")
+        return get_recommendation_cache().get_or_generate(
+            'nutrition', user_data, lambda: self._generate_nutrition_recommendation(user_data)
+        )
+    
+    def _generate_nutrition_recommendation(self, user_data: Dict) -> Dict:
+        """영양 추천 생성 (LLM 호출)"""
         try:
             # birth_date로부터 나이 계산
             age = 30  # 기본값
@@ -475,17 +920,18 @@ class HealthAIChatbot:
             }}
             """
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
+            # 지연 예산 안의 모델로 호출 (OpenAI가 느리면 Gemini로 우회)
+            content = complete(
+                'recommendation',
+                [
                     {"role": "system", "content": "당신은 전문 영양사입니다. JSON 형식으로만 답변하세요."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.7
-            )
+                temperature=0.7,
+                openai_client=self.client
+            ).text
             
             # JSON 파싱
-            content = response.choices[0].message.content
             if '```json' in content:
                 content = content.split('```json')[1].split('```')[0].strip()
             elif '```' in content:
@@ -1,4 +1,19 @@
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
+
+# 이 이름으로 실행된 프로세스에서만 워밍업 (migrate 등 관리 명령 제외)
+SERVER_COMMANDS = ('daphne', 'gunicorn', 'uvicorn')
+
+
+def _is_server_process() -> bool:
+    program = os.path.basename(sys.argv[0]) if sys.argv else ''
+    if program in SERVER_COMMANDS:
+        return True
+    # runserver는 자동 리로더의 자식 프로세스에서만
+    return 'runserver' in sys.argv and os.environ.get('RUN_MAIN') == 'true'
 
 
 class ApiConfig(AppConfig):
@@ -6,4 +21,9 @@ class ApiConfig(AppConfig):
     name = 'api'
     
     def ready(self):
-        import api.signals  # 신호 등록
\ No newline at end of file
+        import api.signals  # 신호 등록
+        
+        # 첫 요청이 모델 로드를 기다리지 않도록 워커 부팅 시 백그라운드 워밍업
+        if getattr(settings, 'CHATBOT_PRELOAD_VECTORSTORE', False) and _is_server_process():
+            from .ai_service import HealthAIChatbot
+            HealthAIChatbot.start_background_warm_up()
@@ -1,4 +1,5 @@
 import json
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
@@ -37,6 +38,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
         message = text_data_json.get('message', '')
         user = self.scope["user"]
         
+        # 챗봇 스트리밍 요청은 그룹 브로드캐스트 없이 요청한 소켓에만 응답
+        if text_data_json.get('type') == 'chatbot_stream':
+            await self.stream_chatbot_response(message)
+            return
+        
         username = user.username if user.is_authenticated else f'Guest_{self.scope["session"].session_key[:8]}'
         
         # Send message to room group
@@ -49,6 +55,49 @@ class ChatConsumer(AsyncWebsocketConsumer):
             }
         )
     
+    async def stream_chatbot_response(self, message):
+        """챗봇 응답을 토큰 단위로 전송하고 최종 텍스트를 저장"""
+        from .ai_service import get_chatbot
+        from .services.chat_history import build_user_data, save_chat_exchange
+        
+        user = self.scope["user"]
+        user_data = await database_sync_to_async(build_user_data)(user)
+        
+        try:
+            chatbot = await sync_to_async(get_chatbot)()
+        except Exception as e:
+            logger.error(f"Chatbot unavailable for websocket stream: {str(e)}")
+            await self.send(text_data=json.dumps({
+                'type': 'chatbot_error',
+                'response': '죄송합니다. 오류가 발생했습니다. 잠시 후 다시 시도해주세요.',
+                'error': str(e)
+            }, ensure_ascii=False))
+            return
+        
+        # 비동기 OpenAI 스트림 - 토큰 대기 중에도 스레드를 점유하지 않음
+        async for event in chatbot.astream_health_consultation(user_data, message):
+            event_type = event.pop('type')
+            if event_type == 'token':
+                await self.send(text_data=json.dumps({
+                    'type': 'chatbot_token',
+                    'content': event['content']
+                }, ensure_ascii=False))
+                continue
+            
+            if event_type == 'done':
+                try:
+                    await database_sync_to_async(save_chat_exchange)(user, message, event.get('response', ''), {
+                        'category': event.get('category'),
+                        'model_used': event.get('model_used'),
+                        'cached': event.get('cached', False)
+                    })
+                except Exception as e:
+                    logger.error(f"Failed to save streamed chat message: {str(e)}")
+            
+            await self.send(text_data=json.dumps(
+                dict(event, type=f'chatbot_{event_type}'), ensure_ascii=False, default=str
+            ))
+    
     async def chat_message(self, event):
         message = event['message']
         username = event['username']
@@ -0,0 +1,79 @@
+"""
+음식 사진 업로드 벤치마크 - 요청당 최대 메모리 (JSON image_base64 vs multipart vs image/* 바이너리 본문)
+
+요청 파싱 + 시리얼라이저 검증 + 사진 바이트 읽기까지 측정합니다 (모델 호출 제외).
+요청 본문은 측정 전에 만들어 두므로 서버가 소켓에서 읽는 상황과 같습니다.
+
+  python manage.py benchmark_food_upload --size-mb 5
+  python manage.py benchmark_food_upload --size-mb 5 --size-mb 12
+"""
+import base64
+import io
+import json
+import os
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.views_nutrition import ANALYSIS_PARSERS, _parse_analysis_request
+
+PATH = '/api/ai-nutrition/analyze/'
+
+
+def synthetic_jpeg(size_bytes: int) -> bytes:
+    """약 size_bytes 크기의 JPEG (작은 JPEG 뒤에 무작위 바이트를 붙여 크기만 맞춤)"""
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 120, 40)).save(buffer, format='JPEG')
+    head = buffer.getvalue()
+    return head + os.urandom(max(0, size_bytes - len(head)))
+
+
+def build_requests(image: bytes):
+    factory = APIRequestFactory()
+    fields = {'food_name': '비빔밥', 'description': '점심'}
+    json_body = json.dumps(dict(fields, image_base64=base64.b64encode(image).decode()))
+    upload = io.BytesIO(image)
+    upload.name = 'meal.jpg'
+    return {
+        'json (image_base64)': factory.post(PATH, json_body, content_type='application/json'),
+        'multipart (image)': factory.post(PATH, dict(fields, image=upload), format='multipart'),
+        'image/jpeg body': factory.post(
+            f"{PATH}?food_name=%EB%B9%84%EB%B9%94%EB%B0%A5", image, content_type='image/jpeg'
+        ),
+    }
+
+
+def measure(django_request):
+    request = Request(django_request, parsers=[parser() for parser in ANALYSIS_PARSERS])
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    data, image_data, error = _parse_analysis_request(request)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if error is not None:
+        raise RuntimeError(f"request rejected: {error.status_code} {error.data}")
+    return peak, elapsed, len(image_data or b'')
+
+
+class Command(BaseCommand):
+    help = '음식 사진 업로드 방식별 요청당 최대 메모리/파싱 시간을 비교합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=float, action='append', help='사진 크기 (MB, 여러 번 지정 가능, 기본 5)')
+
+    def handle(self, *args, **options):
+        for size_mb in options['size_mb'] or [5.0]:
+            image = synthetic_jpeg(int(size_mb * 1024 * 1024))
+            self.stdout.write(f"{len(image) / 1024 / 1024:.1f}MB photo, peak Python memory per request:")
+            for label, django_request in build_requests(image).items():
+                peak, elapsed, received = measure(django_request)
+                self.stdout.write(
+                    f"  {label:20s} peak {peak / 1024 / 1024:6.2f} MB "
+                    f"({peak / len(image):4.2f}x photo)  {elapsed * 1000:6.1f} ms  {received} bytes"
+                )
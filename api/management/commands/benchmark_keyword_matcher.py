@@ -0,0 +1,124 @@
+"""
+키워드 매칭 벤치마크 - 기존 부분 문자열 루프 vs Aho–Corasick 매처
+
+  python manage.py benchmark_keyword_matcher --iterations 20000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services.health_consultation import TOPIC_KEYWORDS, TOPIC_MATCHER
+from api.services.keyword_matcher import CATEGORY_KEYWORDS, KeywordAutomaton, analyze_query, simple_answer
+
+SAMPLE_QUESTIONS = [
+    '안녕하세요!',
+    '고마워요',
+    '감사합니다',
+    '감사해요 근데 단백질은 하루에 얼마나 먹어야 하나요?',
+    '감사원 건강검진 결과가 궁금해요',
+    '안녕하세요 스쿼트 할 때 무릎이 아픈데 자세를 어떻게 고쳐야 하나요?',
+    '다이어트 중인데 탄수화물을 완전히 끊어도 괜찮을까요?',
+    '하체운동 루틴 추천해 주세요',
+    '요즘 잠이 안 와서 스트레스를 받아요. 수면에 좋은 습관이 있을까요?',
+    '비타민 D는 언제 먹는 게 좋아요?',
+    '플랭크를 매일 하면 뱃살이 빠지나요?',
+    '운동 후에 근육통이 심할 때는 어떻게 해야 하나요?',
+    '고혈압이 있는데 유산소 운동 강도는 어느 정도가 적당한가요?',
+    '오늘 날씨 어때?',
+]
+
+SIMPLE_PATTERNS = {
+    '안녕': "안녕하세요! 무엇을 도와드릴까요?",
+    '고마워': "천만에요! 더 궁금한 점이 있으시면 언제든 물어보세요.",
+    '감사': "도움이 되어 기쁩니다! 건강한 하루 보내세요.",
+}
+
+
+def legacy_classify(query):
+    """기존 HealthAIChatbot._classify_query"""
+    query_lower = query.lower()
+    category_scores = {}
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        score = sum(1 for keyword in keywords if keyword in query_lower)
+        if score > 0:
+            category_scores[category] = score
+    if category_scores:
+        return max(category_scores.items(), key=lambda x: x[1])[0]
+    return None
+
+
+def legacy_simple(question):
+    """기존 HealthAIChatbot._check_simple_questions"""
+    question_lower = question.lower()
+    for pattern, response in SIMPLE_PATTERNS.items():
+        if pattern in question_lower:
+            return response
+    return None
+
+
+def legacy_topics(question):
+    """기존 find_best_answer의 키워드 검사 (모든 주제 확인 기준)"""
+    question_lower = question.lower()
+    return {label for label, keywords in TOPIC_KEYWORDS if any(word in question_lower for word in keywords)}
+
+
+class Command(BaseCommand):
+    help = '기존 부분 문자열 키워드 루프와 Aho–Corasick 매처의 속도/결과를 비교합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000, help='질문당 반복 횟수 합계')
+        parser.add_argument(
+            '--scale', type=int, nargs='*', default=[30, 300, 3000],
+            help='합성 키워드 수별 비교 (키워드가 많아질수록 차이가 커짐)'
+        )
+
+    def handle(self, *args, **options):
+        rounds = max(1, options['iterations'] // len(SAMPLE_QUESTIONS))
+        total = rounds * len(SAMPLE_QUESTIONS)
+
+        def bench(func):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for question in SAMPLE_QUESTIONS:
+                    func(question)
+            return (time.perf_counter() - start) / total * 1e6
+
+        # 챗봇: 기존은 인사 검사 + 분류로 두 번 순회, 새 방식은 한 번 분석
+        legacy_chatbot = bench(lambda q: (legacy_simple(q), legacy_classify(q)))
+        def automaton_chatbot(question):
+            analysis = analyze_query(question)
+            return simple_answer(analysis), analysis.top_category
+
+        new_chatbot = bench(automaton_chatbot)
+        legacy_topic = bench(legacy_topics)
+        new_topic = bench(TOPIC_MATCHER.labels)
+
+        self.stdout.write(f"{total} queries, average per query:")
+        self.stdout.write(f"  chatbot classify+simple  legacy {legacy_chatbot:7.2f} us   automaton {new_chatbot:7.2f} us")
+        self.stdout.write(f"  health topics            legacy {legacy_topic:7.2f} us   automaton {new_topic:7.2f} us")
+
+        # 키워드 수 증가에 따른 비교 - 부분 문자열 루프는 O(질문 길이 x 키워드 수)
+        syllables = '가나다라마바사아자차카타파하운동단백질수면'
+        for size in options['scale']:
+            keywords = [
+                syllables[i % len(syllables)] + syllables[(i // len(syllables)) % len(syllables)]
+                + syllables[(i // len(syllables) ** 2) % len(syllables)]
+                for i in range(size)
+            ]
+            automaton = KeywordAutomaton()
+            automaton.add_many(keywords, group='synthetic', label='synthetic', boundary='any')
+            automaton.build()
+            legacy = bench(lambda q: [keyword for keyword in keywords if keyword in q.lower()])
+            new = bench(automaton.find)
+            self.stdout.write(f"  {size:5d} keywords             legacy {legacy:7.2f} us   automaton {new:7.2f} us")
+
+        self.stdout.write("\nResult differences (legacy -> automaton):")
+        for question in SAMPLE_QUESTIONS:
+            analysis = analyze_query(question)
+            old = (legacy_simple(question), legacy_classify(question))
+            new = (simple_answer(analysis), analysis.top_category)
+            if old != new:
+                self.stdout.write(f"  {question!r}: simple={bool(old[0])}->{bool(new[0])}, category={old[1]}->{new[1]}")
+            old_topics, new_topics = legacy_topics(question), TOPIC_MATCHER.labels(question)
+            if old_topics != new_topics:
+                self.stdout.write(f"  {question!r}: topics {sorted(old_topics)} -> {sorted(new_topics)}")
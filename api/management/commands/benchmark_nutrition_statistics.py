@@ -0,0 +1,120 @@
+"""
+영양 통계 벤치마크 - 기존 날짜별 루프(하루 2쿼리) vs 단일 쿼리 + 날짜 시리즈
+
+임시 사용자와 기록을 트랜잭션 안에서 만들고 끝나면 롤백합니다.
+
+  python manage.py benchmark_nutrition_statistics --ranges 7 30 90 365 730
+"""
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+
+from api.models import DailyNutrition, FoodAnalysis
+from api.services.activity_rollup_service import rebuild_rollups
+from api.services.nutrition_statistics import build_nutrition_statistics
+
+
+def legacy_statistics(user, start_date, end_date):
+    """기존 nutrition_statistics 구현 (비교용)"""
+    records = DailyNutrition.objects.filter(user=user, date__range=[start_date, end_date]).order_by('date')
+    total_calories = records.aggregate(Sum('total_calories'))['total_calories__sum'] or 0
+    total_protein = records.aggregate(Sum('total_protein'))['total_protein__sum'] or 0
+    total_carbs = records.aggregate(Sum('total_carbohydrates'))['total_carbohydrates__sum'] or 0
+    total_fat = records.aggregate(Sum('total_fat'))['total_fat__sum'] or 0
+    recorded_days = records.count()
+    days = (end_date - start_date).days + 1
+
+    prev_records = DailyNutrition.objects.filter(
+        user=user, date__range=[start_date - timedelta(days=days), start_date - timedelta(days=1)]
+    )
+    prev_totals = [
+        prev_records.aggregate(Sum(field))[f'{field}__sum'] or 0
+        for field in ('total_calories', 'total_protein', 'total_carbohydrates', 'total_fat')
+    ]
+    prev_recorded_days = prev_records.count()
+
+    daily_data = []
+    current_date = start_date
+    while current_date <= end_date:
+        record = records.filter(date=current_date).first()
+        if record:
+            daily_data.append((current_date, record.total_calories, record.food_analyses.count()))
+        else:
+            daily_data.append((current_date, 0, 0))
+        current_date += timedelta(days=1)
+    return daily_data, (total_calories, total_protein, total_carbs, total_fat, recorded_days), prev_totals, prev_recorded_days
+
+
+class Command(BaseCommand):
+    help = '기간 길이별 영양 통계 쿼리 수/지연을 기존 구현과 비교합니다 (데이터는 롤백).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ranges', type=int, nargs='*', default=[7, 30, 90, 365, 730])
+        parser.add_argument('--foods-per-day', type=int, default=3)
+        parser.add_argument('--fill-rate', type=float, default=0.7, help='기록이 있는 날 비율')
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._run(options)
+            transaction.set_rollback(True)
+
+    def _run(self, options):
+        random.seed(42)
+        user = User.objects.create_user(username=f'bench-stats-{random.randint(0, 10 ** 9)}')
+        history = max(options['ranges']) * 2
+        today = date.today()
+
+        self.stdout.write(f"Creating {history} days of history...")
+        for offset in range(history):
+            if random.random() > options['fill_rate']:
+                continue
+            foods = FoodAnalysis.objects.bulk_create([
+                FoodAnalysis(
+                    user=user, food_name='bench', calories=random.randint(100, 800),
+                    protein=random.uniform(5, 40), carbohydrates=random.uniform(10, 100),
+                    fat=random.uniform(2, 30), analysis_summary='', recommendations=''
+                ) for _ in range(options['foods_per_day'])
+            ])
+            daily = DailyNutrition.objects.create(
+                user=user, date=today - timedelta(days=offset),
+                total_calories=sum(f.calories for f in foods),
+                total_protein=sum(f.protein for f in foods),
+                total_carbohydrates=sum(f.carbohydrates for f in foods),
+                total_fat=sum(f.fat for f in foods),
+            )
+            daily.food_analyses.add(*foods)
+        rebuild_rollups(user_ids=[user.id])
+
+        def measure(func, start_date):
+            best = None
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    func(user, start_date, today)
+                    elapsed = (time.perf_counter() - started) * 1000
+                best = elapsed if best is None else min(best, elapsed)
+            return len(queries.captured_queries), best
+
+        self.stdout.write(f"{'days':>6} {'legacy queries':>15} {'legacy ms':>10} {'new queries':>12} {'new ms':>8}")
+        for days in options['ranges']:
+            start_date = today - timedelta(days=days - 1)
+            legacy_queries, legacy_ms = measure(legacy_statistics, start_date)
+            new_queries, new_ms = measure(build_nutrition_statistics, start_date)
+
+            # 결과 일치 확인
+            legacy_daily = legacy_statistics(user, start_date, today)[0]
+            new_daily = build_nutrition_statistics(user, start_date, today)['daily_data']
+            same = [(d.isoformat(), c, n) for d, c, n in legacy_daily] == [
+                (row['date'], row['total_calories'], row['food_count']) for row in new_daily
+            ]
+            self.stdout.write(
+                f"{days:>6} {legacy_queries:>15} {legacy_ms:>10.1f} {new_queries:>12} {new_ms:>8.1f}"
+                + ('' if same else '  MISMATCH')
+            )
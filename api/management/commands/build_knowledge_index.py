@@ -0,0 +1,71 @@
+"""
+NumPy 지식 검색 인덱스 생성 / 문서 추가
+
+  python manage.py build_knowledge_index               # 기본 문서로 다시 빌드
+  python manage.py build_knowledge_index --if-missing  # 배포 시: 쓸 수 있는 인덱스가 있으면 유지
+  python manage.py build_knowledge_index --append docs.json
+      docs.json: [{"content": "...", "category": "nutrition"}, ...]
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ai_service import HealthAIChatbot
+from api.services.knowledge_retriever import (
+    DEFAULT_KNOWLEDGE_DOCUMENTS, build_knowledge_retriever, get_knowledge_index_path, load_knowledge_retriever
+)
+
+
+class Command(BaseCommand):
+    help = '기본 지식 문서로 NumPy 검색 인덱스를 만들거나(--append) 기존 인덱스에 문서를 추가합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dtype', choices=['float16', 'int8'], default=None,
+            help='임베딩 저장 형식 (기본값: KNOWLEDGE_INDEX_DTYPE 설정)'
+        )
+        parser.add_argument(
+            '--append', metavar='JSON_FILE', default=None,
+            help='전체 재빌드 없이 JSON 파일의 문서를 카테고리별 인덱스에 추가'
+        )
+        parser.add_argument(
+            '--if-missing', action='store_true',
+            help='현재 임베더로 만든 인덱스가 이미 있으면 다시 빌드하지 않음 (추가한 문서 유지)'
+        )
+
+    def handle(self, *args, **options):
+        start_time = time.time()
+
+        if options['append']:
+            try:
+                with open(options['append'], encoding='utf-8') as f:
+                    documents = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read documents: {str(e)}")
+            if not isinstance(documents, list) or not all(doc.get('content') for doc in documents):
+                raise CommandError("Documents must be a list of objects with a 'content' field")
+
+            added = HealthAIChatbot.add_knowledge(documents)
+            self.stdout.write(self.style.SUCCESS(
+                f"Added {added} documents ({time.time() - start_time:.2f}s)"
+            ))
+            return
+
+        if options['if_missing']:
+            try:
+                retriever = load_knowledge_retriever()
+                self.stdout.write(self.style.SUCCESS(
+                    f"Knowledge index exists: {len(retriever)} documents at {get_knowledge_index_path()}"
+                ))
+                return
+            except (OSError, ValueError, KeyError):
+                pass
+
+        retriever = build_knowledge_retriever(DEFAULT_KNOWLEDGE_DOCUMENTS, dtype=options['dtype'])
+        partitions = ', '.join(f"{name}={len(partition)}" for name, partition in retriever.partitions.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Built knowledge index: {len(retriever)} documents ({partitions}), dtype={retriever.dtype}, "
+            f"embedder={retriever.embedder.name} -> {get_knowledge_index_path()} "
+            f"({time.time() - start_time:.2f}s)"
+        ))
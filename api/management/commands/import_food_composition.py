@@ -0,0 +1,120 @@
+"""
+식품 영양성분표 변환
+
+식약처 식품영양성분 DB(통합 CSV 내려받기) 또는 번들 형식 CSV를 읽어
+FoodCompositionTable .npz로 저장합니다. FOOD_COMPOSITION_PATH가 이 파일을 가리키면 서버가 사용합니다.
+
+  python manage.py import_food_composition 식품영양성분DB.csv
+  python manage.py import_food_composition 식품영양성분DB.csv --output /srv/data/food_composition.npz
+  python manage.py import_food_composition 식품영양성분DB.csv --no-seed   # 번들 대표 음식 제외
+"""
+import csv
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services.food_analysis_cache import normalize_food_text
+from api.services.food_composition import (
+    BUNDLED_TABLE_PATH, NUTRIENTS, FoodCompositionTable, read_table_csv,
+)
+
+# 열 이름 후보 (번들 형식 / 식약처 DB 연도별 표기)
+COLUMNS = {
+    'name': ('name', '식품명'),
+    'category': ('category', '식품대분류명', '식품대분류', '대표식품명'),
+    'energy_kcal': ('energy_kcal', '에너지(kcal)', '에너지(㎉)', '에너지(Kcal)'),
+    'protein_g': ('protein_g', '단백질(g)'),
+    'fat_g': ('fat_g', '지방(g)'),
+    'carbohydrate_g': ('carbohydrate_g', '탄수화물(g)'),
+    'sugar_g': ('sugar_g', '당류(g)', '총당류(g)'),
+    'fiber_g': ('fiber_g', '식이섬유(g)', '총 식이섬유(g)', '총식이섬유(g)'),
+    'sodium_mg': ('sodium_mg', '나트륨(mg)'),
+    'base_amount': ('영양성분함량기준량',),
+    'serving_g': ('serving_g', '식품중량', '1회제공량', '1회 섭취참고량'),
+    'unit_g': ('unit_g',),
+    'whole_g': ('whole_g',),
+}
+
+
+def _amount(value) -> float:
+    """'1,234.5', '100g', '-' 같은 값을 숫자로"""
+    match = re.search(r'\d+(?:\.\d+)?', (value or '').replace(',', ''))
+    return float(match.group()) if match else 0.0
+
+
+def _resolve_columns(header):
+    resolved = {}
+    for field, candidates in COLUMNS.items():
+        for candidate in candidates:
+            if candidate in header:
+                resolved[field] = candidate
+                break
+    missing = {'name', 'energy_kcal', 'protein_g', 'fat_g', 'carbohydrate_g'} - set(resolved)
+    if missing:
+        raise CommandError(f"필수 열이 없습니다: {', '.join(sorted(missing))}")
+    return resolved
+
+
+def read_source(path: str, encoding: str):
+    with open(path, encoding=encoding, newline='') as f:
+        reader = csv.DictReader(line for line in f if not line.startswith('#'))
+        columns = _resolve_columns(reader.fieldnames or [])
+        for row in reader:
+            name = (row[columns['name']] or '').strip()
+            if not name:
+                continue
+            # 함량 기준량이 100g이 아니면 100g 기준으로 환산
+            base = _amount(row.get(columns.get('base_amount'), '')) or 100.0
+            parsed = {
+                'name': name,
+                # 식약처 이름은 '김치찌개_돼지고기' 형식 - 앞부분을 별칭으로 색인
+                'aliases': name.split('_')[0] if '_' in name else '',
+                'category': (row.get(columns.get('category'), '') or '').strip(),
+            }
+            for column in NUTRIENTS:
+                parsed[column] = _amount(row.get(columns.get(column), '')) * 100.0 / base
+            parsed['serving_g'] = _amount(row.get(columns.get('serving_g'), '')) or 100.0
+            parsed['unit_g'] = _amount(row.get(columns.get('unit_g'), '')) or parsed['serving_g']
+            parsed['whole_g'] = _amount(row.get(columns.get('whole_g'), ''))
+            yield parsed
+
+
+class Command(BaseCommand):
+    help = '식품 영양성분 CSV(식약처 DB 또는 번들 형식)를 로컬 성분표(.npz)로 변환합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='CSV 파일 경로')
+        parser.add_argument('--output', help='저장 경로 (기본: FOOD_COMPOSITION_PATH)')
+        parser.add_argument('--encoding', default='utf-8-sig', help='CSV 인코딩 (식약처 파일은 보통 cp949)')
+        parser.add_argument('--no-seed', action='store_true', help='번들 대표 음식 표를 합치지 않음')
+
+    def handle(self, *args, **options):
+        output = options['output'] or getattr(settings, 'FOOD_COMPOSITION_PATH', '')
+        if not output or not output.endswith('.npz'):
+            raise CommandError('--output 또는 FOOD_COMPOSITION_PATH에 .npz 경로를 지정하세요.')
+
+        try:
+            imported = list(read_source(options['source'], options['encoding']))
+        except UnicodeDecodeError:
+            imported = list(read_source(options['source'], 'cp949'))
+
+        # 번들 대표값을 먼저 두어 같은 이름은 큐레이션된 값/포션이 우선
+        rows = [] if options['no_seed'] else read_table_csv(BUNDLED_TABLE_PATH)
+        seen = {normalize_food_text(row['name']) for row in rows}
+        skipped = 0
+        for row in imported:
+            key = normalize_food_text(row['name'])
+            if key in seen:
+                skipped += 1
+                continue
+            seen.add(key)
+            rows.append(row)
+        if not rows:
+            raise CommandError('가져올 식품이 없습니다.')
+
+        table = FoodCompositionTable.from_rows(rows)
+        table.save(output)
+        self.stdout.write(self.style.SUCCESS(
+            f"saved {len(table)} foods to {output} ({len(imported)} imported, {skipped} duplicates skipped)"
+        ))
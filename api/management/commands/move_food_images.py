@@ -0,0 +1,39 @@
+"""
+FoodAnalysis.image_base64 인라인 사진을 저장소로 옮기기 (재실행 가능)
+
+마이그레이션 0009는 영구 저장소(FOOD_IMAGE_DURABLE_STORAGE)가 없으면 복사를 건너뜁니다.
+저장소를 설정한 뒤 이 명령으로 옮기고 --verify로 확인한 다음 image_base64 컬럼을 제거합니다.
+
+  python manage.py move_food_images
+  python manage.py move_food_images --verify
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import FoodAnalysis
+from api.services.image_storage import durable_storage, move_inline_images, verify_moved_images
+
+
+class Command(BaseCommand):
+    help = 'image_base64 인라인 사진을 영구 저장소로 옮기고 (또는 --verify로) 남은 사진을 확인합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='옮기지 않고 키가 없거나 저장소에 파일이 없는 행 수만 확인합니다 (남아 있으면 실패).'
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            if not durable_storage():
+                raise CommandError(
+                    'FOOD_IMAGE_DURABLE_STORAGE가 설정되지 않았습니다. 로컬 MEDIA_ROOT로 옮기면 재배포 시 사진이 사라집니다.'
+                )
+            moved = move_inline_images(FoodAnalysis, batch_size=options['batch_size'])
+            self.stdout.write(f"Moved {moved} inline food images")
+
+        result = verify_moved_images(FoodAnalysis)
+        self.stdout.write(f"Inline images without key: {result['pending']}, keys missing in storage: {result['missing']}")
+        if result['pending'] or result['missing']:
+            raise CommandError('Inline food images are not fully moved; keep the image_base64 column.')
+        self.stdout.write(self.style.SUCCESS('All inline food images are in storage.'))
@@ -0,0 +1,45 @@
+"""
+일일 추천 사전 계산 (Celery 없이 직접 실행하거나 작업을 큐에 넣기)
+
+  python manage.py precompute_daily_recommendations              # 내일 추천, 현재 프로세스에서 계산
+  python manage.py precompute_daily_recommendations --date 2025-07-10 --no-ai
+  python manage.py precompute_daily_recommendations --enqueue    # Celery 워커에 분배
+"""
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.services.daily_recommendation_service import active_user_ids, chunked, precompute_chunk
+
+
+class Command(BaseCommand):
+    help = '활성 사용자의 일일 추천을 청크 단위로 계산해 DailyRecommendation에 저장합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='대상 날짜 (YYYY-MM-DD, 기본: 내일)')
+        parser.add_argument('--chunk-size', type=int, default=getattr(settings, 'DAILY_RECOMMENDATION_CHUNK_SIZE', 200))
+        parser.add_argument('--no-ai', action='store_true', help='LLM 추천 없이 규칙 기반으로만 계산')
+        parser.add_argument('--enqueue', action='store_true', help='Celery 작업으로 분배 (워커 필요)')
+
+    def handle(self, *args, **options):
+        try:
+            target_date = date.fromisoformat(options['date']) if options['date'] else timezone.localdate() + timedelta(days=1)
+        except ValueError:
+            raise CommandError('--date must be YYYY-MM-DD')
+
+        if options['enqueue']:
+            from api.tasks import precompute_daily_recommendations
+            precompute_daily_recommendations.delay(target_date.isoformat())
+            self.stdout.write(f"Enqueued daily recommendations for {target_date}")
+            return
+
+        start = time.perf_counter()
+        total = 0
+        for user_ids in chunked(active_user_ids(), options['chunk_size']):
+            total += precompute_chunk(user_ids, target_date, use_ai=not options['no_ai'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {total} recommendations for {target_date} in {time.perf_counter() - start:.1f}s"
+        ))
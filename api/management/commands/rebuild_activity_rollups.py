@@ -0,0 +1,26 @@
+"""
+활동 롤업 백필 / 재계산
+
+  python manage.py rebuild_activity_rollups              # 전체
+  python manage.py rebuild_activity_rollups --days 30    # 최근 30일이 속한 기간만
+  python manage.py rebuild_activity_rollups --user 42
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from api.services.activity_rollup_service import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'DailyNutrition / WorkoutLog 원본 기록에서 일/주/월 활동 롤업을 다시 계산합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='최근 며칠이 속한 기간만 다시 계산 (기본: 전체)')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='사용자 ID (여러 번 지정 가능)')
+        parser.add_argument('--chunk-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        since = date.today() - timedelta(days=options['days']) if options['days'] else None
+        result = rebuild_rollups(user_ids=options['user_ids'], since=since, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"rebuilt {result['rows']} rollup rows for {result['users']} users"))
@@ -0,0 +1,27 @@
+"""
+일일 영양 합계 정합성 검사
+
+  python manage.py reconcile_daily_nutrition --days 30 --dry-run
+  python manage.py reconcile_daily_nutrition --all
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from api.services.daily_nutrition_service import reconcile_daily_nutrition
+
+
+class Command(BaseCommand):
+    help = 'DailyNutrition 합계를 음식 기록 합계와 비교하여 어긋난 값을 수정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='최근 며칠을 검사할지')
+        parser.add_argument('--all', action='store_true', help='전체 기록 검사')
+        parser.add_argument('--dry-run', action='store_true', help='수정하지 않고 개수만 출력')
+
+    def handle(self, *args, **options):
+        since = None if options['all'] else date.today() - timedelta(days=options['days'])
+        result = reconcile_daily_nutrition(since=since, fix=not options['dry_run'])
+        self.stdout.write(
+            f"checked {result['checked']}, drifted {result['drifted']}, fixed {result['fixed']}"
+        )
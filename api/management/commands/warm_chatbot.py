@@ -0,0 +1,35 @@
+"""
+챗봇 임베딩 모델/벡터스토어 워밍업
+
+배포 시 서버 시작 전에 실행하면 인덱스 파일이 미리 만들어져
+각 워커는 빌드 없이 메모리 매핑으로만 인덱스를 엽니다.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ai_service import VECTORSTORE_AVAILABLE, HealthAIChatbot
+from api.services.knowledge_retriever import get_knowledge_retriever
+
+
+class Command(BaseCommand):
+    help = '챗봇 임베딩 모델과 벡터스토어를 로드(없으면 생성)하고 준비 상태를 출력합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='워밍업에 실패하면 0이 아닌 종료 코드를 반환합니다.'
+        )
+
+    def handle(self, *args, **options):
+        HealthAIChatbot.warm_up()
+        if not VECTORSTORE_AVAILABLE:
+            # 경량 이미지에서는 NumPy 검색 인덱스를 준비
+            retriever = get_knowledge_retriever()
+            self.stdout.write(f"NumPy knowledge index: {len(retriever)} documents ({retriever.embedder.name})")
+        readiness = HealthAIChatbot.readiness()
+        self.stdout.write(json.dumps(readiness, ensure_ascii=False))
+
+        if options['strict'] and not readiness['ready']:
+            raise CommandError(f"Chatbot warm-up failed: {readiness['error']}")
+        self.stdout.write(self.style.SUCCESS(f"Chatbot warm-up: {readiness['state']}"))
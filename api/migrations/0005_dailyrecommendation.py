@@ -0,0 +1,33 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0004_userprofile_supabase_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('payload', models.JSONField(help_text='exercise/nutrition/wellness 추천 응답')),
+                ('source', models.CharField(choices=[('ai', 'AI'), ('rule', '규칙 기반')], default='rule', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_recommendations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '일일 추천',
+                'verbose_name_plural': '일일 추천 목록',
+                'ordering': ['-date'],
+                'unique_together': {('user', 'date')},
+            },
+        ),
+    ]
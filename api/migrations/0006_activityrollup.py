@@ -0,0 +1,41 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0005_dailyrecommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', '일'), ('week', '주'), ('month', '월')], max_length=5)),
+                ('period_start', models.DateField(help_text='일: 해당 날짜, 주: 월요일, 월: 1일')),
+                ('total_calories', models.IntegerField(default=0)),
+                ('total_protein', models.FloatField(default=0)),
+                ('total_carbohydrates', models.FloatField(default=0)),
+                ('total_fat', models.FloatField(default=0)),
+                ('food_count', models.IntegerField(default=0)),
+                ('nutrition_days', models.IntegerField(default=0, help_text='영양 기록이 있는 날 수')),
+                ('workout_count', models.IntegerField(default=0)),
+                ('workout_minutes', models.IntegerField(default=0)),
+                ('workout_calories', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '활동 롤업',
+                'verbose_name_plural': '활동 롤업 목록',
+                'ordering': ['-period_start'],
+                'unique_together': {('user', 'period', 'period_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_activityrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foodanalysis',
+            index=models.Index(fields=['user', '-analyzed_at'], name='foodanalysis_user_analyzed'),
+        ),
+    ]
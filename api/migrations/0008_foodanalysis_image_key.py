@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_foodanalysis_user_analyzed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodanalysis',
+            name='image_key',
+            field=models.CharField(blank=True, default='', max_length=120),
+        ),
+        migrations.AddField(
+            model_name='foodanalysis',
+            name='thumbnail_key',
+            field=models.CharField(blank=True, default='', max_length=120),
+        ),
+    ]
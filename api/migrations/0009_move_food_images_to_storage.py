@@ -0,0 +1,97 @@
+# FoodAnalysis.image_base64 사진을 저장소로 복사 (컬럼은 유지)
+#
+# 서비스 코드를 import하지 않도록 복사 로직을 이 파일에 고정합니다.
+# 영구 저장소(FOOD_IMAGE_DURABLE_STORAGE, 예: S3)가 설정되지 않았으면 복사하지 않습니다.
+# 컨테이너 로컬 MEDIA_ROOT는 재배포 시 사라지므로 사진이 유실되기 때문입니다.
+# 건너뛴 경우 영구 저장소 설정 후 `python manage.py move_food_images`로 옮길 수 있습니다.
+# 원본 컬럼은 `move_food_images --verify` 확인 후 별도 마이그레이션에서 제거합니다.
+
+import base64
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations, transaction
+
+BATCH_SIZE = 100
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif', 'HEIF': 'heic', 'MPO': 'jpg'}
+
+
+def _save_once(key, data):
+    if not default_storage.exists(key):
+        saved = default_storage.save(key, ContentFile(data))
+        if saved != key:
+            default_storage.delete(saved)
+
+
+def _store(image_base64):
+    data = base64.b64decode(image_base64.split(',')[1] if ',' in image_base64 else image_base64)
+    digest = hashlib.sha256(data).hexdigest()
+    prefix = getattr(settings, 'FOOD_IMAGE_PREFIX', 'food-images').strip('/')
+    shard = f"{digest[:2]}/{digest}"
+
+    image = None
+    extension = 'jpg'
+    try:
+        from PIL import Image
+        image = Image.open(io.BytesIO(data))
+        extension = EXTENSIONS.get(image.format, extension)
+    except Exception:
+        pass
+
+    image_key = f"{prefix}/{shard}.{extension}"
+    _save_once(image_key, data)
+
+    thumbnail_key = ''
+    if image is not None:
+        try:
+            size = getattr(settings, 'FOOD_IMAGE_THUMBNAIL_SIZE', 256)
+            thumbnail = image.convert('RGB')
+            thumbnail.thumbnail((size, size))
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, format='JPEG', quality=80, optimize=True)
+            thumbnail_key = f"{prefix}/thumbs/{shard}.jpg"
+            _save_once(thumbnail_key, buffer.getvalue())
+        except Exception:
+            thumbnail_key = ''
+    return image_key, thumbnail_key
+
+
+def copy_images(apps, schema_editor):
+    FoodAnalysis = apps.get_model('api', 'FoodAnalysis')
+    pending = FoodAnalysis.objects.exclude(image_base64__isnull=True).exclude(image_base64='').filter(image_key='')
+    ids = list(pending.order_by('id').values_list('id', flat=True))
+    if not ids:
+        return
+    if not getattr(settings, 'FOOD_IMAGE_DURABLE_STORAGE', False):
+        print(f"\n  Skipping copy of {len(ids)} inline food images: FOOD_IMAGE_DURABLE_STORAGE is not set. "
+              "Configure durable storage and run `manage.py move_food_images`.")
+        return
+
+    for start in range(0, len(ids), BATCH_SIZE):
+        rows = list(FoodAnalysis.objects.filter(id__in=ids[start:start + BATCH_SIZE]).only('id', 'image_base64'))
+        for row in rows:
+            try:
+                row.image_key, row.thumbnail_key = _store(row.image_base64)
+            except Exception:
+                # 디코딩할 수 없는 값은 그대로 두고 다음 행 처리
+                continue
+        with transaction.atomic():
+            FoodAnalysis.objects.bulk_update(rows, ['image_key', 'thumbnail_key'])
+
+
+class Migration(migrations.Migration):
+
+    # 배치마다 커밋하여 중단되어도 옮긴 만큼은 유지 (재실행 시 남은 행만 처리)
+    atomic = False
+
+    dependencies = [
+        ('api', '0008_foodanalysis_image_key'),
+    ]
+
+    operations = [
+        # 키만 기록하고 원본은 지우지 않으므로 되돌릴 때는 할 일이 없음
+        migrations.RunPython(copy_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0009_move_food_images_to_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FoodAnalysisJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', '대기'), ('running', '분석 중'), ('succeeded', '완료'), ('failed', '실패')], default='pending', max_length=10)),
+                ('food_name', models.CharField(blank=True, max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('language', models.CharField(default='en', max_length=5)),
+                ('image_key', models.CharField(blank=True, default='', max_length=120)),
+                ('thumbnail_key', models.CharField(blank=True, default='', max_length=120)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('food_analysis', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.foodanalysis')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='food_analysis_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '음식 분석 작업',
+                'verbose_name_plural': '음식 분석 작업 목록',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.11 on 2026-10-17 00:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_foodanalysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodanalysisjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='foodanalysisjob',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='foodanalysisjob',
+            index=models.Index(fields=['status', 'created_at'], name='foodanalysisjob_status'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# 기존 DailyNutrition / WorkoutLog 기록으로 ActivityRollup 백필
+#
+# 0006에서 롤업 테이블만 만들고 기존 데이터를 채우지 않아, 배포 전 기록이 있는 사용자의
+# 전체/이전 기간 합계가 비어 있었습니다. 서비스 코드를 import하지 않도록 계산 로직을 이 파일에 고정합니다
+# (api.services.activity_rollup_service.rebuild_rollups와 같은 결과).
+# 다시 계산이 필요하면 `python manage.py rebuild_activity_rollups`를 사용합니다.
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import migrations, transaction
+from django.db.models import Count, Sum
+
+CHUNK_SIZE = 200
+PERIODS = ('day', 'week', 'month')
+FIELDS = ('total_calories', 'total_protein', 'total_carbohydrates', 'total_fat', 'food_count', 'nutrition_days',
+          'workout_count', 'workout_minutes', 'workout_calories')
+
+
+def _period_start(period, day):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def backfill_rollups(apps, schema_editor):
+    ActivityRollup = apps.get_model('api', 'ActivityRollup')
+    DailyNutrition = apps.get_model('api', 'DailyNutrition')
+    WorkoutLog = apps.get_model('api', 'WorkoutLog')
+
+    user_ids = set()
+    for model in (DailyNutrition, WorkoutLog):
+        user_ids.update(model.objects.values_list('user_id', flat=True).distinct())
+    user_ids = sorted(user_ids)
+
+    for start in range(0, len(user_ids), CHUNK_SIZE):
+        chunk = user_ids[start:start + CHUNK_SIZE]
+        buckets = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+
+        def add(user_id, day, values):
+            for period in PERIODS:
+                bucket = buckets[(user_id, period, _period_start(period, day))]
+                for field, value in values.items():
+                    bucket[field] += value or 0
+
+        for row in DailyNutrition.objects.filter(user_id__in=chunk).annotate(
+                food_count=Count('food_analyses')).values(
+                'user_id', 'date', 'total_calories', 'total_protein', 'total_carbohydrates', 'total_fat', 'food_count'):
+            user_id, day = row.pop('user_id'), row.pop('date')
+            add(user_id, day, dict(row, nutrition_days=1))
+
+        for row in WorkoutLog.objects.filter(user_id__in=chunk).values('user_id', 'date').annotate(
+                workout_count=Count('id'), workout_minutes=Sum('duration'), workout_calories=Sum('calories_burned')):
+            user_id, day = row.pop('user_id'), row.pop('date')
+            add(user_id, day, row)
+
+        # 배포 후 증분 갱신된 행도 원본 기준 값으로 교체
+        with transaction.atomic():
+            ActivityRollup.objects.filter(user_id__in=chunk).delete()
+            ActivityRollup.objects.bulk_create([
+                ActivityRollup(user_id=user_id, period=period, period_start=period_start, **values)
+                for (user_id, period, period_start), values in buckets.items()
+            ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    # 사용자 청크마다 커밋 (재실행해도 같은 결과)
+    atomic = False
+
+    dependencies = [
+        ('api', '0011_foodanalysisjob_attempts'),
+    ]
+
+    operations = [
+        # 원본 기록은 그대로이므로 되돌릴 때는 할 일이 없음
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
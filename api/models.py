@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -145,12 +147,24 @@ class HealthConsultation(models.Model):
 
 
 # 영양 분석 관련 모델
+class FoodAnalysisManager(models.Manager):
+    """인라인 사진 컬럼(image_base64)은 기본으로 읽지 않음 - 목록/prefetch 조회가 사진 크기와 무관"""
+
+    def get_queryset(self):
+        return super().get_queryset().defer('image_base64')
+
+
 class FoodAnalysis(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='food_analyses')
     food_name = models.CharField(max_length=200)
     description = models.TextField(blank=True, null=True)
     image_url = models.URLField(blank=True, null=True)
+    # 예전 인라인 사진 - 영구 저장소(FOOD_IMAGE_DURABLE_STORAGE)가 없을 때만 새로 기록
+    # 저장소로 옮긴 뒤 move_food_images --verify로 확인하고 이후 마이그레이션에서 제거
     image_base64 = models.TextField(blank=True, null=True)
+    # 사진 저장소 키 (내용 해시, services/image_storage.py)
+    image_key = models.CharField(max_length=120, blank=True, default='')
+    thumbnail_key = models.CharField(max_length=120, blank=True, default='')
     calories = models.IntegerField()
     protein = models.FloatField(help_text="단백질 (g)")
     carbohydrates = models.FloatField(help_text="탄수화물 (g)")
@@ -162,12 +176,55 @@ class FoodAnalysis(models.Model):
     recommendations = models.TextField()
     analyzed_at = models.DateTimeField(auto_now_add=True)
 
+    objects = FoodAnalysisManager()
+
     class Meta:
         verbose_name = "음식 분석"
         verbose_name_plural = "음식 분석 목록"
         ordering = ['-analyzed_at']
+        indexes = [
+            # 사용자별 최근 분석 순 목록 / 커서 페이지네이션
+            models.Index(fields=['user', '-analyzed_at'], name='foodanalysis_user_analyzed'),
+        ]
 
 
+# 음식 사진 비동기 분석 작업 (Celery 워커에서 분석 후 WebSocket으로 결과 전송)
+class FoodAnalysisJob(models.Model):
+    """ai_nutrition_analysis 작업 모드 - 요청은 즉시 job id를 받고 결과는 푸시/폴링으로 확인"""
+    STATUS_CHOICES = [
+        ('pending', '대기'),
+        ('running', '분석 중'),
+        ('succeeded', '완료'),
+        ('failed', '실패'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='food_analysis_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    food_name = models.CharField(max_length=200, blank=True)
+    description = models.TextField(blank=True)
+    language = models.CharField(max_length=5, default='en')
+    # 사진은 요청 시 저장소에 올리고 키만 작업에 전달 (브로커로 원본을 보내지 않음)
+    image_key = models.CharField(max_length=120, blank=True, default='')
+    thumbnail_key = models.CharField(max_length=120, blank=True, default='')
+    food_analysis = models.ForeignKey(FoodAnalysis, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    # 워커가 가져간 시각 / 시도 횟수 - FOOD_ANALYSIS_JOB_TIMEOUT이 지난 running 작업은 다시 실행
+    attempts = models.PositiveSmallIntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = '음식 분석 작업'
+        verbose_name_plural = '음식 분석 작업 목록'
+        ordering = ['-created_at']
+        indexes = [
+            # 멈춘 작업 정리 (status + 시각 범위)
+            models.Index(fields=['status', 'created_at'], name='foodanalysisjob_status'),
+        ]
+
 # 일일 영양 기록
 class DailyNutrition(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_nutrition')
@@ -183,9 +240,67 @@ class DailyNutrition(models.Model):
     class Meta:
         verbose_name = "일일 영양 기록"
         verbose_name_plural = "일일 영양 기록 목록"
+        # (user, date) 유니크 인덱스가 날짜 순 목록 / 커서 페이지네이션 인덱스를 겸함
         unique_together = [['user', 'date']]
         ordering = ['-date']
 
+# 일일 추천 (야간 Celery 배치로 미리 계산)
+class DailyRecommendation(models.Model):
+    """사용자별 날짜별 추천 - 엔드포인트는 (user, date) 인덱스로 한 번만 조회"""
+    SOURCE_CHOICES = [
+        ('ai', 'AI'),
+        ('rule', '규칙 기반'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_recommendations')
+    date = models.DateField()
+    payload = models.JSONField(help_text='exercise/nutrition/wellness 추천 응답')
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='rule')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = '일일 추천'
+        verbose_name_plural = '일일 추천 목록'
+        unique_together = [['user', 'date']]
+        ordering = ['-date']
+
+# 사용자별 일/주/월 활동 롤업 (기록 시 증분 갱신, rebuild_activity_rollups로 백필)
+class ActivityRollup(models.Model):
+    """기간별 영양 합계 / 음식 수 / 운동 시간·칼로리 - 추세 차트는 기간당 한 행만 읽음"""
+    PERIOD_CHOICES = [
+        ('day', '일'),
+        ('week', '주'),
+        ('month', '월'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_rollups')
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField(help_text='일: 해당 날짜, 주: 월요일, 월: 1일')
+    
+    # 영양 (DailyNutrition 합계 기준)
+    total_calories = models.IntegerField(default=0)
+    total_protein = models.FloatField(default=0)
+    total_carbohydrates = models.FloatField(default=0)
+    total_fat = models.FloatField(default=0)
+    food_count = models.IntegerField(default=0)
+    nutrition_days = models.IntegerField(default=0, help_text='영양 기록이 있는 날 수')
+    
+    # 운동 (WorkoutLog 기준)
+    workout_count = models.IntegerField(default=0)
+    workout_minutes = models.IntegerField(default=0)
+    workout_calories = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = '활동 롤업'
+        verbose_name_plural = '활동 롤업 목록'
+        unique_together = [['user', 'period', 'period_start']]
+        ordering = ['-period_start']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.period} {self.period_start}"
+
 # WorkoutLog 모델 추가 (원본 프로젝트 참고)
 class WorkoutLog(models.Model):
     """운동 기록"""
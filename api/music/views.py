@@ -13,6 +13,46 @@ import os
 logger = logging.getLogger(__name__)
 
 
+KEYWORD_MODEL = "gpt-3.5-turbo"
+
+EXERCISE_NAMES_KO = {
+    'running': '달리기',
+    'walking': '걷기', 
+    'yoga': '요가',
+    'strength': '근력 운동',
+    'cycling': '자전거'
+}
+
+MOOD_NAMES_KO = {
+    'energetic': '활기찬',
+    'calm': '차분한',
+    'focused': '집중된',
+    'relaxed': '편안한',
+    'pumped': '흥분된'
+}
+
+
+def build_keyword_prompt(exercise, mood):
+    """운동/기분에 맞는 음악 키워드 프롬프트 생성"""
+    # 운동 종류와 기분을 한글로 변환
+    exercise_ko = EXERCISE_NAMES_KO.get(exercise, exercise)
+    mood_ko = MOOD_NAMES_KO.get(mood, mood)
+    
+    return f"""
+    {exercise_ko} 운동을 할 때 '{mood_ko}' 기분에 잘 어울리는 음악 키워드를 5개 추천해줘.
+    
+    - 각 키워드는 유튜브에서 검색했을 때 음악/플레이리스트가 잘 나오도록 구성
+    - 장르, BPM, 분위기 등을 고려해서 추천
+    - 각 키워드는 한 줄씩, 번호나 설명 없이 키워드만 출력
+    """
+
+
+def parse_keywords(content):
+    """LLM 응답에서 키워드 목록 추출 (최대 5개)"""
+    keywords = [line.strip() for line in content.strip().split('\n') if line.strip()]
+    return keywords[:5]
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def get_ai_keywords(request):
@@ -29,45 +69,18 @@ def get_ai_keywords(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # 운동 종류를 한글로 변환
-    exercise_ko = {
-        'running': '달리기',
-        'walking': '걷기', 
-        'yoga': '요가',
-        'strength': '근력 운동',
-        'cycling': '자전거'
-    }.get(exercise, exercise)
-    
-    # 기분을 한글로 변환
-    mood_ko = {
-        'energetic': '활기찬',
-        'calm': '차분한',
-        'focused': '집중된',
-        'relaxed': '편안한',
-        'pumped': '흥분된'
-    }.get(mood, mood)
-    
-    prompt = f"""
-    {exercise_ko} 운동을 할 때 '{mood_ko}' 기분에 잘 어울리는 음악 키워드를 5개 추천해줘.
-    
-    - 각 키워드는 유튜브에서 검색했을 때 음악/플레이리스트가 잘 나오도록 구성
-    - 장르, BPM, 분위기 등을 고려해서 추천
-    - 각 키워드는 한 줄씩, 번호나 설명 없이 키워드만 출력
-    """
+    prompt = build_keyword_prompt(exercise, mood)
     
     try:
         client = OpenAI(api_key=settings.OPENAI_API_KEY)
         
         response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+            model=KEYWORD_MODEL,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7
         )
         
-        content = response.choices[0].message.content
-        keywords = [line.strip() for line in content.strip().split('\n') if line.strip()]
-        
-        return Response({'keywords': keywords[:5]})
+        return Response({'keywords': parse_keywords(response.choices[0].message.content)})
         
     except Exception as e:
         logger.error(f"OpenAI API error: {str(e)}")
@@ -0,0 +1,24 @@
+"""
+커서(키셋) 페이지네이션 - 정렬 컬럼 위치 기준으로 다음 페이지를 조회하므로
+OFFSET 없이 (user, 정렬 컬럼) 인덱스 범위 스캔 한 번으로 페이지를 읽습니다.
+기록이 수년치 쌓여도 페이지 비용이 일정합니다.
+
+응답 형식: {"next": <url|null>, "previous": <url|null>, "results": [...]}
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class HealthCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class FoodAnalysisCursorPagination(HealthCursorPagination):
+    """음식 분석 기록 (최근 분석 순, FoodAnalysis(user, analyzed_at) 인덱스)"""
+    ordering = '-analyzed_at'
+
+
+class DailyNutritionCursorPagination(HealthCursorPagination):
+    """일일 영양 기록 (최근 날짜 순, DailyNutrition(user, date) 유니크 인덱스)"""
+    ordering = '-date'
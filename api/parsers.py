@@ -0,0 +1,61 @@
+"""
+음식 사진 업로드 파서 / 업로드 핸들러
+
+JSON의 image_base64는 사진을 33% 부풀리고, JSONParser가 요청 본문 전체와 디코딩한 문자열을 메모리에 올립니다.
+사진 분석 엔드포인트는 다음 두 방식도 받습니다.
+
+- multipart/form-data: image 파일 필드 + food_name/description 폼 필드
+- 바이너리 본문: Content-Type: image/jpeg 등, food_name/description은 쿼리 파라미터
+
+어느 쪽이든 SpooledFileUploadHandler가 청크 단위로 SpooledTemporaryFile에 기록하므로
+FOOD_IMAGE_SPOOL_MEMORY_SIZE를 넘는 사진은 메모리 대신 임시 파일에 쌓입니다.
+"""
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework.parsers import DataAndFiles, FileUploadParser
+
+
+class SpooledFileUploadHandler(FileUploadHandler):
+    """업로드 파일을 SpooledTemporaryFile로 받기 (작은 파일은 메모리, 큰 파일은 디스크)"""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = SpooledTemporaryFile(max_size=getattr(settings, 'FOOD_IMAGE_SPOOL_MEMORY_SIZE', 1024 * 1024))
+
+    def receive_data_chunk(self, raw_data, start):
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        return UploadedFile(
+            file=self.file,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+        )
+
+
+def use_spooled_uploads(request):
+    """요청 본문을 읽기 전에 호출 - 이 요청의 업로드 파일을 SpooledFileUploadHandler로 받음"""
+    request._request.upload_handlers = [SpooledFileUploadHandler(request._request)]
+
+
+class ImageUploadParser(FileUploadParser):
+    """
+    Content-Type: image/* 바이너리 본문을 'image' 파일로 파싱
+
+    DRF FileUploadParser는 Content-Disposition의 파일 이름이 필수지만 사진 본문에는 기본 이름을 붙입니다.
+    """
+    media_type = 'image/*'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parsed = super().parse(stream, media_type, parser_context)
+        return DataAndFiles({}, {'image': parsed.files['file']})
+
+    def get_filename(self, stream, media_type, parser_context):
+        return super().get_filename(stream, media_type, parser_context) or 'upload'
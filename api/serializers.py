@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
 from .models import (
     UserProfile, FoodAnalysis, DailyNutrition, Exercise, WorkoutRoutine,
@@ -6,6 +7,7 @@ from .models import (
     PostLike, PostComment, HealthConsultation, WorkoutLog,
     ChatSession, ChatMessage
 )
+from .services.image_storage import image_url
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -131,27 +133,58 @@ class HealthConsultationSerializer(serializers.ModelSerializer):
 
 
 class FoodAnalysisSerializer(serializers.ModelSerializer):
+    image_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+    
     class Meta:
         model = FoodAnalysis
         fields = [
-            'id', 'food_name', 'description', 'image_url', 'calories',
+            'id', 'food_name', 'description', 'image_url', 'thumbnail_url', 'calories',
             'protein', 'carbohydrates', 'fat', 'fiber', 'sugar', 'sodium',
             'analysis_summary', 'recommendations', 'analyzed_at'
         ]
         read_only_fields = ['id', 'analyzed_at']
+    
+    def get_image_url(self, obj):
+        # 저장소에 올린 사진이 있으면 저장소 URL, 없으면 외부 URL
+        return image_url(obj.image_key) or obj.image_url
+    
+    def get_thumbnail_url(self, obj):
+        return image_url(obj.thumbnail_key)
 
 
 class FoodAnalysisRequestSerializer(serializers.Serializer):
     food_name = serializers.CharField(required=False, allow_blank=True)
     description = serializers.CharField(required=False, allow_blank=True)
     image_base64 = serializers.CharField(required=False, allow_blank=True)
+    # multipart 파일 필드 또는 image/* 바이너리 본문 (base64 없이 바로 바이트로 사용)
+    image = serializers.FileField(required=False, allow_empty_file=False)
+    # True면 작업으로 등록하고 job id를 바로 반환 (로그인 사용자)
+    run_async = serializers.BooleanField(required=False, default=False)
+    
+    def validate_image(self, value):
+        max_bytes = getattr(settings, 'FOOD_IMAGE_MAX_UPLOAD_BYTES', 20 * 1024 * 1024)
+        if value.size > max_bytes:
+            raise serializers.ValidationError(f"이미지는 {max_bytes // (1024 * 1024)}MB 이하여야 합니다.")
+        return value
     
     def validate(self, attrs):
-        if not attrs.get('food_name') and not attrs.get('image_base64'):
+        if not attrs.get('food_name') and not attrs.get('image_base64') and not attrs.get('image'):
             raise serializers.ValidationError("음식 이름 또는 이미지 중 하나는 필수입니다.")
         return attrs
 
 
+class FoodAnalysisBatchRequestSerializer(serializers.Serializer):
+    """여러 음식/사진 일괄 분석 요청"""
+    items = FoodAnalysisRequestSerializer(many=True, allow_empty=False)
+    
+    def validate_items(self, value):
+        max_items = getattr(settings, 'FOOD_BATCH_MAX_ITEMS', 8)
+        if len(value) > max_items:
+            raise serializers.ValidationError(f"한 번에 최대 {max_items}개까지 분석할 수 있습니다.")
+        return value
+
+
 class DailyNutritionSerializer(serializers.ModelSerializer):
     food_analyses = FoodAnalysisSerializer(many=True, read_only=True)
     
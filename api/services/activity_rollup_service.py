@@ -0,0 +1,273 @@
+"""
+활동 롤업 서비스 - 사용자별 일/주/월 영양·운동 합계 유지
+
+음식 추가/삭제와 운동 기록 생성/수정/삭제 시 해당 날짜가 속한 일·주·월 행 3개를
+F() 증감으로 갱신합니다 (쿼리 2개, 기록 수와 무관).
+추세 조회는 기간을 월/주/일 행으로 덮어 읽으므로 12개월 차트도 12~52행만 읽습니다.
+
+증분 갱신이 어긋나거나(QuerySet.update 같은 직접 수정 등) 기존 데이터를 채울 때는
+rebuild_rollups가 원본 기록에서 다시 계산합니다.
+
+증감 갱신과 재계산은 같은 사용자 행 잠금(User select_for_update)을 잡으므로,
+재계산이 원본을 읽은 뒤 행을 교체하는 사이에 들어온 증감이 지워지지 않습니다.
+"""
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from ..models import ActivityRollup, DailyNutrition, WorkoutLog
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ('day', 'week', 'month')
+
+NUTRITION_FIELDS = ('total_calories', 'total_protein', 'total_carbohydrates', 'total_fat',
+                    'food_count', 'nutrition_days')
+WORKOUT_FIELDS = ('workout_count', 'workout_minutes', 'workout_calories')
+ROLLUP_FIELDS = NUTRITION_FIELDS + WORKOUT_FIELDS
+
+
+def period_start(period: str, day: date) -> date:
+    """날짜가 속한 기간의 시작일 (주는 월요일 시작)"""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_period_start(period: str, start: date) -> date:
+    if period == 'week':
+        return start + timedelta(days=7)
+    if period == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def _period_keys(day: date) -> Q:
+    match = Q()
+    for period in PERIODS:
+        match |= Q(period=period, period_start=period_start(period, day))
+    return match
+
+
+def _lock_users(user_ids: Iterable[int]):
+    """사용자 행 잠금 (트랜잭션 끝까지 유지, 교착 방지를 위해 ID 순서로)"""
+    list(User.objects.select_for_update().filter(id__in=list(user_ids)).order_by('id').values_list('id', flat=True))
+
+
+def apply_delta(user_id: int, day: date, deltas: Dict[str, float]):
+    """날짜가 속한 일·주·월 롤업 행에 증감 반영 (행이 없으면 생성)"""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    with transaction.atomic():
+        # 진행 중인 rebuild_rollups가 있으면 교체가 끝난 뒤 새 행에 반영
+        _lock_users([user_id])
+        ActivityRollup.objects.bulk_create(
+            [ActivityRollup(user_id=user_id, period=period, period_start=period_start(period, day))
+             for period in PERIODS],
+            ignore_conflicts=True
+        )
+        ActivityRollup.objects.filter(_period_keys(day), user_id=user_id).update(
+            **{field: F(field) + value for field, value in deltas.items()}
+        )
+
+
+def record_food(user_id: int, day: date, food_analysis, sign: int = 1, new_day: bool = False):
+    """음식 분석 추가(sign=1)/삭제(sign=-1)를 롤업에 반영"""
+    record_foods(user_id, day, [food_analysis], sign, new_day)
+
+
+def record_foods(user_id: int, day: date, food_analyses: Iterable, sign: int = 1, new_day: bool = False):
+    """같은 날짜의 음식 분석 여러 건을 한 번의 증감으로 롤업에 반영"""
+    food_analyses = list(food_analyses)
+    apply_delta(user_id, day, {
+        # DailyNutrition.total_calories와 같이 정수로 저장
+        'total_calories': sign * sum(int(food.calories or 0) for food in food_analyses),
+        'total_protein': sign * sum(food.protein or 0 for food in food_analyses),
+        'total_carbohydrates': sign * sum(food.carbohydrates or 0 for food in food_analyses),
+        'total_fat': sign * sum(food.fat or 0 for food in food_analyses),
+        'food_count': sign * len(food_analyses),
+        'nutrition_days': 1 if new_day else 0,
+    })
+
+
+def _workout_day(workout_log) -> date:
+    # create()에 문자열 날짜가 전달된 경우 인스턴스에는 문자열이 남아 있음
+    return WorkoutLog._meta.get_field('date').to_python(workout_log.date)
+
+
+def record_workout(workout_log, sign: int = 1):
+    """운동 기록 생성(sign=1)/삭제(sign=-1)를 롤업에 반영"""
+    apply_delta(workout_log.user_id, _workout_day(workout_log), {
+        'workout_count': sign,
+        'workout_minutes': sign * (workout_log.duration or 0),
+        'workout_calories': sign * (workout_log.calories_burned or 0),
+    })
+
+
+def update_workout(previous, workout_log):
+    """운동 기록 수정을 롤업에 반영 (같은 사용자/날짜면 차이만, 아니면 이전 값 차감 후 새 값 추가)"""
+    if previous.user_id != workout_log.user_id or _workout_day(previous) != _workout_day(workout_log):
+        record_workout(previous, -1)
+        record_workout(workout_log, 1)
+        return
+    apply_delta(workout_log.user_id, _workout_day(workout_log), {
+        'workout_minutes': (workout_log.duration or 0) - (previous.duration or 0),
+        'workout_calories': (workout_log.calories_burned or 0) - (previous.calories_burned or 0),
+    })
+
+
+def _empty_totals() -> Dict:
+    return {field: 0 for field in ROLLUP_FIELDS}
+
+
+def cover_range(start_date: date, end_date: date) -> List[Tuple[str, date]]:
+    """기간을 가장 적은 수의 월/주/일 롤업 행으로 덮는 (period, period_start) 목록"""
+    keys = []
+    cursor = start_date
+    while cursor <= end_date:
+        if cursor.day == 1 and next_period_start('month', cursor) - timedelta(days=1) <= end_date:
+            period = 'month'
+        elif cursor.weekday() == 0 and cursor + timedelta(days=6) <= end_date:
+            period = 'week'
+        else:
+            period = 'day'
+        keys.append((period, cursor))
+        cursor = next_period_start(period, cursor)
+    return keys
+
+
+def range_totals(user, start_date: date, end_date: date) -> Dict:
+    """임의 기간 합계 (쿼리 한 번, 1년 범위도 수십 행 이내)"""
+    starts = defaultdict(list)
+    for period, start in cover_range(start_date, end_date):
+        starts[period].append(start)
+    match = Q()
+    for period, period_starts in starts.items():
+        match |= Q(period=period, period_start__in=period_starts)
+
+    totals = _empty_totals()
+    if not starts:
+        return totals
+    for row in ActivityRollup.objects.filter(match, user=user).values(*ROLLUP_FIELDS):
+        for field in ROLLUP_FIELDS:
+            totals[field] += row[field]
+    return totals
+
+
+def rollup_series(user, period: str, count: int, end_date: Optional[date] = None) -> List[Dict]:
+    """최근 count개 기간의 롤업 (기록 없는 기간은 0으로 채움)"""
+    end_date = end_date or date.today()
+    starts = [period_start(period, end_date)]
+    for _ in range(count - 1):
+        starts.append(period_start(period, starts[-1] - timedelta(days=1)))
+    starts.reverse()
+
+    rows = {
+        row['period_start']: row
+        for row in ActivityRollup.objects.filter(
+            user=user, period=period, period_start__gte=starts[0], period_start__lte=starts[-1]
+        ).values('period_start', *ROLLUP_FIELDS)
+    }
+    series = []
+    for start in starts:
+        row = rows.get(start) or _empty_totals()
+        series.append(dict({field: row[field] for field in ROLLUP_FIELDS}, period_start=start.isoformat()))
+    return series
+
+
+def _chunked(ids: Iterable[int], size: int):
+    ids = list(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _rebuild_users(user_ids: List[int], since: Optional[date]) -> int:
+    # 원본 조회부터 행 교체까지 사용자 잠금을 유지 (그 사이 apply_delta는 대기 후 교체된 행에 반영)
+    with transaction.atomic():
+        _lock_users(user_ids)
+        buckets = _compute_buckets(user_ids, since)
+        _replace_rollups(user_ids, since, buckets)
+    return len(buckets)
+
+
+def _cutoffs(since: Optional[date]) -> Dict[str, date]:
+    # 기간 종류마다 since가 속한 기간 시작부터 다시 계산
+    return {period: period_start(period, since) for period in PERIODS} if since else {}
+
+
+def _compute_buckets(user_ids: List[int], since: Optional[date]) -> Dict:
+    cutoffs = _cutoffs(since)
+    read_from = min(cutoffs.values()) if cutoffs else None
+
+    nutrition = DailyNutrition.objects.filter(user_id__in=user_ids)
+    workouts = WorkoutLog.objects.filter(user_id__in=user_ids)
+    if read_from:
+        nutrition = nutrition.filter(date__gte=read_from)
+        workouts = workouts.filter(date__gte=read_from)
+
+    buckets = defaultdict(_empty_totals)
+
+    def add(user_id, day, values):
+        for period in PERIODS:
+            start = period_start(period, day)
+            if cutoffs and start < cutoffs[period]:
+                continue
+            bucket = buckets[(user_id, period, start)]
+            for field, value in values.items():
+                bucket[field] += value or 0
+
+    for row in nutrition.annotate(food_count=Count('food_analyses')).values(
+            'user_id', 'date', 'total_calories', 'total_protein', 'total_carbohydrates', 'total_fat', 'food_count'):
+        user_id, day = row.pop('user_id'), row.pop('date')
+        add(user_id, day, dict(row, nutrition_days=1))
+
+    for row in workouts.values('user_id', 'date').annotate(
+            workout_count=Count('id'), workout_minutes=Sum('duration'), workout_calories=Sum('calories_burned')):
+        user_id, day = row.pop('user_id'), row.pop('date')
+        add(user_id, day, row)
+    return buckets
+
+
+def _replace_rollups(user_ids: List[int], since: Optional[date], buckets: Dict):
+    cutoffs = _cutoffs(since)
+    stale = ActivityRollup.objects.filter(user_id__in=user_ids)
+    if cutoffs:
+        match = Q()
+        for period, cutoff in cutoffs.items():
+            match |= Q(period=period, period_start__gte=cutoff)
+        stale = stale.filter(match)
+    stale.delete()
+    ActivityRollup.objects.bulk_create([
+        ActivityRollup(user_id=user_id, period=period, period_start=start, **values)
+        for (user_id, period, start), values in buckets.items()
+    ], batch_size=1000)
+
+
+def rebuild_rollups(user_ids: Optional[Iterable[int]] = None, since: Optional[date] = None,
+                    chunk_size: int = 200) -> Dict:
+    """
+    원본 기록(DailyNutrition, WorkoutLog)에서 롤업을 다시 계산 (백필 / 정합성 복구)
+
+    since를 주면 since가 속한 일·주·월 기간부터만 교체합니다.
+    사용자 청크마다 한 트랜잭션에서 사용자 잠금 + 조회 2개 + 삭제 + bulk_create로 처리합니다.
+    """
+    if user_ids is None:
+        # 원본 기록이 모두 삭제된 사용자의 롤업도 정리되도록 포함
+        user_ids = set()
+        for model in (DailyNutrition, WorkoutLog, ActivityRollup):
+            user_ids.update(model.objects.values_list('user_id', flat=True).distinct())
+    users = 0
+    rows = 0
+    for chunk in _chunked(sorted(user_ids), chunk_size):
+        rows += _rebuild_users(chunk, since)
+        users += len(chunk)
+    logger.info(f"Activity rollups rebuilt: {users} users, {rows} rows (since={since})")
+    return {'users': users, 'rows': rows}
@@ -0,0 +1,104 @@
+"""
+분석 토큰 - "분석만" 요청의 결과와 사진을 서버에 잠시 보관
+
+프론트엔드는 ai_nutrition_analysis_only로 사진을 분석한 뒤 사용자가 확인하면 nutrition_complete로 저장합니다.
+예전에는 저장 요청에도 같은 image_base64(수 MB JSON)를 다시 보냈지만, 이제 분석 단계에서
+결과를 캐시(운영 환경은 Redis, TTL)에 토큰으로 보관하고 저장 단계는 토큰만 보내면 됩니다.
+사진 업로드/파싱이 식사당 한 번으로 줄어듭니다.
+
+원본 사진(최대 FOOD_IMAGE_MAX_UPLOAD_BYTES)은 캐시에 넣지 않습니다.
+- 영구 저장소: 분석 시점에 저장소에 올리고 키만 보관 (저장하지 않은 사진은 delete_orphan_images가 정리)
+- 그 외: 비전 모델용으로 축소한 JPEG만 보관, ANALYSIS_TOKEN_MAX_IMAGE_BYTES를 넘으면 토큰을 만들지 않음
+
+토큰은 한 번만 사용할 수 있습니다 (같은 토큰으로 두 번 저장되지 않도록 꺼낼 때 삭제).
+"""
+import logging
+import secrets
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .image_preprocessing import preprocess_image
+from .image_storage import durable_storage, mark_pending_image, upload_image
+
+logger = logging.getLogger(__name__)
+
+TOKEN_KEY_PREFIX = 'analysis-token'
+
+
+def _key(token: str) -> str:
+    return f"{TOKEN_KEY_PREFIX}:{token}"
+
+
+def token_ttl() -> int:
+    return getattr(settings, 'ANALYSIS_TOKEN_TTL', 1800)
+
+
+def _stash_image(image_data: Optional[bytes]) -> Optional[Dict]:
+    """토큰에 넣을 사진 - 저장소 키 또는 축소 사진 바이트 (보관할 수 없으면 None)"""
+    if not image_data:
+        return {'image_keys': None, 'image': None}
+    if durable_storage():
+        try:
+            image_keys = upload_image(image_data)
+            # 토큰이 살아 있는 동안 정리 작업이 지우지 않도록 표시 (같은 사진이 예전에 올라와 있던 경우 포함)
+            mark_pending_image(image_keys['image_key'], token_ttl())
+            return {'image_keys': image_keys, 'image': None}
+        except Exception as e:
+            logger.warning(f"Analysis image upload failed, stashing resized image: {str(e)}")
+    resized = preprocess_image(
+        image_data, getattr(settings, 'VISION_IMAGE_MAX_SIDE', 1024), getattr(settings, 'VISION_IMAGE_QUALITY', 85)
+    ).data
+    if len(resized) > getattr(settings, 'ANALYSIS_TOKEN_MAX_IMAGE_BYTES', 2 * 1024 * 1024):
+        return None
+    return {'image_keys': None, 'image': resized}
+
+
+def stash_analysis(user, food: Dict, nutrition_payload: Dict, image_data: Optional[bytes]) -> Optional[str]:
+    """
+    분석 결과와 사진을 보관하고 토큰 반환
+
+    캐시를 쓸 수 없거나 사진을 보관할 수 없으면 None (클라이언트는 예전처럼 사진을 다시 보냄)
+    """
+    image = _stash_image(image_data)
+    if image is None:
+        return None
+    token = secrets.token_urlsafe(24)
+    stash = {
+        'user_id': user.id if user.is_authenticated else None,
+        'food_name': food.get('food_name', ''),
+        'description': food.get('description', ''),
+        'nutrition': nutrition_payload,
+        **image,
+    }
+    try:
+        cache.set(_key(token), stash, token_ttl())
+    except Exception as e:
+        logger.warning(f"Analysis token stash failed: {str(e)}")
+        return None
+    return token
+
+
+def pop_analysis(token: str, user) -> Optional[Dict]:
+    """
+    토큰의 보관 내용을 꺼내고 삭제 (만료/이미 사용/다른 사용자의 토큰이면 None)
+
+    게스트가 분석한 토큰은 로그인 후 저장할 수 있도록 누구나 사용할 수 있습니다 (추측 불가능한 토큰).
+    """
+    if not token:
+        return None
+    key = _key(token)
+    try:
+        stash = cache.get(key)
+        if stash is None:
+            return None
+        if stash['user_id'] is not None and stash['user_id'] != user.id:
+            return None
+        # 삭제에 성공한 요청만 사용 (동시에 두 번 저장 요청이 와도 한 번만 저장)
+        if not cache.delete(key):
+            return None
+    except Exception as e:
+        logger.warning(f"Analysis token lookup failed: {str(e)}")
+        return None
+    return stash
@@ -0,0 +1,58 @@
+"""
+챗봇 대화 기록 서비스 - 사용자 컨텍스트 수집 및 대화 저장
+"""
+import logging
+from typing import Dict, Optional
+
+from ..models import ChatMessage, ChatSession, UserProfile
+
+logger = logging.getLogger(__name__)
+
+
+def build_user_data(user) -> Dict:
+    """챗봇 요청용 사용자 정보 수집 (프로필 포함)"""
+    user_data = {
+        'user_id': user.id if user.is_authenticated else 'guest',
+        'username': user.username if user.is_authenticated else 'Guest',
+        'is_authenticated': user.is_authenticated
+    }
+
+    if user.is_authenticated:
+        try:
+            profile = UserProfile.objects.get(user=user)
+            user_data.update({
+                'birth_date': profile.birth_date,
+                'gender': profile.gender,
+                'height': profile.height,
+                'weight': profile.weight,
+                'diseases': profile.diseases,
+                'allergies': profile.allergies,
+                'fitness_level': profile.fitness_level
+            })
+        except UserProfile.DoesNotExist:
+            logger.warning(f"No profile found for user {user.username}")
+
+    return user_data
+
+
+def get_active_session(user) -> ChatSession:
+    """사용자의 활성 챗봇 세션 조회 (없으면 생성)"""
+    session = ChatSession.objects.filter(user=user, is_active=True).first()
+    if session:
+        return session
+
+    session_number = ChatSession.objects.filter(user=user).count() + 1
+    return ChatSession.objects.create(user=user, user_session_number=session_number)
+
+
+def save_chat_exchange(user, question: str, answer: str, context: Optional[Dict] = None) -> Optional[ChatSession]:
+    """질문/답변 한 쌍을 활성 세션에 저장 (게스트는 저장하지 않음)"""
+    if not user or not user.is_authenticated or not answer:
+        return None
+
+    session = get_active_session(user)
+    ChatMessage.objects.bulk_create([
+        ChatMessage(user=user, session=session, sender='user', message=question),
+        ChatMessage(user=user, session=session, sender='bot', message=answer, context=context or {}),
+    ])
+    return session
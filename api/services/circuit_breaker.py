@@ -0,0 +1,155 @@
+"""
+공급자별 서킷 브레이커 - 장애 중인 LLM 공급자 호출을 즉시 차단
+
+상태:
+  - closed   : 정상. 최근 호출의 실패율(느린 호출 포함)이 기준을 넘으면 open
+  - open     : 호출 차단 (CircuitOpenError). open_seconds가 지나면 half_open
+  - half_open: 시험 호출 몇 개만 허용 - 성공하면 closed, 실패하면 다시 open
+
+타임아웃(15초) + 재시도를 매번 기다리지 않고 호출 측의 기본 응답(폴백)을 바로 반환하게 합니다.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 호출하지 않음"""
+
+    def __init__(self, name: str, retry_after: float = 0):
+        super().__init__(f"{name} circuit is open (retry in {retry_after:.0f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, window: int = 20, min_calls: int = 5, failure_rate: float = 0.5,
+                 slow_call_seconds: float = 10.0, open_seconds: float = 30.0, half_open_calls: int = 1):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._outcomes = deque(maxlen=window)  # True = 실패(오류 또는 느린 호출)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._trips = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def available(self) -> bool:
+        """호출 가능 여부 확인만 (시험 호출 슬롯을 차지하지 않음 - 라우팅 판단용)"""
+        with self._lock:
+            state = self._current_state()
+            return state == CLOSED or (state == HALF_OPEN and self._probes < self.half_open_calls)
+
+    def allow(self) -> bool:
+        """호출 허용 여부 (half_open이면 시험 호출 슬롯 차지)"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._current_state() != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def record(self, latency: float, success: bool):
+        failed = not success or latency >= self.slow_call_seconds
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if failed:
+                    self._trip()
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    logger.info(f"Circuit {self.name} closed")
+                return
+
+            self._outcomes.append(failed)
+            if state == CLOSED and len(self._outcomes) >= self.min_calls:
+                rate = sum(self._outcomes) / len(self._outcomes)
+                if rate >= self.failure_rate:
+                    self._trip()
+
+    def abandon(self):
+        """결과 없이 중단된 호출 (헤징에서 진 요청 등) - 시험 호출 슬롯만 반환"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probes = 0
+        self._trips += 1
+        self._outcomes.clear()
+        logger.warning(f"Circuit {self.name} opened for {self.open_seconds}s")
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            state = self._current_state()
+            outcomes = list(self._outcomes)
+        return {
+            'state': state,
+            'recent_calls': len(outcomes),
+            'failure_rate': round(sum(outcomes) / len(outcomes), 3) if outcomes else None,
+            'trips': self._trips,
+            'retry_after': round(self.retry_after(), 1),
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """이름(공급자)별 서킷 브레이커 (싱글톤)"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = _breakers[name] = CircuitBreaker(
+                    name,
+                    window=getattr(settings, 'LLM_CIRCUIT_WINDOW', 20),
+                    min_calls=getattr(settings, 'LLM_CIRCUIT_MIN_CALLS', 5),
+                    failure_rate=getattr(settings, 'LLM_CIRCUIT_FAILURE_RATE', 0.5),
+                    slow_call_seconds=getattr(settings, 'LLM_CIRCUIT_SLOW_CALL_SECONDS', 10.0),
+                    open_seconds=getattr(settings, 'LLM_CIRCUIT_OPEN_SECONDS', 30.0),
+                )
+    return breaker
+
+
+def circuit_states() -> Dict[str, Dict]:
+    return {name: breaker.snapshot() for name, breaker in sorted(_breakers.items())}
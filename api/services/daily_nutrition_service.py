@@ -0,0 +1,133 @@
+"""
+일일 영양 합계 서비스 - 음식 추가/삭제 시 F() 증감으로 합계 갱신 + 주기적 정합성 검사
+
+음식 한 건을 기록할 때마다 그날의 음식 전체를 다시 합산하지 않고,
+해당 음식의 영양소만큼 원자적으로 더하거나 빼므로 쿼리 수가 하루 음식 수와 무관합니다.
+증감 갱신이 어긋나는 경우(직접 수정, 부분 실패 등)는 reconcile_daily_nutrition이
+M2M 합계와 일괄 비교하여 바로잡습니다.
+같은 트랜잭션에서 일/주/월 활동 롤업(activity_rollup_service)도 함께 증감합니다.
+"""
+import logging
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import F, FloatField, Sum, Value
+from django.db.models.functions import Coalesce
+
+from ..models import DailyNutrition, FoodAnalysis
+from .activity_rollup_service import record_food, record_foods
+
+logger = logging.getLogger(__name__)
+
+# (DailyNutrition 필드, FoodAnalysis 필드)
+TOTAL_FIELDS = (
+    ('total_calories', 'calories'),
+    ('total_protein', 'protein'),
+    ('total_carbohydrates', 'carbohydrates'),
+    ('total_fat', 'fat'),
+)
+
+# 부동소수점 누적 오차는 드리프트로 보지 않음
+DRIFT_TOLERANCE = 0.01
+
+
+def _delta_updates(food_analyses: Iterable[FoodAnalysis], sign: int) -> Dict:
+    food_analyses = list(food_analyses)
+    updates = {}
+    for total_field, food_field in TOTAL_FIELDS:
+        value = 0
+        for food_analysis in food_analyses:
+            amount = getattr(food_analysis, food_field) or 0
+            if total_field == 'total_calories':
+                # 저장 직후 객체에는 실수가 남아 있을 수 있으므로 IntegerField 저장 시와 같이 int() 변환
+                amount = int(amount)
+            value += amount
+        updates[total_field] = F(total_field) + sign * value
+    return updates
+
+
+def add_food_to_daily(user, food_analysis: FoodAnalysis, day: Optional[date] = None,
+                      refresh: bool = False) -> DailyNutrition:
+    """
+    음식 분석을 해당 날짜 영양 기록에 추가하고 합계를 증분 갱신
+
+    refresh=True이면 갱신된 합계를 다시 읽어 반환 객체에 반영합니다 (응답에 합계가 필요할 때).
+    """
+    return add_foods_to_daily(user, [food_analysis], day, refresh)
+
+
+def add_foods_to_daily(user, food_analyses: List[FoodAnalysis], day: Optional[date] = None,
+                       refresh: bool = False) -> DailyNutrition:
+    """
+    음식 분석 여러 건(한 끼의 여러 음식)을 한 번에 추가
+
+    건수와 무관하게 M2M 연결 INSERT 한 번, 합계 UPDATE 한 번, 롤업 갱신 한 번입니다.
+    """
+    day = day or date.today()
+    with transaction.atomic():
+        daily_nutrition, created = DailyNutrition.objects.get_or_create(user=user, date=day)
+        daily_nutrition.food_analyses.add(*food_analyses)
+        DailyNutrition.objects.filter(pk=daily_nutrition.pk).update(**_delta_updates(food_analyses, 1))
+        record_foods(user.id, day, food_analyses, 1, new_day=created)
+    if refresh:
+        daily_nutrition.refresh_from_db(fields=[total_field for total_field, _ in TOTAL_FIELDS])
+    return daily_nutrition
+
+
+def remove_food_from_daily(food_analysis: FoodAnalysis) -> int:
+    """음식 분석이 포함된 모든 일일 기록에서 제거하고 합계를 차감 (영향받은 기록 수 반환)"""
+    through = DailyNutrition.food_analyses.through
+    with transaction.atomic():
+        links = through.objects.filter(foodanalysis_id=food_analysis.pk)
+        daily_records = list(links.values_list('dailynutrition_id', 'dailynutrition__user_id', 'dailynutrition__date'))
+        if not daily_records:
+            return 0
+        links.delete()
+        DailyNutrition.objects.filter(pk__in=[pk for pk, _, _ in daily_records]).update(
+            **_delta_updates([food_analysis], -1)
+        )
+        for _, user_id, day in daily_records:
+            record_food(user_id, day, food_analysis, -1)
+    return len(daily_records)
+
+
+def reconcile_daily_nutrition(since: Optional[date] = None, fix: bool = True, batch_size: int = 500) -> Dict:
+    """
+    저장된 합계와 실제 음식 합계를 일괄 비교하여 어긋난 기록 수정
+
+    기록 조회는 M2M 합계를 annotate한 쿼리 하나(청크 단위)이고, 수정은 bulk_update로 처리합니다.
+    """
+    records = DailyNutrition.objects.all()
+    if since:
+        records = records.filter(date__gte=since)
+    records = records.annotate(**{
+        f'actual_{total_field}': Coalesce(Sum(f'food_analyses__{food_field}'), Value(0), output_field=FloatField())
+        for total_field, food_field in TOTAL_FIELDS
+    }).order_by('pk')
+
+    checked = 0
+    drifted = []
+    for record in records.iterator(chunk_size=batch_size):
+        checked += 1
+        changed = False
+        for total_field, _ in TOTAL_FIELDS:
+            actual = getattr(record, f'actual_{total_field}')
+            if abs((getattr(record, total_field) or 0) - actual) > DRIFT_TOLERANCE:
+                setattr(record, total_field, round(actual) if total_field == 'total_calories' else actual)
+                changed = True
+        if changed:
+            drifted.append(record)
+
+    if drifted:
+        logger.warning(f"DailyNutrition drift found in {len(drifted)} of {checked} records")
+        if fix:
+            DailyNutrition.objects.bulk_update(
+                drifted, [total_field for total_field, _ in TOTAL_FIELDS], batch_size=batch_size
+            )
+
+    return {'checked': checked, 'drifted': len(drifted), 'fixed': len(drifted) if fix else 0}
+
+
+def reconcile_recent(days: int = 7, fix: bool = True) -> Dict:
+    return reconcile_daily_nutrition(since=date.today() - timedelta(days=days), fix=fix)
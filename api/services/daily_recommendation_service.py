@@ -0,0 +1,259 @@
+"""
+일일 추천 사전 계산 서비스
+
+활성 사용자를 청크 단위로 나누어 프로필 / 최근 7일 운동 기록 / 최근 7일 영양 기록을
+청크당 몇 개의 쿼리로 한 번에 읽고, 다음 날 추천을 계산해 DailyRecommendation에 저장합니다.
+LLM 추천은 프로필 구간별 추천 캐시(recommendation_cache)를 거치므로 사용자 수만큼 호출되지 않습니다.
+
+recommendations_daily 엔드포인트는 (user, date) 인덱스로 저장된 추천을 한 번만 조회합니다.
+"""
+import hashlib
+import logging
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Avg, Count, Sum
+from django.utils import timezone
+
+from ..models import DailyNutrition, DailyRecommendation, UserProfile, WorkoutLog
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DAYS = 7
+CARDIO_TYPES = {'running', 'cycling', 'swimming', 'hiking', 'sports'}
+FLEXIBILITY_TYPES = {'yoga', 'pilates'}
+
+NUTRITION_TIPS = [
+    'Eat a balanced breakfast',
+    'Include lean protein in every meal',
+    'Choose whole grains over refined',
+    'Aim for 5 servings of fruits and vegetables'
+]
+DAILY_TIP = 'Remember to take breaks and stretch every hour if you\'re sitting for long periods.'
+EXERCISE_DESCRIPTION = 'Based on your recent activity, we recommend focusing on this type of exercise today.'
+
+
+def active_user_ids(active_days: Optional[int] = None) -> Iterator[int]:
+    """최근 active_days일 안에 로그인한 활성 사용자 ID (id 순)"""
+    active_days = active_days or getattr(settings, 'DAILY_RECOMMENDATION_ACTIVE_DAYS', 30)
+    since = timezone.now() - timedelta(days=active_days)
+    return User.objects.filter(is_active=True, last_login__gte=since).order_by('id').values_list('id', flat=True).iterator()
+
+
+def chunked(ids: Iterable[int], size: int) -> Iterator[List[int]]:
+    chunk = []
+    for user_id in ids:
+        chunk.append(user_id)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_contexts(user_ids: List[int], target_date: date) -> Dict[int, Dict]:
+    """청크 사용자들의 추천 입력을 한 번에 조회 (사용자 수와 무관하게 쿼리 4개)"""
+    since = target_date - timedelta(days=HISTORY_DAYS)
+    contexts = {
+        user.id: {'user_id': user.id, 'username': user.username, 'profile': None,
+                  'workouts': {'sessions': 0, 'minutes': 0, 'types': {}}, 'nutrition': None}
+        for user in User.objects.filter(id__in=user_ids).only('id', 'username')
+    }
+
+    for profile in UserProfile.objects.filter(user_id__in=user_ids):
+        contexts[profile.user_id]['profile'] = profile
+
+    workout_rows = (
+        WorkoutLog.objects.filter(user_id__in=user_ids, date__gte=since, date__lt=target_date)
+        .values('user_id', 'workout_type')
+        .annotate(sessions=Count('id'), minutes=Sum('duration'))
+    )
+    for row in workout_rows:
+        workouts = contexts[row['user_id']]['workouts']
+        workouts['sessions'] += row['sessions']
+        workouts['minutes'] += row['minutes'] or 0
+        workouts['types'][row['workout_type']] = row['sessions']
+
+    nutrition_rows = (
+        DailyNutrition.objects.filter(user_id__in=user_ids, date__gte=since, date__lt=target_date)
+        .values('user_id')
+        .annotate(days=Count('id'), calories=Avg('total_calories'), protein=Avg('total_protein'))
+    )
+    for row in nutrition_rows:
+        contexts[row['user_id']]['nutrition'] = row
+
+    return contexts
+
+
+def _age(profile: Optional[UserProfile], today: date) -> Optional[int]:
+    if not profile or not profile.birth_date:
+        return None
+    birth = profile.birth_date
+    return today.year - birth.year - ((today.month, today.day) < (birth.month, birth.day))
+
+
+def _stable_choice(options: List[str], *seed) -> str:
+    """사용자/날짜별로 고정된 선택 (재계산해도 같은 값)"""
+    digest = hashlib.md5(':'.join(str(s) for s in seed).encode()).hexdigest()
+    return options[int(digest[:8], 16) % len(options)]
+
+
+def target_calories(profile: Optional[UserProfile], sessions: int, today: date) -> int:
+    """Mifflin-St Jeor 기초대사량 x 활동 계수 (프로필이 없으면 2000kcal)"""
+    age = _age(profile, today)
+    if not profile or not profile.weight or not profile.height or age is None:
+        return 2000
+    bmr = 10 * profile.weight + 6.25 * profile.height - 5 * age + (5 if profile.gender == 'M' else -161)
+    activity = 1.2 if sessions == 0 else 1.375 if sessions < 4 else 1.55
+    return int(round(bmr * activity / 50) * 50)
+
+
+def compute_recommendation(context: Dict, target_date: date, ai: Optional[Dict] = None) -> Dict:
+    """사용자 컨텍스트로 추천 응답 계산 (기존 recommendations_daily 응답 형식)"""
+    profile = context['profile']
+    workouts = context['workouts']
+    nutrition = context['nutrition']
+    user_id = context['user_id']
+
+    # 운동: 최근 기록에서 부족한 유형 추천
+    sessions, minutes, types = workouts['sessions'], workouts['minutes'], workouts['types']
+    cardio = sum(count for t, count in types.items() if t in CARDIO_TYPES)
+    flexibility = sum(count for t, count in types.items() if t in FLEXIBILITY_TYPES)
+    if sessions == 0:
+        exercise_type = 'Cardio'
+    elif minutes > 300 or (sessions >= 5 and flexibility == 0):
+        exercise_type = 'Flexibility'  # 운동량이 많으면 회복 위주
+    elif cardio * 2 > sessions:
+        exercise_type = 'Strength'
+    elif cardio == 0:
+        exercise_type = 'Cardio'
+    else:
+        exercise_type = _stable_choice(['Strength', 'Balance', 'Cardio'], user_id, target_date)
+    average_minutes = minutes / sessions if sessions else 30
+    fitness_level = profile.fitness_level if profile else 'beginner'
+
+    exercise = {
+        'type': exercise_type,
+        'duration': int(min(60, max(30, round(average_minutes / 5) * 5))),
+        'intensity': 'high' if fitness_level == 'advanced' and sessions >= 3 and exercise_type != 'Flexibility' else 'moderate',
+        'description': EXERCISE_DESCRIPTION,
+    }
+
+    # 영양: 최근 평균 섭취량과 목표 칼로리 비교
+    calories_goal = target_calories(profile, sessions, target_date)
+    weight = profile.weight if profile and profile.weight else None
+    if not nutrition:
+        focus = _stable_choice(['More vegetables', 'Stay hydrated'], user_id, target_date)
+    elif nutrition['calories'] and nutrition['calories'] > calories_goal * 1.1:
+        focus = 'Reduce sugar'
+    elif weight and (nutrition['protein'] or 0) < weight * 0.8:
+        focus = 'Increase protein'
+    else:
+        focus = 'More vegetables'
+
+    nutrition_payload = {
+        'focus': focus,
+        'target_calories': calories_goal,
+        # 체중 1kg당 약 33ml, 250ml 컵 기준
+        'water_intake': int(min(12, max(8, round(weight * 33 / 250)))) if weight else 8,
+        'tips': list(NUTRITION_TIPS),
+    }
+
+    wellness = {
+        'sleep_target': 8 if minutes >= 150 or exercise['intensity'] == 'high' else 7,
+        'stress_relief': 'Yoga' if flexibility == 0 else _stable_choice(
+            ['Meditation', 'Deep breathing', 'Walk in nature'], user_id, target_date
+        ),
+        'daily_tip': DAILY_TIP,
+    }
+
+    if ai:
+        if ai.get('workout'):
+            exercise['description'] = ai['workout'].get('description') or exercise['description']
+            exercise['ai'] = ai['workout']
+        if ai.get('nutrition'):
+            nutrition_payload['ai'] = ai['nutrition']
+
+    return {
+        'date': target_date.strftime('%Y-%m-%d'),
+        'exercise': exercise,
+        'nutrition': nutrition_payload,
+        'wellness': wellness,
+    }
+
+
+def _ai_recommendations(chatbot, context: Dict) -> Optional[Dict]:
+    """프로필 구간 캐시를 거친 LLM 추천 (실패하면 None)"""
+    profile = context['profile']
+    if not chatbot or not profile:
+        return None
+    user_data = {
+        'birth_date': profile.birth_date,
+        'gender': profile.gender,
+        'height': profile.height,
+        'weight': profile.weight,
+        'allergies': profile.allergies,
+        'experience': profile.fitness_level,
+    }
+    ai = {}
+    workout = chatbot.generate_workout_recommendation(user_data)
+    if workout.get('success'):
+        ai['workout'] = workout['recommendation']
+    nutrition = chatbot.generate_nutrition_recommendation(user_data)
+    if nutrition.get('success'):
+        ai['nutrition'] = nutrition['recommendation']
+    return ai or None
+
+
+def _get_chatbot():
+    if not getattr(settings, 'DAILY_RECOMMENDATION_USE_AI', True):
+        return None
+    try:
+        from ..ai_service import get_chatbot
+        return get_chatbot()
+    except Exception as e:
+        logger.warning(f"Daily recommendations without AI: {str(e)}")
+        return None
+
+
+def precompute_chunk(user_ids: List[int], target_date: date, use_ai: bool = True) -> int:
+    """사용자 청크의 추천을 계산해 한 번의 bulk upsert로 저장"""
+    contexts = load_contexts(user_ids, target_date)
+    chatbot = _get_chatbot() if use_ai else None
+
+    rows = []
+    for context in contexts.values():
+        ai = None
+        if chatbot:
+            try:
+                ai = _ai_recommendations(chatbot, context)
+            except Exception as e:
+                logger.error(f"AI daily recommendation failed for user {context['user_id']}: {str(e)}")
+        rows.append(DailyRecommendation(
+            user_id=context['user_id'],
+            date=target_date,
+            payload=compute_recommendation(context, target_date, ai),
+            source='ai' if ai else 'rule',
+        ))
+
+    DailyRecommendation.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=['user', 'date'], update_fields=['payload', 'source']
+    )
+    return len(rows)
+
+
+def get_daily_recommendation(user, target_date: Optional[date] = None) -> Dict:
+    """
+    저장된 추천 조회 (인덱스 조회 한 번)
+
+    배치 이후 가입/복귀한 사용자는 규칙 기반으로 즉시 계산해 저장합니다 (LLM 호출 없음).
+    """
+    target_date = target_date or timezone.localdate()
+    payload = DailyRecommendation.objects.filter(user=user, date=target_date).values_list('payload', flat=True).first()
+    if payload is not None:
+        return payload
+
+    precompute_chunk([user.id], target_date, use_ai=False)
+    return DailyRecommendation.objects.filter(user=user, date=target_date).values_list('payload', flat=True).first()
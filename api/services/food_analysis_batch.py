@@ -0,0 +1,165 @@
+"""
+여러 음식/사진 일괄 분석
+
+한국식 한 끼 사진에는 밥, 국, 반찬 여러 개가 담기고 사용자는 사진 2~3장을 한 번에 기록하는 경우가 많습니다.
+항목마다 ai_nutrition_analysis를 따로 호출하면 요청 왕복과 모델 호출이 직렬로 쌓이므로
+일괄 요청의 항목을 동시에 분석합니다.
+
+- 동기 뷰: 전용 스레드 풀 (FOOD_BATCH_CONCURRENCY개 동시 모델 호출)
+- 비동기 뷰: asyncio.gather + Semaphore (같은 동시 실행 한도)
+
+항목별 분석은 analyze_food/aanalyze_food 그대로이므로 로컬 성분표, 분석 캐시, 사진 전처리가 모두 적용됩니다.
+한 항목이 실패해도 나머지는 저장하고 실패한 항목은 index와 함께 돌려줍니다.
+저장은 save_food_analyses로 bulk_create 한 번, 일일 영양 기록 갱신 한 번입니다.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from ..models import UserProfile
+from .food_analysis_service import aanalyze_food, analyze_food, build_analysis_payload
+from .image_storage import store_image
+
+logger = logging.getLogger(__name__)
+
+# 한 끼 합계에 포함하는 영양소
+MEAL_TOTAL_FIELDS = ('calories', 'protein', 'carbohydrates', 'fat', 'fiber', 'sugar', 'sodium')
+
+
+class BatchItemResult(NamedTuple):
+    index: int
+    food: Dict
+    nutrition_data: Optional[Dict]
+    image_keys: Optional[Dict]
+    error: Optional[str]
+
+
+def max_batch_items() -> int:
+    return getattr(settings, 'FOOD_BATCH_MAX_ITEMS', 8)
+
+
+def batch_concurrency() -> int:
+    return max(1, getattr(settings, 'FOOD_BATCH_CONCURRENCY', 4))
+
+
+def request_items(data) -> List[Dict]:
+    """
+    일괄 요청 본문을 항목 목록으로
+
+    JSON: {"items": [{"food_name", "description", "image_base64"}, ...]}
+    multipart: image 파일 여러 개 + 같은 순서의 food_name/description (없으면 빈 값)
+    """
+    if 'items' in data:
+        return data['items']
+    if not hasattr(data, 'getlist'):
+        return []
+    images = data.getlist('image')
+    names = data.getlist('food_name')
+    descriptions = data.getlist('description')
+    count = max(len(images), len(names))
+    items = []
+    for index in range(count):
+        item = {
+            'food_name': names[index] if index < len(names) else '',
+            'description': descriptions[index] if index < len(descriptions) else '',
+        }
+        if index < len(images):
+            item['image'] = images[index]
+        items.append(item)
+    return items
+
+
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
+
+
+def _get_batch_executor() -> ThreadPoolExecutor:
+    global _batch_executor
+    if _batch_executor is None:
+        with _batch_executor_lock:
+            if _batch_executor is None:
+                _batch_executor = ThreadPoolExecutor(
+                    max_workers=batch_concurrency(), thread_name_prefix='food-batch'
+                )
+    return _batch_executor
+
+
+def _analyze_item(index: int, food: Dict, image_data: Optional[bytes], user_profile: Optional[UserProfile],
+                  current_language: str, store_images: bool) -> BatchItemResult:
+    """풀 작업자에서 항목 하나 분석 (+ 사진 저장소 업로드)"""
+    try:
+        nutrition_data = analyze_food(food, user_profile, current_language, image_data=image_data)
+        # 사진이 없으면 빈 키 (FoodAnalysis 기본값)
+        image_keys = store_image(image_data) if store_images and image_data else {}
+        return BatchItemResult(index, food, nutrition_data, image_keys, None)
+    except Exception as e:
+        logger.error(f"Batch food analysis item {index} failed: {str(e)}")
+        return BatchItemResult(index, food, None, None, str(e))
+    finally:
+        # 작업자 스레드가 연 DB 연결은 요청 종료 시 닫히지 않으므로 직접 정리
+        close_old_connections()
+
+
+def analyze_foods(foods: List[Dict], images: List[Optional[bytes]], user_profile: Optional[UserProfile],
+                  current_language: str, store_images: bool = False) -> List[BatchItemResult]:
+    """항목들을 스레드 풀에서 동시에 분석 (요청 순서대로 반환)"""
+    executor = _get_batch_executor()
+    futures = [
+        executor.submit(_analyze_item, index, food, image_data, user_profile, current_language, store_images)
+        for index, (food, image_data) in enumerate(zip(foods, images))
+    ]
+    return [future.result() for future in futures]
+
+
+async def aanalyze_foods(foods: List[Dict], images: List[Optional[bytes]], user_profile: Optional[UserProfile],
+                         current_language: str, store_images: bool = False) -> List[BatchItemResult]:
+    """analyze_foods의 비동기 버전 - 이벤트 루프에서 동시에 분석 (Semaphore로 동시 호출 수 제한)"""
+    semaphore = asyncio.Semaphore(batch_concurrency())
+
+    async def analyze(index: int, food: Dict, image_data: Optional[bytes]) -> BatchItemResult:
+        async with semaphore:
+            try:
+                nutrition_data = await aanalyze_food(food, user_profile, current_language, image_data=image_data)
+                image_keys = {}
+                if store_images and image_data:
+                    image_keys = await sync_to_async(store_image, thread_sensitive=False)(image_data)
+                return BatchItemResult(index, food, nutrition_data, image_keys, None)
+            except Exception as e:
+                logger.error(f"Batch food analysis item {index} failed: {str(e)}")
+                return BatchItemResult(index, food, None, None, str(e))
+
+    return list(await asyncio.gather(*(
+        analyze(index, food, image_data) for index, (food, image_data) in enumerate(zip(foods, images))
+    )))
+
+
+def meal_totals(results: List[BatchItemResult]) -> Dict:
+    """성공한 항목의 한 끼 영양 합계"""
+    totals = {field: 0.0 for field in MEAL_TOTAL_FIELDS}
+    for result in results:
+        if result.nutrition_data:
+            for field in MEAL_TOTAL_FIELDS:
+                totals[field] += float(result.nutrition_data.get(field) or 0)
+    return {field: round(value, 1) for field, value in totals.items()}
+
+
+def batch_errors(results: List[BatchItemResult]) -> List[Dict]:
+    return [{'index': result.index, 'error': result.error} for result in results if result.error]
+
+
+def guest_payload(results: List[BatchItemResult]) -> Dict:
+    """저장하지 않는 일괄 분석 응답 (게스트)"""
+    return {
+        'analyses': [
+            dict(build_analysis_payload(result.nutrition_data), index=result.index)
+            for result in results if result.nutrition_data
+        ],
+        'errors': batch_errors(results),
+        'meal_totals': meal_totals(results),
+    }
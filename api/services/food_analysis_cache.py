@@ -0,0 +1,310 @@
+"""
+음식 분석 결과 캐시
+
+같은 음식("닭가슴살 샐러드")이나 거의 같은 사진을 반복 기록할 때 Gemini를 다시 호출하지 않도록
+분석 결과를 두 종류의 키로 저장합니다.
+
+- 텍스트: 음식 이름/설명을 정규화(NFKC, 대소문자/공백 제거)한 값 + 언어
+- 이미지: 64비트 dHash 지각 해시 + 정규화 텍스트 + 언어. 해시를 (허용 거리 + 1)개 밴드로 나눠 밴드별로 색인하므로
+  해밍 거리가 허용치 이하인 사진은 비둘기집 원리에 따라 반드시 한 밴드에서 만남
+  사진 프롬프트도 음식 이름/설명(양, "반만 먹음" 등)을 쓰므로 텍스트가 다르면 같은 사진이라도 다른 키
+
+영양 수치/요약(공유 가능)과 사용자 맞춤 권장사항(recommendations)은 분리해서 저장합니다.
+권장사항은 (분석 키, 프로필 구간 서명)별로 저장하고, 없으면 이미지 없는 짧은 텍스트 호출로만 생성합니다.
+
+저장소는 Django 캐시(운영 환경은 Redis, TTL)이고 그 앞에 프로세스 로컬 LRU를 둡니다.
+"""
+import hashlib
+import io
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .recommendation_cache import profile_signature, signature_key
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+CACHE_KEY_VERSION = 2
+HASH_BITS = 64
+MAX_BAND_ENTRIES = 32
+
+# 여러 사용자가 공유하는 분석 결과 필드
+SHARED_FIELDS = ('food_name', 'calories', 'protein', 'carbohydrates', 'fat', 'fiber', 'sugar', 'sodium',
+                 'analysis_summary')
+# 권장사항에 영향을 주는 프로필 필드 (분석 프롬프트의 사용자 정보)
+PROFILE_FIELDS = ('age', 'gender', 'weight', 'height', 'allergies', 'diseases')
+
+_PUNCTUATION_CATEGORIES = ('P', 'S', 'Z', 'C')
+
+
+def normalize_food_text(text: Optional[str]) -> str:
+    """NFKC 정규화(호환 자모/전각 문자 통합) 후 소문자화, 공백/구두점 제거"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKC', str(text)).casefold()
+    return ''.join(ch for ch in text if unicodedata.category(ch)[0] not in _PUNCTUATION_CATEGORIES)
+
+
+def text_digest(food: Dict) -> Optional[str]:
+    """정규화한 음식 이름/설명의 다이제스트 (둘 다 비었으면 None)"""
+    name = normalize_food_text(food.get('food_name'))
+    description = normalize_food_text(food.get('description'))
+    if not name and not description:
+        return None
+    return hashlib.sha1(f"{name}|{description}".encode('utf-8')).hexdigest()[:20]
+
+
+def text_key(food: Dict, language: str) -> Optional[str]:
+    digest = text_digest(food)
+    if digest is None:
+        return None
+    return f"foodcache:v{CACHE_KEY_VERSION}:text:{language}:{digest}"
+
+
+def image_scope(food: Dict, language: str) -> str:
+    """사진 키/밴드 색인 범위 - 언어 + 텍스트 다이제스트 (텍스트 없는 사진은 '-')"""
+    return f"{language}:{text_digest(food) or '-'}"
+
+
+def image_key(image_hash: int, scope: str) -> str:
+    return f"foodcache:v{CACHE_KEY_VERSION}:image:{scope}:{image_hash:016x}"
+
+
+def _band_key(scope: str, index: int, value: int) -> str:
+    return f"foodcache:v{CACHE_KEY_VERSION}:band:{scope}:{index}:{value:x}"
+
+
+def dhash(image_data: bytes, size: int = 8) -> Optional[int]:
+    """차이 해시 - 재압축/크기 변경/약간의 밝기 차이에도 거의 같은 값"""
+    if not PIL_AVAILABLE or not image_data:
+        return None
+    try:
+        image = Image.open(io.BytesIO(image_data))
+        image.draft('L', (size * 8, size * 8))  # JPEG는 축소 디코딩
+        pixels = list(image.convert('L').resize((size + 1, size), Image.LANCZOS).getdata())
+    except Exception as e:
+        logger.warning(f"Perceptual hash failed: {str(e)}")
+        return None
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def _bands(image_hash: int, count: int) -> List[Tuple[int, int]]:
+    """해시를 count개 밴드로 나눈 (밴드 번호, 밴드 값) 목록"""
+    width = HASH_BITS // count
+    bands = []
+    for index in range(count):
+        shift = index * width
+        bits = width if index < count - 1 else HASH_BITS - shift
+        bands.append((index, (image_hash >> shift) & ((1 << bits) - 1)))
+    return bands
+
+
+def profile_data(user_profile) -> Dict:
+    if not user_profile:
+        return {}
+    return {
+        'birth_date': user_profile.birth_date,
+        'gender': user_profile.gender,
+        'height': user_profile.height,
+        'weight': user_profile.weight,
+        'allergies': user_profile.allergies,
+        'diseases': user_profile.diseases,
+    }
+
+
+class FoodAnalysisCache:
+    """Django 캐시(TTL) + 프로세스 로컬 LRU 2단 분석 결과 캐시"""
+
+    def __init__(self, ttl: int = 604800, max_local_entries: int = 1000, hash_distance: int = 2,
+                 enabled: bool = True):
+        self.ttl = ttl
+        self.max_local_entries = max_local_entries
+        self.hash_distance = hash_distance
+        self.band_count = hash_distance + 1
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        # key -> (만료 시각, 값)
+        self._local: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self.counters = {
+            'text_hits': 0, 'image_hits': 0, 'misses': 0, 'local_hits': 0,
+            'personal_hits': 0, 'personal_misses': 0,
+        }
+
+    # 로컬 LRU
+
+    def _local_get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            item = self._local.get(key)
+            if not item:
+                return None
+            if item[0] < time.time():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            self.counters['local_hits'] += 1
+            return item[1]
+
+    def _local_set(self, key: str, value: Dict):
+        with self._lock:
+            self._local[key] = (time.time() + self.ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+
+    def _get(self, key: str) -> Optional[Dict]:
+        value = self._local_get(key)
+        if value is not None:
+            return value
+        try:
+            value = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Food analysis cache unavailable: {str(e)}")
+            return None
+        if value is not None:
+            self._local_set(key, value)
+        return value
+
+    def _set(self, key: str, value: Dict):
+        self._local_set(key, value)
+        try:
+            cache.set(key, value, self.ttl)
+        except Exception as e:
+            logger.warning(f"Food analysis cache unavailable: {str(e)}")
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    # 공유 분석 결과
+
+    def content_key(self, food: Dict, language: str, image_data: Optional[bytes]) -> Optional[str]:
+        """
+        조회/저장에 쓸 분석 키 (이미지가 있으면 지각 해시 + 정규화 텍스트, 없으면 정규화 텍스트)
+
+        이미지는 같은 텍스트로 색인된 해시 중 허용 거리 이내의 가장 가까운 해시 키를 돌려줍니다.
+        """
+        if not self.enabled:
+            return None
+        if not image_data:
+            return text_key(food, language)
+
+        image_hash = dhash(image_data)
+        if image_hash is None:
+            return None
+        scope = image_scope(food, language)
+        band_keys = [_band_key(scope, index, value) for index, value in _bands(image_hash, self.band_count)]
+        try:
+            band_lists = cache.get_many(band_keys)
+        except Exception as e:
+            logger.warning(f"Food analysis cache unavailable: {str(e)}")
+            band_lists = {}
+        best = None
+        for candidates in band_lists.values():
+            for candidate in candidates:
+                distance = hamming(candidate, image_hash)
+                if distance <= self.hash_distance and (best is None or distance < best[0]):
+                    best = (distance, candidate)
+        return image_key(best[1] if best else image_hash, scope)
+
+    def lookup(self, key: Optional[str]) -> Optional[Dict]:
+        if not key:
+            return None
+        entry = self._get(key)
+        if entry is None:
+            self._count('misses')
+            return None
+        self._count('image_hits' if ':image:' in key else 'text_hits')
+        return entry
+
+    def store(self, key: Optional[str], nutrition_data: Dict):
+        if not key:
+            return
+        self._set(key, {field: nutrition_data.get(field) for field in SHARED_FIELDS})
+        if ':image:' in key:
+            self._index_image(key)
+
+    def _index_image(self, key: str):
+        language, digest, hex_hash = key.rsplit(':', 3)[-3:]
+        scope = f"{language}:{digest}"
+        image_hash = int(hex_hash, 16)
+        for index, value in _bands(image_hash, self.band_count):
+            band_key = _band_key(scope, index, value)
+            try:
+                # 동시 저장 시 일부 항목이 빠질 수 있으나 다음 미스에서 다시 색인됨
+                candidates = [c for c in (cache.get(band_key) or []) if c != image_hash]
+                cache.set(band_key, (candidates + [image_hash])[-MAX_BAND_ENTRIES:], self.ttl)
+            except Exception as e:
+                logger.warning(f"Food analysis cache unavailable: {str(e)}")
+                return
+
+    # 사용자 맞춤 권장사항
+
+    def _personal_key(self, key: str, user_profile) -> str:
+        signature = profile_signature('food_analysis', profile_data(user_profile), PROFILE_FIELDS)
+        return f"{key}:rec:{signature_key(signature).rsplit(':', 1)[-1]}"
+
+    def lookup_recommendations(self, key: str, user_profile) -> Optional[str]:
+        entry = self._get(self._personal_key(key, user_profile))
+        self._count('personal_hits' if entry else 'personal_misses')
+        return entry['recommendations'] if entry else None
+
+    def store_recommendations(self, key: Optional[str], user_profile, recommendations: Optional[str]):
+        if key and recommendations:
+            self._set(self._personal_key(key, user_profile), {'recommendations': recommendations})
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self.counters)
+            local_entries = len(self._local)
+        hits = counters['text_hits'] + counters['image_hits']
+        total = hits + counters['misses']
+        return dict(
+            counters,
+            enabled=self.enabled,
+            ttl=self.ttl,
+            hash_distance=self.hash_distance,
+            local_entries=local_entries,
+            hit_rate=round(hits / total, 3) if total else 0.0,
+        )
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+
+_food_analysis_cache = None
+
+def get_food_analysis_cache() -> FoodAnalysisCache:
+    """음식 분석 캐시 인스턴스 가져오기 (싱글톤)"""
+    global _food_analysis_cache
+    if not _food_analysis_cache:
+        _food_analysis_cache = FoodAnalysisCache(
+            ttl=getattr(settings, 'FOOD_ANALYSIS_CACHE_TTL', 604800),
+            max_local_entries=getattr(settings, 'FOOD_ANALYSIS_CACHE_LOCAL_ENTRIES', 1000),
+            hash_distance=getattr(settings, 'FOOD_ANALYSIS_CACHE_HASH_DISTANCE', 2),
+            enabled=getattr(settings, 'FOOD_ANALYSIS_CACHE_ENABLED', True),
+        )
+    return _food_analysis_cache
@@ -0,0 +1,181 @@
+"""
+음식 사진 비동기 분석 작업
+
+웹 요청은 사진을 저장소에 올리고 FoodAnalysisJob을 만든 뒤 Celery 작업을 등록하고 바로 반환합니다.
+워커가 Gemini 분석과 FoodAnalysis/DailyNutrition 저장을 수행하고, 결과를 사용자의
+notifications_{user.id} 그룹(NotificationConsumer)으로 전송합니다.
+WebSocket이 없는 클라이언트는 작업 조회 엔드포인트를 폴링합니다.
+
+Gemini 지연이 웹 워커 스레드를 점유하지 않으므로 웹 처리량과 분석 지연이 분리됩니다.
+
+워커는 별도 프로세스(Procfile worker)이므로 사진은 공유 저장소(S3 등)에 있어야 합니다.
+FOOD_IMAGE_DURABLE_STORAGE가 아니면 작업 모드를 쓰지 않습니다.
+분석이 실패하면 FOOD_ANALYSIS_JOB_MAX_ATTEMPTS까지 다시 시도하고, 워커가 죽어 running으로 남은 작업은
+sweep_stale_jobs(Celery beat)가 FOOD_ANALYSIS_JOB_TIMEOUT 뒤에 다시 등록하거나 실패 처리합니다.
+"""
+import logging
+from datetime import timedelta
+from typing import Dict, Optional
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..models import FoodAnalysisJob, UserProfile
+from .image_storage import decode_image, durable_storage, read_image, upload_image
+
+logger = logging.getLogger(__name__)
+
+
+def jobs_enabled() -> bool:
+    """Celery 브로커와 공유 사진 저장소가 있을 때만 작업 모드 사용 (없으면 동기 분석)"""
+    return getattr(settings, 'FOOD_ANALYSIS_JOBS_ENABLED', False) and durable_storage()
+
+
+def job_timeout() -> timedelta:
+    return timedelta(seconds=getattr(settings, 'FOOD_ANALYSIS_JOB_TIMEOUT', 600))
+
+
+def max_attempts() -> int:
+    return max(1, getattr(settings, 'FOOD_ANALYSIS_JOB_MAX_ATTEMPTS', 3))
+
+
+def create_job(user, food: Dict, language: str, image_data: Optional[bytes] = None) -> FoodAnalysisJob:
+    """작업 생성 후 커밋되면 Celery 작업 등록 (image_data: 업로드된 사진 바이트)"""
+    from ..tasks import run_food_analysis_job
+
+    if image_data is None and food.get('image_base64'):
+        image_data = decode_image(food['image_base64'])
+    # 워커가 읽을 수 있도록 항상 공유 저장소에 업로드 (인라인 저장 안 함)
+    image_keys = upload_image(image_data) if image_data else {}
+    job = FoodAnalysisJob.objects.create(
+        user=user,
+        food_name=food.get('food_name', ''),
+        description=food.get('description', ''),
+        language=language,
+        **image_keys,
+    )
+    transaction.on_commit(lambda: run_food_analysis_job.delay(str(job.id)))
+    return job
+
+
+def job_payload(job: FoodAnalysisJob) -> Dict:
+    """폴링 응답 / 푸시 메시지 공통 형식"""
+    return {
+        'job_id': str(job.id),
+        'status': job.status,
+        'result': job.result,
+        'error': job.error or None,
+        'created_at': job.created_at.isoformat(),
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+    }
+
+
+def push_job_update(job: FoodAnalysisJob):
+    """사용자 알림 그룹으로 작업 결과 전송 (채널 레이어가 없으면 폴링만 사용)"""
+    from channels.layers import get_channel_layer
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(f'notifications_{job.user_id}', {
+            'type': 'notification_message',
+            'data': dict(job_payload(job), event='food_analysis.job'),
+        })
+    except Exception as e:
+        logger.warning(f"Food analysis job push failed ({job.id}): {str(e)}")
+
+
+def claim_job(job_id: str) -> bool:
+    """
+    대기 중이거나 제한 시간을 넘긴 running 작업을 가져감 (조건부 UPDATE 한 번)
+
+    중복 전달된 작업은 한 워커만 실행하고, 죽은 워커가 남긴 작업은 다시 실행할 수 있습니다.
+    """
+    now = timezone.now()
+    return bool(
+        FoodAnalysisJob.objects.filter(
+            Q(status='pending') | Q(status='running', started_at__lt=now - job_timeout()), id=job_id
+        ).update(status='running', started_at=now, attempts=F('attempts') + 1)
+    )
+
+
+def _finish_job(job: FoodAnalysisJob):
+    job.completed_at = timezone.now()
+    job.save(update_fields=['food_analysis', 'result', 'error', 'status', 'completed_at'])
+    push_job_update(job)
+
+
+def run_job(job_id: str) -> Optional[str]:
+    """
+    워커에서 분석 실행 -> 저장 -> 푸시 (이미 끝났거나 다른 워커가 실행 중이면 건너뜀)
+
+    분석이 실패하고 시도 횟수가 남아 있으면 대기 상태로 되돌리고 예외를 다시 던집니다 (Celery 재시도).
+    """
+    from ..serializers import FoodAnalysisSerializer
+    from .food_analysis_service import analyze_food, save_food_analysis
+
+    if not claim_job(job_id):
+        logger.info(f"Food analysis job {job_id} already claimed")
+        return None
+    job = FoodAnalysisJob.objects.select_related('user').get(id=job_id)
+
+    food = {'food_name': job.food_name, 'description': job.description}
+    image_keys = {'image_key': job.image_key, 'thumbnail_key': job.thumbnail_key}
+    try:
+        user_profile = UserProfile.objects.filter(user=job.user).first()
+        image_data = read_image(job.image_key) if job.image_key else None
+        nutrition_data = analyze_food(food, user_profile, job.language, image_data=image_data)
+    except Exception as e:
+        logger.error(f"Food analysis job {job_id} failed (attempt {job.attempts}): {str(e)}")
+        if job.attempts < max_attempts():
+            FoodAnalysisJob.objects.filter(id=job.id, status='running').update(status='pending')
+            raise
+        job.error = f"영양 분석 중 오류가 발생했습니다: {str(e)}"
+        job.status = 'failed'
+        _finish_job(job)
+        return job.status
+
+    food_analysis = save_food_analysis(job.user, food, nutrition_data, image_keys=image_keys)
+    job.food_analysis = food_analysis
+    job.result = FoodAnalysisSerializer(food_analysis).data
+    job.status = 'succeeded'
+    _finish_job(job)
+    return job.status
+
+
+def sweep_stale_jobs() -> Dict[str, int]:
+    """
+    멈춘 작업 정리 (Celery beat 주기 작업)
+
+    - 제한 시간을 넘긴 running 작업: 시도 횟수가 남았으면 다시 등록, 아니면 실패 처리 후 푸시
+    - 제한 시간 동안 실행되지 않은 pending 작업 (브로커 메시지 유실): 다시 등록
+    다시 등록된 작업은 claim_job이 한 번만 실행하므로 중복 등록되어도 안전합니다.
+    """
+    from ..tasks import run_food_analysis_job
+
+    cutoff = timezone.now() - job_timeout()
+    stale_running = FoodAnalysisJob.objects.filter(status='running', started_at__lt=cutoff)
+    exhausted_ids = list(stale_running.filter(attempts__gte=max_attempts()).values_list('id', flat=True))
+    if exhausted_ids:
+        FoodAnalysisJob.objects.filter(id__in=exhausted_ids, status='running').update(
+            status='failed', error='영양 분석이 제한 시간 안에 끝나지 않았습니다.', completed_at=timezone.now()
+        )
+        for job in FoodAnalysisJob.objects.filter(id__in=exhausted_ids, status='failed'):
+            push_job_update(job)
+
+    retry_ids = list(
+        FoodAnalysisJob.objects.filter(
+            Q(status='running', started_at__lt=cutoff, attempts__lt=max_attempts())
+            | (Q(status='pending', created_at__lt=cutoff) & (Q(started_at__isnull=True) | Q(started_at__lt=cutoff)))
+        ).values_list('id', flat=True)
+    )
+    for job_id in retry_ids:
+        run_food_analysis_job.delay(str(job_id))
+
+    if exhausted_ids or retry_ids:
+        logger.warning(f"Food analysis job sweep: {len(retry_ids)} re-enqueued, {len(exhausted_ids)} failed")
+    return {'requeued': len(retry_ids), 'failed': len(exhausted_ids)}
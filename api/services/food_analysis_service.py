@@ -0,0 +1,370 @@
+"""
+음식 영양 분석 서비스 - Gemini 기반 분석 파이프라인 (동기/비동기 공용)
+"""
+import json
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.utils import translation
+
+from ..models import DailyNutrition, FoodAnalysis, UserProfile
+from .daily_nutrition_service import add_food_to_daily, add_foods_to_daily
+from .food_analysis_cache import get_food_analysis_cache, profile_data
+from .food_composition import local_food_analysis
+from .image_preprocessing import aprepare_vision_image, prepare_vision_image
+from .image_storage import decode_image, store_base64_image
+from .model_router import acomplete, complete
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_LANGUAGES = ['ko', 'en', 'es']
+NUTRITION_MODEL_NAME = 'gemini-1.5-flash'
+
+
+def get_user_profile(user) -> Optional[UserProfile]:
+    """사용자 프로필 가져오기 (게스트/프로필 없음은 None)"""
+    if not user.is_authenticated:
+        return None
+    try:
+        return UserProfile.objects.get(user=user)
+    except UserProfile.DoesNotExist:
+        return None
+
+
+def detect_language(request) -> str:
+    """현재 언어 가져오기 (Accept-Language 헤더 또는 Django 설정)"""
+    current_language = request.headers.get('Accept-Language', 'en')[:2]
+    if current_language not in SUPPORTED_LANGUAGES:
+        current_language = translation.get_language()[:2]  # Django 설정 사용
+        if current_language not in SUPPORTED_LANGUAGES:
+            current_language = 'en'  # 기본값
+    return current_language
+
+
+def build_nutrition_prompt(food: Dict, user_profile: Optional[UserProfile], current_language: str) -> str:
+    """언어별 영양 분석 프롬프트 생성"""
+    # 사용자 컨텍스트 생성
+    user_context = ""
+    if user_profile:
+        # birth_date로 나이 계산
+        if user_profile.birth_date:
+            age = date.today().year - user_profile.birth_date.year
+        else:
+            age = 30  # 기본값
+        user_context = f"""
+        사용자 정보:
+        - 나이: {age}세
+        - 성별: {user_profile.gender}
+        - 신장: {user_profile.height}cm
+        - 체중: {user_profile.weight}kg
+        - 질병: {', '.join(user_profile.diseases) if user_profile.diseases else '없음'}
+        - 알레르기: {', '.join(user_profile.allergies) if user_profile.allergies else '없음'}
+        """
+    
+    # 언어별 프롬프트 템플릿
+    prompts = {
+        'ko': f"""
+        다음 음식에 대해 영양 분석을 해주세요.
+        
+        {user_context}
+        
+        음식 정보:
+        - 이름: {food.get('food_name', '제공된 이미지 참조')}
+        - 설명: {food.get('description', '없음')}
+        
+        다음 정보를 JSON 형식으로 제공해주세요:
+        {{
+            "food_name": "음식 이름",
+            "calories": 칼로리 (숫자),
+            "protein": 단백질(g, 숫자),
+            "carbohydrates": 탄수화물(g, 숫자),
+            "fat": 지방(g, 숫자),
+            "fiber": 식이섬유(g, 숫자, 선택),
+            "sugar": 당류(g, 숫자, 선택),
+            "sodium": 나트륨(mg, 숫자, 선택),
+            "analysis_summary": "영양 성분 요약 (한국어로)",
+            "recommendations": "이 사용자를 위한 섭취 권장사항 (한국어로)"
+        }}
+        
+        주의사항:
+        1. 이미지가 제공된 경우, 음식의 종류와 양을 추정하여 분석하세요.
+        2. 사용자의 건강 상태를 고려한 맞춤형 권장사항을 제공하세요.
+        3. 정확한 수치를 제공하기 어려운 경우, 일반적인 추정치를 사용하세요.
+        4. 모든 설명은 한국어로 작성하세요.
+        """,
+        'en': f"""
+        Please analyze the nutrition of the following food.
+        
+        User Information:
+        - Age: {user_profile.birth_date.year if user_profile and user_profile.birth_date else 'Unknown'} years
+        - Gender: {user_profile.gender if user_profile else 'Unknown'}
+        - Height: {user_profile.height if user_profile else 'Unknown'}cm
+        - Weight: {user_profile.weight if user_profile else 'Unknown'}kg
+        - Diseases: {', '.join(user_profile.diseases) if user_profile and user_profile.diseases else 'None'}
+        - Allergies: {', '.join(user_profile.allergies) if user_profile and user_profile.allergies else 'None'}
+        
+        Food Information:
+        - Name: {food.get('food_name', 'Refer to provided image')}
+        - Description: {food.get('description', 'None')}
+        
+        Please provide the following information in JSON format:
+        {{
+            "food_name": "Food name",
+            "calories": Calories (number),
+            "protein": Protein(g, number),
+            "carbohydrates": Carbohydrates(g, number),
+            "fat": Fat(g, number),
+            "fiber": Dietary fiber(g, number, optional),
+            "sugar": Sugar(g, number, optional),
+            "sodium": Sodium(mg, number, optional),
+            "analysis_summary": "Nutritional summary (in English)",
+            "recommendations": "Intake recommendations for this user (in English)"
+        }}
+        
+        Note:
+        1. If an image is provided, estimate the type and amount of food for analysis.
+        2. Provide personalized recommendations considering the user's health condition.
+        3. Use general estimates if exact figures are difficult to provide.
+        4. Write all descriptions in English.
+        """,
+        'es': f"""
+        Por favor analiza la nutrición de la siguiente comida.
+        
+        Información del usuario:
+        - Edad: {user_profile.birth_date.year if user_profile and user_profile.birth_date else 'Desconocido'} años
+        - Género: {user_profile.gender if user_profile else 'Desconocido'}
+        - Altura: {user_profile.height if user_profile else 'Desconocido'}cm
+        - Peso: {user_profile.weight if user_profile else 'Desconocido'}kg
+        - Enfermedades: {', '.join(user_profile.diseases) if user_profile and user_profile.diseases else 'Ninguna'}
+        - Alergias: {', '.join(user_profile.allergies) if user_profile and user_profile.allergies else 'Ninguna'}
+        
+        Información de la comida:
+        - Nombre: {food.get('food_name', 'Consultar imagen proporcionada')}
+        - Descripción: {food.get('description', 'Ninguna')}
+        
+        Por favor proporciona la siguiente información en formato JSON:
+        {{
+            "food_name": "Nombre de la comida",
+            "calories": Calorías (número),
+            "protein": Proteína(g, número),
+            "carbohydrates": Carbohidratos(g, número),
+            "fat": Grasa(g, número),
+            "fiber": Fibra dietética(g, número, opcional),
+            "sugar": Azúcar(g, número, opcional),
+            "sodium": Sodio(mg, número, opcional),
+            "analysis_summary": "Resumen nutricional (en español)",
+            "recommendations": "Recomendaciones de consumo para este usuario (en español)"
+        }}
+        
+        Nota:
+        1. Si se proporciona una imagen, estima el tipo y cantidad de comida para el análisis.
+        2. Proporciona recomendaciones personalizadas considerando la condición de salud del usuario.
+        3. Usa estimaciones generales si es difícil proporcionar cifras exactas.
+        4. Escribe todas las descripciones en español.
+        """
+    }
+    
+    # 프롬프트 선택 (기본값: 영어)
+    return prompts.get(current_language, prompts['en'])
+
+
+def parse_nutrition_response(response_text: str) -> Dict:
+    """Gemini 응답에서 JSON 블록 추출 및 파싱"""
+    if '```json' in response_text:
+        json_str = response_text.split('```json')[1].split('```')[0].strip()
+    elif '```' in response_text:
+        json_str = response_text.split('```')[1].strip()
+    else:
+        json_str = response_text.strip()
+    return json.loads(json_str)
+
+
+RECOMMENDATION_PROMPTS = {
+    'ko': "다음 음식을 먹은 사용자를 위한 섭취 권장사항을 2~3문장으로 한국어로 작성하세요. 권장사항 문장만 답하세요.",
+    'en': "Write 2-3 sentences of intake recommendations in English for this user who ate the following food. Reply with the recommendations only.",
+    'es': "Escribe 2-3 frases de recomendaciones de consumo en español para este usuario que comió el siguiente alimento. Responde solo con las recomendaciones.",
+}
+
+
+def build_recommendation_prompt(nutrition_data: Dict, user_profile: Optional[UserProfile], current_language: str) -> str:
+    """캐시된 분석 결과에 사용자 맞춤 권장사항만 붙이기 위한 짧은 프롬프트 (이미지 없음)"""
+    profile = profile_data(user_profile)
+    user_context = ', '.join(
+        f"{field}: {', '.join(value) if isinstance(value, list) else value}"
+        for field, value in profile.items() if value
+    ) or 'unknown'
+    nutrients = ', '.join(
+        f"{field}: {nutrition_data.get(field)}"
+        for field in ('calories', 'protein', 'carbohydrates', 'fat', 'sugar', 'sodium')
+        if nutrition_data.get(field) is not None
+    )
+    return (
+        f"{RECOMMENDATION_PROMPTS.get(current_language, RECOMMENDATION_PROMPTS['en'])}\n"
+        f"User: {user_context}\n"
+        f"Food: {nutrition_data.get('food_name')} ({nutrients})"
+    )
+
+
+def _from_cache(key: Optional[str], user_profile: Optional[UserProfile]) -> Tuple[Optional[Dict], bool]:
+    """(캐시된 분석 결과, 맞춤 권장사항 포함 여부)"""
+    analysis_cache = get_food_analysis_cache()
+    shared = analysis_cache.lookup(key)
+    if shared is None:
+        return None, False
+    recommendations = analysis_cache.lookup_recommendations(key, user_profile)
+    return dict(shared, recommendations=recommendations or ''), recommendations is not None
+
+
+def _store_in_cache(key: Optional[str], user_profile: Optional[UserProfile], nutrition_data: Dict):
+    analysis_cache = get_food_analysis_cache()
+    analysis_cache.store(key, nutrition_data)
+    analysis_cache.store_recommendations(key, user_profile, nutrition_data.get('recommendations'))
+
+
+def analyze_food(food: Dict, user_profile: Optional[UserProfile], current_language: str,
+                 image_data: Optional[bytes] = None) -> Dict:
+    """
+    음식 영양 분석 (Gemini 호출) - 파싱된 영양 데이터 반환
+
+    image_data를 주면 food['image_base64'] 대신 사용합니다 (저장소에서 읽은 사진).
+    사진 없이 성분표에 있는 음식만 적은 요청은 로컬 성분표로 계산하고,
+    같은 음식 이름/설명이나 거의 같은 사진은 분석 캐시에서 반환하고,
+    맞춤 권장사항이 없는 프로필이면 이미지 없는 짧은 호출로 권장사항만 생성합니다.
+    """
+    if image_data is None:
+        local = local_food_analysis(food, current_language)
+        if local is not None:
+            return local
+    if image_data is None and food.get('image_base64'):
+        image_data = decode_image(food['image_base64'])
+    # 방향 보정/축소한 사진으로 캐시 키 계산과 모델 호출 (원본은 저장소에 보관)
+    vision_image = prepare_vision_image(image_data)
+    image_data = vision_image.data if vision_image else None
+    key = get_food_analysis_cache().content_key(food, current_language, image_data)
+    
+    cached, personalized = _from_cache(key, user_profile)
+    if cached is not None:
+        if not personalized:
+            prompt = build_recommendation_prompt(cached, user_profile, current_language)
+            try:
+                result = complete('recommendation', [{'role': 'user', 'content': prompt}], max_tokens=300)
+                cached['recommendations'] = result.text.strip()
+                get_food_analysis_cache().store_recommendations(key, user_profile, cached['recommendations'])
+            except Exception as e:
+                # 영양 수치는 캐시로 응답하고 권장사항만 비움
+                logger.warning(f"Recommendation for cached analysis failed: {str(e)}")
+        return cached
+    
+    # 기본은 NUTRITION_MODEL_NAME, p95가 지연 예산을 넘으면 라우터가 다른 공급자로 우회
+    prompt = build_nutrition_prompt(food, user_profile, current_language)
+    result = complete('nutrition_analysis', [{'role': 'user', 'content': prompt}],
+                      temperature=None, image=image_data, prefer=NUTRITION_MODEL_NAME)
+    nutrition_data = parse_nutrition_response(result.text)
+    _store_in_cache(key, user_profile, nutrition_data)
+    return nutrition_data
+
+
+async def aanalyze_food(food: Dict, user_profile: Optional[UserProfile], current_language: str,
+                        image_data: Optional[bytes] = None) -> Dict:
+    """음식 영양 분석 (비동기 Gemini 호출, 로컬 성분표/분석 캐시 공용)"""
+    if image_data is None:
+        local = local_food_analysis(food, current_language)
+        if local is not None:
+            return local
+    if image_data is None and food.get('image_base64'):
+        image_data = decode_image(food['image_base64'])
+    vision_image = await aprepare_vision_image(image_data)
+    image_data = vision_image.data if vision_image else None
+    key = await sync_to_async(get_food_analysis_cache().content_key)(food, current_language, image_data)
+    
+    cached, personalized = await sync_to_async(_from_cache)(key, user_profile)
+    if cached is not None:
+        if not personalized:
+            prompt = build_recommendation_prompt(cached, user_profile, current_language)
+            try:
+                result = await acomplete('recommendation', [{'role': 'user', 'content': prompt}], max_tokens=300)
+                cached['recommendations'] = result.text.strip()
+                await sync_to_async(get_food_analysis_cache().store_recommendations)(
+                    key, user_profile, cached['recommendations']
+                )
+            except Exception as e:
+                logger.warning(f"Recommendation for cached analysis failed: {str(e)}")
+        return cached
+    
+    prompt = build_nutrition_prompt(food, user_profile, current_language)
+    result = await acomplete('nutrition_analysis', [{'role': 'user', 'content': prompt}],
+                             temperature=None, image=image_data, prefer=NUTRITION_MODEL_NAME)
+    nutrition_data = parse_nutrition_response(result.text)
+    await sync_to_async(_store_in_cache)(key, user_profile, nutrition_data)
+    return nutrition_data
+
+
+def build_analysis_payload(nutrition_data: Dict) -> Dict:
+    """분석 결과 응답 형식 (저장하지 않는 분석 결과)"""
+    return {
+        'food_name': nutrition_data['food_name'],
+        'calories': nutrition_data['calories'],
+        'protein': nutrition_data['protein'],
+        'carbohydrates': nutrition_data['carbohydrates'],
+        'fat': nutrition_data['fat'],
+        'fiber': nutrition_data.get('fiber', 0),
+        'sugar': nutrition_data.get('sugar', 0),
+        'sodium': nutrition_data.get('sodium', 0),
+        'analysis_summary': nutrition_data['analysis_summary'],
+        'recommendations': nutrition_data['recommendations']
+    }
+
+
+def _food_analysis(user, food: Dict, nutrition_data: Dict, image_keys: Dict) -> FoodAnalysis:
+    return FoodAnalysis(
+        user=user,
+        food_name=nutrition_data['food_name'],
+        description=food.get('description', ''),
+        **image_keys,
+        calories=nutrition_data['calories'],
+        protein=nutrition_data['protein'],
+        carbohydrates=nutrition_data['carbohydrates'],
+        fat=nutrition_data['fat'],
+        fiber=nutrition_data.get('fiber', 0),
+        sugar=nutrition_data.get('sugar', 0),
+        sodium=nutrition_data.get('sodium', 0),
+        analysis_summary=nutrition_data['analysis_summary'],
+        recommendations=nutrition_data['recommendations']
+    )
+
+
+def save_food_analysis(user, food: Dict, nutrition_data: Dict, image_keys: Optional[Dict] = None) -> FoodAnalysis:
+    """
+    분석 결과를 저장하고 오늘의 영양 기록에 반영 (사진은 저장소에 올리고 키만 기록)
+
+    image_keys: 이미 저장소에 올린 사진의 {'image_key', 'thumbnail_key'}
+    """
+    if image_keys is None:
+        image_keys = store_base64_image(food.get('image_base64'))
+    with transaction.atomic():
+        food_analysis = _food_analysis(user, food, nutrition_data, image_keys)
+        food_analysis.save()
+        
+        # 오늘의 영양 기록에 추가 (합계는 F() 증분 갱신)
+        add_food_to_daily(user, food_analysis, date.today())
+    
+    return food_analysis
+
+
+def save_food_analyses(user, entries: List[Tuple[Dict, Dict, Dict]]) -> Tuple[List[FoodAnalysis], DailyNutrition]:
+    """
+    한 끼의 여러 음식 분석을 한 번에 저장 - entries: (food, nutrition_data, image_keys) 목록
+
+    FoodAnalysis는 bulk_create 한 번, 오늘의 영양 기록/롤업은 합산한 증분으로 한 번 갱신합니다.
+    (bulk_create가 pk를 돌려주는 PostgreSQL/SQLite 기준)
+    """
+    with transaction.atomic():
+        food_analyses = FoodAnalysis.objects.bulk_create([
+            _food_analysis(user, food, nutrition_data, image_keys)
+            for food, nutrition_data, image_keys in entries
+        ])
+        daily_nutrition = add_foods_to_daily(user, food_analyses, date.today(), refresh=True)
+    return food_analyses, daily_nutrition
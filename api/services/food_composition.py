@@ -0,0 +1,456 @@
+"""
+로컬 식품 영양성분표 + 퍼지 검색 색인
+
+식품별 영양성분(가식부 100g 기준)을 NumPy 열 배열로 보관하고, 이름/별칭을 한글 자모 단위로 분해한
+문자 바이그램 역색인(CSR 형태)으로 오타/띄어쓰기 차이가 있는 이름도 찾습니다.
+"현미밥 1공기, 닭가슴살 150g"처럼 흔한 텍스트 입력은 Gemini 호출 없이 수십 마이크로초 안에 계산합니다.
+
+데이터는 기본으로 api/data/food_composition.csv(대표 음식 seed)를 읽고,
+`import_food_composition` 명령으로 식약처 식품영양성분 DB 전체를 변환한 .npz가 있으면 그것을 사용합니다.
+"""
+import csv
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from .food_analysis_cache import normalize_food_text
+from .keyword_matcher import KeywordAutomaton
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+BUNDLED_TABLE_PATH = os.path.join(DATA_DIR, 'food_composition.csv')
+
+# 영양소 열 순서 (100g 기준)
+NUTRIENTS = ('energy_kcal', 'protein_g', 'fat_g', 'carbohydrate_g', 'sugar_g', 'fiber_g', 'sodium_mg')
+# nutrition_data 필드 이름 (FoodAnalysis / Gemini 응답과 같음)
+NUTRITION_FIELDS = ('calories', 'protein', 'fat', 'carbohydrates', 'sugar', 'fiber', 'sodium')
+
+# 포션 단위
+GRAM_UNITS = {'g': 1, '그램': 1, 'gram': 1, 'grams': 1, 'kg': 1000, '킬로': 1000,
+              'ml': 1, '밀리': 1, 'l': 1000, '리터': 1000}
+SPOON_UNITS = {'큰술': 15, '스푼': 15, '숟가락': 15, 'tbsp': 15, '작은술': 5, 'tsp': 5}
+SERVING_UNITS = {'인분', '공기', '그릇', '접시', '줄', '판', '병', 'serving', 'servings', 'bowl', 'bowls',
+                 'plate', 'plates', 'portion', 'portions', 'bottle', 'bottles'}
+PIECE_UNITS = {'개', '조각', '쪽', '장', '알', '컵', '캔', '잔', '팩', '봉지', '봉', '토막',
+               'piece', 'pieces', 'pc', 'pcs', 'slice', 'slices', 'cup', 'cups', 'can', 'cans',
+               'glass', 'glasses'}
+# 1마리 - 음식마다 무게가 크게 달라(치킨 700g, 새우 15g) 성분표의 whole_g로만 환산
+WHOLE_UNITS = {'마리'}
+KOREAN_NUMBERS = {'반': 0.5, '한': 1, '하나': 1, '두': 2, '둘': 2, '세': 3, '셋': 3, '네': 4, '넷': 4,
+                  '다섯': 5, '여섯': 6}
+
+_UNITS = sorted(list(GRAM_UNITS) + list(SPOON_UNITS) + list(SERVING_UNITS) + list(PIECE_UNITS) + list(WHOLE_UNITS),
+                key=len, reverse=True)
+PORTION_PATTERN = re.compile(
+    r'(?P<number>\d+(?:\.\d+)?(?:/\d+)?|' + '|'.join(sorted(KOREAN_NUMBERS, key=len, reverse=True)) + r')'
+    r'\s*(?P<unit>' + '|'.join(re.escape(unit) for unit in _UNITS) + r')(?![a-z])'
+    r'(?P<half>\s*반(?![가-힣]))?',
+    re.IGNORECASE,
+)
+SEGMENT_PATTERN = re.compile(r'[,+\n·&;]|(?<!\d)/|/(?!\d)|\s(?:및|그리고|하고|랑|and|with|y|con)\s', re.IGNORECASE)
+
+# 포함 매칭으로 인정할 최소 안쪽 바이그램 수 ('밥', '무' 같은 짧은 이름이 긴 문장에 걸리지 않도록)
+MIN_CONTAINED_GRAMS = 5
+# 자유 문장에서 음식 이름을 찾을 때 최소 글자 수 ('굴'이 '얼굴'에 걸리지 않도록)
+MIN_SPOT_LENGTH = 2
+
+
+def to_jamo(text: str) -> str:
+    """한글 음절을 초성/중성/종성 자모로 분해 (그 외 문자는 그대로)"""
+    chars = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            chars.append(chr(0x1100 + code // 588))
+            chars.append(chr(0x1161 + (code % 588) // 28))
+            if code % 28:
+                chars.append(chr(0x11A7 + code % 28))
+        else:
+            chars.append(ch)
+    return ''.join(chars)
+
+
+def ngrams(normalized: str) -> set:
+    """정규화된 이름의 자모 바이그램 집합 (앞뒤 경계 포함)"""
+    jamo = f"^{to_jamo(normalized)}$"
+    return {jamo[i:i + 2] for i in range(len(jamo) - 1)}
+
+
+def _number(value: str) -> float:
+    if value in KOREAN_NUMBERS:
+        return KOREAN_NUMBERS[value]
+    if '/' in value:
+        numerator, denominator = value.split('/')
+        return float(numerator) / float(denominator) if float(denominator) else 1.0
+    return float(value)
+
+
+def parse_portion(segment: str) -> Tuple[str, Optional[Tuple[float, str]]]:
+    """
+    "닭가슴살 150g" -> ("닭가슴살", (150.0, 'g'))
+
+    반환 단위는 'g'(중량), 'serving'(1인분), 'unit'(1개), 'whole'(1마리) 중 하나이고, 포션이 없으면 None입니다.
+    """
+    match = PORTION_PATTERN.search(segment)
+    if not match:
+        return segment.strip(), None
+    amount = _number(match.group('number'))
+    if match.group('half'):
+        amount += 0.5
+    unit = match.group('unit').lower()
+    name = (segment[:match.start()] + ' ' + segment[match.end():]).strip()
+    if unit in GRAM_UNITS:
+        return name, (amount * GRAM_UNITS[unit], 'g')
+    if unit in SPOON_UNITS:
+        return name, (amount * SPOON_UNITS[unit], 'g')
+    if unit in SERVING_UNITS:
+        return name, (amount, 'serving')
+    if unit in WHOLE_UNITS:
+        return name, (amount, 'whole')
+    return name, (amount, 'unit')
+
+
+@dataclass
+class FoodMatch:
+    index: int
+    name: str
+    score: float
+
+
+class FoodCompositionTable:
+    """열 배열 영양성분표 + 자모 바이그램 역색인"""
+
+    def __init__(self, names: Iterable[str], aliases: Iterable[str], categories: Iterable[str],
+                 nutrients: np.ndarray, serving_g: np.ndarray, unit_g: np.ndarray,
+                 whole_g: Optional[np.ndarray] = None):
+        self.names = np.asarray(list(names), dtype=str)
+        self.aliases = np.asarray(list(aliases), dtype=str)
+        self.categories = np.asarray(list(categories), dtype=str)
+        self.nutrients = np.asarray(nutrients, dtype=np.float32).reshape(-1, len(NUTRIENTS))
+        self.serving_g = np.asarray(serving_g, dtype=np.float32)
+        self.unit_g = np.asarray(unit_g, dtype=np.float32)
+        # 1마리 중량 (0이면 마리 단위를 환산할 수 없음)
+        self.whole_g = (np.asarray(whole_g, dtype=np.float32) if whole_g is not None
+                        else np.zeros(len(self.names), dtype=np.float32))
+        self._build_index()
+        self._spotter = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _build_index(self):
+        # 검색 항목 = 대표 이름 + 별칭, 항목마다 식품 번호를 기록
+        self._exact: Dict[str, int] = {}
+        entry_items: List[int] = []
+        entry_grams: List[set] = []
+        for index, (name, aliases) in enumerate(zip(self.names, self.aliases)):
+            for text in [name] + [alias for alias in aliases.split('|') if alias]:
+                normalized = normalize_food_text(text)
+                if not normalized:
+                    continue
+                self._exact.setdefault(normalized, index)
+                entry_items.append(index)
+                entry_grams.append(ngrams(normalized))
+
+        vocabulary: Dict[str, int] = {}
+        pairs: List[Tuple[int, int]] = []
+        for entry, grams in enumerate(entry_grams):
+            for gram in grams:
+                pairs.append((vocabulary.setdefault(gram, len(vocabulary)), entry))
+        pairs.sort()
+
+        gram_ids = np.fromiter((gram for gram, _ in pairs), dtype=np.int32, count=len(pairs))
+        self._vocabulary = vocabulary
+        self._postings = np.fromiter((entry for _, entry in pairs), dtype=np.int32, count=len(pairs))
+        self._offsets = np.searchsorted(gram_ids, np.arange(len(vocabulary) + 1)).astype(np.int32)
+        self._entry_items = np.asarray(entry_items, dtype=np.int32)
+        self._entry_sizes = np.asarray([len(grams) for grams in entry_grams], dtype=np.int32)
+
+    def lookup(self, text: str, min_score: float = 0.75) -> Optional[FoodMatch]:
+        """
+        이름으로 식품 찾기 - 정확히 같은 이름/별칭이 없으면 자모 바이그램 Dice 유사도로 가장 가까운 항목
+
+        Dice가 낮아도 입력 안에 어떤 이름이 통째로 들어 있으면("맛있는 김치찌개") 포함 비율로 점수를 매깁니다.
+        """
+        normalized = normalize_food_text(text)
+        if not normalized:
+            return None
+        index = self._exact.get(normalized)
+        if index is not None:
+            return FoodMatch(index, str(self.names[index]), 1.0)
+
+        query = [self._vocabulary[gram] for gram in ngrams(normalized) if gram in self._vocabulary]
+        if not query:
+            return None
+        query_size = len(ngrams(normalized))
+        entries, shared = np.unique(
+            np.concatenate([self._postings[self._offsets[g]:self._offsets[g + 1]] for g in query]),
+            return_counts=True,
+        )
+        sizes = self._entry_sizes[entries]
+        scores = 2.0 * shared / (sizes + query_size)
+        # 경계(^, $) 바이그램을 뺀 안쪽 바이그램이 모두 입력에 있으면 이름이 통째로 포함된 것
+        inner = sizes - 2
+        contained = (shared >= inner) & (inner >= MIN_CONTAINED_GRAMS)
+        scores = np.where(contained, np.maximum(scores, 0.5 * (1.0 + inner / query_size)), scores)
+
+        # 동점이면 더 긴(구체적인) 이름 우선
+        best = int(np.lexsort((-sizes, -scores))[0])
+        score = float(scores[best])
+        if score < min_score:
+            return None
+        index = int(self._entry_items[entries[best]])
+        return FoodMatch(index, str(self.names[index]), round(score, 3))
+
+    def portion_grams(self, index: int, portion: Optional[Tuple[float, str]]) -> Optional[float]:
+        """포션 중량 (g) - 1마리 중량이 없는 음식의 마리 단위는 None"""
+        if portion is None:
+            return float(self.serving_g[index])
+        amount, unit = portion
+        if unit == 'serving':
+            return amount * float(self.serving_g[index])
+        if unit == 'unit':
+            return amount * float(self.unit_g[index])
+        if unit == 'whole':
+            return amount * float(self.whole_g[index]) if self.whole_g[index] else None
+        return amount
+
+    def _item(self, index: int, query: str, grams: float, score: float) -> Dict:
+        return dict(
+            name=str(self.names[index]),
+            query=query,
+            grams=round(grams, 1),
+            score=score,
+            category=str(self.categories[index]),
+            **self.nutrition(index, grams),
+        )
+
+    def nutrition(self, index: int, grams: float) -> Dict[str, float]:
+        values = self.nutrients[index] * (grams / 100.0)
+        return {field: round(float(value), 1) for field, value in zip(NUTRITION_FIELDS, values)}
+
+    def analyze_text(self, text: str, min_score: float = 0.75) -> Optional[Dict]:
+        """
+        "현미밥 1공기, 닭가슴살 150g" 같은 텍스트를 항목별 영양 정보와 합계로 계산
+
+        한 항목이라도 찾지 못하거나 포션을 환산할 수 없으면 None
+        (부분 결과로 칼로리를 과소 추정하지 않도록 전체를 Gemini로 넘김)
+        """
+        segments = [segment.strip() for segment in SEGMENT_PATTERN.split(text or '') if segment and segment.strip()]
+        if not segments:
+            return None
+        items = []
+        for segment in segments:
+            name, portion = parse_portion(segment)
+            match = self.lookup(name, min_score) if name else None
+            if match is None:
+                return None
+            grams = self.portion_grams(match.index, portion)
+            if grams is None:
+                return None
+            items.append(self._item(match.index, segment, grams, match.score))
+        totals = {field: sum(item[field] for item in items) for field in NUTRITION_FIELDS}
+        return {'items': items, 'total': totals}
+
+    def _get_spotter(self) -> KeywordAutomaton:
+        if self._spotter is None:
+            automaton = KeywordAutomaton()
+            for index, (name, aliases) in enumerate(zip(self.names, self.aliases)):
+                for text in [name] + [alias for alias in aliases.split('|') if alias]:
+                    if len(text) >= MIN_SPOT_LENGTH:
+                        # 한국어는 조사가 붙으므로("닭가슴살이랑") 경계 확인 없음, 영문은 단어 시작만 ("price"의 rice 제외)
+                        boundary = 'prefix' if text.isascii() else 'any'
+                        automaton.add(text, group='food', label=str(index), boundary=boundary)
+            self._spotter = automaton.build()
+        return self._spotter
+
+    def spot_foods(self, text: str) -> Optional[Dict]:
+        """
+        자유 문장("오늘 점심에 닭가슴살이랑 현미밥 먹었어")에 들어 있는 음식 이름을 모두 찾아 계산
+
+        겹치는 이름은 긴 것("닭가슴살샐러드" > "닭가슴살")만 쓰고, 이름 바로 뒤의 포션("반마리")을 적용합니다.
+        포션을 환산할 수 없는 항목은 1인분으로 계산하고, 하나도 찾지 못하면 None
+        """
+        text = text or ''
+        matches = sorted(self._get_spotter().find(text), key=lambda m: (m.start, -(m.end - m.start)))
+        items = []
+        covered = -1
+        for match in matches:
+            if match.start < covered:
+                continue
+            covered = match.end
+            index = int(match.label)
+            # 이름 바로 뒤(공백 허용)의 포션만 이 음식의 포션으로 봄
+            after = match.end + len(text[match.end:]) - len(text[match.end:].lstrip())
+            portion_match = PORTION_PATTERN.match(text, after)
+            portion = parse_portion(portion_match.group())[1] if portion_match else None
+            grams = self.portion_grams(index, portion)
+            if grams is None:
+                grams = float(self.serving_g[index])
+            end = portion_match.end() if portion_match else match.end
+            items.append(self._item(index, text[match.start:end], grams, 1.0))
+        if not items:
+            return None
+        totals = {field: sum(item[field] for item in items) for field in NUTRITION_FIELDS}
+        return {'items': items, 'total': totals}
+
+    # 직렬화
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path, names=self.names, aliases=self.aliases, categories=self.categories,
+            nutrients=self.nutrients, serving_g=self.serving_g, unit_g=self.unit_g, whole_g=self.whole_g,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'FoodCompositionTable':
+        if path.endswith('.npz'):
+            with np.load(path, allow_pickle=False) as data:
+                return cls(data['names'], data['aliases'], data['categories'],
+                           data['nutrients'], data['serving_g'], data['unit_g'],
+                           data['whole_g'] if 'whole_g' in data else None)
+        return cls.from_rows(read_table_csv(path))
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict]) -> 'FoodCompositionTable':
+        return cls(
+            names=[row['name'] for row in rows],
+            aliases=[row.get('aliases', '') for row in rows],
+            categories=[row.get('category', '') for row in rows],
+            nutrients=np.array([[row[column] for column in NUTRIENTS] for row in rows], dtype=np.float32),
+            serving_g=np.array([row['serving_g'] for row in rows], dtype=np.float32),
+            unit_g=np.array([row['unit_g'] or row['serving_g'] for row in rows], dtype=np.float32),
+            whole_g=np.array([row.get('whole_g', 0) for row in rows], dtype=np.float32),
+        )
+
+
+def read_table_csv(path: str) -> List[Dict]:
+    """번들 형식 CSV 읽기 ('#' 주석 줄 무시)"""
+    with open(path, encoding='utf-8') as f:
+        reader = csv.DictReader(line for line in f if not line.startswith('#'))
+        rows = []
+        for row in reader:
+            parsed = {'name': row['name'].strip(), 'aliases': row.get('aliases') or '',
+                      'category': row.get('category') or ''}
+            for column in NUTRIENTS + ('serving_g', 'unit_g', 'whole_g'):
+                parsed[column] = float(row.get(column) or 0)
+            parsed['serving_g'] = parsed['serving_g'] or 100.0
+            rows.append(parsed)
+    return rows
+
+
+# 성분표 기반 결과 요약/권장사항 문구 (Gemini 응답과 같은 언어로)
+LOCAL_TEXT = {
+    'ko': {
+        'summary': "{items} 기준 약 {calories:.0f}kcal (단백질 {protein:.1f}g, 탄수화물 {carbohydrates:.1f}g, "
+                   "지방 {fat:.1f}g, 나트륨 {sodium:.0f}mg)입니다. 식품 영양성분표 기반 추정값입니다.",
+        'low_protein': "단백질이 부족하니 달걀, 두부, 살코기 같은 단백질 반찬을 곁들여 보세요.",
+        'high_fat': "지방 비중이 높으니 다음 식사는 채소 위주로 가볍게 구성해 보세요.",
+        'high_sodium': "나트륨이 많으니 국물은 남기고 물을 충분히 드세요.",
+        'high_sugar': "당류가 많으니 단 음료나 간식은 줄여 보세요.",
+        'fiber': "식이섬유가 풍부한 구성입니다.",
+        'balanced': "전체적으로 균형 잡힌 식사입니다.",
+    },
+    'en': {
+        'summary': "About {calories:.0f} kcal for {items} (protein {protein:.1f} g, carbohydrates "
+                   "{carbohydrates:.1f} g, fat {fat:.1f} g, sodium {sodium:.0f} mg). "
+                   "Estimated from the food composition table.",
+        'low_protein': "Protein is low; add a side such as eggs, tofu or lean meat.",
+        'high_fat': "Fat is high; keep your next meal light and vegetable-based.",
+        'high_sodium': "Sodium is high; leave the broth and drink plenty of water.",
+        'high_sugar': "Sugar is high; cut back on sweet drinks and snacks.",
+        'fiber': "This meal is rich in dietary fiber.",
+        'balanced': "Overall this is a balanced meal.",
+    },
+    'es': {
+        'summary': "Aproximadamente {calories:.0f} kcal para {items} (proteína {protein:.1f} g, carbohidratos "
+                   "{carbohydrates:.1f} g, grasa {fat:.1f} g, sodio {sodium:.0f} mg). "
+                   "Estimación basada en la tabla de composición de alimentos.",
+        'low_protein': "La proteína es baja; añade huevos, tofu o carne magra.",
+        'high_fat': "La grasa es alta; que tu próxima comida sea ligera y con verduras.",
+        'high_sodium': "El sodio es alto; deja el caldo y bebe suficiente agua.",
+        'high_sugar': "El azúcar es alto; reduce bebidas dulces y snacks.",
+        'fiber': "Esta comida es rica en fibra.",
+        'balanced': "En general es una comida equilibrada.",
+    },
+}
+
+
+def local_recommendations(total: Dict[str, float], language: str) -> str:
+    """성분표 결과에 대한 규칙 기반 권장사항 (프로필과 무관한 일반 안내)"""
+    text = LOCAL_TEXT.get(language, LOCAL_TEXT['en'])
+    notes = []
+    if total['calories'] >= 300 and total['protein'] < 15:
+        notes.append(text['low_protein'])
+    if total['calories'] and total['fat'] * 9 / total['calories'] > 0.35:
+        notes.append(text['high_fat'])
+    if total['sodium'] > 1200:
+        notes.append(text['high_sodium'])
+    if total['sugar'] > 25:
+        notes.append(text['high_sugar'])
+    if total['fiber'] >= 5:
+        notes.append(text['fiber'])
+    return ' '.join(notes or [text['balanced']])
+
+
+def to_nutrition_data(result: Dict, language: str) -> Dict:
+    """analyze_text 결과를 Gemini 응답과 같은 nutrition_data 형식으로 변환"""
+    text = LOCAL_TEXT.get(language, LOCAL_TEXT['en'])
+    total = result['total']
+    items = ', '.join(f"{item['name']} {item['grams']:g}g" for item in result['items'])
+    data = {field: round(total[field], 1) for field in NUTRITION_FIELDS}
+    data['calories'] = round(total['calories'])
+    data.update(
+        food_name=', '.join(item['name'] for item in result['items']),
+        analysis_summary=text['summary'].format(items=items, **total),
+        recommendations=local_recommendations(total, language),
+        source='food_composition_table',
+    )
+    return data
+
+
+def local_enabled() -> bool:
+    return getattr(settings, 'LOCAL_FOOD_ANALYSIS_ENABLED', True)
+
+
+def local_food_analysis(food: Dict, language: str) -> Optional[Dict]:
+    """텍스트만 있는 분석 요청을 성분표로 계산 (찾지 못한 항목이 있으면 None)"""
+    if not local_enabled() or food.get('image_base64') or food.get('image'):
+        return None
+    name, description = food.get('food_name') or '', food.get('description') or ''
+    if normalize_food_text(name) in normalize_food_text(description):
+        name = ''  # 설명에 이름이 이미 들어 있음
+    text = ' '.join(part for part in (name, description) if part)
+    try:
+        result = get_food_composition_table().analyze_text(
+            text, getattr(settings, 'FOOD_COMPOSITION_MIN_SCORE', 0.75)
+        )
+    except Exception as e:
+        logger.warning(f"Local food composition lookup failed: {str(e)}")
+        return None
+    return to_nutrition_data(result, language) if result else None
+
+
+_food_composition_table = None
+_table_lock = threading.Lock()
+
+def get_food_composition_table() -> FoodCompositionTable:
+    """식품 영양성분표 인스턴스 가져오기 (싱글톤, 첫 사용 시 로드)"""
+    global _food_composition_table
+    if not _food_composition_table:
+        with _table_lock:
+            if not _food_composition_table:
+                path = getattr(settings, 'FOOD_COMPOSITION_PATH', '') or BUNDLED_TABLE_PATH
+                if not os.path.exists(path):
+                    logger.warning(f"Food composition table {path} not found, using bundled table")
+                    path = BUNDLED_TABLE_PATH
+                _food_composition_table = FoodCompositionTable.load(path)
+                logger.info(f"Food composition table loaded: {len(_food_composition_table)} foods from {path}")
+    return _food_composition_table
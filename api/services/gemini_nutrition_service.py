@@ -9,6 +9,9 @@ from typing import Dict, List, Optional
 import google.generativeai as genai
 from django.conf import settings
 
+from .model_router import complete
+from .recommendation_cache import get_recommendation_cache
+
 logger = logging.getLogger(__name__)
 
 class GeminiNutritionAnalyzer:
@@ -88,10 +91,10 @@ class GeminiNutritionAnalyzer:
             }}
             """
             
-            response = self.model.generate_content(prompt)
+            # 지연 예산 안의 모델로 호출 (기본 gemini-pro, 느려지면 다른 모델로 우회)
+            content = complete('meal_analysis', [{'role': 'user', 'content': prompt}], temperature=None).text
             
             # JSON 파싱
-            content = response.text
             if '```json' in content:
                 content = content.split('```json')[1].split('```')[0].strip()
             elif '```' in content:
@@ -113,7 +116,15 @@ class GeminiNutritionAnalyzer:
             return self._fallback_analysis(food_description)
     
     def suggest_meal_plan(self, user_data: Dict, meal_type: str = 'daily') -> Dict:
-        """AI 기반 식단 추천"""
+        """AI 기반 식단 추천 (같은 프로필 구간이면 캐시된 식단 변형을 순환 제공)"""
+        return get_recommendation_cache().get_or_generate(
+            f'meal_plan:{meal_type}', user_data, lambda: self._suggest_meal_plan(user_data, meal_type),
+            # 기본 식단(ai_powered=False)은 저장하지 않음
+            is_cacheable=lambda result: bool(result.get('success') and result.get('ai_powered'))
+        )
+    
+    def _suggest_meal_plan(self, user_data: Dict, meal_type: str = 'daily') -> Dict:
+        """AI 기반 식단 추천 (LLM 호출)"""
         try:
             if not self.model:
                 return self._get_default_meal_plan(meal_type)
@@ -184,10 +195,10 @@ class GeminiNutritionAnalyzer:
             }}
             """
             
-            response = self.model.generate_content(prompt)
+            # 지연 예산 안의 모델로 호출 (기본 gemini-pro, 느려지면 다른 모델로 우회)
+            content = complete('meal_analysis', [{'role': 'user', 'content': prompt}], temperature=None).text
             
             # JSON 파싱
-            content = response.text
             if '```json' in content:
                 content = content.split('```json')[1].split('```')[0].strip()
             elif '```' in content:
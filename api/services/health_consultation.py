@@ -1,5 +1,7 @@
 import random
 
+from .keyword_matcher import KeywordAutomaton
+
 # 간단한 건강 상담 지식베이스 (벡터스토어 대신)
 HEALTH_KNOWLEDGE = {
     'nutrition': {
@@ -55,31 +57,54 @@ HEALTH_KNOWLEDGE = {
     }
 }
 
+# 주제 키워드 (라벨, 키워드 목록) - "뱃살", "낮잠"처럼 복합어가 많아 경계 없이 매칭
+TOPIC_KEYWORDS = [
+    ('nutrition', ['식사', '영양', '다이어트', '음식', '칼로리']),
+    ('nutrition:다이어트', ['다이어트', '살', '체중', '감량']),
+    ('nutrition:영양소', ['영양소', '비타민', '단백질', '탄수화물']),
+    ('exercise', ['운동', '근력', '유산소', '헬스', '피트니스']),
+    ('exercise:근력', ['근력', '웨이트', '근육']),
+    ('exercise:유산소', ['유산소', '달리기', '조깅', '심폐']),
+    ('health:수면', ['수면', '잠', '불면']),
+    ('health:스트레스', ['스트레스', '우울', '불안']),
+]
+
+
+def _build_topic_matcher():
+    automaton = KeywordAutomaton()
+    for label, keywords in TOPIC_KEYWORDS:
+        automaton.add_many(keywords, group='topic', label=label, boundary='any')
+    return automaton.build()
+
+
+TOPIC_MATCHER = _build_topic_matcher()
+
+
 def find_best_answer(question, category='general'):
-    """질문에 가장 적합한 답변 찾기 (간단한 키워드 매칭)"""
+    """질문에 가장 적합한 답변 찾기 (키워드 매칭 - 한 번의 순회로 모든 주제 확인)"""
     
-    question_lower = question.lower()
+    topics = TOPIC_MATCHER.labels(question)
     
     # 카테고리별 키워드 매칭
-    if category == 'nutrition' or any(word in question_lower for word in ['식사', '영양', '다이어트', '음식', '칼로리']):
-        if any(word in question_lower for word in ['다이어트', '살', '체중', '감량']):
+    if category == 'nutrition' or 'nutrition' in topics:
+        if 'nutrition:다이어트' in topics:
             responses = HEALTH_KNOWLEDGE['nutrition']['다이어트']
-        elif any(word in question_lower for word in ['영양소', '비타민', '단백질', '탄수화물']):
+        elif 'nutrition:영양소' in topics:
             responses = HEALTH_KNOWLEDGE['nutrition']['영양소']
         else:
             responses = HEALTH_KNOWLEDGE['nutrition']['식사']
     
-    elif category == 'exercise' or any(word in question_lower for word in ['운동', '근력', '유산소', '헬스', '피트니스']):
-        if any(word in question_lower for word in ['근력', '웨이트', '근육']):
+    elif category == 'exercise' or 'exercise' in topics:
+        if 'exercise:근력' in topics:
             responses = HEALTH_KNOWLEDGE['exercise']['근력']
-        elif any(word in question_lower for word in ['유산소', '달리기', '조깅', '심폐']):
+        elif 'exercise:유산소' in topics:
             responses = HEALTH_KNOWLEDGE['exercise']['유산소']
         else:
             responses = HEALTH_KNOWLEDGE['exercise']['운동']
     
-    elif any(word in question_lower for word in ['수면', '잠', '불면']):
+    elif 'health:수면' in topics:
         responses = HEALTH_KNOWLEDGE['health']['수면']
-    elif any(word in question_lower for word in ['스트레스', '우울', '불안']):
+    elif 'health:스트레스' in topics:
         responses = HEALTH_KNOWLEDGE['health']['스트레스']
     else:
         responses = HEALTH_KNOWLEDGE['health']['일반']
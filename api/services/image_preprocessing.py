@@ -0,0 +1,205 @@
+"""
+비전 모델 입력 사진 전처리
+
+휴대폰 사진(4000x3000 JPEG, 수 MB)을 그대로 보내면 업로드 시간과 모델의 이미지 처리 시간이 모두 늘지만,
+모델은 내부적으로 약 1000px 이하로 줄여서 봅니다. 보내기 전에 다음을 수행합니다.
+
+- 실제 포맷 판별 (매직 바이트 - 확장자/요청 헤더를 믿지 않음)
+- EXIF 방향 적용 (세로 사진이 눕혀서 분석되지 않도록)
+- 긴 변 VISION_IMAGE_MAX_SIDE 이하로 축소 (JPEG는 draft()로 DCT 단계에서 먼저 축소)
+- JPEG(VISION_IMAGE_QUALITY)로 다시 인코딩
+
+디코딩/리사이즈/인코딩은 Pillow C 코드가 GIL을 놓고 실행하므로 전용 스레드 풀에서 돌리고,
+VISION_PREPROCESS_POOL=process면 프로세스 풀을 사용합니다. 원본은 저장소에 그대로 보관합니다.
+"""
+import asyncio
+import io
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    logger.warning("Pillow not available. Vision images are sent without preprocessing.")
+
+# 그대로 보내도 되는 포맷 (그 외는 JPEG로 변환)
+PASSTHROUGH_MIME_TYPES = ('image/jpeg', 'image/png', 'image/webp')
+HEIF_BRANDS = (b'heic', b'heix', b'hevc', b'hevx', b'heim', b'heis', b'mif1', b'msf1')
+
+
+def sniff_mime_type(data: bytes) -> str:
+    """매직 바이트로 이미지 MIME 타입 판별 (알 수 없으면 image/jpeg)"""
+    if data[:3] == b'\xff\xd8\xff':
+        return 'image/jpeg'
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'image/png'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data[4:8] == b'ftyp':
+        if data[8:12] == b'avif':
+            return 'image/avif'
+        if data[8:12] in HEIF_BRANDS:
+            return 'image/heic'
+    return 'image/jpeg'
+
+
+class PreprocessedImage(NamedTuple):
+    data: bytes
+    mime_type: str
+    original_bytes: int
+    original_size: Optional[Tuple[int, int]]
+    size: Optional[Tuple[int, int]]
+    elapsed: float
+
+    @property
+    def bytes(self) -> int:
+        return len(self.data)
+
+
+def _needs_rotation(image) -> bool:
+    try:
+        return image.getexif().get(0x0112, 1) != 1  # Orientation
+    except Exception:
+        return False
+
+
+def preprocess_image(data: bytes, max_side: int = 1024, quality: int = 85) -> PreprocessedImage:
+    """
+    방향 보정 + 축소 + JPEG 재인코딩 (풀 작업자에서 실행하는 순수 함수)
+
+    이미 작고 방향 보정이 필요 없는 JPEG/PNG/WebP나, Pillow로 열 수 없는 포맷(HEIC 등)은 원본을 그대로 반환합니다.
+    긴 변 제한을 넘는 사진은 재인코딩 결과가 원본보다 크더라도 축소본을 반환합니다 (모델 입력 크기 보장).
+    """
+    start = time.perf_counter()
+    mime_type = sniff_mime_type(data)
+    if not PIL_AVAILABLE:
+        return PreprocessedImage(data, mime_type, len(data), None, None, time.perf_counter() - start)
+    try:
+        image = Image.open(io.BytesIO(data))
+        original_size = image.size
+        rotate = _needs_rotation(image)
+        if max(original_size) <= max_side and not rotate and mime_type in PASSTHROUGH_MIME_TYPES:
+            return PreprocessedImage(data, mime_type, len(data), original_size, original_size,
+                                     time.perf_counter() - start)
+
+        # JPEG는 1/2, 1/4, 1/8 스케일로 디코딩해 전체 해상도 디코딩을 피함
+        image.draft('RGB', (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # 투명 배경은 흰색으로 합성
+            rgba = image.convert('RGBA')
+            background = Image.new('RGB', rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=quality)
+        processed = buffer.getvalue()
+    except Exception as e:
+        logger.warning(f"Vision image preprocessing failed ({mime_type}, {len(data)} bytes): {str(e)}")
+        return PreprocessedImage(data, mime_type, len(data), None, None, time.perf_counter() - start)
+
+    return PreprocessedImage(processed, 'image/jpeg', len(data), original_size, image.size,
+                             time.perf_counter() - start)
+
+
+class PreprocessStats:
+    """전처리 전/후 바이트 누적 (헬스 체크에 노출)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.images = 0
+        self.passthrough = 0
+        self.original_bytes = 0
+        self.processed_bytes = 0
+        self.seconds = 0.0
+
+    def record(self, result: PreprocessedImage):
+        with self._lock:
+            self.images += 1
+            self.passthrough += result.bytes == result.original_bytes
+            self.original_bytes += result.original_bytes
+            self.processed_bytes += result.bytes
+            self.seconds += result.elapsed
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'images': self.images,
+                'passthrough': self.passthrough,
+                'original_bytes': self.original_bytes,
+                'processed_bytes': self.processed_bytes,
+                'reduction': round(1 - self.processed_bytes / self.original_bytes, 3) if self.original_bytes else 0.0,
+                'avg_ms': round(self.seconds / self.images * 1000, 1) if self.images else 0.0,
+            }
+
+
+_stats = PreprocessStats()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = getattr(settings, 'VISION_PREPROCESS_WORKERS', 4)
+                if getattr(settings, 'VISION_PREPROCESS_POOL', 'thread') == 'process':
+                    _executor = ProcessPoolExecutor(max_workers=workers)
+                else:
+                    _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='vision-preprocess')
+    return _executor
+
+
+def _submit(data: bytes):
+    return _get_executor().submit(
+        preprocess_image, data,
+        getattr(settings, 'VISION_IMAGE_MAX_SIDE', 1024),
+        getattr(settings, 'VISION_IMAGE_QUALITY', 85),
+    )
+
+
+def _report(result: PreprocessedImage) -> PreprocessedImage:
+    _stats.record(result)
+    logger.info(
+        f"Vision image {result.original_bytes // 1024}KB {result.original_size} -> "
+        f"{result.bytes // 1024}KB {result.size} ({result.mime_type}, {result.elapsed * 1000:.0f}ms)"
+    )
+    return result
+
+
+def prepare_vision_image(data: Optional[bytes]) -> Optional[PreprocessedImage]:
+    """비전 모델에 보낼 사진 전처리 (풀에서 실행, 꺼져 있으면 원본 그대로)"""
+    if not data:
+        return None
+    if not getattr(settings, 'VISION_PREPROCESS_ENABLED', True):
+        return PreprocessedImage(data, sniff_mime_type(data), len(data), None, None, 0.0)
+    return _report(_submit(data).result())
+
+
+async def aprepare_vision_image(data: Optional[bytes]) -> Optional[PreprocessedImage]:
+    """prepare_vision_image의 비동기 버전 (이벤트 루프를 막지 않음)"""
+    if not data:
+        return None
+    if not getattr(settings, 'VISION_PREPROCESS_ENABLED', True):
+        return PreprocessedImage(data, sniff_mime_type(data), len(data), None, None, 0.0)
+    return _report(await asyncio.wrap_future(_submit(data)))
+
+
+def preprocess_stats() -> Dict:
+    return dict(_stats.as_dict(), enabled=getattr(settings, 'VISION_PREPROCESS_ENABLED', True))
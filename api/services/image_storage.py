@@ -0,0 +1,223 @@
+"""
+음식 사진 저장소 - 내용 해시(SHA-256)를 키로 한 번만 저장하고 썸네일 생성
+
+운영 환경은 django-storages(S3), 개발 환경은 MEDIA_ROOT 파일 시스템(default_storage)을 사용합니다.
+FoodAnalysis에는 base64 원본 대신 저장 키만 기록하므로 목록 조회가 이미지 크기와 무관해집니다.
+같은 사진을 여러 번 올려도 키가 같아 한 번만 저장됩니다.
+
+영구 저장소(FOOD_IMAGE_DURABLE_STORAGE)가 아니면 (예: Railway 컨테이너의 로컬 MEDIA_ROOT)
+재배포 시 파일이 사라지므로 예전처럼 image_base64 컬럼에 인라인으로 저장합니다.
+"""
+import base64
+import hashlib
+import io
+import logging
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    logger.warning("Pillow not available. Food image thumbnails disabled.")
+
+# Pillow 포맷 이름 -> 확장자
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif', 'HEIF': 'heic', 'MPO': 'jpg'}
+
+
+def decode_image(image_base64: str) -> bytes:
+    """data URL 또는 순수 base64 문자열을 바이트로 디코딩"""
+    return base64.b64decode(image_base64.split(',')[1] if ',' in image_base64 else image_base64)
+
+
+def _prefix() -> str:
+    return getattr(settings, 'FOOD_IMAGE_PREFIX', 'food-images').strip('/')
+
+
+def _make_thumbnail(image) -> bytes:
+    size = getattr(settings, 'FOOD_IMAGE_THUMBNAIL_SIZE', 256)
+    thumbnail = image.convert('RGB')
+    thumbnail.thumbnail((size, size))
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, format='JPEG', quality=getattr(settings, 'FOOD_IMAGE_THUMBNAIL_QUALITY', 80), optimize=True)
+    return buffer.getvalue()
+
+
+def _save_once(key: str, data: bytes):
+    # 키가 내용 해시이므로 이미 있으면 같은 파일
+    if not default_storage.exists(key):
+        saved = default_storage.save(key, ContentFile(data))
+        if saved != key:
+            # 동시 업로드로 다른 이름이 붙은 경우 중복본 제거
+            default_storage.delete(saved)
+
+
+def durable_storage() -> bool:
+    """default_storage가 재배포/다른 프로세스에서도 유지되는 저장소인지 (S3, 영구 볼륨)"""
+    return getattr(settings, 'FOOD_IMAGE_DURABLE_STORAGE', False)
+
+
+def store_image(data: bytes) -> Dict[str, str]:
+    """
+    이미지 바이트를 저장하고 FoodAnalysis 사진 필드 반환
+
+    영구 저장소면 {'image_key', 'thumbnail_key'}, 아니면 빈 키와 인라인 image_base64
+    """
+    if not durable_storage():
+        return {'image_key': '', 'thumbnail_key': '', 'image_base64': base64.b64encode(data).decode('ascii')}
+    return upload_image(data)
+
+
+def upload_image(data: bytes) -> Dict[str, str]:
+    """이미지 바이트를 default_storage에 저장하고 {'image_key', 'thumbnail_key'} 반환"""
+    digest = hashlib.sha256(data).hexdigest()
+    shard = f"{digest[:2]}/{digest}"
+
+    image = None
+    extension = 'jpg'
+    if PIL_AVAILABLE:
+        try:
+            image = Image.open(io.BytesIO(data))
+            extension = EXTENSIONS.get(image.format, extension)
+        except Exception as e:
+            logger.warning(f"Unreadable food image {digest[:12]}: {str(e)}")
+
+    image_key = f"{_prefix()}/{shard}.{extension}"
+    _save_once(image_key, data)
+
+    thumbnail_key = ''
+    if image is not None:
+        thumbnail_key = f"{_prefix()}/thumbs/{shard}.jpg"
+        try:
+            if not default_storage.exists(thumbnail_key):
+                _save_once(thumbnail_key, _make_thumbnail(image))
+        except Exception as e:
+            logger.warning(f"Thumbnail generation failed for {digest[:12]}: {str(e)}")
+            thumbnail_key = ''
+
+    return {'image_key': image_key, 'thumbnail_key': thumbnail_key}
+
+
+def _pending_marker(key: str) -> str:
+    return f"food-image-pending:{key}"
+
+
+def mark_pending_image(key: str, ttl: int):
+    """아직 기록에 연결되지 않은 사진 (분석 토큰) - ttl 동안 delete_orphan_images에서 제외"""
+    cache.set(_pending_marker(key), True, ttl)
+
+
+def delete_orphan_images(min_age: timedelta, batch_size: int = 500) -> int:
+    """
+    어떤 FoodAnalysis/FoodAnalysisJob도 참조하지 않는 사진과 썸네일 삭제 (Celery beat 야간 작업)
+
+    분석만 하고 저장하지 않은 사진이 대상입니다. min_age보다 최근에 올라왔거나 토큰이 살아 있는 사진은 남깁니다.
+    """
+    from ..models import FoodAnalysis, FoodAnalysisJob
+
+    prefix = _prefix()
+    cutoff = timezone.now() - min_age
+    deleted = 0
+    try:
+        shards = default_storage.listdir(prefix)[0]
+    except FileNotFoundError:
+        return 0
+    for shard in shards:
+        if shard == 'thumbs':
+            continue
+        files = default_storage.listdir(f"{prefix}/{shard}")[1]
+        for start in range(0, len(files), batch_size):
+            keys = [f"{prefix}/{shard}/{name}" for name in files[start:start + batch_size]]
+            referenced = set(FoodAnalysis.objects.filter(image_key__in=keys).values_list('image_key', flat=True))
+            referenced.update(FoodAnalysisJob.objects.filter(image_key__in=keys).values_list('image_key', flat=True))
+            for key in keys:
+                if key in referenced or cache.get(_pending_marker(key)):
+                    continue
+                try:
+                    if default_storage.get_modified_time(key) > cutoff:
+                        continue
+                    default_storage.delete(key)
+                    digest = key.rsplit('/', 1)[-1].split('.')[0]
+                    default_storage.delete(f"{prefix}/thumbs/{shard}/{digest}.jpg")
+                    deleted += 1
+                except Exception as e:
+                    logger.warning(f"Orphan food image cleanup failed for {key}: {str(e)}")
+    return deleted
+
+
+def store_base64_image(image_base64: Optional[str]) -> Dict[str, str]:
+    """base64 사진 저장 (없거나 디코딩할 수 없으면 빈 키)"""
+    if not image_base64:
+        return {'image_key': '', 'thumbnail_key': ''}
+    try:
+        data = decode_image(image_base64)
+    except Exception as e:
+        logger.warning(f"Invalid base64 food image: {str(e)}")
+        return {'image_key': '', 'thumbnail_key': ''}
+    return store_image(data)
+
+
+def read_request_image(data: Dict) -> Optional[bytes]:
+    """분석 요청의 사진 바이트 - 업로드 파일(image)을 그대로 읽거나 image_base64를 디코딩"""
+    upload = data.get('image')
+    if upload is not None:
+        upload.seek(0)
+        return upload.read()
+    if data.get('image_base64'):
+        return decode_image(data['image_base64'])
+    return None
+
+
+def read_image(key: str) -> bytes:
+    with default_storage.open(key, 'rb') as f:
+        return f.read()
+
+
+def image_url(key: Optional[str]) -> Optional[str]:
+    return default_storage.url(key) if key else None
+
+
+def move_inline_images(model, batch_size: int = 100) -> int:
+    """
+    image_base64에 남아 있는 사진을 저장소로 옮기고 키 기록 (배치별 커밋, 재실행 가능)
+
+    원본 컬럼은 지우지 않습니다 (verify_moved_images 확인 후 마이그레이션으로 제거).
+    """
+    from django.db import transaction
+
+    pending = model.objects.exclude(image_base64__isnull=True).exclude(image_base64='').filter(image_key='')
+    ids = list(pending.order_by('id').values_list('id', flat=True))
+    moved = 0
+    for start in range(0, len(ids), batch_size):
+        rows = list(model.objects.filter(id__in=ids[start:start + batch_size]).only('id', 'image_base64'))
+        for row in rows:
+            try:
+                keys = upload_image(decode_image(row.image_base64))
+            except Exception as e:
+                logger.warning(f"Inline food image {row.id} not moved: {str(e)}")
+                continue
+            row.image_key, row.thumbnail_key = keys['image_key'], keys['thumbnail_key']
+        with transaction.atomic():
+            model.objects.bulk_update(rows, ['image_key', 'thumbnail_key'])
+        moved += len(rows)
+        logger.info(f"Moved {moved}/{len(ids)} inline food images")
+    return moved
+
+
+def verify_moved_images(model) -> Dict[str, int]:
+    """인라인 사진이 모두 저장소에 있는지 확인 - {'pending': 키 없음, 'missing': 키는 있으나 파일 없음}"""
+    inline = model.objects.exclude(image_base64__isnull=True).exclude(image_base64='')
+    keys = inline.exclude(image_key='').values_list('image_key', flat=True).distinct()
+    return {
+        'pending': inline.filter(image_key='').count(),
+        'missing': sum(1 for key in keys.iterator() if not default_storage.exists(key)),
+    }
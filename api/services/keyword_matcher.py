@@ -0,0 +1,240 @@
+"""
+Aho–Corasick 다중 키워드 매처
+
+키워드 목록을 한 번 컴파일해 두고, 질문을 한 번만 훑어서
+카테고리 점수와 의도(인사/감사 등) 매칭을 동시에 구합니다.
+
+한국어는 복합어("하체운동")와 조사/어미("단백질은")가 붙으므로 경계 모드를 키워드별로 지정합니다.
+  - 'any'   : 경계 확인 없음 (카테고리 키워드 - 복합어 포함)
+  - 'prefix': 왼쪽 경계만 확인 ("스쿼트할 때" 허용, "하체스쿼트" 제외)
+  - 'word'  : 왼쪽 경계 + 뒤에 남은 글자가 조사/어미 목록에 있을 때만 허용
+              ("감사합니다"는 매칭, "감사원"은 매칭하지 않음)
+"""
+import re
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# 'word' 경계에서 키워드 뒤에 붙을 수 있는 조사/어미
+KOREAN_SUFFIXES = frozenset([
+    # 조사
+    '은', '는', '이', '가', '을', '를', '에', '에서', '으로', '로', '와', '과', '도', '만', '의',
+    '이나', '나', '랑', '이랑', '에게', '한테', '까지', '부터', '보다', '처럼', '요', '이요',
+    # 하다/드리다 활용
+    '해', '해요', '했어', '했어요', '합니다', '했습니다', '하세요', '하고', '하면', '할', '한', '하는',
+    '하기', '해서', '드려요', '드립니다', '드려', '해용', '하세여', '하세용',
+])
+
+_WORD_CHAR_RE = re.compile(r'\w')
+
+
+class KeywordMatch(NamedTuple):
+    keyword: str
+    group: str
+    label: str
+    start: int
+    end: int
+
+
+class _Pattern(NamedTuple):
+    keyword: str
+    group: str
+    label: str
+    boundary: str
+
+
+def _is_word_char(char: str) -> bool:
+    return bool(_WORD_CHAR_RE.match(char))
+
+
+class KeywordAutomaton:
+    """
+    Aho–Corasick 오토마톤 (build 시 실패 링크를 전이표에 미리 펼쳐 검색 중 되돌아가지 않음)
+
+    add()는 원본 트라이(_trie)만 수정하고, build()는 매번 그 복사본으로 전이표(_goto)를 새로 만듭니다.
+    따라서 build() 이후에 add()해도 다음 find()/build()에서 올바르게 다시 컴파일됩니다.
+
+    사용법:
+        automaton = KeywordAutomaton()
+        automaton.add('단백질', group='category', label='nutrition')
+        automaton.build()
+        automaton.find('단백질은 얼마나?')
+    """
+
+    def __init__(self):
+        self._patterns: List[_Pattern] = []
+        # 원본 트라이 (자식 전이/노드에서 끝나는 패턴만)
+        self._trie: List[Dict[str, int]] = [{}]
+        self._trie_outputs: List[List[int]] = [[]]
+        # build() 결과 (실패 전이가 병합된 DFA 전이표 / 실패 경로 출력 포함)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[List[int]] = [[]]
+        self._built = False
+
+    def add(self, keyword: str, group: str, label: str, boundary: str = 'prefix'):
+        if boundary not in ('any', 'prefix', 'word'):
+            raise ValueError(f"Unknown boundary mode: {boundary}")
+        keyword = keyword.lower()
+        if not keyword:
+            return
+        pattern_id = len(self._patterns)
+        self._patterns.append(_Pattern(keyword, group, label, boundary))
+
+        node = 0
+        for char in keyword:
+            next_node = self._trie[node].get(char)
+            if next_node is None:
+                next_node = len(self._trie)
+                self._trie[node][char] = next_node
+                self._trie.append({})
+                self._trie_outputs.append([])
+            node = next_node
+        self._trie_outputs[node].append(pattern_id)
+        self._built = False
+
+    def add_many(self, keywords: Iterable[str], group: str, label: str, boundary: str = 'prefix'):
+        for keyword in keywords:
+            self.add(keyword, group, label, boundary)
+
+    def build(self) -> 'KeywordAutomaton':
+        """원본 트라이에서 실패 링크 계산 후 전이표에 병합 (BFS)"""
+        trie = self._trie
+        goto = [dict(transitions) for transitions in trie]
+        outputs = [list(pattern_ids) for pattern_ids in self._trie_outputs]
+        fail = [0] * len(trie)
+        queue = deque(trie[0].values())
+
+        while queue:
+            node = queue.popleft()
+            # 실패 링크는 원본 트라이의 자식만 따라가며 계산 (병합된 전이는 BFS 순서상 이미 완성된 노드)
+            for char, child in trie[node].items():
+                queue.append(child)
+                fail[child] = goto[fail[node]].get(char, 0) if node else 0
+                outputs[child] += outputs[fail[child]]
+
+            # 자식이 없는 문자는 실패 노드의 전이를 그대로 사용 (DFA화)
+            # 실패 경로가 루트로 끝나므로 루트의 첫 글자 전이도 모든 노드에 펼쳐져 검색 루프는 dict 조회 한 번
+            if node:
+                for char, target in goto[fail[node]].items():
+                    goto[node].setdefault(char, target)
+
+        self._goto = goto
+        self._outputs = outputs
+        self._built = True
+        return self
+
+    def find(self, text: str) -> List[KeywordMatch]:
+        """경계 조건을 만족하는 모든 매칭 (텍스트 한 번 순회)"""
+        if not self._built:
+            self.build()
+
+        text = text.lower()
+        goto = self._goto
+        outputs = self._outputs
+        matches = []
+        node = 0
+        for index, char in enumerate(text):
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                for pattern_id in outputs[node]:
+                    pattern = self._patterns[pattern_id]
+                    start = index - len(pattern.keyword) + 1
+                    if self._check_boundary(text, start, index + 1, pattern.boundary):
+                        matches.append(KeywordMatch(pattern.keyword, pattern.group, pattern.label, start, index + 1))
+        return matches
+
+    def labels(self, text: str, group: Optional[str] = None) -> Set[str]:
+        return {match.label for match in self.find(text) if group is None or match.group == group}
+
+    @staticmethod
+    def _check_boundary(text: str, start: int, end: int, boundary: str) -> bool:
+        if boundary == 'any':
+            return True
+        # 왼쪽: 문장 시작 또는 공백/구두점 뒤
+        if start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if boundary == 'prefix':
+            return True
+
+        # 오른쪽: 토큰 끝이거나 남은 부분이 조사/어미
+        token_end = end
+        while token_end < len(text) and _is_word_char(text[token_end]):
+            token_end += 1
+        rest = text[end:token_end]
+        return not rest or rest in KOREAN_SUFFIXES
+
+
+class QueryAnalysis(NamedTuple):
+    category_scores: Dict[str, int]
+    intents: List[str]
+    token_count: int
+    matches: List[KeywordMatch]
+
+    @property
+    def top_category(self) -> Optional[str]:
+        if not self.category_scores:
+            return None
+        # 동점이면 기존처럼 CATEGORY_KEYWORDS 순서가 우선
+        return min(self.category_scores, key=lambda c: (-self.category_scores[c], _CATEGORY_ORDER.get(c, len(_CATEGORY_ORDER))))
+
+
+# 챗봇 카테고리 키워드
+CATEGORY_KEYWORDS = {
+    'exercise': ['운동', '스쿼트', '푸시업', '플랭크', '런닝', '요가', '필라테스', '근육', '체력', '트레이닝'],
+    'nutrition': ['영양', '단백질', '탄수화물', '지방', '비타민', '칼로리', '식단', '음식', '다이어트', '식품'],
+    'health': ['건강', '질병', '증상', '치료', '예방', '면역', '스트레스', '수면', '정신건강', '의학']
+}
+
+# 빠른 응답 의도 (키워드, 의도, 응답) - 앞에 있을수록 우선
+SIMPLE_INTENTS = [
+    ('안녕', 'greeting', "안녕하세요! 무엇을 도와드릴까요?"),
+    ('고마워', 'thanks', "천만에요! 더 궁금한 점이 있으시면 언제든 물어보세요."),
+    ('감사', 'gratitude', "도움이 되어 기쁩니다! 건강한 하루 보내세요."),
+]
+SIMPLE_RESPONSES = {intent: response for _, intent, response in SIMPLE_INTENTS}
+
+_CATEGORY_ORDER = {category: index for index, category in enumerate(CATEGORY_KEYWORDS)}
+_INTENT_ORDER = {intent: index for index, (_, intent, _) in enumerate(SIMPLE_INTENTS)}
+
+# 이 토큰 수를 넘거나 카테고리 키워드가 있으면 인사/감사가 있어도 실제 질문으로 처리
+SIMPLE_MAX_TOKENS = 4
+
+
+def build_query_matcher() -> KeywordAutomaton:
+    automaton = KeywordAutomaton()
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        automaton.add_many(keywords, group='category', label=category, boundary='any')
+    for keyword, intent, _ in SIMPLE_INTENTS:
+        automaton.add(keyword, group='intent', label=intent, boundary='word')
+    return automaton.build()
+
+
+# 임포트 시 한 번만 컴파일
+QUERY_MATCHER = build_query_matcher()
+
+
+def analyze_query(question: str, matcher: KeywordAutomaton = QUERY_MATCHER) -> QueryAnalysis:
+    """카테고리 점수와 의도를 한 번의 순회로 계산"""
+    matches = matcher.find(question or '')
+    category_scores: Dict[str, int] = {}
+    intents: List[str] = []
+    seen: Set[Tuple[str, str]] = set()
+    for match in matches:
+        # 같은 키워드가 여러 번 나와도 한 번만 계산 (기존 동작과 동일)
+        if (match.keyword, match.label) in seen:
+            continue
+        seen.add((match.keyword, match.label))
+        if match.group == 'category':
+            category_scores[match.label] = category_scores.get(match.label, 0) + 1
+        elif match.group == 'intent' and match.label not in intents:
+            intents.append(match.label)
+
+    if len(intents) > 1:
+        intents.sort(key=lambda intent: _INTENT_ORDER.get(intent, len(_INTENT_ORDER)))
+    return QueryAnalysis(category_scores, intents, len((question or '').split()), matches)
+
+
+def simple_answer(analysis: QueryAnalysis) -> Optional[str]:
+    """짧은 인사/감사 메시지에만 정해진 답변 반환"""
+    if not analysis.intents or analysis.category_scores or analysis.token_count > SIMPLE_MAX_TOKENS:
+        return None
+    return SIMPLE_RESPONSES.get(analysis.intents[0])
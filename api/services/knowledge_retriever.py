@@ -0,0 +1,304 @@
+"""
+NumPy 기반 경량 지식 검색기
+
+langchain/FAISS/sentence-transformers가 없는 Railway 이미지에서 사용합니다.
+문서 임베딩을 float16 또는 int8(행별 스케일) 행렬로 .npy에 저장하고,
+검색은 내적 + argpartition으로 top-k만 부분 정렬합니다.
+
+인덱스는 배포 시 `python manage.py build_knowledge_index --if-missing`으로 KNOWLEDGE_INDEX_PATH
+(소스 트리 밖)에 만듭니다. 요청 처리 중에는 파일을 쓰지 않습니다.
+"""
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+
+from .text_embedding import get_default_embedder
+
+logger = logging.getLogger(__name__)
+
+# 기본 헬스/운동 지식 (FAISS 벡터스토어와 공용)
+DEFAULT_KNOWLEDGE_DOCUMENTS = [
+    # 운동 관련
+    {'category': 'exercise', 'content': "스쿼트는 하체 운동의 기본으로, 대퇴사두근, 햄스트링, 둔근을 강화합니다. 올바른 자세: 발을 어깨너비로 벌리고, 무릎이 발끝을 넘지 않도록 주의하며 엉덩이를 뒤로 빼면서 앉습니다."},
+    {'category': 'exercise', 'content': "푸시업은 가슴, 어깨, 삼두근을 강화하는 상체 운동입니다. 초보자는 무릎을 대고 시작하며, 점진적으로 표준 푸시업으로 발전시킵니다."},
+    {'category': 'exercise', 'content': "플랭크는 코어 강화에 효과적입니다. 팔꿈치를 90도로 굽히고 전완을 바닥에 대고, 몸을 일직선으로 유지합니다. 30초부터 시작해 점진적으로 시간을 늘립니다."},
+
+    # 영양 관련
+    {'category': 'nutrition', 'content': "단백질은 근육 성장과 회복에 필수적입니다. 체중 1kg당 0.8-2g의 단백질 섭취를 권장합니다. 운동 후 30분 이내 섭취가 효과적입니다."},
+    {'category': 'nutrition', 'content': "탄수화물은 운동 에너지원입니다. 운동 전 1-2시간 전에 복합 탄수화물을 섭취하면 지속적인 에너지를 얻을 수 있습니다."},
+    {'category': 'nutrition', 'content': "수분 섭취는 운동 성능에 중요합니다. 운동 전 500ml, 운동 중 15-20분마다 150-250ml, 운동 후 체중 감소량의 150%를 섭취합니다."},
+
+    # 건강 관련
+    {'category': 'health', 'content': "규칙적인 운동은 심혈관 건강을 개선하고, 당뇨병 위험을 감소시키며, 정신 건강에도 도움이 됩니다. 주 150분 이상의 중강도 운동을 권장합니다."},
+    {'category': 'health', 'content': "충분한 수면은 근육 회복과 성장에 필수적입니다. 성인은 7-9시간의 수면이 필요하며, 운동 후 회복을 위해 특히 중요합니다."},
+    {'category': 'health', 'content': "스트레칭은 유연성을 향상시키고 부상을 예방합니다. 운동 전 동적 스트레칭, 운동 후 정적 스트레칭을 권장합니다."},
+]
+
+SUPPORTED_DTYPES = ('float16', 'int8')
+
+# 기본 최소 유사도 - 해싱 임베딩은 점수 분포가 낮아 별도 기준 사용
+# (기본 문서 기준 관련 질문의 1위 점수 0.18~0.48, 무관한 질문은 0.14 이하)
+LEXICAL_MIN_SCORE = 0.15
+SEMANTIC_MIN_SCORE = 0.35
+
+
+def _quantize(matrix: np.ndarray, dtype: str):
+    """float32 행렬을 저장용 dtype으로 변환 - (행렬, 행별 스케일 또는 None)"""
+    if dtype == 'float16':
+        return matrix.astype(np.float16), None
+    # int8: 행별 최대 절댓값을 127로 맞추는 대칭 양자화
+    scales = np.abs(matrix).max(axis=1)
+    scales[scales == 0] = 1.0
+    quantized = np.round(matrix / scales[:, None] * 127).astype(np.int8)
+    return quantized, (scales / 127).astype(np.float32)
+
+
+class KnowledgePartition:
+    """카테고리 하나의 임베딩 행렬과 문서 목록"""
+
+    def __init__(self, matrix: np.ndarray, scales: Optional[np.ndarray], documents: List[Dict]):
+        self.matrix = matrix
+        self.scales = scales
+        self.documents = documents
+        self._dense = None
+
+    def __len__(self):
+        return len(self.documents)
+
+    def dense(self) -> np.ndarray:
+        """검색용 float32 행렬 (첫 검색 시 한 번만 역양자화 - numpy의 float16 행렬곱은 느림)"""
+        if self._dense is None:
+            dense = self.matrix.astype(np.float32)
+            if self.scales is not None:
+                dense *= self.scales[:, None]
+            self._dense = dense
+        return self._dense
+
+    def top_k(self, query_vector: np.ndarray, k: int):
+        """(점수, 문서) 상위 k개 - 정렬되지 않은 상태로 반환"""
+        if not self.documents:
+            return []
+        scores = self.dense() @ query_vector
+        k = min(k, scores.shape[0])
+        # 전체 정렬 대신 top-k만 분리
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [(float(scores[i]), self.documents[i]) for i in top]
+
+
+class NumpyKnowledgeRetriever:
+    """
+    카테고리별로 분할된 .npy 임베딩 인덱스
+
+    카테고리(exercise/nutrition/health/general)마다 별도 행렬을 두어
+    카테고리 검색 시 다른 카테고리 문서는 아예 계산하지 않습니다.
+
+    저장 구조:
+      meta.json                    - 임베더 이름, dtype, 차원, 카테고리별 문서 수
+      <category>/embeddings.npy    - (N, dim) float16 또는 int8
+      <category>/scales.npy        - int8일 때 행별 역양자화 스케일
+      <category>/documents.json    - 문서 본문/카테고리/id
+    """
+
+    def __init__(self, embedder=None, dtype: str = 'float16'):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        self.embedder = embedder or get_default_embedder()
+        self.dtype = dtype
+        self.path: Optional[str] = None
+        self.partitions: Dict[str, KnowledgePartition] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(partition) for partition in self.partitions.values())
+
+    @property
+    def dim(self) -> int:
+        for partition in self.partitions.values():
+            return int(partition.matrix.shape[1])
+        return 0
+
+    def build(self, documents: List[Dict]):
+        """문서 목록으로 인덱스를 새로 생성 (각 문서: {'content', 'category', ...})"""
+        self.partitions = {}
+        self._next_id = 0
+        self.add_documents(documents, persist=False)
+        return self
+
+    def add_documents(self, documents: List[Dict], persist: bool = True) -> int:
+        """
+        기존 인덱스에 문서 추가 (전체 재빌드 없이 새 문서만 임베딩)
+
+        영향받은 카테고리 파티션만 다시 저장합니다.
+        """
+        if not documents:
+            return 0
+
+        by_category: Dict[str, List[Dict]] = {}
+        with self._lock:
+            for doc in documents:
+                category = doc.get('category') or 'general'
+                by_category.setdefault(category, []).append(dict(doc, category=category, id=self._next_id))
+                self._next_id += 1
+
+            for category, new_docs in by_category.items():
+                vectors = self.embedder.embed_documents([doc['content'] for doc in new_docs])
+                matrix, scales = _quantize(vectors, self.dtype)
+
+                current = self.partitions.get(category)
+                if current is not None:
+                    matrix = np.concatenate([current.matrix, matrix])
+                    if scales is not None:
+                        scales = np.concatenate([current.scales, scales])
+                    new_docs = current.documents + new_docs
+                # 새 파티션 객체로 교체 - 검색 중인 스레드는 이전 파티션을 그대로 사용
+                self.partitions[category] = KnowledgePartition(matrix, scales, new_docs)
+
+            if persist and self.path:
+                for category in by_category:
+                    self._save_partition(self.path, category)
+                self._save_meta(self.path)
+
+        return len(documents)
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        for category in self.partitions:
+            self._save_partition(path, category)
+        self._save_meta(path)
+        self.path = path
+
+    def _save_partition(self, path: str, category: str):
+        partition = self.partitions[category]
+        partition_path = os.path.join(path, category)
+        os.makedirs(partition_path, exist_ok=True)
+        np.save(os.path.join(partition_path, 'embeddings.npy'), np.asarray(partition.matrix))
+        if partition.scales is not None:
+            np.save(os.path.join(partition_path, 'scales.npy'), partition.scales)
+        with open(os.path.join(partition_path, 'documents.json'), 'w', encoding='utf-8') as f:
+            json.dump(partition.documents, f, ensure_ascii=False)
+
+    def _save_meta(self, path: str):
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'embedder': self.embedder.name,
+                'dtype': self.dtype,
+                'dim': self.dim,
+                'next_id': self._next_id,
+                'categories': {category: len(partition) for category, partition in self.partitions.items()},
+            }, f)
+
+    @classmethod
+    def load(cls, path: str, embedder=None, mmap: bool = True) -> 'NumpyKnowledgeRetriever':
+        """저장된 인덱스 로드 (임베더가 다르면 ValueError - 다시 빌드 필요)"""
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        retriever = cls(embedder=embedder, dtype=meta['dtype'])
+        if meta['embedder'] != retriever.embedder.name:
+            raise ValueError(f"Index built with {meta['embedder']}, current embedder is {retriever.embedder.name}")
+
+        mmap_mode = 'r' if mmap else None
+        for category in meta['categories']:
+            partition_path = os.path.join(path, category)
+            matrix = np.load(os.path.join(partition_path, 'embeddings.npy'), mmap_mode=mmap_mode)
+            scales_path = os.path.join(partition_path, 'scales.npy')
+            scales = np.load(scales_path) if os.path.exists(scales_path) else None
+            with open(os.path.join(partition_path, 'documents.json'), encoding='utf-8') as f:
+                documents = json.load(f)
+            retriever.partitions[category] = KnowledgePartition(matrix, scales, documents)
+
+        retriever._next_id = meta['next_id']
+        retriever.path = path
+        return retriever
+
+    def search(self, query: str, k: int = 3, category: Optional[str] = None,
+               min_score: Optional[float] = None, include_general: bool = True) -> List[Dict]:
+        """
+        코사인 유사도 top-k 검색
+
+        category를 주면 해당 카테고리(+ include_general이면 'general') 파티션만 검색하고,
+        없으면 모든 파티션을 검색합니다. 파티션별 top-k를 합쳐 최종 top-k를 고릅니다.
+        """
+        if min_score is None:
+            if getattr(self.embedder, 'lexical', False):
+                min_score = getattr(settings, 'KNOWLEDGE_LEXICAL_MIN_SCORE', LEXICAL_MIN_SCORE)
+            else:
+                min_score = SEMANTIC_MIN_SCORE
+
+        if category:
+            names = [category, 'general'] if include_general and category != 'general' else [category]
+        else:
+            names = list(self.partitions)
+        partitions = [self.partitions[name] for name in names if name in self.partitions]
+        if not partitions:
+            return []
+
+        query_vector = self.embedder.embed_query(query).astype(np.float32)
+        candidates = []
+        for partition in partitions:
+            candidates.extend(partition.top_k(query_vector, k))
+        candidates.sort(key=lambda item: item[0], reverse=True)
+
+        return [
+            {
+                'content': doc['content'],
+                'score': score,
+                'category': doc.get('category', 'general'),
+            }
+            for score, doc in candidates[:k]
+            if score >= min_score
+        ]
+
+
+# 전역 검색기 인스턴스
+_retriever = None
+_retriever_lock = threading.Lock()
+
+
+def get_knowledge_index_path() -> str:
+    return getattr(settings, 'KNOWLEDGE_INDEX_PATH', None) or os.path.join(
+        os.path.expanduser('~'), '.cache', 'healthwise', 'knowledge_index'
+    )
+
+
+def build_knowledge_retriever(documents: List[Dict] = None, embedder=None, dtype: str = None,
+                              save: bool = True) -> NumpyKnowledgeRetriever:
+    """기본 문서로 인덱스 생성 (save면 KNOWLEDGE_INDEX_PATH에 저장)"""
+    retriever = NumpyKnowledgeRetriever(
+        embedder=embedder,
+        dtype=dtype or getattr(settings, 'KNOWLEDGE_INDEX_DTYPE', 'float16'),
+    ).build(documents or DEFAULT_KNOWLEDGE_DOCUMENTS)
+    if save:
+        retriever.save(get_knowledge_index_path())
+    return retriever
+
+
+def load_knowledge_retriever() -> NumpyKnowledgeRetriever:
+    """저장된 인덱스 로드 (없거나 이전 형식/다른 임베더면 OSError/ValueError/KeyError)"""
+    return NumpyKnowledgeRetriever.load(get_knowledge_index_path())
+
+
+def get_knowledge_retriever() -> NumpyKnowledgeRetriever:
+    """
+    지식 검색기 인스턴스 가져오기 (싱글톤)
+
+    인덱스를 쓸 수 없으면 기본 문서로 메모리에만 만들고 경고를 남깁니다 (배포 단계 누락).
+    """
+    global _retriever
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                try:
+                    _retriever = load_knowledge_retriever()
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(
+                        f"Knowledge index unavailable at {get_knowledge_index_path()} ({str(e)}); "
+                        "using in-memory default documents. Run `manage.py build_knowledge_index` at deploy time."
+                    )
+                    _retriever = build_knowledge_retriever(save=False)
+    return _retriever
@@ -0,0 +1,428 @@
+"""
+로컬 식단 최적화 - 오늘 남은 칼로리/탄단지에 맞는 한 끼 조합
+
+예전 영양 추천은 매번 GPT에 식단 목록을 요청했습니다. 이제는 다음 순서로 몇 밀리초 안에 계산합니다.
+
+1. 목표: Mifflin-St Jeor 목표 칼로리(daily_recommendation_service.target_calories)를
+   단백질(체중 1kg당 1g, 열량의 15~30%) / 지방(25%) / 탄수화물(나머지)로 나눔
+2. 남은 양: 목표 - 오늘 DailyNutrition 합계, 이번 끼니 몫 = 남은 양 x 끼니 비율
+3. 후보: 로컬 식품 영양성분표(food_composition)에서 끼니 구성 역할(주식/국/단백질/반찬/과일·간식)별로
+   알레르기 식품을 빼고, 역할 몫에 가까운 (음식, 포션) 상위 후보만 남김
+4. 조합: 역할별 후보의 모든 조합 합계를 NumPy 브로드캐스팅으로 한 번에 계산하고
+   목표와의 가중 상대 오차 + 나트륨 초과 - 선호 음식 보너스 + 오늘 먹은 음식 페널티가 가장 낮은 조합 선택
+
+LLM은 선택 사항으로, 고른 식단을 설명하는 짧은 문장만 씁니다 (meal_plan_prose).
+"""
+import functools
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import DailyNutrition, UserProfile, WorkoutLog
+from .daily_recommendation_service import target_calories
+from .food_analysis_cache import normalize_food_text
+from .food_composition import NUTRIENTS, FoodCompositionTable, get_food_composition_table
+from .model_router import complete
+
+logger = logging.getLogger(__name__)
+
+# 최적화에 쓰는 영양소 (응답 필드 이름, 성분표 열)
+MACROS = (('calories', 'energy_kcal'), ('protein', 'protein_g'), ('carbohydrates', 'carbohydrate_g'),
+          ('fat', 'fat_g'))
+MACRO_COLUMNS = [NUTRIENTS.index(column) for _, column in MACROS]
+SODIUM_COLUMN = NUTRIENTS.index('sodium_mg')
+SUGAR_COLUMN = NUTRIENTS.index('sugar_g')
+
+# 목표 대비 오차 가중치 / 목표가 아주 작을 때 상대 오차의 분모 하한
+MACRO_WEIGHTS = np.array([2.0, 1.5, 1.0, 1.0], dtype=np.float32)
+MACRO_FLOORS = np.array([100.0, 10.0, 20.0, 8.0], dtype=np.float32)
+# 칼로리 초과는 부족보다 더 큰 페널티
+CALORIE_OVERSHOOT_PENALTY = 1.5
+# 끼니당 나트륨 권장 상한 (하루 2000mg 기준) / 당류 상한 (끼니 열량의 10%)
+MEAL_SODIUM_LIMIT = 800.0
+SUGAR_ENERGY_RATIO = 0.10
+PREFERENCE_BONUS = 0.15
+EATEN_TODAY_PENALTY = 0.1
+# 남은 칼로리가 이보다 적으면 추천하지 않음
+MIN_MEAL_CALORIES = 100
+
+# 끼니별 하루 비율 / 끼니 구성 역할
+MEAL_SHARES = {'breakfast': 0.25, 'lunch': 0.35, 'dinner': 0.30, 'snack': 0.10}
+MEAL_ORDER = ('breakfast', 'lunch', 'dinner', 'snack')
+MEAL_LABELS = {'breakfast': '아침', 'lunch': '점심', 'dinner': '저녁', 'snack': '간식'}
+# 끼니 구성: 자리마다 (허용 역할, 칼로리 몫 가중치, 1인분 대비 포션) - 빵은 아침 주식으로만
+MEAL_TEMPLATES = {
+    'breakfast': ((('staple', 'bread'), 3.0, (0.5, 1.0, 1.5)), (('protein',), 2.0, (0.5, 1.0, 1.5)),
+                  (('fruit',), 1.5, (1.0,))),
+    'lunch': ((('staple',), 3.0, (0.5, 1.0, 1.5)), (('soup',), 1.5, (1.0,)), (('side',), 1.0, (1.0,))),
+    'dinner': ((('staple',), 3.0, (0.5, 1.0, 1.5)), (('protein',), 2.0, (0.5, 1.0, 1.5)),
+               (('side',), 1.0, (1.0,))),
+    'snack': ((('fruit',), 1.0, (1.0,)),),
+}
+# 분류 이름에 이 단어가 들어 있으면 해당 역할 (번들 표와 식약처 DB 분류 모두, 앞의 역할 우선)
+ROLE_KEYWORDS = (
+    ('soup', ('국', '탕', '찌개', '전골')),
+    ('bread', ('빵',)),
+    ('staple', ('밥', '면', '죽', '분식', '중식', '일식', '양식', '만두')),
+    ('protein', ('육류', '가금', '어패', '난류', '두류', '구이', '찜')),
+    ('side', ('반찬', '채소', '김치', '전류', '샐러드', '버섯', '해조', '나물', '무침', '볶음', '조림')),
+    ('fruit', ('과일', '유제품', '견과', '서류', '떡', '간식')),
+)
+# 역할별로 조합 탐색에 남길 (음식, 포션) 후보 수
+CANDIDATES_PER_ROLE = 32
+
+# 프로필 알레르기 선택지(services/data.py) -> 제외할 분류/이름 단어
+ALLERGEN_KEYWORDS = {
+    '견과류': ('견과', '땅콩', '아몬드', '호두', '캐슈', '피스타치오', '잣', '피넛', '마카다미아'),
+    '유제품': ('유제품', '우유', '치즈', '요거트', '요구르트', '라떼', '크림', '버터', '아이스크림', '밀크',
+            '카푸치노', '마키아토', '피자', '까르보나라', '그라탕'),
+    '글루텐': ('빵', '면류', '만두', '국수', '라면', '우동', '파스타', '스파게티', '짜장', '짬뽕', '수제비',
+            '칼국수', '돈까스', '튀김', '치킨', '피자', '부침', '전류', '케이크', '쿠키', '시리얼'),
+    '해산물': ('어패', '새우', '게장', '꽃게', '대게', '크랩', '오징어', '조개', '굴', '홍합', '멸치', '어묵',
+            '참치', '연어', '해물', '생선', '낙지', '쭈꾸미', '주꾸미', '문어', '젓갈', '대구', '명태', '황태',
+            '북어', '고등어', '갈치', '삼치', '조기', '회', '랍스터', '장어'),
+    '계란': ('난류', '계란', '달걀', '에그', '오므라이스', '마요', '지단'),
+}
+
+
+def daily_targets(profile: Optional[UserProfile], sessions: int, today: date) -> Dict[str, float]:
+    """하루 목표 칼로리/단백질/탄수화물/지방"""
+    calories = float(target_calories(profile, sessions, today))
+    protein = profile.weight * 1.0 if profile and profile.weight else calories * 0.18 / 4
+    protein = min(max(protein, calories * 0.15 / 4), calories * 0.30 / 4)
+    fat = calories * 0.25 / 9
+    carbohydrates = (calories - protein * 4 - fat * 9) / 4
+    return {'calories': calories, 'protein': round(protein, 1), 'carbohydrates': round(carbohydrates, 1),
+            'fat': round(fat, 1)}
+
+
+def current_meal(now: Optional[datetime] = None) -> str:
+    hour = (now or timezone.localtime()).hour
+    if hour < 10:
+        return 'breakfast'
+    if hour < 15:
+        return 'lunch'
+    if hour < 21:
+        return 'dinner'
+    return 'snack'
+
+
+def meal_target(targets: Dict[str, float], remaining: Dict[str, float], meal: str) -> Dict[str, float]:
+    """
+    이번 끼니 목표 = 남은 양 x (이번 끼니 비율 / 이번 끼니부터 남은 끼니 비율 합)
+
+    늦게 먹는 끼니가 남은 양을 한꺼번에 떠안지 않도록 하루 목표 x 끼니 비율의 1.5배를 넘지 않습니다.
+    """
+    later = MEAL_ORDER[MEAL_ORDER.index(meal):]
+    fraction = MEAL_SHARES[meal] / sum(MEAL_SHARES[m] for m in later)
+    return {
+        field: round(min(remaining[field] * fraction, targets[field] * MEAL_SHARES[meal] * 1.5), 1)
+        for field, _ in MACROS
+    }
+
+
+def role_of(category: str) -> Optional[str]:
+    for role, keywords in ROLE_KEYWORDS:
+        if any(keyword in category for keyword in keywords):
+            return role
+    return None
+
+
+def allergen_keywords(allergies: Iterable[str]) -> List[str]:
+    """프로필 알레르기 -> 제외 단어 ('해산물 알레르기' 같은 선택지와 '새우' 같은 직접 입력 모두)"""
+    keywords = []
+    for allergy in allergies or []:
+        label = str(allergy).replace('알레르기', '').strip()
+        if not label or label in ('없음', '음식'):
+            continue
+        keywords.extend(ALLERGEN_KEYWORDS.get(label, (label,)))
+    return keywords
+
+
+class MealOptimizer:
+    """성분표의 1인분 영양소 행렬과 역할 분류를 미리 계산해 두고 끼니 조합을 고르는 최적화기"""
+
+    def __init__(self, table: FoodCompositionTable):
+        self.table = table
+        # 1인분 기준 (칼로리, 단백질, 탄수화물, 지방) / 나트륨 / 당류
+        per_serving = table.nutrients * (table.serving_g / 100.0)[:, None]
+        self.macros = per_serving[:, MACRO_COLUMNS].astype(np.float32)
+        self.sodium = per_serving[:, SODIUM_COLUMN].astype(np.float32)
+        self.sugar = per_serving[:, SUGAR_COLUMN].astype(np.float32)
+        self.roles = np.array([role_of(str(category)) or '' for category in table.categories])
+        # 알레르기/선호 검사용 검색 문자열 (이름|별칭|분류), 단어별 마스크는 캐시
+        self.search_text = np.char.add(
+            np.char.add(np.char.add(table.names, '|'), table.aliases), np.char.add('|', table.categories)
+        )
+        self._keyword_mask = functools.lru_cache(maxsize=4096)(self._find)
+
+    def _find(self, keyword: str) -> np.ndarray:
+        return np.char.find(self.search_text, keyword) >= 0
+
+    def matching(self, keywords: Sequence[str]) -> np.ndarray:
+        """이름/별칭/분류에 단어가 들어 있는 식품 마스크"""
+        mask = np.zeros(len(self.table), dtype=bool)
+        for keyword in keywords:
+            mask |= self._keyword_mask(keyword)
+        return mask
+
+    def food_indexes(self, names: Iterable[str]) -> np.ndarray:
+        """음식 이름 목록 -> 성분표에서 찾은 식품 마스크 (정확/퍼지 이름 + 이름 포함)"""
+        mask = np.zeros(len(self.table), dtype=bool)
+        for name in names or []:
+            normalized = normalize_food_text(str(name))
+            if not normalized:
+                continue
+            match = self.table.lookup(normalized)
+            if match:
+                mask[match.index] = True
+            if len(normalized) >= 2:
+                mask |= self._keyword_mask(normalized)
+        return mask
+
+    def _penalties(self, totals: np.ndarray, sodium: np.ndarray, sugar: np.ndarray,
+                   target: np.ndarray) -> np.ndarray:
+        """목표와의 가중 상대 제곱 오차 + 나트륨/당류 초과 (마지막 축이 영양소)"""
+        error = (totals - target) / np.maximum(target, MACRO_FLOORS)
+        error[..., 0] *= np.where(error[..., 0] > 0, CALORIE_OVERSHOOT_PENALTY, 1.0)
+        sugar_limit = max(target[0] * SUGAR_ENERGY_RATIO / 4, 5.0)
+        return ((error ** 2 * MACRO_WEIGHTS).sum(axis=-1)
+                + 0.5 * np.maximum(sodium - MEAL_SODIUM_LIMIT, 0) / MEAL_SODIUM_LIMIT
+                + 0.5 * np.maximum(sugar - sugar_limit, 0) / sugar_limit)
+
+    def _candidates(self, roles: Tuple[str, ...], portions: Tuple[float, ...], share: np.ndarray,
+                    allowed: np.ndarray, adjustment: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """자리 몫에 가까운 (식품 번호, 포션) 후보"""
+        foods = np.flatnonzero(allowed & np.isin(self.roles, roles))
+        portions = np.asarray(portions, dtype=np.float32)
+        food_ids = np.repeat(foods, len(portions))
+        portion_values = np.tile(portions, len(foods))
+        scores = self._penalties(
+            self.macros[food_ids] * portion_values[:, None], self.sodium[food_ids] * portion_values,
+            self.sugar[food_ids] * portion_values, share,
+        ) + adjustment[food_ids]
+        keep = np.argsort(scores, kind='stable')[:CANDIDATES_PER_ROLE]
+        return food_ids[keep], portion_values[keep]
+
+    def optimize(self, target: Dict[str, float], meal: str, allergies: Iterable[str] = (),
+                 preferred_foods: Iterable[str] = (), eaten_foods: Iterable[str] = (),
+                 alternatives: int = 2) -> List[Dict]:
+        """
+        끼니 목표에 가장 가까운 조합 (최선 + 주식이 다른 대안 최대 alternatives개)
+
+        자리별 후보 K개의 모든 조합(K^자리 수)을 (K, K, K, 4) 배열로 한 번에 계산합니다.
+        """
+        template = MEAL_TEMPLATES[meal]
+        target_vector = np.array([target[field] for field, _ in MACROS], dtype=np.float32)
+        allowed = ~self.matching(allergen_keywords(allergies)) & (self.macros[:, 0] > 0)
+        preferred = self.food_indexes(preferred_foods)
+        adjustment = (EATEN_TODAY_PENALTY * self.food_indexes(eaten_foods)
+                      - PREFERENCE_BONUS * preferred).astype(np.float32)
+
+        weights = np.array([weight for _, weight, _ in template], dtype=np.float32)
+        slots = []
+        for (roles, _, portions), weight in zip(template, weights / weights.sum()):
+            foods, amounts = self._candidates(roles, portions, target_vector * weight, allowed, adjustment)
+            if not len(foods):
+                return []
+            slots.append((foods, amounts))
+
+        # 조합 합계 브로드캐스팅: 자리 i의 후보를 i번째 축에 놓음
+        dims = len(slots)
+        totals = np.zeros([len(foods) for foods, _ in slots] + [len(MACROS)], dtype=np.float32)
+        sodium = np.zeros(totals.shape[:-1], dtype=np.float32)
+        sugar = np.zeros(totals.shape[:-1], dtype=np.float32)
+        bonus = np.zeros(totals.shape[:-1], dtype=np.float32)
+        for axis, (foods, amounts) in enumerate(slots):
+            shape = [1] * dims
+            shape[axis] = len(foods)
+            totals += (self.macros[foods] * amounts[:, None]).reshape(shape + [len(MACROS)])
+            sodium += (self.sodium[foods] * amounts).reshape(shape)
+            sugar += (self.sugar[foods] * amounts).reshape(shape)
+            bonus += adjustment[foods].reshape(shape)
+        flat = (self._penalties(totals, sodium, sugar, target_vector) + bonus).ravel()
+
+        # 첫 자리(주식) 후보마다 나머지 자리의 최선 조합 -> 주식이 다른 조합을 점수 순으로
+        per_staple = flat.reshape(len(slots[0][0]), -1)
+        best = per_staple.argmin(axis=1)
+        best_scores = per_staple[np.arange(len(best)), best]
+        results, staples = [], set()
+        for first in np.argsort(best_scores, kind='stable'):
+            staple = int(slots[0][0][first])
+            if staple in staples:
+                continue
+            staples.add(staple)
+            combo = np.unravel_index(first * per_staple.shape[1] + best[first], totals.shape[:-1])
+            results.append(self._describe(slots, combo, float(best_scores[first]), preferred))
+            if len(results) > alternatives:
+                break
+        return results
+
+    def _describe(self, slots, combo, score: float, preferred: np.ndarray) -> Dict:
+        """조합 설명 (matches_preferences: 선호 음식이 하나라도 들어 있는지)"""
+        items = []
+        for (foods, amounts), position in zip(slots, combo):
+            index, portion = int(foods[position]), float(amounts[position])
+            values = self.macros[index] * portion
+            items.append({
+                'name': str(self.table.names[index]),
+                'category': str(self.table.categories[index]),
+                'role': str(self.roles[index]),
+                'portion': portion,
+                'grams': round(float(self.table.serving_g[index]) * portion),
+                **{field: round(float(value), 1) for (field, _), value in zip(MACROS, values)},
+                'sodium': round(float(self.sodium[index] * portion)),
+                'preferred': bool(preferred[index]),
+            })
+        totals = {field: round(sum(item[field] for item in items), 1) for field, _ in MACROS}
+        totals['sodium'] = sum(item['sodium'] for item in items)
+        return {'items': items, 'totals': totals, 'score': round(score, 4),
+                'matches_preferences': any(item['preferred'] for item in items)}
+
+
+_meal_optimizer = None
+_optimizer_lock = threading.Lock()
+
+
+def get_meal_optimizer() -> MealOptimizer:
+    """식단 최적화기 인스턴스 가져오기 (싱글톤, 성분표 로드 후 한 번 계산)"""
+    global _meal_optimizer
+    if not _meal_optimizer:
+        with _optimizer_lock:
+            if not _meal_optimizer:
+                _meal_optimizer = MealOptimizer(get_food_composition_table())
+    return _meal_optimizer
+
+
+def _today_intake(user, today: date) -> Tuple[Dict[str, float], List[str]]:
+    """오늘 섭취 합계와 먹은 음식 이름"""
+    record = (DailyNutrition.objects.filter(user=user, date=today)
+              .prefetch_related('food_analyses').first())
+    if not record:
+        return {field: 0.0 for field, _ in MACROS}, []
+    consumed = {
+        'calories': float(record.total_calories or 0),
+        'protein': float(record.total_protein or 0),
+        'carbohydrates': float(record.total_carbohydrates or 0),
+        'fat': float(record.total_fat or 0),
+    }
+    return consumed, [food.food_name for food in record.food_analyses.all()]
+
+
+def recommend_meal(user, profile: Optional[UserProfile], meal: Optional[str] = None,
+                   preferred_foods: Iterable[str] = (), allergies: Iterable[str] = ()) -> Dict:
+    """
+    오늘 남은 탄단지에 맞춘 이번 끼니 추천
+
+    preferred_foods/allergies는 프로필 값에 더해집니다 (요청에서 임시로 지정).
+    """
+    start = time.perf_counter()
+    today = timezone.localdate()
+    meal = meal if meal in MEAL_SHARES else current_meal()
+    sessions = WorkoutLog.objects.filter(user=user, date__gte=today - timedelta(days=7), date__lt=today).count()
+    targets = daily_targets(profile, sessions, today)
+    consumed, eaten = _today_intake(user, today)
+    remaining = {field: round(max(targets[field] - consumed[field], 0.0), 1) for field, _ in MACROS}
+    target = meal_target(targets, remaining, meal)
+    allergies = list(profile.allergies or []) + list(allergies) if profile else list(allergies)
+    preferred = list(profile.preferred_foods or []) + list(preferred_foods) if profile else list(preferred_foods)
+
+    options = []
+    if target['calories'] >= MIN_MEAL_CALORIES:
+        options = get_meal_optimizer().optimize(target, meal, allergies, preferred, eaten)
+    return {
+        'date': today.isoformat(),
+        'meal': meal,
+        'meal_label': MEAL_LABELS[meal],
+        'targets': targets,
+        'consumed': {field: round(value, 1) for field, value in consumed.items()},
+        'remaining': remaining,
+        'meal_target': target,
+        'suggestion': options[0] if options else None,
+        'alternatives': options[1:],
+        'message': None if options else '오늘 목표 칼로리를 거의 채웠습니다. 물이나 가벼운 채소를 권장합니다.',
+        'source': 'meal_optimizer',
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def _profile_from_data(user_data: Dict) -> UserProfile:
+    """챗봇 user_data(dict)를 저장하지 않는 UserProfile로 (target_calories 입력용)"""
+    birth_date = user_data.get('birth_date')
+    if isinstance(birth_date, str):
+        birth_date = datetime.strptime(birth_date, '%Y-%m-%d').date()
+    return UserProfile(
+        birth_date=birth_date,
+        gender=user_data.get('gender'),
+        height=user_data.get('height'),
+        weight=user_data.get('weight'),
+        allergies=user_data.get('allergies') or [],
+        preferred_foods=user_data.get('preferred_foods') or [],
+    )
+
+
+def format_item(item: Dict) -> str:
+    portion = '' if item['portion'] == 1.0 else f" x{item['portion']:g}"
+    return f"{item['name']}{portion} ({item['grams']}g)"
+
+
+def local_day_plan(user_data: Dict) -> Optional[Dict]:
+    """
+    하루 식단 (generate_nutrition_recommendation 응답 형식) - 끼니별 목표에 맞춰 차례로 고르고
+    앞 끼니에 고른 음식은 다시 고르지 않도록 페널티
+    """
+    profile = _profile_from_data(user_data)
+    targets = daily_targets(profile, 0, date.today())
+    optimizer = get_meal_optimizer()
+    plan, chosen, total = {}, [], 0.0
+    for meal in MEAL_ORDER:
+        target = {field: targets[field] * MEAL_SHARES[meal] for field, _ in MACROS}
+        options = optimizer.optimize(target, meal, profile.allergies, profile.preferred_foods, chosen,
+                                     alternatives=0)
+        if not options:
+            return None
+        plan[meal] = [format_item(item) for item in options[0]['items']]
+        chosen.extend(item['name'] for item in options[0]['items'])
+        total += options[0]['totals']['calories']
+    return {
+        'title': '남은 영양 목표 맞춤 한식 식단',
+        'description': (f"하루 목표 {targets['calories']:.0f}kcal(단백질 {targets['protein']:.0f}g, "
+                        f"탄수화물 {targets['carbohydrates']:.0f}g, 지방 {targets['fat']:.0f}g)에 맞춰 "
+                        f"식품 영양성분표에서 고른 식단입니다."),
+        **plan,
+        'total_calories': f"약 {total:.0f}kcal",
+        'source': 'meal_optimizer',
+    }
+
+
+def meal_plan_prose(recommendation: Dict, language: str = 'ko') -> Optional[str]:
+    """고른 식단에 대한 짧은 설명 (선택 사항 - LLM은 조합을 고르지 않고 문장만 씀, 실패하면 None)"""
+    suggestion = recommendation.get('suggestion')
+    if not suggestion:
+        return None
+    foods = ', '.join(format_item(item) for item in suggestion['items'])
+    prompt = (
+        f"{recommendation['meal_label']} 추천 식단: {foods}. 합계 {suggestion['totals']['calories']:.0f}kcal, "
+        f"단백질 {suggestion['totals']['protein']:.0f}g. 오늘 남은 목표는 {recommendation['remaining']['calories']:.0f}kcal, "
+        f"단백질 {recommendation['remaining']['protein']:.0f}g입니다. "
+        f"이 식단을 왜 추천하는지 {'한국어' if language == 'ko' else language}로 2문장 이내로 설명하세요."
+    )
+    try:
+        return complete(
+            'recommendation',
+            [{"role": "system", "content": "당신은 전문 영양사입니다."}, {"role": "user", "content": prompt}],
+            temperature=0.5, max_tokens=200
+        ).text.strip()
+    except Exception as e:
+        logger.warning(f"Meal plan prose failed: {str(e)}")
+        return None
+
+
+def local_meal_plan_enabled() -> bool:
+    return getattr(settings, 'LOCAL_MEAL_PLAN_ENABLED', True)
@@ -0,0 +1,682 @@
+"""
+LLM 모델 라우터 - 모델별 지연/오류율/토큰 비용을 기록하고 엔드포인트 지연 예산에 맞는 모델 선택
+
+엔드포인트마다 후보 모델을 선호 순서대로 두고, 최근 호출의 p95 지연이 예산 안에 있고
+오류율이 기준 이하인 첫 번째 후보를 사용합니다. 느려진 공급자(OpenAI/Gemini)는
+자동으로 건너뛰고, 오래된 기록은 만료되므로 회복되면 다시 선택됩니다.
+
+    router = get_model_router()
+    result = complete('recommendation', messages, temperature=0.7)
+    result.text, result.model, router.stats()
+
+공급자 서킷이 열려 있으면 해당 공급자는 후보에서 빠지고, 남은 후보가 없으면
+CircuitOpenError로 즉시 실패해 호출 측 기본 응답을 사용하게 합니다.
+LLM_HEDGE_ENDPOINTS의 엔드포인트는 주 모델이 p90 시간 안에 끝나지 않으면
+다른 공급자로 예비 요청을 보내고 먼저 도착한 답을 사용합니다.
+
+스트리밍(stream_complete/astream_complete)은 헤징하지 않습니다 (이미 보낸 토큰을 되돌릴 수 없음).
+대신 첫 토큰 전에 실패하거나 서킷이 열려 있으면 다른 공급자 모델로 넘어갑니다.
+
+통계는 프로세스 메모리에만 보관합니다 (워커별 독립 - 각 워커가 자기 호출로 판단).
+"""
+import asyncio
+import base64
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+import google.generativeai as genai
+import numpy as np
+from django.conf import settings
+from openai import AsyncOpenAI, OpenAI
+
+from .circuit_breaker import CircuitOpenError, circuit_states, get_circuit_breaker
+from .image_preprocessing import sniff_mime_type
+
+logger = logging.getLogger(__name__)
+
+
+class ModelSpec(NamedTuple):
+    name: str
+    provider: str  # 'openai' | 'gemini'
+    input_cost: float  # USD / 1K 토큰
+    output_cost: float
+    vision: bool = False
+
+
+MODEL_CATALOG = {
+    'gpt-3.5-turbo': ModelSpec('gpt-3.5-turbo', 'openai', 0.0005, 0.0015),
+    'gpt-4o-mini': ModelSpec('gpt-4o-mini', 'openai', 0.00015, 0.0006, vision=True),
+    'gemini-1.5-flash': ModelSpec('gemini-1.5-flash', 'gemini', 0.000075, 0.0003, vision=True),
+    'gemini-pro': ModelSpec('gemini-pro', 'gemini', 0.0005, 0.0015),
+}
+
+# 엔드포인트별 후보 (앞에 있을수록 우선 - 첫 번째가 기존 고정 모델)
+ENDPOINT_CANDIDATES = {
+    'chatbot': ['gpt-3.5-turbo', 'gpt-4o-mini', 'gemini-1.5-flash'],
+    'chatbot_complex': ['gpt-4o-mini', 'gpt-3.5-turbo', 'gemini-1.5-flash'],
+    'recommendation': ['gpt-3.5-turbo', 'gpt-4o-mini', 'gemini-1.5-flash'],
+    'nutrition_analysis': ['gemini-1.5-flash', 'gpt-4o-mini'],
+    'meal_analysis': ['gemini-pro', 'gemini-1.5-flash', 'gpt-3.5-turbo'],
+}
+
+DEFAULT_LATENCY_BUDGETS = {
+    'chatbot': 6.0,
+    'chatbot_complex': 10.0,
+    'recommendation': 8.0,
+    'nutrition_analysis': 12.0,
+    'meal_analysis': 10.0,
+}
+
+
+class LLMResult(NamedTuple):
+    text: str
+    model: str
+    provider: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency: float
+
+
+class StreamChunk(NamedTuple):
+    text: str
+    model: str
+
+
+class ModelStats:
+    """모델 하나의 최근 호출 기록 (고정 길이 창) + 누적 토큰/비용"""
+
+    def __init__(self, spec: ModelSpec, window: int):
+        self.spec = spec
+        self._samples = deque(maxlen=window)  # (시각, 지연, 성공 여부)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+
+    def record(self, latency: float, success: bool, prompt_tokens: int = 0, completion_tokens: int = 0):
+        cost = (prompt_tokens * self.spec.input_cost + completion_tokens * self.spec.output_cost) / 1000
+        with self._lock:
+            self._samples.append((time.time(), latency, success))
+            self.calls += 1
+            self.errors += 0 if success else 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost += cost
+
+    def recent(self, max_age: float):
+        """max_age초 이내 기록의 (지연 배열, 성공 배열)"""
+        cutoff = time.time() - max_age
+        with self._lock:
+            samples = [s for s in self._samples if s[0] >= cutoff]
+        latencies = np.fromiter((s[1] for s in samples), dtype=np.float64, count=len(samples))
+        successes = np.fromiter((s[2] for s in samples), dtype=bool, count=len(samples))
+        return latencies, successes
+
+    def summary(self, max_age: float) -> Dict:
+        latencies, successes = self.recent(max_age)
+        p50 = p90 = p95 = None
+        if len(latencies):
+            p50, p90, p95 = (round(float(v), 3) for v in np.percentile(latencies, [50, 90, 95]))
+        return {
+            'provider': self.spec.provider,
+            'samples': int(len(latencies)),
+            'p50': p50,
+            'p90': p90,
+            'p95': p95,
+            'error_rate': round(float(1 - successes.mean()), 3) if len(successes) else None,
+            'calls': self.calls,
+            'errors': self.errors,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'cost_usd': round(self.cost, 6),
+        }
+
+
+class _CallTracker:
+    """router.track() 블록 안에서 토큰 사용량을 기록하기 위한 핸들"""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+        self.prompt_tokens = int(prompt_tokens or 0)
+        self.completion_tokens = int(completion_tokens or 0)
+
+
+class ModelRouter:
+    """엔드포인트 지연 예산 기반 모델 선택기"""
+
+    def __init__(self, budgets: Optional[Dict[str, float]] = None, window: int = 200,
+                 max_age: float = 600, min_samples: int = 5, max_error_rate: float = 0.3):
+        self.budgets = dict(DEFAULT_LATENCY_BUDGETS, **(budgets or {}))
+        self.window = window
+        self.max_age = max_age
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self._stats: Dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def _get_stats(self, model: str) -> ModelStats:
+        stats = self._stats.get(model)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.get(model)
+                if stats is None:
+                    spec = get_model_spec(model)
+                    stats = self._stats[model] = ModelStats(spec, self.window)
+        return stats
+
+    def record(self, model: str, latency: float, success: bool,
+               prompt_tokens: int = 0, completion_tokens: int = 0):
+        self._get_stats(model).record(latency, success, prompt_tokens, completion_tokens)
+
+    @contextmanager
+    def track(self, model: str):
+        """
+        블록 실행 시간과 성공 여부를 기록 (예외는 실패로 기록 후 다시 발생)
+
+        공급자 서킷이 열려 있으면 호출하지 않고 바로 CircuitOpenError를 발생시킵니다.
+        """
+        breaker = get_circuit_breaker(get_model_spec(model).provider)
+        if not breaker.allow():
+            raise CircuitOpenError(breaker.name, breaker.retry_after())
+
+        tracker = _CallTracker()
+        start = time.perf_counter()
+        try:
+            yield tracker
+        except (GeneratorExit, asyncio.CancelledError):
+            # 클라이언트 연결 종료/헤징 패배로 중단된 호출은 모델 지연으로 보지 않음
+            breaker.abandon()
+            raise
+        except BaseException:
+            latency = time.perf_counter() - start
+            self.record(model, latency, False)
+            breaker.record(latency, False)
+            raise
+        latency = time.perf_counter() - start
+        self.record(model, latency, True, tracker.prompt_tokens, tracker.completion_tokens)
+        breaker.record(latency, True)
+
+    def candidates(self, endpoint: str, providers: Optional[Iterable[str]] = None,
+                   vision: bool = False, prefer: Optional[str] = None) -> List[ModelSpec]:
+        names = list(ENDPOINT_CANDIDATES.get(endpoint) or ENDPOINT_CANDIDATES['chatbot'])
+        if prefer:
+            names = [prefer] + [name for name in names if name != prefer]
+
+        allowed = set(providers) if providers else None
+        configured = _configured_providers()
+        specs = []
+        for name in names:
+            spec = get_model_spec(name)
+            if spec.provider not in configured or (allowed and spec.provider not in allowed):
+                continue
+            if vision and not spec.vision:
+                continue
+            # 서킷이 열린 공급자는 후보에서 제외 (장애 중인 공급자로 라우팅하지 않음)
+            if not get_circuit_breaker(spec.provider).available():
+                continue
+            specs.append(spec)
+        return specs
+
+    def choose(self, endpoint: str, providers: Optional[Iterable[str]] = None,
+               vision: bool = False, prefer: Optional[str] = None) -> ModelSpec:
+        """
+        예산(p95) 안에 있고 오류율이 기준 이하인 첫 번째 후보 선택
+
+        기록이 min_samples 미만인 모델은 측정 전이므로 통과시킵니다 (회복 확인 겸).
+        모든 후보가 기준을 넘으면 오류율 기준 통과 여부 → p95 순으로 가장 나은 모델을 사용합니다.
+        """
+        specs = self.candidates(endpoint, providers, vision, prefer)
+        if not specs:
+            # 사용할 공급자가 없으면 첫 후보 그대로 (호출 시 CircuitOpenError → 호출 측 폴백)
+            name = prefer or (ENDPOINT_CANDIDATES.get(endpoint) or ENDPOINT_CANDIDATES['chatbot'])[0]
+            return get_model_spec(name)
+        return self._pick(endpoint, specs)
+
+    def backup_for(self, endpoint: str, primary: ModelSpec, vision: bool = False) -> Optional[ModelSpec]:
+        """헤징용 예비 모델 - 주 모델과 다른 공급자 중에서 선택 (없으면 None)"""
+        specs = [spec for spec in self.candidates(endpoint, vision=vision) if spec.provider != primary.provider]
+        return self._pick(endpoint, specs) if specs else None
+
+    def _pick(self, endpoint: str, specs: List[ModelSpec]) -> ModelSpec:
+        budget = self.budgets.get(endpoint, self.budgets['chatbot'])
+        ranked = []
+        for spec in specs:
+            latencies, successes = self._get_stats(spec.name).recent(self.max_age)
+            if len(latencies) < self.min_samples:
+                return spec
+            error_rate = 1 - successes.mean()
+            # 실패 호출은 타임아웃 포함이므로 p95 계산에 함께 사용
+            p95 = float(np.percentile(latencies, 95))
+            if p95 <= budget and error_rate <= self.max_error_rate:
+                return spec
+            ranked.append((error_rate > self.max_error_rate, p95, spec))
+
+        best = min(ranked, key=lambda item: (item[0], item[1]))[2]
+        logger.warning(f"No model within {budget}s budget for {endpoint}; using {best.name}")
+        return best
+
+    def percentile(self, model: str, q: float) -> Optional[float]:
+        latencies, _ = self._get_stats(model).recent(self.max_age)
+        if len(latencies) < self.min_samples:
+            return None
+        return float(np.percentile(latencies, q))
+
+    def stats(self) -> Dict:
+        return {
+            'budgets': self.budgets,
+            'models': {name: stats.summary(self.max_age) for name, stats in sorted(self._stats.items())},
+            'circuits': circuit_states(),
+        }
+
+
+def get_model_spec(name: str) -> ModelSpec:
+    """카탈로그에 없는 모델은 이름으로 공급자만 추정 (비용 0)"""
+    spec = MODEL_CATALOG.get(name)
+    if spec is None:
+        spec = ModelSpec(name, 'gemini' if name.startswith('gemini') else 'openai', 0.0, 0.0)
+    return spec
+
+
+def _configured_providers() -> set:
+    providers = set()
+    if getattr(settings, 'OPENAI_API_KEY', None):
+        providers.add('openai')
+    gemini_key = getattr(settings, 'GEMINI_API_KEY', None)
+    if gemini_key and gemini_key != 'your-gemini-api-key-here':
+        providers.add('gemini')
+    return providers
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """모델 라우터 인스턴스 가져오기 (싱글톤)"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter(
+                    budgets=getattr(settings, 'MODEL_ROUTER_LATENCY_BUDGETS', None),
+                    window=getattr(settings, 'MODEL_ROUTER_WINDOW', 200),
+                    max_age=getattr(settings, 'MODEL_ROUTER_MAX_AGE', 600),
+                    min_samples=getattr(settings, 'MODEL_ROUTER_MIN_SAMPLES', 5),
+                    max_error_rate=getattr(settings, 'MODEL_ROUTER_MAX_ERROR_RATE', 0.3),
+                )
+    return _router
+
+
+# ---------------------------------------------------------------------------
+# 공급자 공통 호출 (OpenAI 채팅 메시지 형식을 Gemini 프롬프트로 변환)
+# ---------------------------------------------------------------------------
+
+_openai_client = None
+_async_openai_client = None
+
+
+_gemini_configured = False
+
+
+def _get_gemini_model(name: str):
+    global _gemini_configured
+    if not _gemini_configured:
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        _gemini_configured = True
+    return genai.GenerativeModel(name)
+
+
+def _get_openai_client() -> OpenAI:
+    global _openai_client
+    if not _openai_client:
+        _openai_client = OpenAI(api_key=settings.OPENAI_API_KEY, timeout=15.0, max_retries=1)
+    return _openai_client
+
+
+def _get_async_openai_client() -> AsyncOpenAI:
+    global _async_openai_client
+    if not _async_openai_client:
+        _async_openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, timeout=15.0, max_retries=1)
+    return _async_openai_client
+
+
+def _openai_messages(messages: Sequence[Dict], image: Optional[bytes]) -> List[Dict]:
+    if not image:
+        return list(messages)
+    # 이미지는 마지막 사용자 메시지에 data URL로 첨부
+    image_url = f'data:{sniff_mime_type(image)};base64,' + base64.b64encode(image).decode('ascii')
+    converted = list(messages)
+    last = converted[-1]
+    converted[-1] = {
+        'role': last['role'],
+        'content': [
+            {'type': 'text', 'text': last['content']},
+            {'type': 'image_url', 'image_url': {'url': image_url}},
+        ]
+    }
+    return converted
+
+
+def _gemini_contents(messages: Sequence[Dict], image: Optional[bytes]):
+    # google-generativeai 0.3은 system_instruction을 지원하지 않으므로 시스템 메시지를 앞에 붙임
+    prompt = '\n\n'.join(message['content'] for message in messages)
+    if image:
+        return [prompt, {'mime_type': sniff_mime_type(image), 'data': image}]
+    return prompt
+
+
+def _gemini_config(temperature: Optional[float], max_tokens: Optional[int]) -> Optional[Dict]:
+    config = {}
+    if temperature is not None:
+        config['temperature'] = temperature
+    if max_tokens:
+        config['max_output_tokens'] = max_tokens
+    return config or None
+
+
+def estimate_tokens(text: str) -> int:
+    """사용량 정보가 없을 때의 토큰 수 추정 (한국어 약 2자/토큰)"""
+    return len(text or '') // 2
+
+
+def _gemini_usage(response, messages: Sequence[Dict], text: str):
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is not None:
+        return usage.prompt_token_count, usage.candidates_token_count
+    # 구버전 SDK는 사용량을 주지 않으므로 추정
+    return sum(estimate_tokens(message['content']) for message in messages), estimate_tokens(text)
+
+
+def _openai_kwargs(temperature: Optional[float], max_tokens: Optional[int]) -> Dict:
+    kwargs = {}
+    if temperature is not None:
+        kwargs['temperature'] = temperature
+    if max_tokens:
+        kwargs['max_tokens'] = max_tokens
+    return kwargs
+
+
+def _call(spec: ModelSpec, messages: Sequence[Dict], temperature: Optional[float], max_tokens: Optional[int],
+          image: Optional[bytes], openai_client: Optional[OpenAI]) -> LLMResult:
+    start = time.perf_counter()
+    with get_model_router().track(spec.name) as call:
+        if spec.provider == 'gemini':
+            response = _get_gemini_model(spec.name).generate_content(
+                _gemini_contents(messages, image),
+                generation_config=_gemini_config(temperature, max_tokens)
+            )
+            text = response.text
+            call.usage(*_gemini_usage(response, messages, text))
+        else:
+            response = (openai_client or _get_openai_client()).chat.completions.create(
+                model=spec.name,
+                messages=_openai_messages(messages, image),
+                **_openai_kwargs(temperature, max_tokens)
+            )
+            text = response.choices[0].message.content
+            if response.usage:
+                call.usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+    return LLMResult(text, spec.name, spec.provider, call.prompt_tokens, call.completion_tokens,
+                     time.perf_counter() - start)
+
+
+async def _acall(spec: ModelSpec, messages: Sequence[Dict], temperature: Optional[float], max_tokens: Optional[int],
+                 image: Optional[bytes], openai_client: Optional[AsyncOpenAI]) -> LLMResult:
+    start = time.perf_counter()
+    with get_model_router().track(spec.name) as call:
+        if spec.provider == 'gemini':
+            response = await _get_gemini_model(spec.name).generate_content_async(
+                _gemini_contents(messages, image),
+                generation_config=_gemini_config(temperature, max_tokens)
+            )
+            text = response.text
+            call.usage(*_gemini_usage(response, messages, text))
+        else:
+            response = await (openai_client or _get_async_openai_client()).chat.completions.create(
+                model=spec.name,
+                messages=_openai_messages(messages, image),
+                **_openai_kwargs(temperature, max_tokens)
+            )
+            text = response.choices[0].message.content
+            if response.usage:
+                call.usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+    return LLMResult(text, spec.name, spec.provider, call.prompt_tokens, call.completion_tokens,
+                     time.perf_counter() - start)
+
+
+# ---------------------------------------------------------------------------
+# 헤징 - 주 모델이 p90 시간 안에 끝나지 않으면 다른 공급자로 예비 요청, 먼저 온 답 사용
+# ---------------------------------------------------------------------------
+
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_executor_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'LLM_HEDGE_MAX_WORKERS', 16),
+                    thread_name_prefix='llm-hedge'
+                )
+    return _hedge_executor
+
+
+def _hedge_plan(endpoint: str, spec: ModelSpec, vision: bool, hedge: Optional[bool]):
+    """(예비 모델, 대기 시간) - 헤징하지 않으면 (None, None)"""
+    if hedge is None:
+        hedge = endpoint in getattr(settings, 'LLM_HEDGE_ENDPOINTS', ())
+    if not hedge:
+        return None, None
+    router = get_model_router()
+    backup = router.backup_for(endpoint, spec, vision)
+    if backup is None:
+        return None, None
+    # 측정 전에는 기본 대기 시간 사용
+    delay = router.percentile(spec.name, 90)
+    if delay is None:
+        delay = getattr(settings, 'LLM_HEDGE_DEFAULT_DELAY', 3.0)
+    return backup, delay
+
+
+def complete(endpoint: str, messages: Sequence[Dict], temperature: Optional[float] = 0.7,
+             max_tokens: Optional[int] = None, image: Optional[bytes] = None,
+             prefer: Optional[str] = None, model: Optional[str] = None,
+             openai_client: Optional[OpenAI] = None, hedge: Optional[bool] = None) -> LLMResult:
+    """
+    엔드포인트에 맞는 모델을 골라 호출하고 지연/토큰을 기록
+
+    model을 지정하면 선택을 건너뛰고 해당 모델을 사용합니다 (이미 선택한 경우).
+    hedge가 None이면 LLM_HEDGE_ENDPOINTS 설정에 따라 헤징합니다.
+    공급자 서킷이 열려 있으면 CircuitOpenError가 즉시 발생합니다.
+    """
+    router = get_model_router()
+    spec = get_model_spec(model) if model else router.choose(endpoint, vision=bool(image), prefer=prefer)
+    backup, delay = _hedge_plan(endpoint, spec, bool(image), hedge)
+    if backup is None:
+        return _call(spec, messages, temperature, max_tokens, image, openai_client)
+
+    executor = _get_hedge_executor()
+    pending = {executor.submit(_call, spec, messages, temperature, max_tokens, image, openai_client)}
+    done, _ = wait(pending, timeout=delay)
+    first = next(iter(done), None)
+    if first is not None and first.exception() is None:
+        return first.result()
+
+    # 주 요청이 느리거나 바로 실패하면 예비 요청 (느린 쪽 스레드는 끝까지 실행되어 통계만 기록)
+    logger.info(f"Hedging {endpoint}: {spec.name} -> {backup.name} after {delay:.2f}s")
+    pending.add(executor.submit(_call, backup, messages, temperature, max_tokens, image, None))
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+async def acomplete(endpoint: str, messages: Sequence[Dict], temperature: Optional[float] = 0.7,
+                    max_tokens: Optional[int] = None, image: Optional[bytes] = None,
+                    prefer: Optional[str] = None, model: Optional[str] = None,
+                    openai_client: Optional[AsyncOpenAI] = None, hedge: Optional[bool] = None) -> LLMResult:
+    """complete의 비동기 버전 (AsyncOpenAI / generate_content_async, 헤징에서 진 요청은 취소)"""
+    router = get_model_router()
+    spec = get_model_spec(model) if model else router.choose(endpoint, vision=bool(image), prefer=prefer)
+    backup, delay = _hedge_plan(endpoint, spec, bool(image), hedge)
+    if backup is None:
+        return await _acall(spec, messages, temperature, max_tokens, image, openai_client)
+
+    primary = asyncio.ensure_future(_acall(spec, messages, temperature, max_tokens, image, openai_client))
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done and primary.exception() is None:
+        return primary.result()
+
+    logger.info(f"Hedging {endpoint}: {spec.name} -> {backup.name} after {delay:.2f}s")
+    pending = {asyncio.ensure_future(_acall(backup, messages, temperature, max_tokens, image, None))}
+    if not done:
+        pending.add(primary)
+    error = primary.exception() if done else None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+    finally:
+        for task in pending:
+            task.cancel()
+    raise error
+
+
+# ---------------------------------------------------------------------------
+# 스트리밍 - 헤징 없음, 첫 토큰 전 실패 시에만 다른 공급자로 전환
+# ---------------------------------------------------------------------------
+
+def _chunk_text(chunk) -> str:
+    """Gemini 스트림 조각의 텍스트 (안전 필터 등으로 비어 있으면 '')"""
+    try:
+        return chunk.text
+    except ValueError:
+        return ''
+
+
+def _stream_plan(endpoint: str, model: Optional[str]) -> List[ModelSpec]:
+    router = get_model_router()
+    spec = get_model_spec(model) if model else router.choose(endpoint)
+    backup = router.backup_for(endpoint, spec)
+    return [spec, backup] if backup else [spec]
+
+
+def _stream_call(spec: ModelSpec, messages: Sequence[Dict], temperature: Optional[float],
+                 max_tokens: Optional[int], openai_client: Optional[OpenAI]) -> Iterator[str]:
+    if spec.provider == 'gemini':
+        response = _get_gemini_model(spec.name).generate_content(
+            _gemini_contents(messages, None),
+            generation_config=_gemini_config(temperature, max_tokens),
+            stream=True
+        )
+        for chunk in response:
+            yield _chunk_text(chunk)
+    else:
+        stream = (openai_client or _get_openai_client()).chat.completions.create(
+            model=spec.name,
+            messages=list(messages),
+            stream=True,
+            **_openai_kwargs(temperature, max_tokens)
+        )
+        for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ''
+
+
+async def _astream_call(spec: ModelSpec, messages: Sequence[Dict], temperature: Optional[float],
+                        max_tokens: Optional[int], openai_client: Optional[AsyncOpenAI]) -> AsyncIterator[str]:
+    if spec.provider == 'gemini':
+        response = await _get_gemini_model(spec.name).generate_content_async(
+            _gemini_contents(messages, None),
+            generation_config=_gemini_config(temperature, max_tokens),
+            stream=True
+        )
+        async for chunk in response:
+            yield _chunk_text(chunk)
+    else:
+        stream = await (openai_client or _get_async_openai_client()).chat.completions.create(
+            model=spec.name,
+            messages=list(messages),
+            stream=True,
+            **_openai_kwargs(temperature, max_tokens)
+        )
+        async for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ''
+
+
+def stream_complete(endpoint: str, messages: Sequence[Dict], temperature: Optional[float] = 0.7,
+                    max_tokens: Optional[int] = None, model: Optional[str] = None,
+                    openai_client: Optional[OpenAI] = None) -> Iterator[StreamChunk]:
+    """
+    엔드포인트에 맞는 모델로 스트리밍 호출 (텍스트 조각마다 StreamChunk)
+
+    주 모델이 첫 토큰 전에 실패하면(서킷 열림 포함) 다른 공급자의 예비 모델로 다시 시도합니다.
+    토큰을 보낸 뒤의 실패는 그대로 발생합니다. 스트림에는 사용량이 없으므로 토큰 수는 추정치로 기록합니다.
+    """
+    prompt_tokens = sum(estimate_tokens(message['content']) for message in messages)
+    error = None
+    for spec in _stream_plan(endpoint, model):
+        started = False
+        try:
+            with get_model_router().track(spec.name) as call:
+                chunks = []
+                for text in _stream_call(spec, messages, temperature, max_tokens, openai_client):
+                    if text:
+                        started = True
+                        chunks.append(text)
+                        yield StreamChunk(text, spec.name)
+                call.usage(prompt_tokens, estimate_tokens(''.join(chunks)))
+            return
+        except Exception as e:
+            if started:
+                raise
+            logger.warning(f"Streaming {endpoint} with {spec.name} failed before first token: {str(e)}")
+            error = e
+    raise error
+
+
+async def astream_complete(endpoint: str, messages: Sequence[Dict], temperature: Optional[float] = 0.7,
+                           max_tokens: Optional[int] = None, model: Optional[str] = None,
+                           openai_client: Optional[AsyncOpenAI] = None) -> AsyncIterator[StreamChunk]:
+    """stream_complete의 비동기 버전"""
+    prompt_tokens = sum(estimate_tokens(message['content']) for message in messages)
+    error = None
+    for spec in _stream_plan(endpoint, model):
+        started = False
+        try:
+            with get_model_router().track(spec.name) as call:
+                chunks = []
+                async for text in _astream_call(spec, messages, temperature, max_tokens, openai_client):
+                    if text:
+                        started = True
+                        chunks.append(text)
+                        yield StreamChunk(text, spec.name)
+                call.usage(prompt_tokens, estimate_tokens(''.join(chunks)))
+            return
+        except Exception as e:
+            if started:
+                raise
+            logger.warning(f"Streaming {endpoint} with {spec.name} failed before first token: {str(e)}")
+            error = e
+    raise error
@@ -0,0 +1,233 @@
+"""
+영양소 섭취 격차 분석 - 사용자 기간 기록을 (일수 x 영양소) NumPy 행렬로 한 번에 계산
+
+FoodAnalysis에는 칼로리/단백질/탄수화물/지방/식이섬유/당류/나트륨이 저장되지만 지금까지는 일일 합계만 보여 줬습니다.
+기간의 날짜별 합계를 GROUP BY 쿼리 한 번으로 읽어 날짜 축 행렬에 채우고, 모든 계산을 열 단위로 수행합니다.
+
+- 이동 평균: 누적 합 차분 (기록한 날만 평균, 기록 없는 날은 분모에서 제외)
+- 섭취 기준 대비 격차: 2020 한국인 영양소 섭취기준(성별/연령) - 에너지 필요추정량, 단백질 권장섭취량,
+  식이섬유 충분섭취량, 탄수화물/지방 에너지 적정비율, 총당류 상한(에너지 20%), 나트륨 만성질환위험감소섭취량
+- 나트륨/당류 초과 연속일: 초과 여부 배열의 np.diff로 구간 시작/끝 계산 (기록 없는 날은 연속을 끊음)
+
+행 수가 기간 일수라서 몇 년치 기록도 Python 행 루프 없이 수 밀리초 안에 계산됩니다.
+"""
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+from django.db.models import Count, FloatField, Sum, Value
+from django.db.models.functions import Coalesce
+
+from ..models import DailyNutrition, UserProfile
+
+# 행렬 열 순서 (FoodAnalysis 필드)
+NUTRIENT_FIELDS = ('calories', 'protein', 'carbohydrates', 'fat', 'fiber', 'sugar', 'sodium')
+# 행렬/이동 평균 단위 (격차는 탄수화물/지방/당류를 에너지 비율로 비교)
+MATRIX_UNITS = {'calories': 'kcal', 'protein': 'g', 'carbohydrates': 'g', 'fat': 'g', 'fiber': 'g',
+                'sugar': 'g', 'sodium': 'mg'}
+GAP_UNITS = dict(MATRIX_UNITS, carbohydrates='%kcal', fat='%kcal', sugar='%kcal')
+COLUMN = {field: index for index, field in enumerate(NUTRIENT_FIELDS)}
+
+MAX_PERIOD_DAYS = 3660
+MAX_SERIES_POINTS = 180
+
+# 2020 한국인 영양소 섭취기준 (연령 구간 하한: 12, 15, 19, 30, 50, 65, 75세)
+REFERENCE_AGES = np.array([12, 15, 19, 30, 50, 65, 75])
+REFERENCE_INTAKES = {
+    'M': {
+        'calories': np.array([2500, 2700, 2600, 2500, 2200, 2000, 1900]),
+        'protein': np.array([60, 65, 65, 65, 60, 60, 60]),
+        'fiber': np.array([25, 30, 30, 30, 30, 25, 25]),
+        'sodium': np.array([2300, 2300, 2300, 2300, 2300, 2100, 1700]),
+    },
+    'F': {
+        'calories': np.array([2000, 2000, 2000, 1900, 1700, 1600, 1500]),
+        'protein': np.array([55, 55, 55, 50, 50, 50, 50]),
+        'fiber': np.array([20, 25, 20, 20, 20, 20, 20]),
+        'sodium': np.array([2300, 2300, 2300, 2300, 2300, 2100, 1700]),
+    },
+}
+# 에너지 적정비율 (% kcal) - 탄수화물 55~65%, 지방 15~30%, 총당류 20% 이하
+ENERGY_RATIO_RANGES = {'carbohydrates': (55.0, 65.0, 4.0), 'fat': (15.0, 30.0, 9.0), 'sugar': (0.0, 20.0, 4.0)}
+# 필요추정량 대비 이 범위면 적정
+CALORIE_TOLERANCE = 0.10
+DEFAULT_AGE = 35
+
+
+def _age(profile: Optional[UserProfile], today: date) -> int:
+    if not profile or not profile.birth_date:
+        return DEFAULT_AGE
+    birth = profile.birth_date
+    return today.year - birth.year - ((today.month, today.day) < (birth.month, birth.day))
+
+
+def reference_intakes(profile: Optional[UserProfile], today: date) -> Dict[str, float]:
+    """성별/연령 기준 섭취량 (성별 미지정이면 남녀 평균, 12세 미만은 12~14세 구간)"""
+    band = max(int(np.searchsorted(REFERENCE_AGES, _age(profile, today), side='right')) - 1, 0)
+    gender = profile.gender if profile and profile.gender in REFERENCE_INTAKES else None
+    genders = [gender] if gender else list(REFERENCE_INTAKES)
+    return {
+        field: float(np.mean([REFERENCE_INTAKES[g][field][band] for g in genders]))
+        for field in REFERENCE_INTAKES['M']
+    }
+
+
+def load_daily_matrix(user, start_date: date, end_date: date):
+    """
+    (일수 x 영양소) 행렬과 기록 여부 배열 - 일일 기록에 연결된 음식의 날짜별 합계 (GROUP BY 쿼리 한 번)
+
+    음식이 없는 날(행렬 0, logged False)도 날짜 축에 포함합니다.
+    """
+    days = (end_date - start_date).days + 1
+    rows = list(
+        DailyNutrition.objects.filter(user=user, date__range=[start_date, end_date])
+        .values('date')
+        .annotate(
+            food_count=Count('food_analyses'),
+            **{field: Coalesce(Sum(f'food_analyses__{field}'), Value(0), output_field=FloatField())
+               for field in NUTRIENT_FIELDS}
+        )
+        .values_list('date', 'food_count', *NUTRIENT_FIELDS)
+        .order_by()
+    )
+    matrix = np.zeros((days, len(NUTRIENT_FIELDS)), dtype=np.float64)
+    logged = np.zeros(days, dtype=bool)
+    if rows:
+        dates, counts, *columns = zip(*rows)
+        offsets = (np.array(dates, dtype='datetime64[D]') - np.datetime64(start_date, 'D')).astype(np.int64)
+        matrix[offsets] = np.column_stack(columns)
+        logged[offsets] = np.array(counts) > 0
+    return matrix, logged
+
+
+def rolling_averages(matrix: np.ndarray, logged: np.ndarray, window: int) -> np.ndarray:
+    """날짜별 직전 window일 평균 (기록한 날 기준, 창 안에 기록이 없으면 NaN)"""
+    sums = np.vstack([np.zeros((1, matrix.shape[1])), np.cumsum(matrix * logged[:, None], axis=0)])
+    counts = np.concatenate([[0], np.cumsum(logged)])
+    end = np.arange(1, len(logged) + 1)
+    begin = np.maximum(end - window, 0)
+    window_counts = (counts[end] - counts[begin]).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (sums[end] - sums[begin]) / window_counts[:, None]
+
+
+def excess_streaks(exceeded: np.ndarray, start_date: date) -> Dict:
+    """초과한 날의 연속 구간 (가장 긴 구간, 오늘까지 이어지는 구간, 초과 일수)"""
+    edges = np.diff(np.concatenate([[0], exceeded.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths = ends - starts
+    result = {'days_exceeded': int(exceeded.sum()), 'longest_streak': 0, 'longest_streak_start': None,
+              'longest_streak_end': None, 'current_streak': 0}
+    if len(lengths):
+        longest = int(np.argmax(lengths))
+        result.update(
+            longest_streak=int(lengths[longest]),
+            longest_streak_start=(start_date + timedelta(days=int(starts[longest]))).isoformat(),
+            longest_streak_end=(start_date + timedelta(days=int(ends[longest]) - 1)).isoformat(),
+            current_streak=int(lengths[-1]) if ends[-1] == len(exceeded) else 0,
+        )
+    return result
+
+
+def _energy_percent(matrix: np.ndarray, field: str) -> np.ndarray:
+    """날짜별 에너지 비율 (%) - 칼로리가 0인 날은 NaN"""
+    calories = matrix[:, COLUMN['calories']]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(calories > 0,
+                        matrix[:, COLUMN[field]] * ENERGY_RATIO_RANGES[field][2] / calories * 100, np.nan)
+
+
+def _status(value: float, low: Optional[float], high: Optional[float]) -> str:
+    if low is not None and value < low:
+        return 'low'
+    if high is not None and value > high:
+        return 'high'
+    return 'adequate'
+
+
+def nutrient_gaps(matrix: np.ndarray, logged: np.ndarray, references: Dict[str, float]) -> Dict[str, Dict]:
+    """기록한 날 평균과 섭취 기준의 격차 + 기준 미달/초과 일수"""
+    recorded = matrix[logged]
+    averages = recorded.mean(axis=0) if len(recorded) else np.zeros(len(NUTRIENT_FIELDS))
+    gaps = {}
+    for field in NUTRIENT_FIELDS:
+        if field in ENERGY_RATIO_RANGES:
+            low, high, _ = ENERGY_RATIO_RANGES[field]
+            per_day = _energy_percent(recorded, field)
+            total_calories = recorded[:, COLUMN['calories']].sum()
+            average = (recorded[:, COLUMN[field]].sum() * ENERGY_RATIO_RANGES[field][2] / total_calories * 100
+                       if total_calories else 0.0)
+            reference = high if field == 'sugar' else (low + high) / 2
+            low = None if field == 'sugar' else low
+        else:
+            reference = references[field]
+            per_day = recorded[:, COLUMN[field]]
+            average = float(averages[COLUMN[field]])
+            if field == 'calories':
+                low, high = reference * (1 - CALORIE_TOLERANCE), reference * (1 + CALORIE_TOLERANCE)
+            elif field == 'sodium':
+                low, high = None, reference
+            else:
+                low, high = reference, None
+        gaps[field] = {
+            'average': round(float(average), 1),
+            'reference': round(float(reference), 1),
+            'range': [low, high],
+            'unit': GAP_UNITS[field],
+            'gap': round(float(average - reference), 1),
+            'percent_of_reference': round(float(average / reference * 100), 1) if reference else None,
+            'status': _status(average, low, high) if len(recorded) else 'no_data',
+            'days_below': int(np.count_nonzero(per_day < low)) if low is not None else 0,
+            'days_above': int(np.count_nonzero(per_day > high)) if high is not None else 0,
+        }
+    return gaps
+
+
+def _series(averages: np.ndarray, start_date: date, window: int) -> Dict:
+    """이동 평균 시리즈 (최대 MAX_SERIES_POINTS개로 간격 조정, 기록이 없는 창은 None)"""
+    step = max(1, -(-len(averages) // MAX_SERIES_POINTS))
+    # 마지막 날이 항상 포함되도록 끝에서부터 샘플링
+    indexes = np.arange(len(averages) - 1, -1, -step)[::-1]
+    sampled = np.round(averages[indexes], 1)
+    series = {
+        'window': window,
+        'step_days': step,
+        'units': MATRIX_UNITS,
+        'dates': [(start_date + timedelta(days=int(index))).isoformat() for index in indexes],
+    }
+    for field in NUTRIENT_FIELDS:
+        column = sampled[:, COLUMN[field]]
+        series[field] = [None if np.isnan(value) else float(value) for value in column]
+    return series
+
+
+def build_nutrient_gap_analysis(user, profile: Optional[UserProfile], start_date: date, end_date: date,
+                                window: int = 7) -> Dict:
+    """nutrition_gaps 응답"""
+    matrix, logged = load_daily_matrix(user, start_date, end_date)
+    references = reference_intakes(profile, end_date)
+    averages = rolling_averages(matrix, logged, window)
+
+    sodium_limit = references['sodium']
+    sugar_limit = ENERGY_RATIO_RANGES['sugar'][1]
+    with np.errstate(invalid='ignore'):
+        sugar_exceeded = logged & (_energy_percent(matrix, 'sugar') > sugar_limit)
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'days': len(logged),
+        'recorded_days': int(logged.sum()),
+        'references': references,
+        'gaps': nutrient_gaps(matrix, logged, references),
+        'latest_rolling_average': {
+            field: (None if np.isnan(averages[-1, COLUMN[field]]) else round(float(averages[-1, COLUMN[field]]), 1))
+            for field in NUTRIENT_FIELDS
+        },
+        'excess_streaks': {
+            'sodium': dict(excess_streaks(logged & (matrix[:, COLUMN['sodium']] > sodium_limit), start_date),
+                           limit=sodium_limit, unit='mg'),
+            'sugar': dict(excess_streaks(sugar_exceeded, start_date), limit=sugar_limit, unit='%kcal'),
+        },
+        'rolling': _series(averages, start_date, window),
+    }
@@ -1,57 +1,46 @@
 import random
 
+from .food_composition import get_food_composition_table
+
 def analyze_food_simple(food_description):
-    """간단한 음식 분석 (AI 대신 룰 베이스)"""
+    """간단한 음식 분석 (AI 대신 로컬 식품 영양성분표)"""
     
-    # 음식별 기본 영양 정보 (100g 기준)
-    food_db = {
-        '삼겹살': {'calories': 300, 'protein': 17, 'carbs': 0, 'fat': 25},
-        '닭가슴살': {'calories': 165, 'protein': 31, 'carbs': 0, 'fat': 3.6},
-        '현미밥': {'calories': 112, 'protein': 2.6, 'carbs': 23, 'fat': 0.9},
-        '백미밥': {'calories': 130, 'protein': 2.7, 'carbs': 28, 'fat': 0.3},
-        '브로콜리': {'calories': 34, 'protein': 2.8, 'carbs': 7, 'fat': 0.4},
-        '상추': {'calories': 15, 'protein': 1.4, 'carbs': 2.9, 'fat': 0.2},
-        '계란': {'calories': 155, 'protein': 13, 'carbs': 1.1, 'fat': 11},
-        '바나나': {'calories': 89, 'protein': 1.1, 'carbs': 23, 'fat': 0.3},
-        '오트밀': {'calories': 68, 'protein': 2.4, 'carbs': 12, 'fat': 1.4},
-    }
+    # "현미밥 1공기, 닭가슴살 150g" -> 항목별 중량/영양소 (포션이 없으면 1인분)
+    # 목록 형식이 아닌 자유 문장은 문장 안에 나온 음식 이름을 모두 찾아 계산
+    table = get_food_composition_table()
+    result = table.analyze_text(food_description or '') or table.spot_foods(food_description or '')
     
-    # 키워드 기반 음식 인식
-    detected_foods = []
-    for food_name, nutrition in food_db.items():
-        if food_name in food_description:
-            quantity = random.randint(80, 200)  # 80g~200g
-            detected_foods.append({
-                'name': food_name,
-                'quantity': f'{quantity}g',
-                'calories': int(nutrition['calories'] * quantity / 100),
-                'protein': round(nutrition['protein'] * quantity / 100, 1),
-                'carbs': round(nutrition['carbs'] * quantity / 100, 1),
-                'fat': round(nutrition['fat'] * quantity / 100, 1),
-                'fiber': random.randint(1, 5),
-                'confidence': random.uniform(0.8, 0.95)
-            })
+    detected_foods = [{
+        'name': item['name'],
+        'quantity': f"{item['grams']:g}g",
+        'calories': int(item['calories']),
+        'protein': item['protein'],
+        'carbs': item['carbohydrates'],
+        'fat': item['fat'],
+        'fiber': item['fiber'],
+        'confidence': item['score'],
+    } for item in (result['items'] if result else [])]
     
-    # 인식된 음식이 없으면 기본값
+    # 성분표에서 찾지 못하면 일반 한식 1인분 평균값
     if not detected_foods:
         detected_foods = [{
             'name': '일반 음식',
-            'quantity': '150g',
-            'calories': random.randint(200, 500),
-            'protein': random.randint(10, 30),
-            'carbs': random.randint(20, 60),
-            'fat': random.randint(5, 25),
-            'fiber': random.randint(2, 8),
-            'confidence': 0.7
+            'quantity': '300g',
+            'calories': 450,
+            'protein': 18.0,
+            'carbs': 60.0,
+            'fat': 14.0,
+            'fiber': 4.0,
+            'confidence': 0.3
         }]
     
     # 총 영양소 계산
     total_nutrition = {
         'calories': sum(food['calories'] for food in detected_foods),
-        'protein': sum(food['protein'] for food in detected_foods),
-        'carbs': sum(food['carbs'] for food in detected_foods),
-        'fat': sum(food['fat'] for food in detected_foods),
-        'fiber': sum(food['fiber'] for food in detected_foods)
+        'protein': round(sum(food['protein'] for food in detected_foods), 1),
+        'carbs': round(sum(food['carbs'] for food in detected_foods), 1),
+        'fat': round(sum(food['fat'] for food in detected_foods), 1),
+        'fiber': round(sum(food['fiber'] for food in detected_foods), 1)
     }
     
     # 건강 평가
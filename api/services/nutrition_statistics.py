@@ -0,0 +1,128 @@
+"""
+영양 통계 계산 - 조회 기간의 일일 기록을 쿼리 한 번으로 읽고 날짜 시리즈는 Python에서 채움
+
+직전 비교 기간 합계는 활동 롤업(월/주/일 행)에서 읽으므로 추세 계산에 원본 기록을 다시 읽지 않습니다.
+기간 길이와 무관하게 쿼리 수가 일정하므로 365일 이상의 범위도 같은 비용으로 처리됩니다.
+"""
+from datetime import date, timedelta
+from typing import Dict, List
+
+from django.db.models import Count
+
+from ..models import DailyNutrition
+from .activity_rollup_service import range_totals
+
+NUTRIENT_FIELDS = ('total_calories', 'total_protein', 'total_carbohydrates', 'total_fat')
+
+
+def _empty_day(day: date) -> Dict:
+    return {
+        'date': day.isoformat(),
+        'total_calories': 0,
+        'total_protein': 0,
+        'total_carbohydrates': 0,
+        'total_fat': 0,
+        'food_count': 0
+    }
+
+
+def date_series(start_date: date, end_date: date) -> List[date]:
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+def fetch_daily_rows(user, start_date: date, end_date: date) -> Dict[date, Dict]:
+    """기간 내 일일 기록 + 음식 개수 (GROUP BY 쿼리 한 번)"""
+    rows = (
+        DailyNutrition.objects.filter(user=user, date__range=[start_date, end_date])
+        .annotate(food_count=Count('food_analyses'))
+        .values('date', *NUTRIENT_FIELDS, 'food_count')
+    )
+    return {row['date']: row for row in rows}
+
+
+def _totals(rows) -> Dict:
+    totals = {field: 0 for field in NUTRIENT_FIELDS}
+    for row in rows:
+        for field in NUTRIENT_FIELDS:
+            totals[field] += row[field] or 0
+    return totals
+
+
+def build_nutrition_statistics(user, start_date: date, end_date: date) -> Dict:
+    """nutrition_statistics 응답 (daily_data + period_stats)"""
+    days = (end_date - start_date).days + 1
+    prev_start_date = start_date - timedelta(days=days)
+
+    rows_by_date = fetch_daily_rows(user, start_date, end_date)
+    totals = _totals(rows_by_date.values())
+    recorded_days = len(rows_by_date)
+
+    # 비교 기간은 롤업 합계로
+    prev_totals = range_totals(user, prev_start_date, start_date - timedelta(days=1))
+    prev_recorded_days = prev_totals['nutrition_days']
+
+    # 평균 계산 (기록이 있는 날짜 기준)
+    def average(field):
+        return totals[field] / recorded_days if recorded_days > 0 else 0
+
+    # 이전 기간 대비 변화율
+    def trend(field):
+        previous = prev_totals[field]
+        if prev_recorded_days > 0 and previous > 0:
+            prev_avg = previous / prev_recorded_days
+            return (average(field) - prev_avg) / prev_avg * 100
+        return 0
+
+    daily_data = []
+    total_analyses = 0
+    for day in date_series(start_date, end_date):
+        row = rows_by_date.get(day)
+        if row is None:
+            # 기록이 없는 날도 0으로 포함
+            daily_data.append(_empty_day(day))
+            continue
+        total_analyses += row['food_count']
+        daily_data.append({
+            'date': day.isoformat(),
+            'total_calories': row['total_calories'],
+            'total_protein': row['total_protein'],
+            'total_carbohydrates': row['total_carbohydrates'],
+            'total_fat': row['total_fat'],
+            'food_count': row['food_count']
+        })
+
+    return {
+        'daily_data': daily_data,
+        'period_stats': {
+            'average_calories': round(average('total_calories'), 1),
+            'average_protein': round(average('total_protein'), 1),
+            'average_carbohydrates': round(average('total_carbohydrates'), 1),
+            'average_fat': round(average('total_fat'), 1),
+            'total_days': days,
+            'total_analyses': total_analyses,
+            'trend_calories': round(trend('total_calories'), 1),
+            'trend_protein': round(trend('total_protein'), 1),
+            'trend_carbohydrates': round(trend('total_carbohydrates'), 1),
+            'trend_fat': round(trend('total_fat'), 1)
+        }
+    }
+
+
+def build_guest_statistics(start_date: date, end_date: date) -> Dict:
+    """게스트용 빈 통계"""
+    return {
+        'daily_data': [_empty_day(day) for day in date_series(start_date, end_date)],
+        'period_stats': {
+            'average_calories': 0,
+            'average_protein': 0,
+            'average_carbohydrates': 0,
+            'average_fat': 0,
+            'total_days': (end_date - start_date).days + 1,
+            'total_analyses': 0,
+            'trend_calories': 0,
+            'trend_protein': 0,
+            'trend_carbohydrates': 0,
+            'trend_fat': 0
+        },
+        'message': '게스트 사용자는 통계를 볼 수 없습니다.'
+    }
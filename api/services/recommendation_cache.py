@@ -0,0 +1,176 @@
+"""
+AI 추천 캐시 - 구간화한 프로필 서명별로 추천 결과를 N개까지 저장하고 돌아가며 제공
+
+운동/영양/식단 추천은 입력이 나이·성별·체중·키·목표 등 몇 개의 거친 값뿐이므로
+5세 나이대, 5kg 체중 구간 등으로 묶으면 대부분의 사용자가 수백 개 버킷에 들어갑니다.
+버킷마다 변형(variant)이 N개 모일 때까지만 LLM을 호출하고, 이후에는 저장된 변형을
+순서대로 돌려 다양성을 유지합니다.
+
+Django 캐시(운영 환경은 Redis)를 사용하므로 워커 간에 공유됩니다.
+"""
+import hashlib
+import json
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .semantic_cache import _calculate_age
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_VERSION = 1
+
+# 추천 종류별로 프롬프트에 들어가는 필드만 서명에 포함
+SIGNATURE_FIELDS = {
+    'workout': ('age', 'gender', 'weight', 'height', 'experience', 'goal'),
+    'nutrition': ('age', 'gender', 'weight', 'height', 'goal', 'allergies'),
+    'meal_plan': ('age', 'gender', 'weight', 'height', 'fitness_level', 'goal', 'allergies', 'diseases'),
+}
+
+AGE_BAND = 5  # 세
+WEIGHT_BAND = 5  # kg
+HEIGHT_BAND = 5  # cm
+
+_GENDER_ALIASES = {
+    'm': 'M', 'male': 'M', '남': 'M', '남성': 'M', '남자': 'M',
+    'f': 'F', 'female': 'F', '여': 'F', '여성': 'F', '여자': 'F',
+}
+
+
+def _band(value, width: int) -> str:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 'unknown'
+    low = int(value // width) * width
+    return f"{low}-{low + width - 1}"
+
+
+def _normalize_text(value) -> str:
+    return ' '.join(str(value).lower().split()) if value else 'unknown'
+
+
+def _normalize_list(values) -> Tuple[str, ...]:
+    if not values:
+        return ()
+    if isinstance(values, str):
+        values = values.split(',')
+    return tuple(sorted({_normalize_text(v) for v in values if str(v).strip()}))
+
+
+def profile_signature(kind: str, user_data: Dict, fields: Optional[Iterable[str]] = None) -> Tuple:
+    """추천 종류와 구간화한 프로필 값으로 만든 서명 (같은 서명 = 같은 버킷)"""
+    user_data = user_data or {}
+    base_kind = kind.split(':', 1)[0]
+    signature = [kind]
+    for field in fields or SIGNATURE_FIELDS.get(base_kind, ()):
+        if field == 'age':
+            age = user_data.get('age')
+            if age is None:
+                age = _calculate_age(user_data.get('birth_date'))
+            signature.append(_band(age, AGE_BAND))
+        elif field == 'weight':
+            signature.append(_band(user_data.get('weight'), WEIGHT_BAND))
+        elif field == 'height':
+            signature.append(_band(user_data.get('height'), HEIGHT_BAND))
+        elif field == 'gender':
+            gender = _normalize_text(user_data.get('gender'))
+            signature.append(_GENDER_ALIASES.get(gender, gender))
+        elif field in ('allergies', 'diseases'):
+            signature.append(_normalize_list(user_data.get(field)))
+        else:
+            signature.append(_normalize_text(user_data.get(field)))
+    return tuple(signature)
+
+
+def signature_key(signature: Tuple) -> str:
+    digest = hashlib.sha1(json.dumps(signature, ensure_ascii=False).encode('utf-8')).hexdigest()[:20]
+    return f"reco:v{CACHE_KEY_VERSION}:{signature[0]}:{digest}"
+
+
+class RecommendationCache:
+    """버킷별 추천 변형 저장소 (변형 N개가 찰 때까지 생성, 이후 순환 제공)"""
+
+    def __init__(self, variants: int = 5, ttl: int = 86400, enabled: bool = True):
+        self.variants = max(1, variants)
+        self.ttl = ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_generate(self, kind: str, user_data: Dict, generate: Callable[[], Dict],
+                        is_cacheable: Callable[[Dict], bool] = None) -> Dict:
+        """
+        버킷에 변형이 N개 미만이면 generate()를 호출해 결과를 추가하고 반환,
+        N개가 모였으면 LLM 호출 없이 다음 변형을 반환합니다.
+
+        폴백(기본 추천) 결과는 저장하지 않습니다 (is_cacheable 기본값: success=True).
+        """
+        if not self.enabled:
+            return generate()
+
+        key = signature_key(profile_signature(kind, user_data))
+        try:
+            entries = cache.get(key) or []
+        except Exception as e:
+            logger.warning(f"Recommendation cache unavailable: {str(e)}")
+            return generate()
+
+        if len(entries) >= self.variants:
+            with self._lock:
+                self.hits += 1
+            return dict(entries[self._next_index(key, len(entries))], cached=True)
+
+        with self._lock:
+            self.misses += 1
+        result = generate()
+        if (is_cacheable or _is_successful)(result):
+            # 동시 생성 시 일부 변형이 덮어써질 수 있으나 다음 미스에서 다시 채워짐
+            entries = (cache.get(key) or [])[:self.variants - 1] + [result]
+            cache.set(key, entries, self.ttl)
+        return dict(result, cached=False)
+
+    def _next_index(self, key: str, size: int) -> int:
+        counter_key = f"{key}:rr"
+        try:
+            cache.add(counter_key, 0, self.ttl)
+            return cache.incr(counter_key) % size
+        except ValueError:
+            # add와 incr 사이에 만료된 경우
+            return 0
+
+    def invalidate(self, kind: str, user_data: Dict):
+        key = signature_key(profile_signature(kind, user_data))
+        cache.delete_many([key, f"{key}:rr"])
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            'variants': self.variants,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+def _is_successful(result: Dict) -> bool:
+    return bool(result and result.get('success'))
+
+
+_recommendation_cache = None
+
+def get_recommendation_cache() -> RecommendationCache:
+    """추천 캐시 인스턴스 가져오기 (싱글톤)"""
+    global _recommendation_cache
+    if not _recommendation_cache:
+        _recommendation_cache = RecommendationCache(
+            variants=getattr(settings, 'RECOMMENDATION_CACHE_VARIANTS', 5),
+            ttl=getattr(settings, 'RECOMMENDATION_CACHE_TTL', 86400),
+            enabled=getattr(settings, 'RECOMMENDATION_CACHE_ENABLED', True),
+        )
+    return _recommendation_cache
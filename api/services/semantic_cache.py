@@ -0,0 +1,191 @@
+"""
+챗봇 시맨틱 응답 캐시
+
+질문 임베딩 + 프로필 지문(나이대/성별/BMI 구간/카테고리)을 키로 사용하여
+의미가 같은 질문(표현만 다른 질문 포함)에 대해 이전 답변을 재사용합니다.
+
+답변은 같은 버킷의 다른 사용자에게 그대로 제공되므로, 캐시할 답변은 버킷 값만 넣은 프롬프트
+(이름/정확한 나이·키·체중·BMI 없음)로 생성해야 합니다 (HealthAIChatbot._create_system_prompt).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from itertools import count
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _calculate_age(birth_date) -> Optional[int]:
+    if not birth_date:
+        return None
+    if isinstance(birth_date, str):
+        try:
+            birth_date = datetime.strptime(birth_date, '%Y-%m-%d').date()
+        except ValueError:
+            return None
+    return (date.today() - birth_date).days // 365
+
+
+def _bmi_band(height, weight) -> str:
+    try:
+        height_m = float(height) / 100
+        bmi = float(weight) / (height_m ** 2)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return 'unknown'
+    # 대한비만학회 기준 구간
+    if bmi < 18.5:
+        return 'under'
+    if bmi < 23:
+        return 'normal'
+    if bmi < 25:
+        return 'over'
+    if bmi < 30:
+        return 'obese1'
+    return 'obese2'
+
+
+# 구간 -> 프롬프트 표기 (캐시 가능한 답변은 정확한 수치 대신 구간만 모델에 전달)
+BMI_BAND_LABELS = {
+    'under': '저체중 (18.5 미만)',
+    'normal': '정상 (18.5~23)',
+    'over': '과체중 (23~25)',
+    'obese1': '비만 1단계 (25~30)',
+    'obese2': '비만 2단계 (30 이상)',
+}
+
+
+def profile_fingerprint(session_data: Dict, category: Optional[str]) -> Tuple:
+    """캐시 버킷 키 - 답변에 영향을 주는 프로필 정보만 구간화"""
+    session_data = session_data or {}
+    age = _calculate_age(session_data.get('birth_date'))
+    age_band = f"{(age // 10) * 10}s" if age is not None else 'unknown'
+    gender = session_data.get('gender') or 'unknown'
+    bmi_band = _bmi_band(session_data.get('height'), session_data.get('weight'))
+    return (age_band, gender, bmi_band, category or 'general')
+
+
+class SemanticResponseCache:
+    """TTL + LRU 기반 시맨틱 캐시 (프로세스 로컬)"""
+
+    def __init__(self, similarity_threshold: float = 0.9, ttl: int = 3600,
+                 max_entries: int = 2000, lexical_threshold: float = 0.95):
+        self.similarity_threshold = similarity_threshold
+        # 어휘 기반(해싱) 임베딩은 의미 유사도를 잘 구분하지 못하므로 더 엄격하게
+        self.lexical_threshold = lexical_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._ids = count()
+        # entry_id -> entry (삽입/조회 순서 = LRU 순서)
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        # (embedder, bucket) -> [entry_id, ...]
+        self._buckets: Dict[Tuple, list] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, bucket: Tuple, vector: np.ndarray, lexical: bool = False) -> Optional[Dict]:
+        """버킷 내에서 가장 유사한 답변 조회 (임계값 미만이면 None)"""
+        threshold = self.lexical_threshold if lexical else self.similarity_threshold
+        now = time.time()
+        with self._lock:
+            entry_ids = self._buckets.get(bucket)
+            if entry_ids:
+                self._purge_expired(bucket, now)
+                entry_ids = self._buckets.get(bucket)
+            if not entry_ids:
+                self.misses += 1
+                return None
+
+            matrix = np.vstack([self._entries[entry_id]['vector'] for entry_id in entry_ids])
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+
+            if similarity < threshold:
+                self.misses += 1
+                return None
+
+            entry_id = entry_ids[best]
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return {
+                'payload': self._entries[entry_id]['payload'],
+                'question': self._entries[entry_id]['question'],
+                'similarity': similarity,
+            }
+
+    def store(self, bucket: Tuple, vector: np.ndarray, question: str, payload: Dict):
+        """답변 저장 (최대 개수 초과 시 가장 오래 사용되지 않은 항목부터 제거)"""
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = {
+                'bucket': bucket,
+                'vector': vector.astype(np.float32, copy=False),
+                'question': question,
+                'payload': payload,
+                'expires_at': time.time() + self.ttl,
+            }
+            self._buckets.setdefault(bucket, []).append(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                old_id, old_entry = self._entries.popitem(last=False)
+                self._remove_from_bucket(old_entry['bucket'], old_id)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'buckets': len(self._buckets),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+                'similarity_threshold': self.similarity_threshold,
+                'lexical_threshold': self.lexical_threshold,
+                'ttl': self.ttl,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _purge_expired(self, bucket: Tuple, now: float):
+        for entry_id in list(self._buckets.get(bucket, [])):
+            if self._entries[entry_id]['expires_at'] <= now:
+                del self._entries[entry_id]
+                self._remove_from_bucket(bucket, entry_id)
+
+    def _remove_from_bucket(self, bucket: Tuple, entry_id: int):
+        entry_ids = self._buckets.get(bucket)
+        if entry_ids is None:
+            return
+        entry_ids.remove(entry_id)
+        if not entry_ids:
+            del self._buckets[bucket]
+
+
+# 전역 캐시 인스턴스
+_semantic_cache = None
+
+def get_semantic_cache() -> SemanticResponseCache:
+    """시맨틱 캐시 인스턴스 가져오기 (싱글톤)"""
+    global _semantic_cache
+    if not _semantic_cache:
+        _semantic_cache = SemanticResponseCache(
+            similarity_threshold=getattr(settings, 'CHATBOT_SEMANTIC_CACHE_THRESHOLD', 0.9),
+            ttl=getattr(settings, 'CHATBOT_SEMANTIC_CACHE_TTL', 3600),
+            max_entries=getattr(settings, 'CHATBOT_SEMANTIC_CACHE_MAX_ENTRIES', 2000),
+            lexical_threshold=getattr(settings, 'CHATBOT_SEMANTIC_CACHE_LEXICAL_THRESHOLD', 0.95),
+        )
+    return _semantic_cache
@@ -0,0 +1,96 @@
+"""
+텍스트 임베딩 유틸리티 - 시맨틱 캐시와 지식 검색에서 공용으로 사용
+"""
+import re
+import unicodedata
+import zlib
+from typing import Iterable, List
+
+import numpy as np
+
+_PUNCT_RE = re.compile(r'[^\w\s]')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """임베딩/캐시 키용 텍스트 정규화 (NFKC, 소문자, 구두점/공백 정리)"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    text = _PUNCT_RE.sub(' ', text)
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+class HashingEmbedder:
+    """
+    문자 n-gram 해싱 임베딩 (의존성 없는 경량 버전)
+
+    sentence-transformers가 없는 Railway 이미지에서도 동작합니다.
+    어휘 기반이므로 "단백질"/"탄수화물"처럼 핵심어만 다른 질문도 비슷하게
+    나올 수 있어, 캐시에서는 거의 동일한 질문만 매칭되도록 높은 임계값을 씁니다.
+    """
+
+    lexical = True
+
+    def __init__(self, dim: int = 512, ngram_range=(1, 3)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.name = f"hashing-ngram-{dim}"
+
+    def _features(self, text: str) -> Iterable[str]:
+        min_n, max_n = self.ngram_range
+        for token in normalize_text(text).split(' '):
+            if not token:
+                continue
+            padded = f" {token} "
+            for n in range(min_n, max_n + 1):
+                for i in range(len(padded) - n + 1):
+                    gram = padded[i:i + n]
+                    if gram.strip():
+                        yield gram
+
+    def embed_query(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for gram in self._features(text):
+            h = zlib.crc32(gram.encode('utf-8'))
+            # 부호 해싱으로 충돌에 의한 편향 완화
+            vector[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack([self.embed_query(text) for text in texts])
+
+
+class LangchainEmbedder:
+    """HuggingFaceEmbeddings 등 langchain 임베딩을 numpy 인터페이스로 감싸기"""
+
+    lexical = False
+
+    def __init__(self, embeddings, name: str):
+        self._embeddings = embeddings
+        self.name = name
+
+    def embed_query(self, text: str) -> np.ndarray:
+        vector = np.asarray(self._embeddings.embed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        matrix = np.asarray(self._embeddings.embed_documents(texts), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+_default_embedder = None
+
+
+def get_default_embedder() -> HashingEmbedder:
+    """기본(해싱) 임베더 인스턴스 가져오기 (싱글톤)"""
+    global _default_embedder
+    if not _default_embedder:
+        _default_embedder = HashingEmbedder()
+    return _default_embedder
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import UserProfile
+from .models import UserProfile, WorkoutLog
+from .services.activity_rollup_service import record_workout, update_workout
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -18,3 +19,38 @@ def save_user_profile(sender, instance, **kwargs):
     """
     if hasattr(instance, 'profile'):
         instance.profile.save()
+
+@receiver(pre_save, sender=WorkoutLog)
+def remember_workout_before_update(sender, instance, **kwargs):
+    """
+    기존 운동 기록을 수정할 때 저장 전 값을 보관합니다 (post_save에서 차이만큼 롤업 갱신).
+    """
+    instance._rollup_previous = None
+    if instance.pk and not kwargs.get('raw'):
+        instance._rollup_previous = WorkoutLog.objects.filter(pk=instance.pk).only(
+            'user_id', 'date', 'duration', 'calories_burned'
+        ).first()
+
+@receiver(post_save, sender=WorkoutLog)
+def add_workout_to_rollups(sender, instance, created, **kwargs):
+    """
+    운동 기록이 생성되면 일/주/월 활동 롤업에 반영하고,
+    수정되면 이전 값과의 차이(날짜/사용자가 바뀌면 이전 기간 차감)를 반영합니다.
+    """
+    if created:
+        record_workout(instance, 1)
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is not None:
+        update_workout(previous, instance)
+
+@receiver(post_delete, sender=WorkoutLog)
+def remove_workout_from_rollups(sender, instance, **kwargs):
+    """
+    운동 기록이 삭제되면 활동 롤업에서 차감합니다.
+    사용자 삭제로 함께 지워지는 경우에는 롤업도 삭제되므로 건너뜁니다.
+    """
+    origin = kwargs.get('origin')
+    if getattr(origin, 'model', type(origin)) is User:
+        return
+    record_workout(instance, -1)
@@ -0,0 +1,87 @@
+"""
+Celery 작업 (healthwise/celery.py의 autodiscover_tasks로 등록)
+"""
+import logging
+from datetime import date, timedelta
+from typing import List, Optional
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .services.activity_rollup_service import rebuild_rollups
+from .services.daily_nutrition_service import reconcile_recent
+from .services.daily_recommendation_service import active_user_ids, chunked, precompute_chunk
+from .services.food_analysis_jobs import run_job, sweep_stale_jobs
+from .services.image_storage import delete_orphan_images
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def precompute_daily_recommendations(target_date: Optional[str] = None) -> int:
+    """
+    활성 사용자의 다음 날 추천 계산 (Celery beat 야간 작업)
+
+    사용자 ID를 청크로 나누어 청크별 작업으로 분배합니다 (워커 여러 대에서 병렬 처리).
+    """
+    target_date = target_date or (timezone.localdate() + timedelta(days=1)).isoformat()
+    chunk_size = getattr(settings, 'DAILY_RECOMMENDATION_CHUNK_SIZE', 200)
+
+    chunks = 0
+    for user_ids in chunked(active_user_ids(), chunk_size):
+        precompute_daily_recommendations_chunk.delay(user_ids, target_date)
+        chunks += 1
+    logger.info(f"Scheduled {chunks} daily recommendation chunks for {target_date}")
+    return chunks
+
+
+@shared_task(autoretry_for=(Exception,), retry_backoff=60, max_retries=3)
+def precompute_daily_recommendations_chunk(user_ids: List[int], target_date: str) -> int:
+    """사용자 청크의 추천을 계산해 저장"""
+    return precompute_chunk(user_ids, date.fromisoformat(target_date))
+
+
+@shared_task
+def reconcile_daily_nutrition(days: Optional[int] = None) -> dict:
+    """
+    최근 일일 영양 합계를 음식 기록 합계와 비교해 어긋난 값 수정 (Celery beat 주기 작업)
+
+    같은 기간의 활동 롤업도 원본 기록에서 다시 계산합니다 (운동 기록 편집 등 증분 갱신 누락 보정).
+    """
+    days = days or getattr(settings, 'DAILY_NUTRITION_RECONCILE_DAYS', 7)
+    result = reconcile_recent(days)
+    if result['drifted']:
+        logger.warning(f"Reconciled DailyNutrition totals: {result}")
+    result['rollups'] = rebuild_rollups(since=timezone.localdate() - timedelta(days=days))
+    return result
+
+
+@shared_task(
+    acks_late=True, reject_on_worker_lost=True,
+    autoretry_for=(Exception,), retry_backoff=15, retry_backoff_max=120,
+    max_retries=getattr(settings, 'FOOD_ANALYSIS_JOB_MAX_ATTEMPTS', 3),
+)
+def run_food_analysis_job(job_id: str) -> Optional[str]:
+    """
+    음식 사진 분석 작업 실행 (결과는 notifications_{user.id} 그룹으로 전송)
+
+    워커가 죽으면 메시지를 다시 큐에 넣고(acks_late), 분석 실패는 시도 횟수가 남은 동안 재시도합니다.
+    """
+    return run_job(job_id)
+
+
+@shared_task
+def sweep_food_analysis_jobs() -> dict:
+    """제한 시간을 넘긴 음식 분석 작업 재등록/실패 처리 (Celery beat 5분 주기)"""
+    return sweep_stale_jobs()
+
+
+@shared_task
+def cleanup_food_images() -> int:
+    """분석만 하고 저장하지 않은 사진 삭제 (Celery beat 야간 작업, 토큰 만료 후 1시간이 지난 것만)"""
+    ttl = getattr(settings, 'ANALYSIS_TOKEN_TTL', 1800)
+    deleted = delete_orphan_images(min_age=timedelta(seconds=ttl + 3600))
+    if deleted:
+        logger.info(f"Deleted {deleted} orphan food images")
+    return deleted
@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
 from . import views_nutrition
+from . import views_async
 from . import views_auth
 from . import views_supabase_auth
 from . import views_debug
@@ -69,11 +70,15 @@ urlpatterns = [
     # AI 영양 분석 API - views_nutrition.py의 함수들
     path('ai-nutrition/', views_nutrition.ai_nutrition_analysis, name='ai_nutrition_analysis'),
     path('ai-nutrition/analyze/', views_nutrition.ai_nutrition_analysis_only, name='ai_nutrition_analysis_only'),
+    path('ai-nutrition/batch/', views_nutrition.ai_nutrition_batch_analysis, name='ai_nutrition_batch_analysis'),
+    path('ai-nutrition/jobs/<uuid:job_id>/', views_nutrition.food_analysis_job_detail, name='food_analysis_job_detail'),
     path('food-analyses/', views_nutrition.food_analysis_list, name='food_analysis_list'),
     path('food-analyses/<int:pk>/', views_nutrition.food_analysis_detail, name='food_analysis_detail'),
     path('daily-nutrition/', views_nutrition.daily_nutrition_list, name='daily_nutrition_list'),
     path('daily-nutrition/<str:date_str>/', views_nutrition.daily_nutrition_detail, name='daily_nutrition_detail'),
     path('nutrition-statistics/', views_nutrition.nutrition_statistics, name='nutrition_statistics'),
+    path('activity-trends/', views_nutrition.activity_trends, name='activity_trends'),
+    path('nutrition-gaps/', views_nutrition.nutrient_gaps, name='nutrient_gaps'),
     path('nutrition-complete/', views_nutrition.nutrition_complete, name='nutrition_complete'),
     
     # 👥 소셜 기능 API - 모듈화된 엔드포인트
@@ -107,10 +112,20 @@ urlpatterns = [
     
     # 채팅봇 엔드포인트
     path('chatbot/', views.chatbot, name='chatbot'),
+    path('chatbot/stream/', views.chatbot_stream, name='chatbot_stream'),
     path('chatbot/status/', views.chatbot_status, name='chatbot_status'),
     path('chatbot/sessions/', views.chatbot_sessions, name='chatbot_sessions'),
     path('chatbot/sessions/active/', views.chatbot_sessions_active, name='chatbot_sessions_active'),
     
+    # ⚡ 비동기 AI 엔드포인트 (ASGI 서버에서 사용)
+    path('async/chatbot/', views_async.async_chatbot, name='async_chatbot'),
+    path('async/chatbot/stream/', views_async.async_chatbot_stream, name='async_chatbot_stream'),
+    path('async/health-consultation/', views_async.async_health_consultation, name='async_health_consultation'),
+    path('async/music/ai-keywords/', views_async.async_music_keywords, name='async_music_keywords'),
+    path('async/ai-nutrition/', views_async.async_ai_nutrition_analysis, name='async_ai_nutrition_analysis'),
+    path('async/ai-nutrition/analyze/', views_async.async_ai_nutrition_analysis_only, name='async_ai_nutrition_analysis_only'),
+    path('async/ai-nutrition/batch/', views_async.async_ai_nutrition_batch_analysis, name='async_ai_nutrition_batch_analysis'),
+    
     # 운동 관련 추가 엔드포인트
     path('workout-videos/', views.workout_videos_list, name='workout_videos_list'),
     path('ai-workout/', views.ai_workout, name='ai_workout'),
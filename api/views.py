@@ -40,7 +40,7 @@ from .views_modules import (
     # Health
     health_check, health_options, api_health, 
     health_consultation, chatbot_status, chatbot_sessions,
-    chatbot_sessions_active, chatbot,
+    chatbot_sessions_active, chatbot, chatbot_stream,
     # Workout
     exercise_list, workout_routines, workout_videos,
     workout_logs, workout_logs_create, workout_videos_list,
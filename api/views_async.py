@@ -0,0 +1,385 @@
+"""
+비동기 AI 엔드포인트 (ASGI 전용)
+
+LLM 호출을 AsyncOpenAI / Gemini generate_content_async로 처리하여
+느린 응답이 워커 스레드가 아닌 코루틴만 점유하도록 합니다.
+DRF는 async 뷰를 지원하지 않으므로 Django async 뷰로 작성하고,
+인증과 요청 파싱만 DRF 설정(DEFAULT_AUTHENTICATION_CLASSES)을 그대로 사용합니다.
+"""
+import functools
+import logging
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from openai import AsyncOpenAI
+from rest_framework import exceptions
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .ai_service import get_chatbot
+from .music.views import KEYWORD_MODEL, build_keyword_prompt, get_default_keywords, parse_keywords
+from .serializers import FoodAnalysisBatchRequestSerializer, FoodAnalysisRequestSerializer, FoodAnalysisSerializer
+from .services.analysis_tokens import stash_analysis, token_ttl
+from .services.chat_history import build_user_data, save_chat_exchange
+from .services.food_analysis_batch import aanalyze_foods, batch_errors, guest_payload, meal_totals, request_items
+from .services.food_analysis_service import (
+    aanalyze_food, build_analysis_payload, detect_language, get_user_profile,
+    save_food_analyses, save_food_analysis
+)
+from .services.image_storage import read_request_image, store_image
+from .views_modules.health import _sse_event
+
+logger = logging.getLogger(__name__)
+
+_keyword_client = None
+
+
+def _get_keyword_client() -> AsyncOpenAI:
+    """음악 키워드용 AsyncOpenAI 클라이언트 (커넥션 풀 재사용을 위해 싱글톤)"""
+    global _keyword_client
+    if not _keyword_client:
+        _keyword_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, timeout=15.0, max_retries=1)
+    return _keyword_client
+
+
+def _authenticate(request):
+    """DRF 인증 클래스로 사용자 인증 및 본문 파싱 (동기 - 스레드에서 실행)"""
+    drf_request = Request(
+        request,
+        parsers=[JSONParser(), FormParser(), MultiPartParser()],
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    user = drf_request.user
+    data = drf_request.data if request.method == 'POST' else {}
+    return user, data
+
+
+async def _prepare_request(request):
+    """(user, data, error_response) 반환"""
+    try:
+        user, data = await database_sync_to_async(_authenticate)(request)
+    except exceptions.APIException as e:
+        return None, None, JsonResponse({'detail': str(e.detail)}, status=e.status_code)
+    return user, data, None
+
+
+def _options_response():
+    return JsonResponse({}, status=200)
+
+
+def async_view(methods):
+    """
+    async 뷰용 데코레이터 (허용 메서드 검사 + CSRF 예외)
+
+    Django 4.2의 csrf_exempt/require_http_methods는 동기 래퍼를 반환해
+    코루틴 뷰를 감싸면 동기 뷰로 인식되므로 직접 구현합니다.
+    세션 인증 요청의 CSRF 검사는 DRF SessionAuthentication이 수행합니다.
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            return await view_func(request, *args, **kwargs)
+
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+@async_view(['POST', 'OPTIONS'])
+async def async_chatbot(request):
+    """메인 챗봇 API (비동기)"""
+    if request.method == 'OPTIONS':
+        return _options_response()
+
+    user, data, error = await _prepare_request(request)
+    if error:
+        return error
+
+    message = data.get('message', '')
+    user_data = await database_sync_to_async(build_user_data)(user)
+    session_id = f"session-{user.id}" if user.is_authenticated else 'guest-session'
+
+    try:
+        chatbot = await sync_to_async(get_chatbot)()
+        result = await chatbot.aget_health_consultation(user_data, message)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'Chatbot error: {str(e)}',
+            'response': '죄송합니다. 오류가 발생했습니다. 잠시 후 다시 시도해주세요.'
+        }, status=500)
+
+    if result.get('success'):
+        try:
+            await database_sync_to_async(save_chat_exchange)(user, message, result.get('response', ''), {
+                'category': result.get('category'),
+                'model_used': result.get('model_used'),
+                'cached': result.get('cached', False)
+            })
+        except Exception as e:
+            logger.error(f"Failed to save async chat message: {str(e)}")
+
+    return JsonResponse({
+        'success': result.get('success', True),
+        'response': result.get('response', ''),
+        'raw_response': result.get('response', ''),
+        'sources': [],
+        'user_context': user_data,
+        'session_id': session_id,
+        'is_authenticated': user.is_authenticated
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+@async_view(['POST', 'OPTIONS'])
+async def async_chatbot_stream(request):
+    """메인 챗봇 API (비동기 SSE 스트리밍)"""
+    if request.method == 'OPTIONS':
+        return _options_response()
+
+    user, data, error = await _prepare_request(request)
+    if error:
+        return error
+
+    message = data.get('message') or data.get('question', '')
+    user_data = await database_sync_to_async(build_user_data)(user)
+    session_id = f"session-{user.id}" if user.is_authenticated else 'guest-session'
+
+    try:
+        chatbot = await sync_to_async(get_chatbot)()
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'Chatbot error: {str(e)}',
+            'response': '죄송합니다. 오류가 발생했습니다. 잠시 후 다시 시도해주세요.'
+        }, status=500)
+
+    async def event_stream():
+        yield _sse_event('start', {'session_id': session_id, 'is_authenticated': user.is_authenticated})
+
+        async for event in chatbot.astream_health_consultation(user_data, message):
+            event_type = event.pop('type')
+            if event_type == 'token':
+                yield _sse_event('token', event)
+                continue
+
+            if event_type == 'done':
+                try:
+                    await database_sync_to_async(save_chat_exchange)(user, message, event.get('response', ''), {
+                        'category': event.get('category'),
+                        'model_used': event.get('model_used'),
+                        'cached': event.get('cached', False)
+                    })
+                except Exception as e:
+                    logger.error(f"Failed to save streamed chat message: {str(e)}")
+            event['session_id'] = session_id
+            yield _sse_event(event_type, event)
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # 프록시 버퍼링 비활성화
+    return response
+
+
+@async_view(['POST', 'OPTIONS'])
+async def async_health_consultation(request):
+    """AI 건강 상담 (비동기)"""
+    if request.method == 'OPTIONS':
+        return _options_response()
+
+    user, data, error = await _prepare_request(request)
+    if error:
+        return error
+
+    try:
+        user_data = await database_sync_to_async(build_user_data)(user)
+        chatbot = await sync_to_async(get_chatbot)()
+        result = await chatbot.aget_health_consultation(user_data, data.get('question', ''))
+        return JsonResponse(result, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        return JsonResponse({
+            'error': f'Health consultation error: {str(e)}'
+        }, status=500)
+
+
+@async_view(['POST', 'OPTIONS'])
+async def async_music_keywords(request):
+    """AI 음악 키워드 생성 (비동기)"""
+    if request.method == 'OPTIONS':
+        return _options_response()
+
+    user, data, error = await _prepare_request(request)
+    if error:
+        return error
+
+    exercise = data.get('exercise')
+    mood = data.get('mood')
+    if not exercise or not mood:
+        return JsonResponse({'error': 'Both exercise and mood are required'}, status=400)
+
+    try:
+        response = await _get_keyword_client().chat.completions.create(
+            model=KEYWORD_MODEL,
+            messages=[{"role": "user", "content": build_keyword_prompt(exercise, mood)}],
+            temperature=0.7
+        )
+        keywords = parse_keywords(response.choices[0].message.content)
+    except Exception as e:
+        logger.error(f"OpenAI API error: {str(e)}")
+        # OpenAI API 실패 시 기본 키워드 제공
+        keywords = get_default_keywords(exercise, mood)
+
+    return JsonResponse({'keywords': keywords}, json_dumps_params={'ensure_ascii': False})
+
+
+async def _analyze_nutrition_request(request):
+    """영양 분석 공통 처리 - (user, data, image_data, nutrition_data, error_response) 반환"""
+    user, data, error = await _prepare_request(request)
+    if error:
+        return None, None, None, None, error
+
+    serializer = FoodAnalysisRequestSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        return None, None, None, None, JsonResponse(serializer.errors, status=400)
+
+    validated = serializer.validated_data
+    user_profile = await database_sync_to_async(get_user_profile)(user)
+    current_language = await sync_to_async(detect_language)(request)
+
+    try:
+        # multipart image 파일 또는 image_base64
+        image_data = await sync_to_async(read_request_image)(validated)
+        nutrition_data = await aanalyze_food(validated, user_profile, current_language, image_data=image_data)
+    except Exception as e:
+        logger.error(f"AI nutrition analysis error: {str(e)}")
+        return None, None, None, None, JsonResponse(
+            {"error": f"영양 분석 중 오류가 발생했습니다: {str(e)}"},
+            status=500, json_dumps_params={'ensure_ascii': False}
+        )
+    return user, validated, image_data, nutrition_data, None
+
+
+@async_view(['POST', 'OPTIONS'])
+async def async_ai_nutrition_analysis_only(request):
+    """AI 영양 분석만 수행 (비동기, 저장하지 않음)"""
+    if request.method == 'OPTIONS':
+        return _options_response()
+
+    user, data, image_data, nutrition_data, error = await _analyze_nutrition_request(request)
+    if error:
+        return error
+
+    # 저장 요청은 사진 대신 analysis_token만 보내면 됨
+    payload = build_analysis_payload(nutrition_data)
+    token = await sync_to_async(stash_analysis)(user, data, payload, image_data)
+    if token:
+        payload.update(analysis_token=token, analysis_token_expires_in=token_ttl())
+    return JsonResponse(payload, json_dumps_params={'ensure_ascii': False})
+
+
+@async_view(['POST', 'OPTIONS'])
+async def async_ai_nutrition_analysis(request):
+    """AI 영양 분석 및 저장 (비동기)"""
+    if request.method == 'OPTIONS':
+        return _options_response()
+
+    user, data, image_data, nutrition_data, error = await _analyze_nutrition_request(request)
+    if error:
+        return error
+
+    if not user.is_authenticated:
+        # 게스트는 분석 결과만 반환
+        return JsonResponse({
+            **build_analysis_payload(nutrition_data),
+            'is_guest': True,
+            'message': '회원가입 후 분석 기록을 저장할 수 있습니다.'
+        }, json_dumps_params={'ensure_ascii': False})
+
+    try:
+        def save():
+            image_keys = store_image(image_data) if image_data else None
+            food_analysis = save_food_analysis(user, data, nutrition_data, image_keys=image_keys)
+            return FoodAnalysisSerializer(food_analysis).data
+
+        payload = await database_sync_to_async(save)()
+    except Exception as e:
+        logger.error(f"AI nutrition analysis error: {str(e)}")
+        return JsonResponse(
+            {"error": f"영양 분석 중 오류가 발생했습니다: {str(e)}"},
+            status=500, json_dumps_params={'ensure_ascii': False}
+        )
+    return JsonResponse(payload, status=201, json_dumps_params={'ensure_ascii': False})
+
+
+@async_view(['POST', 'OPTIONS'])
+async def async_ai_nutrition_batch_analysis(request):
+    """여러 음식/사진 일괄 분석 및 저장 (비동기 - 항목들을 동시에 분석)"""
+    if request.method == 'OPTIONS':
+        return _options_response()
+
+    user, data, error = await _prepare_request(request)
+    if error:
+        return error
+
+    serializer = FoodAnalysisBatchRequestSerializer(data={'items': request_items(data)})
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=400)
+
+    foods = serializer.validated_data['items']
+    try:
+        images = await sync_to_async(lambda: [read_request_image(food) for food in foods])()
+    except Exception as e:
+        logger.warning(f"Unreadable food image upload: {str(e)}")
+        return JsonResponse({"error": "이미지를 읽을 수 없습니다."}, status=400,
+                            json_dumps_params={'ensure_ascii': False})
+
+    user_profile = await database_sync_to_async(get_user_profile)(user)
+    current_language = await sync_to_async(detect_language)(request)
+    results = await aanalyze_foods(foods, images, user_profile, current_language,
+                                   store_images=user.is_authenticated)
+
+    succeeded = [result for result in results if result.nutrition_data]
+    if not succeeded:
+        return JsonResponse({
+            "error": "영양 분석 중 오류가 발생했습니다.",
+            "errors": batch_errors(results)
+        }, status=500, json_dumps_params={'ensure_ascii': False})
+
+    if not user.is_authenticated:
+        # 게스트는 분석 결과만 반환
+        return JsonResponse({
+            **guest_payload(results),
+            'is_guest': True,
+            'message': '회원가입 후 분석 기록을 저장할 수 있습니다.'
+        }, json_dumps_params={'ensure_ascii': False})
+
+    try:
+        def save():
+            food_analyses, daily_nutrition = save_food_analyses(user, [
+                (result.food, result.nutrition_data, result.image_keys) for result in succeeded
+            ])
+            return FoodAnalysisSerializer(food_analyses, many=True).data, daily_nutrition
+
+        analyses, daily_nutrition = await database_sync_to_async(save)()
+    except Exception as e:
+        logger.error(f"Batch food analysis save error: {str(e)}")
+        return JsonResponse(
+            {"error": f"영양 정보 저장 중 오류가 발생했습니다: {str(e)}"},
+            status=500, json_dumps_params={'ensure_ascii': False}
+        )
+    return JsonResponse({
+        'analyses': analyses,
+        'errors': batch_errors(results),
+        'meal_totals': meal_totals(results),
+        'daily_totals': {
+            'date': daily_nutrition.date.isoformat(),
+            'total_calories': daily_nutrition.total_calories,
+            'total_protein': daily_nutrition.total_protein,
+            'total_carbohydrates': daily_nutrition.total_carbohydrates,
+            'total_fat': daily_nutrition.total_fat
+        }
+    }, status=201, json_dumps_params={'ensure_ascii': False})
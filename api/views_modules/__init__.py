@@ -11,7 +11,7 @@ from .user_profile import user_profile
 from .health import (
     health_check, health_options, api_health, 
     health_consultation, chatbot_status, chatbot_sessions,
-    chatbot_sessions_active, chatbot
+    chatbot_sessions_active, chatbot, chatbot_stream
 )
 from .workout import (
     exercise_list, workout_routines, workout_videos,
@@ -42,7 +42,7 @@ __all__ = [
     # Health
     'health_check', 'health_options', 'api_health', 
     'health_consultation', 'chatbot_status', 'chatbot_sessions',
-    'chatbot_sessions_active', 'chatbot',
+    'chatbot_sessions_active', 'chatbot', 'chatbot_stream',
     # Workout
     'exercise_list', 'workout_routines', 'workout_videos',
     'workout_logs', 'workout_logs_create', 'workout_videos_list',
@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 import random
 import uuid
 
+from ..services.daily_recommendation_service import get_daily_recommendation
+
 
 @api_view(['GET'])
 def test_api(request):
@@ -254,7 +256,11 @@ def recommendations_daily(request):
     if request.method == 'OPTIONS':
         return Response(status=status.HTTP_200_OK)
     
-    # 직접 구현
+    # 로그인 사용자는 야간 배치로 미리 계산된 추천 (인덱스 조회 한 번)
+    if request.user.is_authenticated:
+        return Response(get_daily_recommendation(request.user))
+    
+    # 게스트용 일반 추천
     recommendations = {
         'date': datetime.now().strftime('%Y-%m-%d'),
         'exercise': {
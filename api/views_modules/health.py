@@ -2,16 +2,24 @@
 Health related views
 """
 from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import AllowAny
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.response import Response
 from datetime import datetime
+import json
 import logging
 
 from ..services.data import HEALTH_OPTIONS
-from ..ai_service import get_chatbot
+from ..ai_service import HealthAIChatbot, get_chatbot
 from ..models import UserProfile
+from ..services.food_analysis_cache import get_food_analysis_cache
+from ..services.image_preprocessing import preprocess_stats
+from ..services.semantic_cache import get_semantic_cache
+from ..services.model_router import get_model_router
+from ..services.chat_history import build_user_data, save_chat_exchange
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +68,9 @@ def health_check(request):
         result['redis'] = 'error'
         result['redis_error'] = str(e)
     
+    # 챗봇 워밍업 상태 (로드 중이어도 API는 동작하며 지식 검색만 생략됨)
+    result['chatbot'] = HealthAIChatbot.readiness()
+    
     return Response(result)
 
 
@@ -164,7 +175,11 @@ def chatbot_status(request):
         'status': 'available',
         'user_context': user_context,
         'message_count': 0,
-        'has_profile': has_profile
+        'has_profile': has_profile,
+        'cache': get_semantic_cache().stats(),
+        'food_analysis_cache': get_food_analysis_cache().stats(),
+        'vision_images': preprocess_stats(),
+        'models': get_model_router().stats()
     })
 
 
@@ -293,3 +308,68 @@ def chatbot(request):
             'error': f'Chatbot error: {str(e)}',
             'response': '죄송합니다. 오류가 발생했습니다. 잠시 후 다시 시도해주세요.'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Accept: text/event-stream 요청이 406으로 거절되지 않도록 하는 렌더러"""
+    media_type = 'text/event-stream'
+    format = 'sse'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return _sse_event('error', data or {}).encode('utf-8')
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Server-Sent Events 메시지 포맷"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@api_view(['POST', 'OPTIONS'])
+@permission_classes([AllowAny])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def chatbot_stream(request):
+    """메인 챗봇 API (SSE 스트리밍)"""
+    if request.method == 'OPTIONS':
+        return Response(status=status.HTTP_200_OK)
+    
+    data = request.data
+    message = data.get('message') or data.get('question', '')
+    user = request.user
+    user_data = build_user_data(user)
+    session_id = f"session-{user.id}" if user.is_authenticated else 'guest-session'
+    
+    try:
+        chatbot = get_chatbot()
+    except Exception as e:
+        return Response({
+            'success': False,
+            'error': f'Chatbot error: {str(e)}',
+            'response': '죄송합니다. 오류가 발생했습니다. 잠시 후 다시 시도해주세요.'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def event_stream():
+        yield _sse_event('start', {'session_id': session_id, 'is_authenticated': user.is_authenticated})
+        
+        for event in chatbot.stream_health_consultation(user_data, message):
+            event_type = event.pop('type')
+            if event_type == 'token':
+                yield _sse_event('token', event)
+                continue
+            
+            # 최종 텍스트 저장 후 완료 이벤트 전송
+            if event_type == 'done':
+                try:
+                    save_chat_exchange(user, message, event.get('response', ''), {
+                        'category': event.get('category'),
+                        'model_used': event.get('model_used'),
+                        'cached': event.get('cached', False)
+                    })
+                except Exception as e:
+                    logger.error(f"Failed to save streamed chat message: {str(e)}")
+            event['session_id'] = session_id
+            yield _sse_event(event_type, event)
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # 프록시 버퍼링 비활성화
+    return response
@@ -8,6 +8,9 @@ import random
 import json
 from django.db.models import Sum
 
+from ..services.food_analysis_service import detect_language, get_user_profile
+from ..services.meal_optimizer import format_item, meal_plan_prose, recommend_meal
+
 # 모델 import 추가
 try:
     from api.models import DailyNutrition, FoodAnalysis
@@ -285,11 +288,22 @@ def guest_daily_nutrition(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def guest_nutrition_statistics(request):
-    """게스트용 영양 통계"""
+    """게스트용 영양 통계 (로그인 사용자는 일 단위 롤업 7행으로 실제 통계)"""
     stats = []
     today = timezone.now().date()
     
-    for i in range(7):
+    if request.user.is_authenticated:
+        from api.services.activity_rollup_service import rollup_series
+        for row in reversed(rollup_series(request.user, 'day', 7, end_date=today)):
+            stats.append({
+                'date': row['period_start'],
+                'calories': row['total_calories'],
+                'protein': round(row['total_protein'], 1),
+                'carbs': round(row['total_carbohydrates'], 1),
+                'fat': round(row['total_fat'], 1)
+            })
+    
+    for i in range(0 if stats else 7):
         date = today - timedelta(days=i)
         stats.append({
             'date': date.isoformat(),
@@ -414,41 +428,61 @@ def analyze_nutrition(request):
         }
     })
 
+def _meal_recommendation_response(recommendation, explain, language):
+    """식단 최적화 결과 + 기존 응답 형식(meal/suggestion/calories/reason 목록)"""
+    options = [recommendation['suggestion']] + recommendation['alternatives'] if recommendation['suggestion'] else []
+    remaining = recommendation['remaining']
+    tips = ['물을 충분히 마시세요', '식사 간격을 일정하게 유지하세요']
+    if remaining['protein'] >= 30:
+        tips.insert(0, f"오늘 단백질이 {remaining['protein']:.0f}g 남았습니다. 단백질 반찬을 곁들이세요")
+    if options and options[0]['totals']['sodium'] > 800:
+        tips.append('국물은 남겨 나트륨을 줄이세요')
+    if explain:
+        recommendation['prose'] = meal_plan_prose(recommendation, language)
+    return {
+        'recommendations': [
+            {
+                'meal': recommendation['meal_label'],
+                'suggestion': ' + '.join(format_item(item) for item in option['items']),
+                'calories': round(option['totals']['calories']),
+                'reason': (f"단백질 {option['totals']['protein']:.0f}g, 탄수화물 {option['totals']['carbohydrates']:.0f}g, "
+                           f"지방 {option['totals']['fat']:.0f}g - 오늘 남은 목표에 맞춘 조합"),
+            }
+            for option in options
+        ],
+        'daily_tips': tips,
+        'meal_plan': recommendation,
+    }
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def ai_nutrition_recommendation(request):
-    """AI 영양 추천"""
+    """영양 추천 - 오늘 남은 칼로리/탄단지에 맞춘 끼니 조합 (로컬 식단 최적화, LLM은 explain 시 설명만)"""
+    profile = get_user_profile(request.user)
+    language = detect_language(request)
+    
     if request.method == 'GET':
-        return Response({
-            'recommendations': [
-                {
-                    'meal': '아침',
-                    'suggestion': '오트밀과 과일',
-                    'calories': 350,
-                    'reason': '섬유질과 비타민이 풍부합니다'
-                },
-                {
-                    'meal': '점심', 
-                    'suggestion': '현미밥과 구운 닭가슴살',
-                    'calories': 550,
-                    'reason': '균형 잡힌 탄수화물과 단백질'
-                }
-            ],
-            'daily_tips': [
-                '물을 충분히 마시세요',
-                '식사 간격을 일정하게 유지하세요'
-            ]
-        })
+        meal = request.query_params.get('meal')
+        explain = request.query_params.get('explain') in ('1', 'true', 'True')
+        recommendation = recommend_meal(request.user, profile, meal)
+        return Response(_meal_recommendation_response(recommendation, explain, language))
     
-    # POST: 사용자 선호도 기반 추천
-    preferences = request.data.get('preferences', {})
+    # POST: 사용자 선호도 기반 추천 (선호 음식/알레르기는 프로필 값에 더해짐)
+    preferences = request.data.get('preferences', {}) or {}
+    recommendation = recommend_meal(
+        request.user, profile, preferences.get('meal'),
+        preferred_foods=preferences.get('preferred_foods') or [],
+        allergies=preferences.get('allergies') or [],
+    )
+    payload = _meal_recommendation_response(recommendation, bool(preferences.get('explain')), language)
+    # 추천 목록은 최선 조합 + 대안 순서 (선호 음식이 조합에 들어갔는지는 최적화기가 표시)
+    options = [recommendation['suggestion']] + recommendation['alternatives'] if recommendation['suggestion'] else []
     return Response({
         'personalized_recommendations': [
-            {
-                'meal': '저녁',
-                'suggestion': '연어 스테이크와 야채',
-                'calories': 450,
-                'matches_preferences': True
-            }
-        ]
+            dict(option, matches_preferences=meal_option['matches_preferences'])
+            for option, meal_option in zip(payload['recommendations'], options)
+        ],
+        'daily_tips': payload['daily_tips'],
+        'meal_plan': payload['meal_plan'],
     })
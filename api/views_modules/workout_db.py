@@ -62,7 +62,7 @@ def workout_logs_db(request):
                 'routine_id': f'routine_{log.id}',  # 가상 routine_id
                 'routine_name': log.workout_name,
                 'exercise_name': log.workout_name,
-                'user_id': log.user.id,
+                'user_id': log.user_id,
                 'date': log.date.strftime('%Y-%m-%d'),
                 'duration': log.duration,
                 'calories_burned': log.calories_burned or 0,
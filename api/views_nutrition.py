@@ -1,218 +1,103 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from django.conf import settings
 from django.db import transaction
-from django.db.models import Sum
-import google.generativeai as genai
-import json
-import base64
 import logging
 from datetime import date, datetime, timedelta
-from .models import FoodAnalysis, DailyNutrition
+from .models import FoodAnalysis, DailyNutrition, FoodAnalysisJob
+from .pagination import DailyNutritionCursorPagination, FoodAnalysisCursorPagination
+from .parsers import ImageUploadParser, use_spooled_uploads
 from .serializers import (
-    FoodAnalysisSerializer, FoodAnalysisRequestSerializer,
+    FoodAnalysisSerializer, FoodAnalysisRequestSerializer, FoodAnalysisBatchRequestSerializer,
     DailyNutritionSerializer
 )
-from .models import UserProfile
-from django.utils import translation
+from .services.activity_rollup_service import rollup_series
+from .services.analysis_tokens import pop_analysis, stash_analysis, token_ttl
+from .services.daily_nutrition_service import add_food_to_daily, remove_food_from_daily
+from .services.food_analysis_batch import (
+    analyze_foods, batch_errors, guest_payload, max_batch_items, meal_totals, request_items
+)
+from .services.food_analysis_jobs import create_job, job_payload, jobs_enabled
+from .services.image_storage import read_request_image, store_base64_image, store_image
+from .services.food_analysis_service import (
+    analyze_food, build_analysis_payload, detect_language, get_user_profile,
+    save_food_analyses, save_food_analysis
+)
+from .services.nutrient_gap_analysis import MAX_PERIOD_DAYS, build_nutrient_gap_analysis
+from .services.nutrition_statistics import build_guest_statistics, build_nutrition_statistics
 
 logger = logging.getLogger(__name__)
 
-# Google Gemini API 설정
-genai.configure(api_key=settings.GEMINI_API_KEY)
+
+ANALYSIS_PARSERS = [JSONParser, MultiPartParser, FormParser, ImageUploadParser]
+
+
+def _prepare_upload(request, max_images):
+    """업로드 요청이면 본문 크기 확인 후 스풀 업로드 핸들러 설정 (너무 크면 413 응답 반환)"""
+    if request.content_type.startswith('application/json'):
+        return None
+    max_bytes = getattr(settings, 'FOOD_IMAGE_MAX_UPLOAD_BYTES', 20 * 1024 * 1024)
+    if int(request.META.get('CONTENT_LENGTH') or 0) > max_bytes * max_images + 64 * 1024:
+        return Response(
+            {"error": f"이미지는 {max_bytes // (1024 * 1024)}MB 이하여야 합니다."},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    use_spooled_uploads(request)
+    return None
+
+
+def _parse_analysis_request(request):
+    """
+    분석 요청 파싱 - (validated_data, 사진 바이트, 오류 응답)
+
+    JSON(image_base64), multipart(image 파일), image/* 바이너리 본문(쿼리 파라미터에 food_name)을 모두 받습니다.
+    업로드 파일은 SpooledTemporaryFile로 스트리밍되고 base64 변환 없이 바이트로 넘어갑니다.
+    """
+    error = _prepare_upload(request, 1)
+    if error:
+        return None, None, error
+    
+    data = request.data
+    if request.content_type.startswith('image/'):
+        # 바이너리 본문은 사진뿐이므로 나머지 필드는 쿼리 파라미터에서
+        data = {**request.query_params.dict(), **data}
+    serializer = FoodAnalysisRequestSerializer(data=data)
+    if not serializer.is_valid():
+        return None, None, Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = serializer.validated_data
+    try:
+        image_data = read_request_image(data)
+    except Exception as e:
+        logger.warning(f"Unreadable food image upload: {str(e)}")
+        return None, None, Response({"error": "이미지를 읽을 수 없습니다."}, status=status.HTTP_400_BAD_REQUEST)
+    return data, image_data, None
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@parser_classes(ANALYSIS_PARSERS)
 def ai_nutrition_analysis_only(request):
     """AI 영양 분석만 수행 (저장하지 않음)"""
-    serializer = FoodAnalysisRequestSerializer(data=request.data)
-    if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    data = serializer.validated_data
-    
-    # 사용자 프로필 가져오기
-    user_profile = None
-    if request.user.is_authenticated:
-        try:
-            user_profile = UserProfile.objects.get(user=request.user)
-        except UserProfile.DoesNotExist:
-            user_profile = None
+    data, image_data, error = _parse_analysis_request(request)
+    if error:
+        return error
     
-    # 사용자 컨텍스트 생성
-    user_context = ""
-    if user_profile:
-        # birth_date로 나이 계산
-        if user_profile.birth_date:
-            age = date.today().year - user_profile.birth_date.year
-        else:
-            age = 30  # 기본값
-        user_context = f"""
-        사용자 정보:
-        - 나이: {age}세
-        - 성별: {user_profile.gender}
-        - 신장: {user_profile.height}cm
-        - 체중: {user_profile.weight}kg
-        - 질병: {', '.join(user_profile.diseases) if user_profile.diseases else '없음'}
-        - 알레르기: {', '.join(user_profile.allergies) if user_profile.allergies else '없음'}
-        """
-    
-    # 현재 언어 가져오기 (Accept-Language 헤더 또는 Django 설정)
-    current_language = request.headers.get('Accept-Language', 'en')[:2]
-    if current_language not in ['ko', 'en', 'es']:
-        current_language = translation.get_language()[:2]  # Django 설정 사용
-        if current_language not in ['ko', 'en', 'es']:
-            current_language = 'en'  # 기본값
-    
-    # 언어별 프롬프트 템플릿
-    prompts = {
-        'ko': f"""
-        다음 음식에 대해 영양 분석을 해주세요.
-        
-        {user_context}
-        
-        음식 정보:
-        - 이름: {data.get('food_name', '제공된 이미지 참조')}
-        - 설명: {data.get('description', '없음')}
-        
-        다음 정보를 JSON 형식으로 제공해주세요:
-        {{
-            "food_name": "음식 이름",
-            "calories": 칼로리 (숫자),
-            "protein": 단백질(g, 숫자),
-            "carbohydrates": 탄수화물(g, 숫자),
-            "fat": 지방(g, 숫자),
-            "fiber": 식이섬유(g, 숫자, 선택),
-            "sugar": 당류(g, 숫자, 선택),
-            "sodium": 나트륨(mg, 숫자, 선택),
-            "analysis_summary": "영양 성분 요약 (한국어로)",
-            "recommendations": "이 사용자를 위한 섭취 권장사항 (한국어로)"
-        }}
-        
-        주의사항:
-        1. 이미지가 제공된 경우, 음식의 종류와 양을 추정하여 분석하세요.
-        2. 사용자의 건강 상태를 고려한 맞춤형 권장사항을 제공하세요.
-        3. 정확한 수치를 제공하기 어려운 경우, 일반적인 추정치를 사용하세요.
-        4. 모든 설명은 한국어로 작성하세요.
-        """,
-        'en': f"""
-        Please analyze the nutrition of the following food.
-        
-        User Information:
-        - Age: {user_profile.birth_date.year if user_profile and user_profile.birth_date else 'Unknown'} years
-        - Gender: {user_profile.gender if user_profile else 'Unknown'}
-        - Height: {user_profile.height if user_profile else 'Unknown'}cm
-        - Weight: {user_profile.weight if user_profile else 'Unknown'}kg
-        - Diseases: {', '.join(user_profile.diseases) if user_profile and user_profile.diseases else 'None'}
-        - Allergies: {', '.join(user_profile.allergies) if user_profile and user_profile.allergies else 'None'}
-        
-        Food Information:
-        - Name: {data.get('food_name', 'Refer to provided image')}
-        - Description: {data.get('description', 'None')}
-        
-        Please provide the following information in JSON format:
-        {{
-            "food_name": "Food name",
-            "calories": Calories (number),
-            "protein": Protein(g, number),
-            "carbohydrates": Carbohydrates(g, number),
-            "fat": Fat(g, number),
-            "fiber": Dietary fiber(g, number, optional),
-            "sugar": Sugar(g, number, optional),
-            "sodium": Sodium(mg, number, optional),
-            "analysis_summary": "Nutritional summary (in English)",
-            "recommendations": "Intake recommendations for this user (in English)"
-        }}
-        
-        Note:
-        1. If an image is provided, estimate the type and amount of food for analysis.
-        2. Provide personalized recommendations considering the user's health condition.
-        3. Use general estimates if exact figures are difficult to provide.
-        4. Write all descriptions in English.
-        """,
-        'es': f"""
-        Por favor analiza la nutrición de la siguiente comida.
-        
-        Información del usuario:
-        - Edad: {user_profile.birth_date.year if user_profile and user_profile.birth_date else 'Desconocido'} años
-        - Género: {user_profile.gender if user_profile else 'Desconocido'}
-        - Altura: {user_profile.height if user_profile else 'Desconocido'}cm
-        - Peso: {user_profile.weight if user_profile else 'Desconocido'}kg
-        - Enfermedades: {', '.join(user_profile.diseases) if user_profile and user_profile.diseases else 'Ninguna'}
-        - Alergias: {', '.join(user_profile.allergies) if user_profile and user_profile.allergies else 'Ninguna'}
-        
-        Información de la comida:
-        - Nombre: {data.get('food_name', 'Consultar imagen proporcionada')}
-        - Descripción: {data.get('description', 'Ninguna')}
-        
-        Por favor proporciona la siguiente información en formato JSON:
-        {{
-            "food_name": "Nombre de la comida",
-            "calories": Calorías (número),
-            "protein": Proteína(g, número),
-            "carbohydrates": Carbohidratos(g, número),
-            "fat": Grasa(g, número),
-            "fiber": Fibra dietética(g, número, opcional),
-            "sugar": Azúcar(g, número, opcional),
-            "sodium": Sodio(mg, número, opcional),
-            "analysis_summary": "Resumen nutricional (en español)",
-            "recommendations": "Recomendaciones de consumo para este usuario (en español)"
-        }}
-        
-        Nota:
-        1. Si se proporciona una imagen, estima el tipo y cantidad de comida para el análisis.
-        2. Proporciona recomendaciones personalizadas considerando la condición de salud del usuario.
-        3. Usa estimaciones generales si es difícil proporcionar cifras exactas.
-        4. Escribe todas las descripciones en español.
-        """
-    }
-    
-    # 프롬프트 선택 (기본값: 영어)
-    prompt = prompts.get(current_language, prompts['en'])
+    user_profile = get_user_profile(request.user)
+    current_language = detect_language(request)
     
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash' if data.get('image_base64') else 'gemini-1.5-flash')
+        nutrition_data = analyze_food(data, user_profile, current_language, image_data=image_data)
+        payload = build_analysis_payload(nutrition_data)
         
-        # 이미지가 있는 경우
-        if data.get('image_base64'):
-            # base64 디코딩
-            image_data = base64.b64decode(data['image_base64'].split(',')[1] if ',' in data['image_base64'] else data['image_base64'])
-            
-            response = model.generate_content([
-                prompt,
-                {"mime_type": "image/jpeg", "data": image_data}
-            ])
-        else:
-            response = model.generate_content(prompt)
-        
-        # 응답 파싱
-        response_text = response.text
-        # JSON 블록 추출
-        if '```json' in response_text:
-            json_str = response_text.split('```json')[1].split('```')[0].strip()
-        elif '```' in response_text:
-            json_str = response_text.split('```')[1].strip()
-        else:
-            json_str = response_text.strip()
-        
-        nutrition_data = json.loads(json_str)
-        
-        # 분석 결과만 반환 (저장하지 않음)
-        return Response({
-            'food_name': nutrition_data['food_name'],
-            'calories': nutrition_data['calories'],
-            'protein': nutrition_data['protein'],
-            'carbohydrates': nutrition_data['carbohydrates'],
-            'fat': nutrition_data['fat'],
-            'fiber': nutrition_data.get('fiber', 0),
-            'sugar': nutrition_data.get('sugar', 0),
-            'sodium': nutrition_data.get('sodium', 0),
-            'analysis_summary': nutrition_data['analysis_summary'],
-            'recommendations': nutrition_data['recommendations']
-        }, status=status.HTTP_200_OK)
+        # 분석 결과만 반환 (저장하지 않음) - 저장 요청은 사진 대신 analysis_token만 보내면 됨
+        token = stash_analysis(request.user, data, payload, image_data)
+        if token:
+            payload.update(analysis_token=token, analysis_token_expires_in=token_ttl())
+        return Response(payload, status=status.HTTP_200_OK)
         
     except Exception as e:
         logger.error(f"AI nutrition analysis error: {str(e)}")
@@ -224,236 +109,39 @@ def ai_nutrition_analysis_only(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@parser_classes(ANALYSIS_PARSERS)
 def ai_nutrition_analysis(request):
     """AI 영양 분석 및 저장"""
-    serializer = FoodAnalysisRequestSerializer(data=request.data)
-    if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data, image_data, error = _parse_analysis_request(request)
+    if error:
+        return error
     
-    data = serializer.validated_data
+    current_language = detect_language(request)
     
-    # 사용자 프로필 가져오기
-    user_profile = None
-    if request.user.is_authenticated:
-        try:
-            user_profile = UserProfile.objects.get(user=request.user)
-        except UserProfile.DoesNotExist:
-            user_profile = None
-    
-    # 사용자 컨텍스트 생성
-    user_context = ""
-    if user_profile:
-        # birth_date로 나이 계산
-        if user_profile.birth_date:
-            age = date.today().year - user_profile.birth_date.year
-        else:
-            age = 30  # 기본값
-        user_context = f"""
-        사용자 정보:
-        - 나이: {age}세
-        - 성별: {user_profile.gender}
-        - 신장: {user_profile.height}cm
-        - 체중: {user_profile.weight}kg
-        - 질병: {', '.join(user_profile.diseases) if user_profile.diseases else '없음'}
-        - 알레르기: {', '.join(user_profile.allergies) if user_profile.allergies else '없음'}
-        """
-    
-    # 현재 언어 가져오기 (Accept-Language 헤더 또는 Django 설정)
-    current_language = request.headers.get('Accept-Language', 'en')[:2]
-    if current_language not in ['ko', 'en', 'es']:
-        current_language = translation.get_language()[:2]  # Django 설정 사용
-        if current_language not in ['ko', 'en', 'es']:
-            current_language = 'en'  # 기본값
-    
-    # 언어별 프롬프트 템플릿
-    prompts = {
-        'ko': f"""
-        다음 음식에 대해 영양 분석을 해주세요.
-        
-        {user_context}
-        
-        음식 정보:
-        - 이름: {data.get('food_name', '제공된 이미지 참조')}
-        - 설명: {data.get('description', '없음')}
-        
-        다음 정보를 JSON 형식으로 제공해주세요:
-        {{
-            "food_name": "음식 이름",
-            "calories": 칼로리 (숫자),
-            "protein": 단백질(g, 숫자),
-            "carbohydrates": 탄수화물(g, 숫자),
-            "fat": 지방(g, 숫자),
-            "fiber": 식이섬유(g, 숫자, 선택),
-            "sugar": 당류(g, 숫자, 선택),
-            "sodium": 나트륨(mg, 숫자, 선택),
-            "analysis_summary": "영양 성분 요약 (한국어로)",
-            "recommendations": "이 사용자를 위한 섭취 권장사항 (한국어로)"
-        }}
-        
-        주의사항:
-        1. 이미지가 제공된 경우, 음식의 종류와 양을 추정하여 분석하세요.
-        2. 사용자의 건강 상태를 고려한 맞춤형 권장사항을 제공하세요.
-        3. 정확한 수치를 제공하기 어려운 경우, 일반적인 추정치를 사용하세요.
-        4. 모든 설명은 한국어로 작성하세요.
-        """,
-        'en': f"""
-        Please analyze the nutrition of the following food.
-        
-        User Information:
-        - Age: {user_profile.birth_date.year if user_profile and user_profile.birth_date else 'Unknown'} years
-        - Gender: {user_profile.gender if user_profile else 'Unknown'}
-        - Height: {user_profile.height if user_profile else 'Unknown'}cm
-        - Weight: {user_profile.weight if user_profile else 'Unknown'}kg
-        - Diseases: {', '.join(user_profile.diseases) if user_profile and user_profile.diseases else 'None'}
-        - Allergies: {', '.join(user_profile.allergies) if user_profile and user_profile.allergies else 'None'}
-        
-        Food Information:
-        - Name: {data.get('food_name', 'Refer to provided image')}
-        - Description: {data.get('description', 'None')}
-        
-        Please provide the following information in JSON format:
-        {{
-            "food_name": "Food name",
-            "calories": Calories (number),
-            "protein": Protein(g, number),
-            "carbohydrates": Carbohydrates(g, number),
-            "fat": Fat(g, number),
-            "fiber": Dietary fiber(g, number, optional),
-            "sugar": Sugar(g, number, optional),
-            "sodium": Sodium(mg, number, optional),
-            "analysis_summary": "Nutritional summary (in English)",
-            "recommendations": "Intake recommendations for this user (in English)"
-        }}
-        
-        Note:
-        1. If an image is provided, estimate the type and amount of food for analysis.
-        2. Provide personalized recommendations considering the user's health condition.
-        3. Use general estimates if exact figures are difficult to provide.
-        4. Write all descriptions in English.
-        """,
-        'es': f"""
-        Por favor analiza la nutrición de la siguiente comida.
-        
-        Información del usuario:
-        - Edad: {user_profile.birth_date.year if user_profile and user_profile.birth_date else 'Desconocido'} años
-        - Género: {user_profile.gender if user_profile else 'Desconocido'}
-        - Altura: {user_profile.height if user_profile else 'Desconocido'}cm
-        - Peso: {user_profile.weight if user_profile else 'Desconocido'}kg
-        - Enfermedades: {', '.join(user_profile.diseases) if user_profile and user_profile.diseases else 'Ninguna'}
-        - Alergias: {', '.join(user_profile.allergies) if user_profile and user_profile.allergies else 'Ninguna'}
-        
-        Información de la comida:
-        - Nombre: {data.get('food_name', 'Consultar imagen proporcionada')}
-        - Descripción: {data.get('description', 'Ninguna')}
-        
-        Por favor proporciona la siguiente información en formato JSON:
-        {{
-            "food_name": "Nombre de la comida",
-            "calories": Calorías (número),
-            "protein": Proteína(g, número),
-            "carbohydrates": Carbohidratos(g, número),
-            "fat": Grasa(g, número),
-            "fiber": Fibra dietética(g, número, opcional),
-            "sugar": Azúcar(g, número, opcional),
-            "sodium": Sodio(mg, número, opcional),
-            "analysis_summary": "Resumen nutricional (en español)",
-            "recommendations": "Recomendaciones de consumo para este usuario (en español)"
-        }}
-        
-        Nota:
-        1. Si se proporciona una imagen, estima el tipo y cantidad de comida para el análisis.
-        2. Proporciona recomendaciones personalizadas considerando la condición de salud del usuario.
-        3. Usa estimaciones generales si es difícil proporcionar cifras exactas.
-        4. Escribe todas las descripciones en español.
-        """
-    }
+    # 작업 모드: 분석은 Celery 워커에서, 결과는 WebSocket 푸시 또는 폴링으로
+    if data.get('run_async') and request.user.is_authenticated and jobs_enabled():
+        job = create_job(request.user, data, current_language, image_data=image_data)
+        return Response({
+            **job_payload(job),
+            'status_url': request.build_absolute_uri(f'/api/ai-nutrition/jobs/{job.id}/')
+        }, status=status.HTTP_202_ACCEPTED)
     
-    # 프롬프트 선택 (기본값: 영어)
-    prompt = prompts.get(current_language, prompts['en'])
+    user_profile = get_user_profile(request.user)
     
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash' if data.get('image_base64') else 'gemini-1.5-flash')
-        
-        # 이미지가 있는 경우
-        if data.get('image_base64'):
-            # base64 디코딩
-            image_data = base64.b64decode(data['image_base64'].split(',')[1] if ',' in data['image_base64'] else data['image_base64'])
-            
-            response = model.generate_content([
-                prompt,
-                {"mime_type": "image/jpeg", "data": image_data}
-            ])
-        else:
-            response = model.generate_content(prompt)
-        
-        # 응답 파싱
-        response_text = response.text
-        # JSON 블록 추출
-        if '```json' in response_text:
-            json_str = response_text.split('```json')[1].split('```')[0].strip()
-        elif '```' in response_text:
-            json_str = response_text.split('```')[1].strip()
-        else:
-            json_str = response_text.strip()
-        
-        nutrition_data = json.loads(json_str)
+        nutrition_data = analyze_food(data, user_profile, current_language, image_data=image_data)
         
         # FoodAnalysis 객체 생성 (게스트는 저장하지 않음)
         if not request.user.is_authenticated:
             # 게스트는 분석 결과만 반환
             return Response({
-                'food_name': nutrition_data['food_name'],
-                'calories': nutrition_data['calories'],
-                'protein': nutrition_data['protein'],
-                'carbohydrates': nutrition_data['carbohydrates'],
-                'fat': nutrition_data['fat'],
-                'fiber': nutrition_data.get('fiber', 0),
-                'sugar': nutrition_data.get('sugar', 0),
-                'sodium': nutrition_data.get('sodium', 0),
-                'analysis_summary': nutrition_data['analysis_summary'],
-                'recommendations': nutrition_data['recommendations'],
+                **build_analysis_payload(nutrition_data),
                 'is_guest': True,
                 'message': '회원가입 후 분석 기록을 저장할 수 있습니다.'
             }, status=status.HTTP_200_OK)
         
-        food_analysis = FoodAnalysis.objects.create(
-            user=request.user,
-            food_name=nutrition_data['food_name'],
-            description=data.get('description', ''),
-            image_base64=data.get('image_base64', ''),
-            calories=nutrition_data['calories'],
-            protein=nutrition_data['protein'],
-            carbohydrates=nutrition_data['carbohydrates'],
-            fat=nutrition_data['fat'],
-            fiber=nutrition_data.get('fiber', 0),
-            sugar=nutrition_data.get('sugar', 0),
-            sodium=nutrition_data.get('sodium', 0),
-            analysis_summary=nutrition_data['analysis_summary'],
-            recommendations=nutrition_data['recommendations']
-        )
-        
-        # 오늘의 영양 기록에 추가
-        today = date.today()
-        daily_nutrition, created = DailyNutrition.objects.get_or_create(
-            user=request.user,
-            date=today
-        )
-        daily_nutrition.food_analyses.add(food_analysis)
-        
-        # 총 영양소 업데이트
-        daily_nutrition.total_calories = daily_nutrition.food_analyses.aggregate(
-            total=Sum('calories')
-        )['total'] or 0
-        daily_nutrition.total_protein = daily_nutrition.food_analyses.aggregate(
-            total=Sum('protein')
-        )['total'] or 0
-        daily_nutrition.total_carbohydrates = daily_nutrition.food_analyses.aggregate(
-            total=Sum('carbohydrates')
-        )['total'] or 0
-        daily_nutrition.total_fat = daily_nutrition.food_analyses.aggregate(
-            total=Sum('fat')
-        )['total'] or 0
-        daily_nutrition.save()
+        image_keys = store_image(image_data) if image_data else None
+        food_analysis = save_food_analysis(request.user, data, nutrition_data, image_keys=image_keys)
         
         serializer = FoodAnalysisSerializer(food_analysis)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -466,6 +154,91 @@ def ai_nutrition_analysis(request):
         )
 
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@parser_classes([JSONParser, MultiPartParser])
+def ai_nutrition_batch_analysis(request):
+    """
+    여러 음식/사진 일괄 분석 및 저장 (한 끼의 밥·국·반찬, 사진 여러 장)
+
+    JSON {"items": [...]} 또는 multipart(image 파일 여러 개 + 같은 순서의 food_name/description).
+    항목들은 동시에 분석하고, 로그인 사용자는 성공한 항목을 한 번에 저장합니다.
+    """
+    error = _prepare_upload(request, max_batch_items())
+    if error:
+        return error
+    
+    serializer = FoodAnalysisBatchRequestSerializer(data={'items': request_items(request.data)})
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    foods = serializer.validated_data['items']
+    try:
+        images = [read_request_image(food) for food in foods]
+    except Exception as e:
+        logger.warning(f"Unreadable food image upload: {str(e)}")
+        return Response({"error": "이미지를 읽을 수 없습니다."}, status=status.HTTP_400_BAD_REQUEST)
+    
+    user_profile = get_user_profile(request.user)
+    current_language = detect_language(request)
+    results = analyze_foods(foods, images, user_profile, current_language,
+                            store_images=request.user.is_authenticated)
+    
+    succeeded = [result for result in results if result.nutrition_data]
+    if not succeeded:
+        return Response({
+            "error": "영양 분석 중 오류가 발생했습니다.",
+            "errors": batch_errors(results)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    if not request.user.is_authenticated:
+        # 게스트는 분석 결과만 반환
+        return Response({
+            **guest_payload(results),
+            'is_guest': True,
+            'message': '회원가입 후 분석 기록을 저장할 수 있습니다.'
+        }, status=status.HTTP_200_OK)
+    
+    try:
+        food_analyses, daily_nutrition = save_food_analyses(request.user, [
+            (result.food, result.nutrition_data, result.image_keys)
+            for result in succeeded
+        ])
+    except Exception as e:
+        logger.error(f"Batch food analysis save error: {str(e)}")
+        return Response(
+            {"error": f"영양 정보 저장 중 오류가 발생했습니다: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    return Response({
+        'analyses': FoodAnalysisSerializer(food_analyses, many=True).data,
+        'errors': batch_errors(results),
+        'meal_totals': meal_totals(results),
+        'daily_totals': {
+            'date': daily_nutrition.date.isoformat(),
+            'total_calories': daily_nutrition.total_calories,
+            'total_protein': daily_nutrition.total_protein,
+            'total_carbohydrates': daily_nutrition.total_carbohydrates,
+            'total_fat': daily_nutrition.total_fat
+        }
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def food_analysis_job_detail(request, job_id):
+    """음식 분석 작업 상태 조회 (WebSocket을 쓰지 않는 클라이언트의 폴링용)"""
+    try:
+        job = FoodAnalysisJob.objects.get(id=job_id, user=request.user)
+    except FoodAnalysisJob.DoesNotExist:
+        return Response(
+            {"error": "분석 작업을 찾을 수 없습니다."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(job_payload(job))
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def food_analysis_list(request):
@@ -480,8 +253,10 @@ def food_analysis_list(request):
     if date_to:
         analyses = analyses.filter(analyzed_at__date__lte=date_to)
     
-    serializer = FoodAnalysisSerializer(analyses, many=True)
-    return Response(serializer.data)
+    paginator = FoodAnalysisCursorPagination()
+    page = paginator.paginate_queryset(analyses, request)
+    serializer = FoodAnalysisSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
 
 
 @api_view(['GET', 'DELETE'])
@@ -501,26 +276,10 @@ def food_analysis_detail(request, pk):
         return Response(serializer.data)
     
     elif request.method == 'DELETE':
-        # 일일 영양 기록에서도 제거
-        daily_nutritions = analysis.dailynutrition_set.all()
-        for dn in daily_nutritions:
-            dn.food_analyses.remove(analysis)
-            # 총 영양소 재계산
-            dn.total_calories = dn.food_analyses.aggregate(
-                total=Sum('calories')
-            )['total'] or 0
-            dn.total_protein = dn.food_analyses.aggregate(
-                total=Sum('protein')
-            )['total'] or 0
-            dn.total_carbohydrates = dn.food_analyses.aggregate(
-                total=Sum('carbohydrates')
-            )['total'] or 0
-            dn.total_fat = dn.food_analyses.aggregate(
-                total=Sum('fat')
-            )['total'] or 0
-            dn.save()
-        
-        analysis.delete()
+        # 일일 영양 기록에서도 제거 (합계는 F() 증분 차감)
+        with transaction.atomic():
+            remove_food_from_daily(analysis)
+            analysis.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -531,15 +290,18 @@ def daily_nutrition_list(request):
     date_from = request.query_params.get('date_from')
     date_to = request.query_params.get('date_to')
     
-    records = DailyNutrition.objects.filter(user=request.user)
+    # 페이지의 음식 분석은 한 번에 prefetch (기록 수만큼 쿼리하지 않음)
+    records = DailyNutrition.objects.filter(user=request.user).prefetch_related('food_analyses')
     
     if date_from:
         records = records.filter(date__gte=date_from)
     if date_to:
         records = records.filter(date__lte=date_to)
     
-    serializer = DailyNutritionSerializer(records, many=True)
-    return Response(serializer.data)
+    paginator = DailyNutritionCursorPagination()
+    page = paginator.paginate_queryset(records, request)
+    serializer = DailyNutritionSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
 
 
 @api_view(['GET'])
@@ -569,7 +331,9 @@ def daily_nutrition_detail(request, date_str):
         return Response(mock_data)
     
     try:
-        record = DailyNutrition.objects.get(user=request.user, date=target_date)
+        record = DailyNutrition.objects.prefetch_related('food_analyses').get(
+            user=request.user, date=target_date
+        )
         serializer = DailyNutritionSerializer(record)
         return Response(serializer.data)
     except DailyNutrition.DoesNotExist:
@@ -608,136 +372,69 @@ def nutrition_statistics(request):
     
     # 게스트 사용자 처리
     if not request.user.is_authenticated:
-        # 게스트용 목 데이터 생성
-        daily_data = []
-        current_date = start_date
-        while current_date <= end_date:
-            daily_data.append({
-                'date': current_date.isoformat(),
-                'total_calories': 0,
-                'total_protein': 0,
-                'total_carbohydrates': 0,
-                'total_fat': 0,
-                'food_count': 0
-            })
-            current_date += timedelta(days=1)
-        
-        return Response({
-            'daily_data': daily_data,
-            'period_stats': {
-                'average_calories': 0,
-                'average_protein': 0,
-                'average_carbohydrates': 0,
-                'average_fat': 0,
-                'total_days': (end_date - start_date).days + 1,
-                'total_analyses': 0,
-                'trend_calories': 0,
-                'trend_protein': 0,
-                'trend_carbohydrates': 0,
-                'trend_fat': 0
-            },
-            'message': '게스트 사용자는 통계를 볼 수 없습니다.'
-        })
-    
-    # 모든 날짜 범위의 기록 조회
-    records = DailyNutrition.objects.filter(
-        user=request.user,
-        date__range=[start_date, end_date]
-    ).order_by('date')
-    
-    # 통계 계산
-    total_calories = records.aggregate(Sum('total_calories'))['total_calories__sum'] or 0
-    total_protein = records.aggregate(Sum('total_protein'))['total_protein__sum'] or 0
-    total_carbs = records.aggregate(Sum('total_carbohydrates'))['total_carbohydrates__sum'] or 0
-    total_fat = records.aggregate(Sum('total_fat'))['total_fat__sum'] or 0
-    
-    # 기록이 있는 일수
-    recorded_days = records.count()
-    days = (end_date - start_date).days + 1
-    
-    # 평균 계산 (기록이 있는 날짜 기준)
-    avg_calories = total_calories / recorded_days if recorded_days > 0 else 0
-    avg_protein = total_protein / recorded_days if recorded_days > 0 else 0
-    avg_carbs = total_carbs / recorded_days if recorded_days > 0 else 0
-    avg_fat = total_fat / recorded_days if recorded_days > 0 else 0
-    
-    # 이전 기간 대비 변화율 계산
-    prev_period_days = days
-    prev_start_date = start_date - timedelta(days=prev_period_days)
-    prev_end_date = start_date - timedelta(days=1)
-    
-    prev_records = DailyNutrition.objects.filter(
-        user=request.user,
-        date__range=[prev_start_date, prev_end_date]
-    )
-    
-    prev_total_calories = prev_records.aggregate(Sum('total_calories'))['total_calories__sum'] or 0
-    prev_total_protein = prev_records.aggregate(Sum('total_protein'))['total_protein__sum'] or 0
-    prev_total_carbs = prev_records.aggregate(Sum('total_carbohydrates'))['total_carbohydrates__sum'] or 0
-    prev_total_fat = prev_records.aggregate(Sum('total_fat'))['total_fat__sum'] or 0
-    
-    prev_recorded_days = prev_records.count()
-    
-    # 변화율 계산
-    def calculate_trend(current, previous, prev_days):
-        if prev_days > 0 and previous > 0:
-            prev_avg = previous / prev_days
-            return ((current / recorded_days if recorded_days > 0 else 0) - prev_avg) / prev_avg * 100
-        return 0
-    
-    trend_calories = calculate_trend(total_calories, prev_total_calories, prev_recorded_days)
-    trend_protein = calculate_trend(total_protein, prev_total_protein, prev_recorded_days)
-    trend_carbs = calculate_trend(total_carbs, prev_total_carbs, prev_recorded_days)
-    trend_fat = calculate_trend(total_fat, prev_total_fat, prev_recorded_days)
-    
-    # 일별 데이터 및 음식 개수
-    daily_data = []
-    total_analyses = 0
-    
-    # 모든 날짜를 포함하여 데이터 생성
-    current_date = start_date
-    while current_date <= end_date:
-        record = records.filter(date=current_date).first()
-        if record:
-            food_count = record.food_analyses.count()
-            total_analyses += food_count
-            daily_data.append({
-                'date': current_date.isoformat(),
-                'total_calories': record.total_calories,
-                'total_protein': record.total_protein,
-                'total_carbohydrates': record.total_carbohydrates,
-                'total_fat': record.total_fat,
-                'food_count': food_count
-            })
-        else:
-            # 기록이 없는 날도 0으로 포함
-            daily_data.append({
-                'date': current_date.isoformat(),
-                'total_calories': 0,
-                'total_protein': 0,
-                'total_carbohydrates': 0,
-                'total_fat': 0,
-                'food_count': 0
-            })
-        current_date += timedelta(days=1)
+        return Response(build_guest_statistics(start_date, end_date))
     
+    # 조회 기간 일일 기록 + 비교 기간 롤업 (기간 길이와 무관하게 쿼리 2개)
+    return Response(build_nutrition_statistics(request.user, start_date, end_date))
+
+
+TREND_MAX_COUNT = {'day': 366, 'week': 104, 'month': 36}
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def activity_trends(request):
+    """일/주/월 영양·운동 추세 (롤업 테이블에서 기간당 한 행)"""
+    period = request.query_params.get('period', 'month')
+    if period not in TREND_MAX_COUNT:
+        return Response(
+            {"error": "period는 day, week, month 중 하나여야 합니다."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        count = int(request.query_params.get('count', 12))
+    except ValueError:
+        return Response({"error": "count는 정수여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+    count = max(1, min(count, TREND_MAX_COUNT[period]))
+
     return Response({
-        'daily_data': daily_data,
-        'period_stats': {
-            'average_calories': round(avg_calories, 1),
-            'average_protein': round(avg_protein, 1),
-            'average_carbohydrates': round(avg_carbs, 1),
-            'average_fat': round(avg_fat, 1),
-            'total_days': days,
-            'total_analyses': total_analyses,
-            'trend_calories': round(trend_calories, 1),
-            'trend_protein': round(trend_protein, 1),
-            'trend_carbohydrates': round(trend_carbs, 1),
-            'trend_fat': round(trend_fat, 1)
-        }
+        'period': period,
+        'series': rollup_series(request.user, period, count)
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def nutrient_gaps(request):
+    """기간 영양소 섭취 격차 (섭취 기준 대비 평균, 이동 평균, 나트륨/당류 초과 연속일)"""
+    end_date = date.today()
+    start_date = end_date - timedelta(days=89)
+    try:
+        if request.query_params.get('start_date'):
+            start_date = datetime.strptime(request.query_params['start_date'], '%Y-%m-%d').date()
+        if request.query_params.get('end_date'):
+            end_date = datetime.strptime(request.query_params['end_date'], '%Y-%m-%d').date()
+    except ValueError:
+        return Response(
+            {"error": "날짜 형식이 올바르지 않습니다. (YYYY-MM-DD)"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if start_date > end_date or (end_date - start_date).days >= MAX_PERIOD_DAYS:
+        return Response(
+            {"error": f"조회 기간은 시작일부터 종료일까지 최대 {MAX_PERIOD_DAYS}일입니다."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        window = int(request.query_params.get('window', 7))
+    except ValueError:
+        return Response({"error": "window는 정수여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+    window = max(1, min(window, 90))
+
+    return Response(build_nutrient_gap_analysis(
+        request.user, get_user_profile(request.user), start_date, end_date, window
+    ))
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def nutrition_complete(request):
@@ -762,6 +459,22 @@ def nutrition_complete(request):
         # request body에서 분석 데이터 추출
         data = request.data
         
+        # 분석 토큰이 있으면 분석 단계에서 보관한 결과/사진 사용 (사진을 다시 받지 않음)
+        # 사용자가 확인 화면에서 수정한 값은 요청 본문이 우선
+        stash = None
+        if data.get('analysis_token'):
+            stash = pop_analysis(data['analysis_token'], request.user)
+            if stash is None:
+                return Response({
+                    'error': '분석 결과가 만료되었습니다. 다시 분석해주세요.'
+                }, status=status.HTTP_410_GONE)
+            data = {
+                'food_name': stash['food_name'],
+                'description': stash['description'],
+                **stash['nutrition'],
+                **{field: value for field, value in data.items() if field != 'analysis_token'},
+            }
+        
         # 숫자 필드 검증 및 변환
         try:
             calories = float(data.get('calories', 0))
@@ -776,12 +489,20 @@ def nutrition_complete(request):
                 'error': f'영양 수치가 올바르지 않습니다: {str(e)}'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        # 사진은 저장소에 올리고 키만 기록 (토큰이면 분석 때 올린 키 또는 보관해 둔 축소 사진)
+        if stash and stash.get('image_keys'):
+            image_keys = stash['image_keys']
+        elif stash and stash.get('image'):
+            image_keys = store_image(stash['image'])
+        else:
+            image_keys = store_base64_image(data.get('image_base64'))
+        
         # FoodAnalysis 객체 생성
         food_analysis = FoodAnalysis.objects.create(
             user=request.user,
             food_name=data.get('food_name', ''),
             description=data.get('description', ''),
-            image_base64=data.get('image_base64', ''),
+            **image_keys,
             calories=calories,
             protein=protein,
             carbohydrates=carbohydrates,
@@ -793,30 +514,9 @@ def nutrition_complete(request):
             recommendations=data.get('recommendations', '')
         )
         
-        # 오늘의 영양 기록에 추가
+        # 오늘의 영양 기록에 추가 (합계는 F() 증분 갱신 후 다시 읽기)
         today = date.today()
-        with transaction.atomic():  # 트랜잭션으로 묶어서 처리
-            daily_nutrition, created = DailyNutrition.objects.get_or_create(
-                user=request.user,
-                date=today
-            )
-            daily_nutrition.food_analyses.add(food_analysis)
-            
-            # 총 영양소 업데이트 (Sum 사용하여 정확히 계산)
-            from django.db.models import Sum
-            
-            totals = daily_nutrition.food_analyses.aggregate(
-                total_calories=Sum('calories'),
-                total_protein=Sum('protein'),
-                total_carbohydrates=Sum('carbohydrates'),
-                total_fat=Sum('fat')
-            )
-            
-            daily_nutrition.total_calories = totals['total_calories'] or 0
-            daily_nutrition.total_protein = totals['total_protein'] or 0
-            daily_nutrition.total_carbohydrates = totals['total_carbohydrates'] or 0
-            daily_nutrition.total_fat = totals['total_fat'] or 0
-            daily_nutrition.save()
+        daily_nutrition = add_food_to_daily(request.user, food_analysis, today, refresh=True)
         
         # 업데이트된 일일 영양 정보 포함하여 반환
         serializer = FoodAnalysisSerializer(food_analysis)
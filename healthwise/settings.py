@@ -9,6 +9,7 @@ import time
 import logging
 from dotenv import load_dotenv
 import dj_database_url
+from celery.schedules import crontab
 
 # Load environment variables
 load_dotenv()
@@ -420,6 +421,142 @@ GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
 YOUTUBE_API_KEY = os.environ.get('YOUTUBE_API_KEY')
 KAKAO_API_KEY = os.environ.get('KAKAO_API_KEY')
 
+# 챗봇 시맨틱 응답 캐시
+CHATBOT_SEMANTIC_CACHE_ENABLED = os.environ.get('CHATBOT_SEMANTIC_CACHE_ENABLED', 'True') == 'True'
+CHATBOT_SEMANTIC_CACHE_THRESHOLD = float(os.environ.get('CHATBOT_SEMANTIC_CACHE_THRESHOLD', '0.9'))
+CHATBOT_SEMANTIC_CACHE_LEXICAL_THRESHOLD = float(os.environ.get('CHATBOT_SEMANTIC_CACHE_LEXICAL_THRESHOLD', '0.95'))
+CHATBOT_SEMANTIC_CACHE_TTL = int(os.environ.get('CHATBOT_SEMANTIC_CACHE_TTL', '3600'))  # 1시간
+CHATBOT_SEMANTIC_CACHE_MAX_ENTRIES = int(os.environ.get('CHATBOT_SEMANTIC_CACHE_MAX_ENTRIES', '2000'))
+
+# 챗봇 벡터스토어 워밍업 (서버 프로세스 부팅 시 백그라운드 로드)
+CHATBOT_PRELOAD_VECTORSTORE = (
+    os.environ.get('CHATBOT_PRELOAD_VECTORSTORE', 'True') == 'True'
+    and os.environ.get('SKIP_VECTORSTORE_INIT', 'false').lower() != 'true'
+)
+# 워밍업 실패 후 요청이 백그라운드 로드를 다시 시작하기까지 대기 시간 (초)
+CHATBOT_WARMUP_RETRY_SECONDS = int(os.environ.get('CHATBOT_WARMUP_RETRY_SECONDS', '300'))
+
+# NumPy 지식 검색기 (langchain/FAISS가 없는 경량 이미지용)
+# 배포 시 build_knowledge_index로 생성 - 소스 트리 밖 (--append로 추가한 문서를 유지하려면 영구 볼륨 경로 지정)
+KNOWLEDGE_INDEX_PATH = os.environ.get(
+    'KNOWLEDGE_INDEX_PATH', os.path.join(os.path.expanduser('~'), '.cache', 'healthwise', 'knowledge_index')
+)
+# 해싱 임베딩 검색 최소 유사도 (무관한 질문에 문서를 붙이지 않도록)
+KNOWLEDGE_LEXICAL_MIN_SCORE = float(os.environ.get('KNOWLEDGE_LEXICAL_MIN_SCORE', '0.15'))
+KNOWLEDGE_INDEX_DTYPE = os.environ.get('KNOWLEDGE_INDEX_DTYPE', 'float16')  # float16 | int8
+KNOWLEDGE_FETCH_K = int(os.environ.get('KNOWLEDGE_FETCH_K', '200'))  # FAISS 카테고리 필터 전 후보 수
+
+# LLM 모델 라우터 - 엔드포인트별 p95 지연 예산(초), 이를 넘는 모델은 다른 후보로 우회
+MODEL_ROUTER_LATENCY_BUDGETS = {
+    'chatbot': float(os.environ.get('MODEL_ROUTER_BUDGET_CHATBOT', '6')),
+    'chatbot_complex': float(os.environ.get('MODEL_ROUTER_BUDGET_CHATBOT_COMPLEX', '10')),
+    'recommendation': float(os.environ.get('MODEL_ROUTER_BUDGET_RECOMMENDATION', '8')),
+    'nutrition_analysis': float(os.environ.get('MODEL_ROUTER_BUDGET_NUTRITION_ANALYSIS', '12')),
+    'meal_analysis': float(os.environ.get('MODEL_ROUTER_BUDGET_MEAL_ANALYSIS', '10')),
+}
+MODEL_ROUTER_WINDOW = int(os.environ.get('MODEL_ROUTER_WINDOW', '200'))  # 모델별 최근 호출 기록 수
+MODEL_ROUTER_MAX_AGE = int(os.environ.get('MODEL_ROUTER_MAX_AGE', '600'))  # 이보다 오래된 기록은 무시 (초)
+MODEL_ROUTER_MIN_SAMPLES = int(os.environ.get('MODEL_ROUTER_MIN_SAMPLES', '5'))
+MODEL_ROUTER_MAX_ERROR_RATE = float(os.environ.get('MODEL_ROUTER_MAX_ERROR_RATE', '0.3'))
+
+# LLM 공급자 서킷 브레이커 - 최근 호출 실패율(느린 호출 포함)이 기준을 넘으면 일정 시간 호출 차단 후 폴백
+LLM_CIRCUIT_WINDOW = int(os.environ.get('LLM_CIRCUIT_WINDOW', '20'))
+LLM_CIRCUIT_MIN_CALLS = int(os.environ.get('LLM_CIRCUIT_MIN_CALLS', '5'))
+LLM_CIRCUIT_FAILURE_RATE = float(os.environ.get('LLM_CIRCUIT_FAILURE_RATE', '0.5'))
+LLM_CIRCUIT_SLOW_CALL_SECONDS = float(os.environ.get('LLM_CIRCUIT_SLOW_CALL_SECONDS', '10'))
+LLM_CIRCUIT_OPEN_SECONDS = float(os.environ.get('LLM_CIRCUIT_OPEN_SECONDS', '30'))
+
+# 헤징 - 주 모델이 p90 시간 안에 응답하지 않으면 다른 공급자로 예비 요청 (비어 있으면 비활성화)
+LLM_HEDGE_ENDPOINTS = [
+    endpoint.strip() for endpoint in os.environ.get('LLM_HEDGE_ENDPOINTS', 'chatbot,chatbot_complex').split(',')
+    if endpoint.strip()
+]
+LLM_HEDGE_DEFAULT_DELAY = float(os.environ.get('LLM_HEDGE_DEFAULT_DELAY', '3'))  # p90 측정 전 대기 시간 (초)
+LLM_HEDGE_MAX_WORKERS = int(os.environ.get('LLM_HEDGE_MAX_WORKERS', '16'))
+
+# AI 추천 캐시 - 프로필 구간(5세/5kg 등)별로 추천 변형을 N개까지 저장 후 순환 제공
+RECOMMENDATION_CACHE_ENABLED = os.environ.get('RECOMMENDATION_CACHE_ENABLED', 'True') == 'True'
+RECOMMENDATION_CACHE_VARIANTS = int(os.environ.get('RECOMMENDATION_CACHE_VARIANTS', '5'))
+RECOMMENDATION_CACHE_TTL = int(os.environ.get('RECOMMENDATION_CACHE_TTL', '86400'))  # 1일
+
+# 일일 추천 야간 사전 계산
+DAILY_RECOMMENDATION_HOUR = int(os.environ.get('DAILY_RECOMMENDATION_HOUR', '22'))  # 전날 밤에 다음 날 추천 계산
+DAILY_RECOMMENDATION_CHUNK_SIZE = int(os.environ.get('DAILY_RECOMMENDATION_CHUNK_SIZE', '200'))
+DAILY_RECOMMENDATION_ACTIVE_DAYS = int(os.environ.get('DAILY_RECOMMENDATION_ACTIVE_DAYS', '30'))
+DAILY_RECOMMENDATION_USE_AI = os.environ.get('DAILY_RECOMMENDATION_USE_AI', 'True') == 'True'
+# 일일 영양 합계 정합성 검사 (F() 증분 갱신의 드리프트 수정)
+DAILY_NUTRITION_RECONCILE_HOUR = int(os.environ.get('DAILY_NUTRITION_RECONCILE_HOUR', '4'))
+DAILY_NUTRITION_RECONCILE_DAYS = int(os.environ.get('DAILY_NUTRITION_RECONCILE_DAYS', '7'))
+
+# Celery beat 주기 작업 (DatabaseScheduler가 시작 시 DB에 동기화)
+CELERY_BEAT_SCHEDULE = {
+    'precompute-daily-recommendations': {
+        'task': 'api.tasks.precompute_daily_recommendations',
+        'schedule': crontab(hour=DAILY_RECOMMENDATION_HOUR, minute=0),
+    },
+    'reconcile-daily-nutrition': {
+        'task': 'api.tasks.reconcile_daily_nutrition',
+        'schedule': crontab(hour=DAILY_NUTRITION_RECONCILE_HOUR, minute=30),
+    },
+    'sweep-food-analysis-jobs': {
+        'task': 'api.tasks.sweep_food_analysis_jobs',
+        'schedule': crontab(minute='*/5'),
+    },
+    'cleanup-food-images': {
+        'task': 'api.tasks.cleanup_food_images',
+        'schedule': crontab(hour=5, minute=0),
+    },
+}
+
+# 음식 사진 저장소 (default_storage: USE_S3=True면 S3, 아니면 MEDIA_ROOT)
+FOOD_IMAGE_PREFIX = os.environ.get('FOOD_IMAGE_PREFIX', 'food-images')
+# 재배포 후에도 유지되고 모든 프로세스가 공유하는 저장소인지 (S3 또는 영구 볼륨을 MEDIA_ROOT에 마운트)
+# 아니면 사진을 저장소 대신 FoodAnalysis.image_base64에 인라인으로 저장
+FOOD_IMAGE_DURABLE_STORAGE = os.environ.get(
+    'FOOD_IMAGE_DURABLE_STORAGE', os.environ.get('USE_S3', 'False')
+) == 'True'
+FOOD_IMAGE_THUMBNAIL_SIZE = int(os.environ.get('FOOD_IMAGE_THUMBNAIL_SIZE', '256'))  # px (긴 변)
+FOOD_IMAGE_THUMBNAIL_QUALITY = int(os.environ.get('FOOD_IMAGE_THUMBNAIL_QUALITY', '80'))
+# multipart / 바이너리 사진 업로드 (이 크기를 넘는 부분은 메모리 대신 임시 파일에)
+FOOD_IMAGE_MAX_UPLOAD_BYTES = int(os.environ.get('FOOD_IMAGE_MAX_UPLOAD_BYTES', str(20 * 1024 * 1024)))
+FOOD_IMAGE_SPOOL_MEMORY_SIZE = int(os.environ.get('FOOD_IMAGE_SPOOL_MEMORY_SIZE', str(1024 * 1024)))
+# 일괄 분석 (ai-nutrition/batch/) - 요청당 최대 항목 수 / 동시 모델 호출 수
+FOOD_BATCH_MAX_ITEMS = int(os.environ.get('FOOD_BATCH_MAX_ITEMS', '8'))
+FOOD_BATCH_CONCURRENCY = int(os.environ.get('FOOD_BATCH_CONCURRENCY', '4'))
+
+# 음식 분석 결과 캐시 (정규화 텍스트 / 사진 지각 해시 키)
+FOOD_ANALYSIS_CACHE_ENABLED = os.environ.get('FOOD_ANALYSIS_CACHE_ENABLED', 'True') == 'True'
+FOOD_ANALYSIS_CACHE_TTL = int(os.environ.get('FOOD_ANALYSIS_CACHE_TTL', '604800'))  # 7일
+FOOD_ANALYSIS_CACHE_LOCAL_ENTRIES = int(os.environ.get('FOOD_ANALYSIS_CACHE_LOCAL_ENTRIES', '1000'))
+FOOD_ANALYSIS_CACHE_HASH_DISTANCE = int(os.environ.get('FOOD_ANALYSIS_CACHE_HASH_DISTANCE', '2'))  # dHash 해밍 거리 (64비트 중)
+
+# 음식 사진 비동기 분석 작업 (Celery 브로커와 워커가 함께 읽는 사진 저장소가 있을 때만, 없으면 요청 안에서 동기 분석)
+FOOD_ANALYSIS_JOBS_ENABLED = os.environ.get(
+    'FOOD_ANALYSIS_JOBS_ENABLED', 'True' if redis_url and FOOD_IMAGE_DURABLE_STORAGE else 'False'
+) == 'True'
+# 이 시간이 지나도 running인 작업은 워커가 죽은 것으로 보고 다시 실행 (시도 횟수를 넘으면 실패 처리)
+FOOD_ANALYSIS_JOB_TIMEOUT = int(os.environ.get('FOOD_ANALYSIS_JOB_TIMEOUT', '600'))  # 10분
+FOOD_ANALYSIS_JOB_MAX_ATTEMPTS = int(os.environ.get('FOOD_ANALYSIS_JOB_MAX_ATTEMPTS', '3'))
+
+# 비전 모델 입력 사진 전처리 (EXIF 방향 보정, 축소, JPEG 재인코딩 - 원본은 저장소에 그대로)
+VISION_PREPROCESS_ENABLED = os.environ.get('VISION_PREPROCESS_ENABLED', 'True') == 'True'
+VISION_IMAGE_MAX_SIDE = int(os.environ.get('VISION_IMAGE_MAX_SIDE', '1024'))  # 긴 변 px
+VISION_IMAGE_QUALITY = int(os.environ.get('VISION_IMAGE_QUALITY', '85'))
+VISION_PREPROCESS_POOL = os.environ.get('VISION_PREPROCESS_POOL', 'thread')  # thread | process
+VISION_PREPROCESS_WORKERS = int(os.environ.get('VISION_PREPROCESS_WORKERS', '4'))
+
+# 분석만 요청의 결과/사진 보관 시간 (nutrition_complete는 사진 대신 analysis_token으로 저장)
+ANALYSIS_TOKEN_TTL = int(os.environ.get('ANALYSIS_TOKEN_TTL', '1800'))  # 30분
+# 영구 저장소가 없을 때 토큰에 보관할 축소 사진 최대 크기 (넘으면 토큰 없이 사진을 다시 받음)
+ANALYSIS_TOKEN_MAX_IMAGE_BYTES = int(os.environ.get('ANALYSIS_TOKEN_MAX_IMAGE_BYTES', str(2 * 1024 * 1024)))
+
+# 로컬 식품 영양성분표 (텍스트 입력은 Gemini 호출 전에 성분표로 계산)
+LOCAL_FOOD_ANALYSIS_ENABLED = os.environ.get('LOCAL_FOOD_ANALYSIS_ENABLED', 'True') == 'True'
+FOOD_COMPOSITION_PATH = os.environ.get('FOOD_COMPOSITION_PATH', '')  # import_food_composition 결과(.npz), 비우면 번들 CSV
+FOOD_COMPOSITION_MIN_SCORE = float(os.environ.get('FOOD_COMPOSITION_MIN_SCORE', '0.75'))  # 이름 유사도 하한
+# 영양 추천을 성분표 기반 식단 최적화로 계산 (False면 기존 LLM 식단)
+LOCAL_MEAL_PLAN_ENABLED = os.environ.get('LOCAL_MEAL_PLAN_ENABLED', 'True') == 'True'
+
 # 세션 설정 강화
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 86400 * 30  # 30일
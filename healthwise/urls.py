@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse
@@ -27,4 +29,7 @@ urlpatterns = [
     path('health/', health, name='health'),
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
-]
\ No newline at end of file
+]
+
+# 개발 환경 업로드 파일(음식 사진 등) 제공 - DEBUG가 아니거나 S3 사용 시에는 빈 목록
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
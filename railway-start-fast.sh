@@ -39,5 +39,14 @@ python manage.py migrate --noinput --fake-initial 2>/dev/null || python manage.p
 echo "Collecting static files..."
 python manage.py collectstatic --noinput --clear
 
+# 지식 검색 인덱스 (KNOWLEDGE_INDEX_PATH, 소스 트리 밖) - 요청 처리 중에는 만들지 않음
+echo "Building knowledge index..."
+python manage.py build_knowledge_index --if-missing || true
+
 echo "🚀 Starting server with fast mode..."
-exec gunicorn healthwise.asgi:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT --workers 1 --timeout 120
+if [ "${SERVER_MODE:-asgi}" = "wsgi" ]; then
+    # WSGI (옵트인): WebSocket(Channels), 작업 결과 푸시, /api/async/... 사용 불가
+    exec gunicorn healthwise.wsgi:application --bind 0.0.0.0:$PORT --workers ${GUNICORN_WORKERS:-2} --threads ${GUNICORN_THREADS:-4} --timeout 120
+fi
+# 기본 ASGI: 동기 뷰는 프로세스당 스레드 하나에서 실행되므로 워커를 여러 개 실행
+exec gunicorn healthwise.asgi:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT --workers ${ASGI_WORKERS:-4} --timeout 120
@@ -64,6 +64,16 @@ if [ "$DJANGO_CREATE_SUPERUSER" = "true" ]; then
     python manage.py createsuperuser --noinput || true
 fi
 
+# 지식 검색 인덱스 (KNOWLEDGE_INDEX_PATH, 소스 트리 밖) - 요청 처리 중에는 만들지 않음
+echo "Building knowledge index..."
+python manage.py build_knowledge_index --if-missing || true
+
+# 챗봇 벡터스토어 준비 (인덱스 파일을 미리 만들어 워커는 메모리 매핑만 수행)
+if [ "$SKIP_VECTORSTORE_INIT" != "true" ]; then
+    echo "Warming up chatbot vectorstore..."
+    python manage.py warm_chatbot || true
+fi
+
 # 헬스체크 엔드포인트 테스트
 echo "Testing health endpoint..."
 python manage.py check
@@ -72,9 +82,26 @@ python manage.py check
 if [ "$DJANGO_DEBUG" = "True" ]; then
     echo "Starting Django development server..."
     exec python manage.py runserver 0.0.0.0:$PORT
+elif [ "$SERVER_MODE" = "asgi" ]; then
+    echo "Starting Gunicorn with Uvicorn ASGI workers..."
+    # ASGI 모드 (옵트인): WebSocket과 비동기 AI 엔드포인트(/api/async/...)는 코루틴으로 동시 처리
+    # 기존 동기 DRF 뷰는 프로세스마다 스레드 하나(sync_to_async thread_sensitive)에서 직렬 실행되므로
+    # 느린 LLM 호출 하나가 같은 프로세스의 다른 동기 요청을 막음 -> 워커 프로세스를 여러 개 실행
+    exec gunicorn healthwise.asgi:application \
+        --bind 0.0.0.0:$PORT \
+        --workers ${ASGI_WORKERS:-${GUNICORN_WORKERS:-4}} \
+        --worker-class uvicorn.workers.UvicornWorker \
+        --worker-tmp-dir /dev/shm \
+        --timeout ${GUNICORN_TIMEOUT:-120} \
+        --keep-alive ${GUNICORN_KEEPALIVE:-5} \
+        --max-requests ${GUNICORN_MAX_REQUESTS:-1000} \
+        --max-requests-jitter ${GUNICORN_MAX_REQUESTS_JITTER:-100} \
+        --access-logfile - \
+        --error-logfile - \
+        --log-level ${GUNICORN_LOG_LEVEL:-info}
 else
     echo "Starting Gunicorn production server..."
-    # Gunicorn 최적화 설정
+    # 기본 WSGI 모드: 동기 뷰는 워커 x 스레드만큼 동시 처리 (WebSocket 미지원, SERVER_MODE=asgi로 전환)
     exec gunicorn healthwise.wsgi:application \
         --bind 0.0.0.0:$PORT \
         --workers ${GUNICORN_WORKERS:-2} \